@@ -0,0 +1,606 @@
+#!/usr/bin/env python
+# ============================================================================
+# Project Name : iTrade
+# Module Name  : itrade_bench.py
+#
+# Description: Benchmarks of the main code paths on synthetic data
+#
+# The Original Code is iTrade code (http://itrade.sourceforge.net).
+#
+# The Initial Developer of the Original Code is Gilles Dumortier.
+#
+# Portions created by the Initial Developer are Copyright (C) 2004-2008 the
+# Initial Developer. All Rights Reserved.
+#
+# Contributor(s):
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; see http://www.gnu.org/licenses/gpl.html
+#
+# History       Rev   Description
+# 2026-10-19    agent Wrote it from scratch
+# ============================================================================
+
+# ============================================================================
+# Imports
+# ============================================================================
+
+# python system
+import os
+import sys
+import time
+import json
+import random
+import shutil
+import getopt
+import logging
+import platform
+import tempfile
+import datetime
+from timeit import default_timer as clock
+
+# iTrade root : itrade_config locates the installation from sys.argv[0]
+dirRoot = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0,dirRoot)
+sys.argv[0] = os.path.join(dirRoot,'itrade.py')
+
+# iTrade system (the other modules are imported once the calendar is sized)
+import itrade_config
+from itrade_logging import *
+
+# ============================================================================
+# Workspace
+#
+#   a synthetic installation in a temporary folder (no network, nothing
+#   read from the user data) :
+#       symbols/quotes.EURONEXT.txt     nsymbols quotes (QS0000000000...)
+#       symbols/indices.txt             the portfolio indice
+#       cache/<key>.txt                 random-walk OHLCV of the nquotes first
+#                                       quotes on each day of the calendar
+#       usrdata/bench.operations.txt    credit, then buy/sell of these quotes
+#
+#   The random generator is seeded per quote : the same options give the same
+#   files (the calendar ends with the current year).
+# ============================================================================
+
+BENCH_MARKET = 'EURONEXT'
+BENCH_PLACE = 'PAR'
+BENCH_INDICE = 'FR0003500008'
+
+def benchISIN(i):
+    return 'QS%010d' % i
+
+def benchTicker(i):
+    return 'B%05d' % i
+
+def benchName(i):
+    return 'BENCH %05d' % i
+
+def benchKey(i):
+    return '%s.%s.%s' % (benchISIN(i),BENCH_MARKET,BENCH_PLACE)
+
+class Workspace(object):
+    def __init__(self,folder,nsymbols,nquotes,seed):
+        self.m_folder = folder
+        self.m_nsymbols = nsymbols
+        self.m_nquotes = min(nquotes,nsymbols)
+        self.m_seed = seed
+        self.m_nbars = 0
+        self.m_nops = 0
+
+    def path(self,*args):
+        return os.path.join(self.m_folder,*args)
+
+    def install(self):
+        # redirect the data folders of the installation
+        for each in ('symbols','usrdata','cache'):
+            if not os.path.exists(self.path(each)):
+                os.makedirs(self.path(each))
+        itrade_config.dirSymbData = self.path('symbols')
+        itrade_config.dirUserData = self.path('usrdata')
+        itrade_config.dirCacheData = self.path('cache')
+
+    def generate(self):
+        self.install()
+        self.generateSymbols()
+        self.generateCaches()
+        self.generateOperations()
+
+    def generateSymbols(self):
+        f = open(self.path('symbols','indices.txt'),'w')
+        f.write('%s;CAC 40;^FCHI;%s;EUR;%s;FR\n' % (BENCH_INDICE,BENCH_MARKET,BENCH_PLACE))
+        f.close()
+        f = open(self.path('symbols','quotes.%s.txt' % BENCH_MARKET),'w')
+        for i in range(self.m_nsymbols):
+            f.write('%s;%s;%s;%s;EUR;%s;FR\n' % (benchISIN(i),benchName(i),benchTicker(i),BENCH_MARKET,BENCH_PLACE))
+        f.close()
+
+    def generateCaches(self):
+        from itrade_datation import gCal
+        today = datetime.date.today()
+        days = [gCal.date(i) for i in range(gCal.lastindex()+1) if gCal.date(i)<today]
+        self.m_nbars = len(days)
+        for i in range(self.m_nquotes):
+            rnd = random.Random(self.m_seed*100003+i)
+            key = benchKey(i)
+            close = rnd.uniform(5.0,200.0)
+            f = open(self.path('cache','%s.txt' % key),'w')
+            for d in days:
+                open_ = close * (1.0 + rnd.gauss(0.0,0.005))
+                close = max(0.01,close * (1.0 + rnd.gauss(0.0002,0.02)))
+                high = max(open_,close) * (1.0 + abs(rnd.gauss(0.0,0.008)))
+                low = min(open_,close) * (1.0 - abs(rnd.gauss(0.0,0.008)))
+                f.write('%s;%s;%f;%f;%f;%f;%d\n' % (key,d.isoformat(),open_,high,low,close,rnd.randint(1000,500000)))
+            f.close()
+
+    def generateOperations(self):
+        from itrade_datation import gCal
+        rnd = random.Random(self.m_seed)
+        first = gCal.date(0)
+        ops = ['%s 00:00:00;C;Virement;1000000.000000;0.000000;0;-1.000000' % first.isoformat()]
+        for i in range(self.m_nquotes):
+            key = benchKey(i)
+            d = first + datetime.timedelta(rnd.randint(1,300))
+            for t in range(4):
+                n = rnd.randint(10,200)
+                ops.append('%s 00:00:00;B;%s;%f;%f;%d;-1.000000' % (d.isoformat(),key,n*rnd.uniform(5.0,200.0),rnd.uniform(5.0,15.0),n))
+                d = d + datetime.timedelta(rnd.randint(5,60))
+                ops.append('%s 00:00:00;S;%s;%f;%f;%d;-1.000000' % (d.isoformat(),key,n*rnd.uniform(5.0,200.0),rnd.uniform(5.0,15.0),n))
+                d = d + datetime.timedelta(rnd.randint(5,60))
+        ops.append('%s 00:00:00;F;Frais;120.000000;0.000000;0;-1.000000' % first.isoformat())
+        self.m_nops = len(ops)
+        f = open(self.path('usrdata','bench.operations.txt'),'w')
+        f.write('\n'.join(ops) + '\n')
+        f.close()
+
+# ============================================================================
+# StubLiveConnector
+#
+#   live connector answering from memory (same protocol as the connectors of
+#   ext/) : one random-walk tick per getdata() on the last open day
+# ============================================================================
+
+class StubLiveConnector(object):
+    def __init__(self,seed):
+        import thread
+        self.m_livelock = thread.allocate_lock()
+        self.m_random = random.Random(seed)
+        self.m_last = {}
+        d = datetime.date.today()
+        while d.weekday()>=5:
+            d = d - datetime.timedelta(1)
+        self.m_date = d.strftime('%Y%m%d')
+        self.m_connected = False
+
+    def acquire(self):
+        self.m_livelock.acquire()
+
+    def release(self):
+        self.m_livelock.release()
+
+    def name(self):
+        return 'bench'
+
+    def delay(self):
+        return 0
+
+    def timezone(self):
+        return 'CET'
+
+    def connect(self):
+        return True
+
+    def disconnect(self):
+        pass
+
+    def alive(self):
+        return self.m_connected
+
+    def getstate(self):
+        return True
+
+    def iscacheddataenoughfreshq(self):
+        return False
+
+    def getcacheddata(self,quote):
+        return None
+
+    def getdata(self,quote):
+        self.m_connected = True
+        key = quote.key()
+        o,h,l,c,v = self.m_last.get(key) or (10.0,10.0,10.0,10.0,0)
+        c = max(0.01,c * (1.0 + self.m_random.gauss(0.0,0.001)))
+        h = max(h,c)
+        l = min(l,c)
+        v = v + self.m_random.randint(1,1000)
+        self.m_last[key] = (o,h,l,c,v)
+        # ISIN;DATE;OPEN;HIGH;LOW;CLOSE;VOLUME;PERCENT
+        return '%s;%s;%f;%f;%f;%f;%d;%f' % (key,self.m_date,o,h,l,c,v,(c/o-1.0)*100.0)
+
+# ============================================================================
+# Bench
+#
+#   each benchmark runs `repeat` times ; a run processes n operations (bars,
+#   lookups, ticks, ...). The setup (not timed) returns the state of a run.
+# ============================================================================
+
+def median(lst):
+    lst = sorted(lst)
+    m = len(lst)/2
+    if len(lst)%2:
+        return lst[m]
+    return (lst[m-1]+lst[m])/2.0
+
+class Bench(object):
+    def __init__(self,workspace,repeat=5,only=None):
+        self.m_workspace = workspace
+        self.m_repeat = repeat
+        self.m_only = only
+        self.m_results = {}
+        self.m_skipped = {}
+
+    def selected(self,name):
+        if not self.m_only:
+            return True
+        for each in self.m_only:
+            if name.startswith(each):
+                return True
+        return False
+
+    def measure(self,name,n,fn,setup=None):
+        if not self.selected(name):
+            return
+        runs = []
+        for r in range(self.m_repeat):
+            if setup:
+                state = setup()
+            else:
+                state = None
+            t = clock()
+            fn(state)
+            runs.append(clock()-t)
+        m = median(runs)
+        self.m_results[name] = {
+            'n': n,
+            'runs': runs,
+            'min': min(runs),
+            'median': m,
+            'mean': sum(runs)/len(runs),
+            'us_per_op': m*1e6/max(n,1),
+            'ops_per_s': (m>0.0) and n/m or 0.0,
+            }
+        print '%-36s %8d %12.3f ms %12.2f us/op' % (name,n,m*1000.0,m*1e6/max(n,1))
+
+    def skip(self,name,reason):
+        if self.selected(name):
+            self.m_skipped[name] = reason
+            print '%-36s skipped (%s)' % (name,reason)
+
+    # ---[ benchmarks ] -----------------------------------
+
+    def run(self):
+        import itrade_quotes
+        import itrade_trades
+        from itrade_market import unload_markets
+
+        ws = self.m_workspace
+        nquotes = ws.m_nquotes
+
+        # --- symbols database
+        def loadList(q):
+            unload_markets()
+            q.loadListOfQuotes()
+            q.loadMarket(BENCH_MARKET)
+        self.measure('Quotes.loadListOfQuotes',ws.m_nsymbols,loadList,lambda: itrade_quotes.Quotes())
+
+        unload_markets()
+        quotes = itrade_quotes.quotes
+        quotes.loadListOfQuotes()
+        quotes.loadMarket(BENCH_MARKET)
+        lst = [quotes.lookupKey(benchKey(i)) for i in range(nquotes)]
+
+        # --- lookups (spread over the symbols database)
+        rnd = random.Random(ws.m_seed)
+        sample = [rnd.randrange(ws.m_nsymbols) for i in range(200)]
+        def lookupKey(s):
+            for i in sample: quotes.lookupKey(benchKey(i))
+        def lookupTicker(s):
+            for i in sample: quotes.lookupTicker(benchTicker(i),BENCH_MARKET)
+        def lookupISIN(s):
+            for i in sample: quotes.lookupISIN(benchISIN(i))
+        def lookupName(s):
+            for i in sample: quotes.lookupName(benchName(i),BENCH_MARKET)
+        def lookupPartialTicker(s):
+            for i in sample: quotes.lookupPartialTicker(benchTicker(i)[:4],BENCH_MARKET)
+        self.measure('Quotes.lookupKey',len(sample),lookupKey)
+        self.measure('Quotes.lookupTicker',len(sample),lookupTicker)
+        self.measure('Quotes.lookupISIN',len(sample),lookupISIN)
+        self.measure('Quotes.lookupName',len(sample),lookupName)
+        self.measure('Quotes.lookupPartialTicker',len(sample),lookupPartialTicker)
+
+        # --- trades
+        def freshTrades():
+            return [itrade_trades.Trades(q) for q in lst]
+        def loadedTrades():
+            trs = freshTrades()
+            for tr in trs: tr.load()
+            return trs
+        def load(trs):
+            for tr in trs: tr.load()
+        self.measure('Trades.load',nquotes*ws.m_nbars,load,freshTrades)
+
+        trs = loadedTrades()
+        first = min([tr.firsttrade().index() for tr in trs])
+        last = max([tr.lasttrade().index() for tr in trs])
+        nidx = last-first+1
+        for each in ('ma20','ma50','ma100','ma150','rsi14','stoK','stoD','vma15','bollinger'):
+            def compute(s,m='compute_%s' % each):
+                for tr in trs:
+                    fn = getattr(tr,m)
+                    for i in xrange(first,last+1): fn(i)
+            self.measure('Trades.compute_%s' % each,nquotes*nidx,compute)
+        def computeOvb(s):
+            for tr in trs: tr.compute_ovb()
+        self.measure('Trades.compute_ovb',nquotes,computeOvb)
+
+        def save(s):
+            for tr in trs: tr.save(os.path.join(ws.path('cache'),'%s.save' % tr.quote().key()))
+        self.measure('Trades.save',nquotes*ws.m_nbars,save)
+
+        # --- quotes
+        def quoteCompute(s):
+            for q in lst: q.compute()
+        def attach():
+            for q in lst: q.loadTrades()
+        attach()
+        self.measure('Quote.compute',nquotes,quoteCompute)
+
+        # --- chart (zoom on the whole history, all the indicators)
+        def prepare(trs):
+            for tr in trs: tr.prepareChart(first,last+1)
+        self.measure('Trades.prepareChart',nquotes*nidx,prepare,loadedTrades)
+        self.benchChartDraw(trs,first,last)
+
+        # --- portfolio
+        import itrade_portfolio
+        p = itrade_portfolio.Portfolio('bench','bench','bench',BENCH_MARKET,'EUR',1.196,3,5,BENCH_INDICE)
+        def loadOperations(p):
+            p.loadOperations()
+        self.measure('Portfolio.loadOperations',ws.m_nops,loadOperations,lambda: itrade_portfolio.Portfolio('bench','bench','bench',BENCH_MARKET,'EUR',1.196,3,5,BENCH_INDICE))
+        p.loadOperations()
+        p.applyOperations()
+        def computeOperations(s):
+            for y in range(3):
+                p.computeOperations(datetime.date.today().year-y)
+        self.measure('Portfolio.computeOperations',3*ws.m_nops,computeOperations)
+
+        # --- live update dispatch through a registered connector
+        from itrade_ext import registerLiveConnector
+        from itrade_defs import QLIST_ANY,QTAG_DIFFERED
+        from itrade_import import liveupdate_from_internet
+        registerLiveConnector(BENCH_MARKET,BENCH_PLACE,QLIST_ANY,QTAG_DIFFERED,StubLiveConnector(ws.m_seed),True)
+        ticks = 20
+        def live(s):
+            for t in range(ticks):
+                for q in lst: liveupdate_from_internet(q)
+        self.measure('liveupdate_from_internet',ticks*nquotes,live)
+
+    def benchChartDraw(self,trs,first,last):
+        name = 'chart.draw (Agg)'
+        try:
+            import matplotlib
+            matplotlib.use('Agg')
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from myfinance import candlestick2,volume_overlay
+        except ImportError,e:
+            self.skip(name,e)
+            return
+
+        tr = trs[0]
+        b,e = first,last+1
+
+        def draw(s):
+            fig = Figure(figsize=(8,6))
+            canvas = FigureCanvasAgg(fig)
+            chart1 = fig.add_subplot(3,1,1)
+            chart2 = fig.add_subplot(3,1,2)
+            chart3 = fig.add_subplot(3,1,3)
+            candlestick2(chart1,tr.m_inOpen[b:e],tr.m_inClose[b:e],tr.m_inHigh[b:e],tr.m_inLow[b:e],colorup='g',colordown='r',alpha=1.0)
+            chart1.plot(tr.m_ma20[b:e],'m',scalex=False)
+            chart1.plot(tr.m_ma50[b:e],'r',scalex=False)
+            chart1.plot(tr.m_ma100[b:e],'b',scalex=False)
+            chart1.plot(tr.m_ma150[b:e],'c',scalex=False)
+            volume_overlay(chart2,tr.m_inClose[b-1:e],tr.m_inVol[b-1:e],colorup='g',colordown='r',alpha=1.0)
+            chart2.plot(tr.m_vma15[b:e],'r',antialiased=False,linewidth=0.05,scalex=False)
+            chart3.plot(tr.m_rsi14[b:e],'k',antialiased=False,linewidth=0.05)
+            chart3.plot(tr.m_stoK[b:e],'b',antialiased=False,linewidth=0.05,scalex=False)
+            canvas.draw()
+        self.measure(name,e-b,draw)
+
+    # ---[ results ] --------------------------------------
+
+    def results(self):
+        ws = self.m_workspace
+        return {
+            'meta': {
+                'date': datetime.datetime.now().isoformat(),
+                'version': itrade_config.softwareVersion,
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'symbols': ws.m_nsymbols,
+                'quotes': ws.m_nquotes,
+                'years': itrade_config.numTradeYears,
+                'bars': ws.m_nbars,
+                'operations': ws.m_nops,
+                'seed': ws.m_seed,
+                'repeat': self.m_repeat,
+                },
+            'results': self.m_results,
+            'skipped': dict([(k,str(v)) for k,v in self.m_skipped.items()]),
+            }
+
+# ============================================================================
+# compare()
+#
+#   median of each benchmark of cur against base ; returns the names of the
+#   benchmarks slower than base by more than threshold (ratio)
+# ============================================================================
+
+def compare(base,cur,threshold=0.10):
+    slower = []
+    print '%-36s %12s %12s %8s' % ('benchmark','base ms','current ms','ratio')
+    br = base['results']
+    cr = cur['results']
+    for name in sorted(set(br.keys()) | set(cr.keys())):
+        if not br.has_key(name) or not cr.has_key(name):
+            print '%-36s %s' % (name,br.has_key(name) and 'missing in current' or 'new')
+            continue
+        # normalize by the number of operations (sizes may differ)
+        b = br[name]['us_per_op']
+        c = cr[name]['us_per_op']
+        ratio = (b>0.0) and c/b or 0.0
+        if ratio>1.0+threshold:
+            flag = ' slower'
+            slower.append(name)
+        elif ratio and ratio<1.0-threshold:
+            flag = ' faster'
+        else:
+            flag = ''
+        print '%-36s %12.3f %12.3f %8.2f%s' % (name,br[name]['median']*1000.0,cr[name]['median']*1000.0,ratio,flag)
+    return slower
+
+def loadResults(fn):
+    f = open(fn,'r')
+    try:
+        return json.load(f)
+    finally:
+        f.close()
+
+# ============================================================================
+# Usage
+# ============================================================================
+
+def usage():
+    print "itrade_bench.py - benchmarks of iTrade on synthetic data"
+    print
+    print "--quotes=<n>     quotes with a trades history (default 50)      "
+    print "--symbols=<n>    size of the symbols database (default 5000)    "
+    print "--years=<n>      years of history (default 2)                   "
+    print "--seed=<n>       random seed of the synthetic data (default 1)  "
+    print "--repeat=<n>     runs of each benchmark (default 5)             "
+    print "--only=<a,b>     run the benchmarks starting with these names   "
+    print "--output=<f>     JSON results (default reports/bench-<date>.json)"
+    print "--workdir=<d>    keep the synthetic data in this folder         "
+    print
+    print "--compare=<f>    compare the results against this JSON file     "
+    print "--input=<f>      compare this JSON file instead of running      "
+    print "--threshold=<p>  slower above this ratio (default 0.10)         "
+
+# ============================================================================
+# Main
+# ============================================================================
+
+def main():
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "h", ["help","quotes=","symbols=","years=","seed=","repeat=","only=","output=","workdir=","compare=","input=","threshold="])
+    except getopt.GetoptError:
+        usage()
+        sys.exit(2)
+
+    nquotes = 50
+    nsymbols = 5000
+    years = 2
+    seed = 1
+    repeat = 5
+    only = None
+    output = None
+    workdir = None
+    base = None
+    input = None
+    threshold = 0.10
+
+    for o, a in opts:
+        if o == "-h" or o == "--help":
+            usage()
+            sys.exit()
+        if o == "--quotes":
+            nquotes = int(a)
+        if o == "--symbols":
+            nsymbols = int(a)
+        if o == "--years":
+            years = int(a)
+        if o == "--seed":
+            seed = int(a)
+        if o == "--repeat":
+            repeat = int(a)
+        if o == "--only":
+            only = a.split(',')
+        if o == "--output":
+            output = a
+        if o == "--workdir":
+            workdir = a
+        if o == "--compare":
+            base = a
+        if o == "--input":
+            input = a
+        if o == "--threshold":
+            threshold = float(a)
+
+    if input:
+        cur = loadResults(input)
+    else:
+        # the calendar is built when itrade_datation is imported
+        itrade_config.verbose = False
+        itrade_config.numTradeYears = years
+        itrade_config.setDisconnected(False)
+
+        if workdir:
+            folder = workdir
+        else:
+            folder = tempfile.mkdtemp(prefix='itrade-bench-')
+        try:
+            ws = Workspace(folder,nsymbols,nquotes,seed)
+            ws.generate()
+            print 'bench: %d symbols, %d quotes x %d bars, %d operations' % (ws.m_nsymbols,ws.m_nquotes,ws.m_nbars,ws.m_nops)
+            bench = Bench(ws,repeat,only)
+            bench.run()
+            cur = bench.results()
+        finally:
+            if not workdir:
+                shutil.rmtree(folder,True)
+
+        if output==None:
+            output = os.path.join(itrade_config.dirReports,'bench-%s.json' % time.strftime('%Y%m%d-%H%M%S'))
+        f = open(output,'w')
+        json.dump(cur,f,indent=1,sort_keys=True)
+        f.close()
+        print 'bench: results in %s' % output
+
+    if base:
+        slower = compare(loadResults(base),cur,threshold)
+        if slower:
+            sys.exit(1)
+
+# ============================================================================
+# Launch me
+# ============================================================================
+
+if __name__ == "__main__":
+    setLevel(logging.WARNING)
+
+    main()
+
+# ============================================================================
+# That's all folks !
+# ============================================================================
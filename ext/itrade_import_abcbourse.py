@@ -48,6 +48,7 @@ from itrade_quotes import *
 from itrade_datation import Datation
 from itrade_defs import *
 from itrade_ext import *
+from itrade_connection import gResponseCache,historyTTL
 
 # ============================================================================
 # Import_ABCBourse()
@@ -106,7 +107,7 @@ class Import_ABCBourse(object):
             debug('Import_ABCBourse:GET failure')
             return None
 
-        debug("status:%s reason:%s" %(response.status, response.reason))
+        debug("status:%s reason:%s",response.status, response.reason)
         if response.status != 200:
             debug('Import_ABCBourse:status!=200')
             return None
@@ -146,7 +147,13 @@ class Import_ABCBourse(object):
         if isinstance(datefin,Datation):
             datefin = datefin.date()
 
-        debug("Import_ABCBourse:getdata quote:%s begin:%s end:%s" % (quote,datedebut,datefin))
+        debug("Import_ABCBourse:getdata quote:%s begin:%s end:%s",quote,datedebut,datefin)
+
+        # cached answer (the viewstate changes with the session : not in the key)
+        key = gResponseCache.key('http://%s%s' % (self.m_host,self.m_url),'isin=%s&from=%s&to=%s' % (quote.isin(),datedebut,datefin))
+        cached = gResponseCache.entry(key,historyTTL(datefin))
+        if cached and cached[1]:
+            return cached[0]
 
         # init params and headers
         params = urlencode({'__VIEWSTATE': self.m_viewstate, 'dayDeb': datedebut.day, 'monthDeb': datedebut.month, 'yearDeb': datedebut.year, 'dayFin': datefin.day, 'monthFin': datefin.month, 'yearFin': datefin.year, 'OneSico': 'on', 'txtOneSico': quote.isin(), 'dlFormat': 'e', 'listFormat': 'isin', 'ImageButton1.x': 25, 'ImageButton1.y': 10 })
@@ -161,7 +168,7 @@ class Import_ABCBourse(object):
             debug('Import_ABCBourse:POST failure')
             return None
 
-        debug("status:%s reason:%s" %(response.status, response.reason))
+        debug("status:%s reason:%s",response.status, response.reason)
         if response.status != 200:
             debug('Import_ABCBourse:status!=200')
             return None
@@ -171,6 +178,7 @@ class Import_ABCBourse(object):
 
         # detect EBP file
         if data[:8]=="30111998":
+            gResponseCache.store(key,data[8:],historyTTL(datefin))
             return data[8:]
         return ""
 
@@ -204,7 +212,7 @@ def test(ticker,d):
 
         state = gImportABC.getstate()
         if state:
-            debug("state=%s" % (state))
+            debug("state=%s",state)
 
             quote = quotes.lookupTicker(ticker,'EURONEXT')
             data = gImportABC.getdata(quote,d)
@@ -40,7 +40,6 @@ import logging
 import re
 import string
 import time
-import urllib2
 from datetime import *
 
 # iTrade system
@@ -50,7 +49,7 @@ from itrade_datation import Datation,jjmmaa2yyyymmdd
 from itrade_defs import *
 from itrade_ext import *
 from itrade_market import euronextmic,euronext_place2mep
-from itrade_connection import ITradeConnection
+from itrade_connection import ITradeConnection,historyTTL
 import itrade_config
 
 # ============================================================================
@@ -147,7 +146,7 @@ class Import_euronext(object):
         datefinurl =str(int(dateto)/100)+'00000'
         endurl = 'typefile=csv&layout=vertical&typedate=dmy&separator=comma&mic=%s&isin=%s&name=&namefile=Price_Data_Historical&from=%s&to=%s&adjusted=1&base=0' % (mic,quote.isin(),datefromurl,datefinurl)
 
-        debug("Import_euronext:getdata quote:%s begin:%s end:%s" % (quote,d1,d2))
+        debug("Import_euronext:getdata quote:%s begin:%s end:%s",quote,d1,d2)
 
         query = (
             ('typefile', 'csv'),
@@ -171,58 +170,67 @@ class Import_euronext(object):
         #print url
         debug("Import_euronext:getdata: url=%s ",url)
         try:
-
-            req = urllib2.Request(url)
-            req.add_header('User-Agent', 'Mozilla/5.0 (Windows; U; Windows NT 5.1; en-US; rv:1.7.5) Gecko/20041202 Firefox/1.0')
-
-            f = urllib2.urlopen(req)
-            buf = f.read()
-            f.close()
-            
-            #buf=self.m_connection.getDataFromUrl(url)
+            header = {'User-Agent': 'Mozilla/5.0 (Windows; U; Windows NT 5.1; en-US; rv:1.7.5) Gecko/20041202 Firefox/1.0',
+                      'Accept': '*/*',
+                      'Connection': 'Keep-Alive'}
+            # pull data while it is downloaded
+            lines = self.m_connection.iterLines(url, header, ttl=historyTTL(datefin))
+            lines.next()
+        except StopIteration:
+            return ''
         except:
             debug('Import_euronext:unable to connect :-(')
             return None
+        data = []
 
-        # pull data
-        lines = self.splitLines(buf)
-        data = ''
-        #print lines
-
-        for eachLine in lines[4:]:
-            eachLine = eachLine.replace('","',';')
-            eachLine = eachLine.replace('"','')
-            sdata = string.split(eachLine,';')
+        # skip the 4 first lines
+        skip = 3
+        try:
+            for eachLine in lines:
+                if not eachLine:
+                    continue
+                if skip>0:
+                    skip = skip - 1
+                    continue
+                eachLine = eachLine.replace('","',';')
+                eachLine = eachLine.replace('"','')
+                sdata = string.split(eachLine,';')
             
-            if len(sdata)== 11:
-                #print sdata
-                #if (sdata[0] != "Date") and (quote.list() == QLIST_INDICES):
-                sdate = jjmmaa2yyyymmdd(sdata[2])
-                open = self.parseFValue(sdata[3].replace(',','.'))
-                high = self.parseFValue(sdata[4].replace(',','.'))
-                low = self.parseFValue(sdata[5].replace(',','.'))
-                value = self.parseFValue(sdata[6].replace(',','.'))
-                volume = self.parseLValue(sdata[7])
-                #print quote.key(),sdate,open,high,low,value,volume
-
-                # encode in EBP format
-                # ISIN;DATE;OPEN;HIGH;LOW;CLOSE;VOLUME
-                line = (
-                    quote.key(),
-                    sdate,
-                    open,
-                    high,
-                    low,
-                    value,
-                    volume
-                    )
-                line = map(lambda (val): '%s' % str(val), line)
-                line = string.join(line, ';')
-                #print line
-
-                # append
-                data = data + line + '\r\n'
-        return data
+                if len(sdata)== 11:
+                    #print sdata
+                    #if (sdata[0] != "Date") and (quote.list() == QLIST_INDICES):
+                    sdate = jjmmaa2yyyymmdd(sdata[2])
+                    open = self.parseFValue(sdata[3].replace(',','.'))
+                    high = self.parseFValue(sdata[4].replace(',','.'))
+                    low = self.parseFValue(sdata[5].replace(',','.'))
+                    value = self.parseFValue(sdata[6].replace(',','.'))
+                    volume = self.parseLValue(sdata[7])
+                    #print quote.key(),sdate,open,high,low,value,volume
+
+                    # encode in EBP format
+                    # ISIN;DATE;OPEN;HIGH;LOW;CLOSE;VOLUME
+                    line = (
+                        quote.key(),
+                        sdate,
+                        open,
+                        high,
+                        low,
+                        value,
+                        volume
+                        )
+                    line = map(lambda (val): '%s' % str(val), line)
+                    line = string.join(line, ';')
+                    #print line
+
+                    # append
+                    data.append(line + '\r\n')
+        except:
+            # connection lost while downloading (timeout, truncated or
+            # corrupted content)
+            debug('Import_euronext:download interrupted :-(')
+            lines.close()
+            return None
+        return string.join(data, '')
 
 # ============================================================================
 # Export me
@@ -279,7 +287,7 @@ def test(ticker,d):
 
         state = gImportEuronext.getstate()
         if state:
-            debug("state=%s" % (state))
+            debug("state=%s",state)
 
             quote = quotes.lookupTicker(ticker,'EURONEXT')
             data = gImportEuronext.getdata(quote,d)
@@ -151,7 +151,7 @@ class Import_euronext_bonds(object):
         datefinurl =str(int(dateto)/100)+'00000'
         endurl = 'typefile=csv&layout=vertical&typedate=dmy&separator=comma&mic=%s&isin=%s&name=&namefile=Price_Data_Historical&from=%s&to=%s&adjusted=1&base=0' % (mic,quote.isin(),datefromurl,datefinurl)
 
-        debug("Import_euronext_bonds:getdata quote:%s begin:%s end:%s" % (quote,d1,d2))
+        debug("Import_euronext_bonds:getdata quote:%s begin:%s end:%s",quote,d1,d2)
 
         query = (
             ('typefile', 'csv'),
@@ -251,7 +251,7 @@ def test(ticker,d):
 
         state = gImportEuronext.getstate()
         if state:
-            debug("state=%s" % (state))
+            debug("state=%s",state)
 
             quote = quotes.lookupTicker(ticker,'EURONEXT')
             data = gImportEuronext.getdata(quote,d)
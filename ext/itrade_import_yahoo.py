@@ -48,7 +48,7 @@ from itrade_datation import Datation,dd_mmm_yy2yyyymmdd,re_p3_1
 from itrade_defs import *
 from itrade_ext import *
 from itrade_market import yahooTicker,yahooUrl
-from itrade_connection import ITradeConnection
+from itrade_connection import ITradeConnection,historyTTL
 import itrade_config
 
 # ============================================================================
@@ -111,7 +111,7 @@ class Import_yahoo(object):
         d1 = self.parseDate(datedebut)
         d2 = self.parseDate(datefin)
 
-        debug("Import_yahoo:getdata quote:%s begin:%s end:%s" % (quote,d1,d2))
+        debug("Import_yahoo:getdata quote:%s begin:%s end:%s",quote,d1,d2)
 
         sname = yahooTicker(quote.ticker(),quote.market(),quote.place())
 
@@ -137,56 +137,64 @@ class Import_yahoo(object):
 
         debug("Import_yahoo:getdata: url=%s ",url)
         try:
-            buf=self.m_connection.getDataFromUrl(url)
+            # pull data while it is downloaded
+            lines = self.m_connection.iterLines(url, ttl=historyTTL(datefin))
+            header = string.split(lines.next(),',')
+        except StopIteration:
+            # empty content
+            return None
         except:
             debug('Import_yahoo:unable to connect :-(')
             return None
-
-        # pull data
-        lines = self.splitLines(buf)
-        if len(lines)<=0:
-            # empty content
-            return None
-        header = string.split(lines[0],',')
-        data = ""
+        data = []
 
         if (header[0] != "Date"):
             # no valid content
+            lines.close()
             return None
 
-        for eachLine in lines:
-            sdata = string.split (eachLine, ',')
-            sdate = sdata[0]
-            if (sdate != "Date"):
-                if re_p3_1.match(sdate):
-                    #print 'already good format ! ',sdate,sdata
-                    pass
-                else:
-                    sdate = dd_mmm_yy2yyyymmdd(sdate)
-                open = string.atof(sdata[1])
-                high = string.atof(sdata[2])
-                low = string.atof(sdata[3])
-                value = string.atof(sdata[6])   #   Adj. Close*
-                volume = string.atoi(sdata[5])
-
-                if volume >= 0:
-                    # encode in EBP format
-                    # ISIN;DATE;OPEN;HIGH;LOW;CLOSE;VOLUME
-                    line = (
-                       quote.key(),
-                       sdate,
-                       open,
-                       high,
-                       low,
-                       value,
-                       volume
-                    )
-                    line = map(lambda (val): '%s' % str(val), line)
-                    line = string.join(line, ';')
-                    # append
-                    data = data + line + '\r\n'
-
-        return data
+        try:
+            for eachLine in lines:
+                if not eachLine:
+                    continue
+                sdata = string.split (eachLine, ',')
+                sdate = sdata[0]
+                if (sdate != "Date"):
+                    if re_p3_1.match(sdate):
+                        #print 'already good format ! ',sdate,sdata
+                        pass
+                    else:
+                        sdate = dd_mmm_yy2yyyymmdd(sdate)
+                    open = string.atof(sdata[1])
+                    high = string.atof(sdata[2])
+                    low = string.atof(sdata[3])
+                    value = string.atof(sdata[6])   #   Adj. Close*
+                    volume = string.atoi(sdata[5])
+
+                    if volume >= 0:
+                        # encode in EBP format
+                        # ISIN;DATE;OPEN;HIGH;LOW;CLOSE;VOLUME
+                        line = (
+                           quote.key(),
+                           sdate,
+                           open,
+                           high,
+                           low,
+                           value,
+                           volume
+                        )
+                        line = map(lambda (val): '%s' % str(val), line)
+                        line = string.join(line, ';')
+                        # append
+                        data.append(line + '\r\n')
+        except:
+            # connection lost while downloading (timeout, truncated or
+            # corrupted content)
+            debug('Import_yahoo:download interrupted :-(')
+            lines.close()
+            return None
+
+        return string.join(data, '')
 
 # ============================================================================
 # Export me
@@ -307,7 +315,7 @@ def test(ticker,d):
 
         state = gImportYahoo.getstate()
         if state:
-            debug("state=%s" % (state))
+            debug("state=%s",state)
 
             quote = quotes.lookupTicker(ticker,'NASDAQ')
             data = gImportYahoo.getdata(quote,d)
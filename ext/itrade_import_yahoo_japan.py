@@ -112,7 +112,7 @@ class Import_yahoojp(object):
         d1 = self.parseDate(datedebut)
         d2 = self.parseDate(datefin)
 
-        debug("Import_yahoojp:getdata quote:%s begin:%s end:%s" % (quote,d1,d2))
+        debug("Import_yahoojp:getdata quote:%s begin:%s end:%s",quote,d1,d2)
 
         sname = yahooTicker(quote.ticker(),quote.market(),quote.place())
 
@@ -277,7 +277,7 @@ def test(ticker,d):
 
         state = gImportYahoo.getstate()
         if state:
-            debug("state=%s" % (state))
+            debug("state=%s",state)
 
             quote = quotes.lookupTicker(ticker,'TOKYO EXCHANGE')
             data = gImportYahoo.getdata(quote,d)
@@ -129,7 +129,7 @@ class LiveUpdate_ABCBourse(object):
             debug('LiveUpdate_ABCBourse:GET failure')
             return None
 
-        debug("status:%s reason:%s" %(response.status, response.reason))
+        debug("status:%s reason:%s",response.status, response.reason)
         if response.status != 200:
             debug('LiveUpdate_ABCBourse:status!=200')
             return None
@@ -159,7 +159,7 @@ class LiveUpdate_ABCBourse(object):
             raise('LiveUpdate_ABCBourse:no viewstate / missing getstate() call !')
             return None
 
-        debug("LiveUpdate_ABCBourse:getdata quote:%s " % quote)
+        debug("LiveUpdate_ABCBourse:getdata quote:%s ",quote)
 
         # init params and headers
         params = urlencode({'f': 'ebp', '__VIEWSTATE': self.m_viewstate, 'm': 'complet', 'ImageButton1.x': 4, 'ImageButton1.y': 13 })
@@ -174,7 +174,7 @@ class LiveUpdate_ABCBourse(object):
             debug('LiveUpdate_ABCBourse:POST failure')
             return None
 
-        debug("status:%s reason:%s" %(response.status, response.reason))
+        debug("status:%s reason:%s",response.status, response.reason)
         if response.status != 200:
             debug('LiveUpdate_ABCBourse:status!=200')
             return None
@@ -184,7 +184,7 @@ class LiveUpdate_ABCBourse(object):
         self.m_datatime = datetime.today()
         self.m_clock = "%d:%02d" % (self.m_datatime.hour,self.m_datatime.minute)
 
-        debug('!!! datatime = %s clock=%s' % (self.m_datatime,self.m_clock))
+        debug('!!! datatime = %s clock=%s',self.m_datatime,self.m_clock)
 
         # detect EBP file then split by line
         if data[:8]!="30111998":
@@ -198,7 +198,7 @@ class LiveUpdate_ABCBourse(object):
     # ---[ cache management on data ] ---
 
     def getcacheddata(self,quote):
-        debug('getcacheddata %s' % self.m_data)
+        debug('getcacheddata %s',self.m_data)
         for eachLine in self.m_data:
             item = itrade_csv.parse(eachLine,7)
             if item:
@@ -219,9 +219,9 @@ class LiveUpdate_ABCBourse(object):
         delta = timedelta(0,itrade_config.cachedDataFreshDelay)
         newtime = self.m_datatime + delta
         if (datetime.today()>newtime):
-            debug('datatime = %s  currentdatatime = %s  newtime = %s delta = %s : False' %(self.m_datatime,datetime.today(),newtime,delta))
+            debug('datatime = %s  currentdatatime = %s  newtime = %s delta = %s : False',self.m_datatime,datetime.today(),newtime,delta)
             return False
-        debug('datatime = %s  currentdatatime = %s  newtime = %s delta = %s : True' %(self.m_datatime,datetime.today(),newtime,delta))
+        debug('datatime = %s  currentdatatime = %s  newtime = %s delta = %s : True',self.m_datatime,datetime.today(),newtime,delta)
         return True
 
     def cacheddatanotfresh(self):
@@ -283,7 +283,7 @@ def test(ticker):
 
         state = gLiveABC.getstate()
         if state:
-            debug("state=%s" % (state))
+            debug("state=%s",state)
 
             quote = quotes.lookupTicker(ticker,'EURONEXT')
             data = gLiveABC.getdata(quote)
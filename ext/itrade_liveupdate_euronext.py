@@ -30,6 +30,7 @@
 #
 # History       Rev   Description
 # 2005-06-10    dgil  Wrote it from scratch
+# 2026-10-19    agent single pass extraction / ITradeConnection
 # ============================================================================
 
 # ============================================================================
@@ -41,7 +42,6 @@ import logging
 import re
 import string
 import thread
-import urllib2
 from datetime import *
 
 # iTrade system
@@ -54,13 +54,31 @@ from itrade_market import euronextmic,euronext_place2mep,convertConnectorTimeToP
 from itrade_connection import ITradeConnection
 import itrade_config
 
+# ============================================================================
+# fields of the real-time quote page
+#
+#   one alternative (and one named group) by field : the page is scanned once
+# ============================================================================
+
+euronext_fields = re.compile('|'.join((
+    r'"datetimeLastvalue">(?P<date>[^<]*)</span>',
+    r'"lastPriceint">(?P<int>[^<]*)</span>',
+    r'"lastPricefract">(?P<fract>[^<]*)</sup>',
+    r'"cnDiffRelvalue">\((?P<percent>[^)\n]*)\)</span>',
+    r'"todayVolumevalue">(?P<volume>[^\n]*?)&nbsp',
+    r'>Ouvert<[^\n]*\n\s*(?P<open>[^\n]*?)</td>',
+    r'"highPricevalue">(?P<high>[^\n]*?)&nbsp',
+    r'"lowPricevalue">(?P<low>[^\n]*?)&nbsp',
+    )))
+
+euronext_required = ('date','int','fract','percent','volume','open','high','low')
+euronext_required_indice = ('date','int','fract','percent','open','high','low')
+
 # ============================================================================
 # LiveUpdate_Euronext()
 #
-#  Euronext returns all the quotes then we have to extract only the quote
-#  we want to return :-(
-#  design idea : if the quote is requested within the same second, use a
-#  cached data to extract !
+#  one page by quote, fetched on the keep-alive connections of
+#  ITradeConnection, then scanned once by euronext_fields
 # ============================================================================
 
 class LiveUpdate_Euronext(object):
@@ -126,17 +144,6 @@ class LiveUpdate_Euronext(object):
 
     # ---[ code to get data ] ---
 
-    def splitLines(self,buf):
-        lines = string.split(buf, '\n')
-        lines = filter(lambda x:x, lines)
-        def removeCarriage(s):
-            if s[-1]=='\r':
-                return s[:-1]
-            else:
-                return s
-        lines = [removeCarriage(l) for l in lines]
-        return lines
-
     def euronextDate(self,date):
         sp = string.split(date,' ')
         #print 'euronextDate:',sp
@@ -182,9 +189,37 @@ class LiveUpdate_Euronext(object):
             ret = ret+val
         return string.atol(ret)
 
+    def extract(self,buf,bIndice):
+        # single pass over the page : stops when all the fields are found
+        fields = {}
+        required = euronext_required
+        if bIndice:
+            fields['volume'] = '0'
+            required = euronext_required_indice
+        for m in euronext_fields.finditer(buf):
+            name = m.lastgroup
+            if not fields.has_key(name):
+                fields[name] = m.group(name)
+                if len(fields)==len(required)+bIndice:
+                    break
+        for name in required:
+            if not fields.has_key(name):
+                return None
+        return fields
+
+    def euronextPrice(self,d):
+        # '1.234,56' or currency prefixed value ; None if no value ('-')
+        d = d.replace('.','').replace(',','.')
+        for eachCurrency in ('%','$','&euro;','&pound;'):
+            if eachCurrency in d:
+                return d[d.find(eachCurrency)+len(eachCurrency):].strip()
+        if '-' in d:
+            return None
+        return d.strip()
+
     def getdata(self,quote):
         self.m_connected = False
-        debug("LiveUpdate_Euronext:getdata quote:%s market:%s" % (quote,self.m_market))
+        debug("LiveUpdate_Euronext:getdata quote:%s market:%s",quote,self.m_market)
 
         mic = euronextmic(quote.market(),quote.place())
 
@@ -200,116 +235,48 @@ class LiveUpdate_Euronext(object):
         debug("LiveUpdate_Euronext:getdata: url=%s ",url)
 
         try:
-
-            req = urllib2.Request(url)
-            req.add_header('User-Agent', 'Mozilla/5.0 (Windows; U; Windows NT 5.1; en-US; rv:1.7.5) Gecko/20041202 Firefox/1.0')
-
-            f = urllib2.urlopen(req)
-            buf = f.read()
-            f.close()
-            
+            buf = self.m_connection.getDataFromUrl(url)
         except:
             debug('LiveUpdate_Euronext:unable to connect :-(')
             return None
 
         # pull data
-        lines = self.splitLines(buf)
-
-        i = 0
-        count = 0
-        for eachLine in lines:
-            count = count + 1
-
-
-            if '"datetimeLastvalue">' in eachLine:
-                iDate = eachLine[eachLine.find('"datetimeLastvalue">')+20:eachLine.find('</span>')].replace('CET','').replace('BST','')
-                iDate = iDate.rstrip()
-                #print count,'iDate:',iDate
-                i = i +1
-                                         
-            if '"lastPriceint">' in eachLine:
-                lastPriceint = eachLine[eachLine.find('"lastPriceint">')+15:eachLine.find('</span>')].replace(',','.')
-                lastPriceint = lastPriceint.replace(',','.')
-                i = i +1
-            if '"lastPricefract">' in eachLine:
-                lastPricefract = eachLine[eachLine.find('"lastPricefract">')+17:eachLine.find('</sup>')]
-                i = i +1
-                iLast = lastPriceint + lastPricefract
-                #print count,'iLast:',iLast
-                
-            if '"cnDiffRelvalue">(' in eachLine:
-                iPercent = eachLine[eachLine.find('"cnDiffRelvalue">(')+18:eachLine.find(')</span>')]
-                iPercent = iPercent.replace('%','').replace(',','.').replace('+','')
-                i = i +1
-                #print count,'iPercent:',iPercent
-
-            if '"todayVolumevalue">' in eachLine:
-                iVolume = eachLine[eachLine.find('"todayVolumevalue">')+19:eachLine.find('&nbsp')].replace('.','').replace(',','')
-                i = i +1
-                #print count,'iVolume:',iVolume
-
-            if '>Ouvert<' in eachLine:
-                eachLine = lines[count]
-                iOpen = eachLine[:eachLine.find('</td>')].replace('.','').replace(',','.')
-                if '%' in iOpen:
-                    iOpen = iOpen[iOpen.find('%')+1:]
-                elif '$' in iOpen:
-                    iOpen = iOpen[iOpen.find('$')+1:]
-                elif '&euro;' in iOpen :
-                    iOpen = iOpen[iOpen.find('&euro;')+6:]   
-                elif '&pound;' in iOpen :
-                    iOpen = iOpen[iOpen.find('&pound;')+7:]   
-                elif '-' in iOpen:
-                    iOpen = '0'
-                    return None
-                i = i + 1
-                #print count,'iOpen:',iOpen
-
-            if '"highPricevalue">' in eachLine:
-                iHigh = eachLine[eachLine.find('"highPricevalue">')+17:eachLine.find('&nbsp')].replace('.','').replace(',','.')
-                if '-' in iHigh:
-                    iHigh = '0'
-                    return None
-                i = i +1
-                #print count,'iHigh:',iHigh
-
-            if '"lowPricevalue">' in eachLine:
-                iLow = eachLine[eachLine.find('"lowPricevalue">')+16:eachLine.find('&nbsp')].replace('.','').replace(',','.')
-                if '-' in iLow:
-                    iLow = '0'
-                    return None
-                i = i +1
-                #print count,'iLow:',iLow
-
-            if i == 7 and (quote.list()==QLIST_INDICES):
-                iVolume = '0'
-                i = i + 1
-
-            if i == 8:
-                count = 0
-                i = 0
-                c_datetime = datetime.today()
-                c_date = "%04d%02d%02d" % (c_datetime.year,c_datetime.month,c_datetime.day)
-                #print 'Today is :', c_date
-            
-
-                sdate,sclock = self.euronextDate(iDate)
-
-                # be sure we have volume (or indices)
-                if (quote.list() == QLIST_INDICES or iVolume != ''):
-
-                    # be sure not an oldest day !
-                    if (c_date==sdate) or (quote.list() == QLIST_INDICES):
-                        key = quote.key()
-                        self.m_dcmpd[key] = sdate
-                        self.m_dateindice[key] = str(sdate[6:8]) + '/' + str(sdate[4:6]) + '/' +str(sdate[0:4])
-                        self.m_clock[key] = self.convertClock(quote.place(),sclock,sdate)
-
-                    # ISIN;DATE;OPEN;HIGH;LOW;CLOSE;VOLUME;PERCENT
-                    data = ';'.join([quote.key(),sdate,iOpen,iHigh,iLow,iLast,iVolume,iPercent])
-                    return data
-            
-        return None
+        bIndice = (quote.list()==QLIST_INDICES)
+        fields = self.extract(buf,bIndice)
+        if fields==None:
+            return None
+
+        iDate = fields['date'].replace('CET','').replace('BST','').rstrip()
+        iLast = fields['int'].replace(',','.') + fields['fract']
+        iPercent = fields['percent'].replace('%','').replace(',','.').replace('+','')
+        iVolume = fields['volume'].replace('.','').replace(',','')
+        iOpen = self.euronextPrice(fields['open'])
+        iHigh = self.euronextPrice(fields['high'])
+        iLow = self.euronextPrice(fields['low'])
+        if iOpen==None or iHigh==None or iLow==None:
+            return None
+
+        c_datetime = datetime.today()
+        c_date = "%04d%02d%02d" % (c_datetime.year,c_datetime.month,c_datetime.day)
+        #print 'Today is :', c_date
+
+        sdate,sclock = self.euronextDate(iDate)
+
+        # be sure we have volume (or indices)
+        if not bIndice and iVolume == '':
+            return None
+
+        # be sure not an oldest day !
+        if (c_date==sdate) or bIndice:
+            key = quote.key()
+            self.m_dcmpd[key] = sdate
+            self.m_dateindice[key] = str(sdate[6:8]) + '/' + str(sdate[4:6]) + '/' +str(sdate[0:4])
+            self.m_clock[key] = self.convertClock(quote.place(),sclock,sdate)
+
+        # ISIN;DATE;OPEN;HIGH;LOW;CLOSE;VOLUME;PERCENT
+        self.m_connected = True
+        data = ';'.join([quote.key(),sdate,iOpen,iHigh,iLow,iLast,iVolume,iPercent])
+        return data
 
     # ---[ cache management on data ] ---
 
@@ -429,7 +396,7 @@ def test(ticker):
 
         state = gLiveEuronext.getstate()
         if state:
-            debug("state=%s" % (state))
+            debug("state=%s",state)
 
             quote = quotes.lookupTicker(ticker,'EURONEXT')
             if (quote):
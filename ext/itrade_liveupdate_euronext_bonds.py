@@ -184,7 +184,7 @@ class LiveUpdate_Euronext_bonds(object):
 
     def getdata(self,quote):
         self.m_connected = False
-        debug("LiveUpdate_Euronext_bonds:getdata quote:%s market:%s" % (quote,self.m_market))
+        debug("LiveUpdate_Euronext_bonds:getdata quote:%s market:%s",quote,self.m_market)
 
         mic = euronextmic(quote.market(),quote.place())
 
@@ -390,7 +390,7 @@ def test(ticker):
 
         state = gLiveEuronext.getstate()
         if state:
-            debug("state=%s" % (state))
+            debug("state=%s",state)
 
             quote = quotes.lookupTicker(ticker,'EURONEXT')
             if (quote):
@@ -36,6 +36,7 @@
 #
 # 2006-08-17    dgil  working on the new mechanism ...
 # 2006-08-19    dgil  authentication is working !!!!!!
+# 2026-10-19    agent one stream for all the quotes / buffered decoder
 # ============================================================================
 
 # ============================================================================
@@ -51,7 +52,8 @@ import datetime
 import os
 import socket
 import httplib
-import datetime
+import time
+import threading
 
 # iTrade system
 import itrade_config
@@ -241,70 +243,6 @@ def indice2subscriptions(isin,flux):
         str = str + isin2sub(isin,each,flux)
     return str
 
-index2field = {
-    '000' : 0,
-    '001' : 1,
-    '002' : 2,
-    '003' : 3,
-    '004' : 4,
-    '005' : 5,
-    '006' : 6,
-    '007' : 7,
-    '008' : 8,
-    '009' : 9,
-    '00A' : 10,
-    '00B' : 11,
-    '00C' : 12,
-    '00D' : 13,
-    '00E' : 14,
-    '00F' : 15,
-    '00G' : 16,
-    '00H' : 17,
-    '00I' : 18,
-    '00J' : 19,
-    '00K' : 20,
-    '00L' : 21,
-    '00M' : 22,
-    '00N' : 23,
-    '00O' : 24,
-    '00P' : 25,
-    '00Q' : 26,
-    '00R' : 27,
-    '00S' : 28,
-    '00T' : 29,
-    '00U' : 30,
-    '00V' : 31,
-    '00W' : 32,
-    '00X' : 33,
-    '00Y' : 34,
-    '00Z' : 35,
-    '010' : 36,
-    '011' : 37,
-    '012' : 38,
-    '013' : 39,
-    '014' : 40,
-    '015' : 41,
-    '016' : 42,
-    '017' : 43,
-    '018' : 44,
-    '019' : 45,
-    '01A' : 46,
-    '01B' : 47,
-    '01C' : 48,
-    '01D' : 49,
-    '01E' : 50,
-    '01F' : 51,
-    '01G' : 52,
-    '01H' : 53,
-    '01I' : 54,
-    '01J' : 55,
-    '01K' : 56,     # last of quote
-    '01L' : 57,
-    '01M' : 58,
-    '01N' : 59
-
-}
-
 # ============================================================================
 # place -> code place
 # ============================================================================
@@ -465,11 +403,171 @@ def encode_topics(topics,key):
 
     return ret
 
+# ============================================================================
+# default values of the fields (just in case not in the server answer ...)
+# ============================================================================
+
+default_fields = {
+    'CSA_H_TRANS_2' : '0:00:00',
+    'CSA_H_TRANS_3' : '0:00:00',
+    'CSA_H_TRANS_4' : '0:00:00',
+    'CSA_H_TRANS_5' : '0:00:00',
+
+    'CSA_NBL_DEM1' : '0',
+    'CSA_NBL_DEM2' : '0',
+    'CSA_NBL_DEM3' : '0',
+    'CSA_NBL_DEM4' : '0',
+    'CSA_NBL_DEM5' : '0',
+    'CSA_CRS_DEM1' : '0.00',
+    'CSA_CRS_DEM2' : '0.00',
+    'CSA_CRS_DEM3' : '0.00',
+    'CSA_CRS_DEM4' : '0.00',
+    'CSA_CRS_DEM5' : '0.00',
+
+    'CSA_NBL_OFF1' : '0',
+    'CSA_NBL_OFF2' : '0',
+    'CSA_NBL_OFF3' : '0',
+    'CSA_NBL_OFF4' : '0',
+    'CSA_NBL_OFF5' : '0',
+    'CSA_CRS_OFF1' : '0.00',
+    'CSA_CRS_OFF2' : '0.00',
+    'CSA_CRS_OFF3' : '0.00',
+    'CSA_CRS_OFF4' : '0.00',
+    'CSA_CRS_OFF5' : '0.00',
+
+    'CSA_H_REPRIS_COT' : '',
+    'CSA_IND_ETAT' : '',
+    'CSA_FMP_DEM' : '0.00',
+    'CSA_FMP_OFF' : '0.00',
+    'CSA_CRS_CMP' : '0.00',
+
+    'CSA_VOL_JOUR' : '0',
+    'CSA_VOL_DERNIER' : '0',
+    'CSA_CRS_DERNIER' : '0.00'
+    }
+
+# ============================================================================
+# FortuneoDecoder
+#
+#   incremental decoder of the streaming flux. A frame is the index of the
+#   topic (3 digits, base 36, position of the topic in the subscription)
+#   followed by the value and '\n'. Chunks are appended to a bytearray ;
+#   feed() returns the frames completed by the chunk and keeps the tail.
+# ============================================================================
+
+STATE_INDEX = 0
+STATE_VALUE = 1
+
+class FortuneoDecoder(object):
+    def __init__(self):
+        self.m_buf = bytearray()
+        self.m_state = STATE_INDEX
+        self.m_index = None
+
+    def feed(self,chunk):
+        buf = self.m_buf
+        buf.extend(chunk)
+        frames = []
+        pos = 0
+        while 1:
+            if self.m_state == STATE_INDEX:
+                if len(buf)-pos < 3:
+                    break
+                self.m_index = str(buf[pos:pos+3])
+                pos = pos + 3
+                self.m_state = STATE_VALUE
+            else:
+                eol = buf.find('\n',pos)
+                if eol < 0:
+                    break
+                frames.append((self.m_index,str(buf[pos:eol])))
+                pos = eol + 1
+                self.m_state = STATE_INDEX
+        if pos:
+            del buf[:pos]
+        return frames
+
+# ============================================================================
+# ChunkedReader
+#
+#   decodes a chunked stream over sock.recv : read() returns the payload of
+#   what is received, without waiting for the end of the chunk ('' when the
+#   stream is closed or at the last chunk). httplib's read(n) on a chunked
+#   response blocks until n bytes of payload arrived.
+# ============================================================================
+
+class ChunkedReader(object):
+    def __init__(self,recv):
+        self.m_recv = recv
+        self.m_buf = ''
+        self.m_left = 0
+        self.m_crlf = False
+        self.m_end = False
+
+    def read(self,size):
+        while not self.m_end:
+            data = self.decode()
+            if data:
+                return data
+            raw = self.m_recv(size)
+            if not raw:
+                self.m_end = True
+                break
+            self.m_buf = self.m_buf + raw
+        return ''
+
+    def decode(self):
+        buf = self.m_buf
+        data = []
+        pos = 0
+        while pos < len(buf):
+            if self.m_left > 0:
+                # payload of the current chunk
+                n = min(self.m_left,len(buf)-pos)
+                data.append(buf[pos:pos+n])
+                pos = pos + n
+                self.m_left = self.m_left - n
+                self.m_crlf = self.m_left == 0
+            elif self.m_crlf:
+                # end of the chunk
+                if len(buf)-pos < 2:
+                    break
+                pos = pos + 2
+                self.m_crlf = False
+            else:
+                # size of the next chunk
+                eol = buf.find('\r\n',pos)
+                if eol < 0:
+                    break
+                self.m_left = int(buf[pos:eol].split(';')[0].strip() or '0',16)
+                pos = eol + 2
+                if self.m_left == 0:
+                    self.m_end = True
+                    break
+        self.m_buf = buf[pos:]
+        return ''.join(data)
+
 # ============================================================================
 # LiveUpdate_fortuneo()
 #
+#   one streaming connection carries the topics of all the subscribed ISIN
+#   (see subscribe()). A background thread decodes the flux and stores the
+#   fields by ISIN : getdata() / getcacheddata() only format the last known
+#   fields. The stream is reopened with the whole list of topics when a new
+#   ISIN is subscribed.
 # ============================================================================
 
+# size of the chunks read on the stream
+STREAM_CHUNK = 16384
+
+# delay (in seconds) before reopening a stream closed by the server / broken
+STREAM_REOPEN = 1.0
+STREAM_RETRY = 10.0
+
+# quiet delay (in seconds) of the subscriptions before (re)opening the stream :
+# the quotes subscribed together (i.e. the matrix at startup) share one open
+STREAM_BATCH = 0.5
+
 class LiveUpdate_fortuneo(object):
     def __init__(self):
         debug('LiveUpdate_fortuneo:__init__')
@@ -487,6 +585,13 @@ class LiveUpdate_fortuneo(object):
         self.m_blowfish = None
         self.m_places = None
 
+        # isin -> (place code, isIndice) ; incremented generation reopens the stream
+        self.m_subscriptions = {}
+        self.m_generation = 0
+        self.m_datalock = threading.Condition()
+        self.m_thread = None
+        self.m_running = False
+
     # ---[ read cookie ] ---
     def readCookie(self):
         if self.m_cookie==None:
@@ -522,23 +627,28 @@ class LiveUpdate_fortuneo(object):
     # ---[ connexion ] ---
 
     def connect(self):
-        self.m_conn = httplib.HTTPConnection(self.m_default_host,80)
-        if self.m_conn == None:
-            print 'live: not connected on %s:80' % self.m_default_host
-            return False
-
         self.readCookie()
         self.loadPlaces()
 
-        #if itrade_config.verbose:
-        #    print 'live: connected on %s:80' % self.m_default_host
+        # the stream is shared by all the quotes : start it once
+        if not self.m_running:
+            self.m_running = True
+            self.m_thread = threading.Thread(target=self.run,name='fortuneo')
+            self.m_thread.setDaemon(True)
+            self.m_thread.start()
         return True
 
     def disconnect(self):
+        # the stream stays open for the other quotes (see stop())
+        pass
+
+    def stop(self):
+        self.m_datalock.acquire()
+        self.m_running = False
+        self.m_datalock.notifyAll()
+        self.m_datalock.release()
         if self.m_conn:
             self.m_conn.close()
-        self.m_conn = None
-        self.m_connected = False
 
     def alive(self):
         return self.m_connected
@@ -563,35 +673,43 @@ class LiveUpdate_fortuneo(object):
                         self.m_places[item[0]] = place2code(item[1].strip().upper())
 
     def place(self,isin):
+        self.loadPlaces()
         if self.m_places.has_key(isin) : return self.m_places[isin]
         return "025"
 
-    # ---[ code to get data ] ---
-
-    def convertClock(self,clock):
-        clo = clock[:-3]
-        min = clo[-2:]
-        hour = clo[:-3]
-        val = (int(hour)*60) + int(min)
-        #print clo,hour,min,val
-        if val>self.m_lastclock:
-            #print "lastclock was :",self.m_lastclock," then is : ",val
-            self.m_lastclock = val
-        return "%d:%02d" % (val/60,val%60)
-
-    def getdata(self,quote):
-        # check we have a connection
-        if not self.m_conn:
-            raise('LiveUpdate_fortuneo:no connection / missing connect() call !')
-            return None
-
-        #info("LiveUpdate_fortuneo:getdata quote:%s " % quote)
+    # ---[ subscriptions ] ---
 
+    def subscribe(self,quote):
         isin = quote.isin()
+        if self.m_subscriptions.has_key(isin):
+            return
+        self.m_datalock.acquire()
+        try:
+            if not self.m_subscriptions.has_key(isin):
+                self.m_subscriptions[isin] = (self.place(isin),quote.list()==QLIST_INDICES)
+                self.m_generation = self.m_generation + 1
+                self.m_datalock.notifyAll()
+        finally:
+            self.m_datalock.release()
+
+    def topics(self):
+        # caller owns m_datalock : (generation, index -> (isin,field), topics)
+        table = []
+        topics = []
+        for isin,(flux,bIndice) in sorted(self.m_subscriptions.items()):
+            if bIndice:
+                fields = indice_subscriptions
+            else:
+                fields = full_subscriptions
+            for each in fields:
+                table.append((isin,each))
+                topics.append(isin2sub(isin,each,flux))
+        return self.m_generation,table,','.join(topics)
 
-        self.m_connected = False
+    # ---[ streaming ] ---
 
-        # init params and headers
+    def open(self,topics):
+        # POST the subscriptions : returns the function reading the stream
         headers = {
                     "Connection":"keep-alive",
                     "Accept":"text/html, image/gif, image/jpeg, *; q=.2, */*; q=.2",
@@ -602,16 +720,11 @@ class LiveUpdate_fortuneo(object):
                     "Content-Type":"application/x-www-form-urlencoded"
                     }
 
-        cac = "FR0003500008"
-        #topics = "%s,%s" % (isin2subscriptions(isin,self.place(isin)),indice2subscriptions(cac,self.place(cac)))
-        topics = indice2subscriptions(cac,self.place(cac))
         topics = encode_topics(topics,self.m_blowfish)
-
         params = "subscriptions%%3D%%7B%s%%7D%%26userinfo%%3D%s\r\n" % (topics,self.m_cookie)
-        print 'params:',params
 
-        # POST quote request
         try:
+            self.m_conn = httplib.HTTPConnection(self.m_default_host,80,timeout=itrade_config.connectionTimeout)
             self.m_conn.request("POST", "/streaming", params, headers)
             flux = self.m_conn.getresponse()
         except:
@@ -622,127 +735,162 @@ class LiveUpdate_fortuneo(object):
             info('LiveUpdate_fortuneo: status==%d!=200 reason:%s headers:%s' % (flux.status,flux.reason,flux.getheaders()))
             return None
 
-        self.m_connected = True
-
-        # init some defaut values (just in case not in the server answer ...)
-        dcmpd = {}
-
-        dcmpd['CSA_H_TRANS_2'] = '0:00:00'
-        dcmpd['CSA_H_TRANS_3'] = '0:00:00'
-        dcmpd['CSA_H_TRANS_4'] = '0:00:00'
-        dcmpd['CSA_H_TRANS_5'] = '0:00:00'
-
-        dcmpd['CSA_NBL_DEM1'] = '0'
-        dcmpd['CSA_NBL_DEM2'] = '0'
-        dcmpd['CSA_NBL_DEM3'] = '0'
-        dcmpd['CSA_NBL_DEM4'] = '0'
-        dcmpd['CSA_NBL_DEM5'] = '0'
-        dcmpd['CSA_CRS_DEM1'] = '0.00'
-        dcmpd['CSA_CRS_DEM2'] = '0.00'
-        dcmpd['CSA_CRS_DEM3'] = '0.00'
-        dcmpd['CSA_CRS_DEM4'] = '0.00'
-        dcmpd['CSA_CRS_DEM5'] = '0.00'
-
-        dcmpd['CSA_NBL_OFF1'] = '0'
-        dcmpd['CSA_NBL_OFF2'] = '0'
-        dcmpd['CSA_NBL_OFF3'] = '0'
-        dcmpd['CSA_NBL_OFF4'] = '0'
-        dcmpd['CSA_NBL_OFF5'] = '0'
-        dcmpd['CSA_CRS_OFF1'] = '0.00'
-        dcmpd['CSA_CRS_OFF2'] = '0.00'
-        dcmpd['CSA_CRS_OFF3'] = '0.00'
-        dcmpd['CSA_CRS_OFF4'] = '0.00'
-        dcmpd['CSA_CRS_OFF5'] = '0.00'
-
-        dcmpd['CSA_H_REPRIS_COT'] = ''
-        dcmpd['CSA_IND_ETAT'] = ''
-        dcmpd['CSA_FMP_DEM'] = '0.00'
-        dcmpd['CSA_FMP_OFF'] = '0.00'
-        dcmpd['CSA_CRS_CMP'] = '0.00'
-
-        dcmpd['CSA_VOL_JOUR'] = '0'
-        dcmpd['CSA_VOL_DERNIER'] = '0'
-        dcmpd['CSA_CRS_DERNIER'] = '0.00'
-
-        # read the streaming flux
-        while 1:
-            # get index
-            index = flux.read(3)
-
-            # get value
-            value = ''
-            while 1 :
-                data = flux.read(1)
-                if data=='\n':
-                    break
-                else:
-                    value = value + data
-
-            # get field
-            numind = index2field[index]
-            if numind <= 56:
-                field = full_subscriptions[numind]
+        # the headers are read byte per byte by httplib : nothing of the
+        # stream is buffered in flux and the socket can be read directly
+        self.m_conn.sock.settimeout(1.0)
+        if flux.chunked:
+            return ChunkedReader(self.m_conn.sock.recv).read
+        return self.m_conn.sock.recv
 
-                # store information
-                # print '%s: %s = %s' % (index,field,value)
-                dcmpd[field] = value
-            else:
-                field = indice_subscriptions[numind-57]
+    def run(self):
+        while self.m_running:
+            self.m_datalock.acquire()
+            try:
+                if not self.m_subscriptions or not itrade_config.isConnected():
+                    self.m_datalock.wait(1.0)
+                    continue
+                generation = self.m_generation
+                self.m_datalock.wait(STREAM_BATCH)
+                if generation!=self.m_generation:
+                    # more subscriptions are coming
+                    continue
+                generation,table,topics = self.topics()
+            finally:
+                self.m_datalock.release()
+
+            read = self.open(topics)
+            if read==None:
+                self.close()
+                time.sleep(STREAM_RETRY)
+                continue
+
+            self.m_connected = True
+            decoder = FortuneoDecoder()
+            try:
+                while self.m_running and generation==self.m_generation:
+                    try:
+                        chunk = read(STREAM_CHUNK)
+                    except socket.timeout:
+                        continue
+                    if not chunk:
+                        # closed by the server
+                        time.sleep(STREAM_REOPEN)
+                        break
+                    self.dispatch(decoder.feed(chunk),table)
+            except (socket.error,httplib.HTTPException),e:
+                info('LiveUpdate_fortuneo: stream failure %s' % e)
+                time.sleep(STREAM_RETRY)
+            self.close()
+
+    def close(self):
+        self.m_connected = False
+        if self.m_conn:
+            self.m_conn.close()
+        self.m_conn = None
 
-                # store information
-                # print '%s: %s = %s' % (index,field,value)
-                # indice[field] = value
+    def dispatch(self,frames,table):
+        # store the fields of the frames by ISIN and wake up getdata()
+        if not frames:
+            return
+        updated = {}
+        self.m_datalock.acquire()
+        try:
+            for index,value in frames:
+                try:
+                    isin,field = table[int(index,36)]
+                except (ValueError,IndexError):
+                    debug('LiveUpdate_fortuneo: unknown index %s',index)
+                    continue
+                d = self.m_dcmpd.get(isin)
+                if d==None:
+                    d = self.m_dcmpd[isin] = default_fields.copy()
+                d[field] = value
+                updated[isin] = d
+
+            for isin,d in updated.items():
+                if d.has_key('CSA_HD_COURS'):
+                    try:
+                        self.m_clock[isin] = self.convertClock(d['CSA_HD_COURS'][8:])
+                    except ValueError:
+                        pass
+            self.m_datalock.notifyAll()
+        finally:
+            self.m_datalock.release()
 
-            if index == '01N':
-                break
+    # ---[ code to get data ] ---
 
-        # close the stream
-        flux.close()
+    def convertClock(self,clock):
+        clo = clock[:-3]
+        min = clo[-2:]
+        hour = clo[:-3]
+        val = (int(hour)*60) + int(min)
+        #print clo,hour,min,val
+        if val>self.m_lastclock:
+            #print "lastclock was :",self.m_lastclock," then is : ",val
+            self.m_lastclock = val
+        return "%d:%02d" % (val/60,val%60)
 
-        # usefull information ?
-        if not dcmpd.has_key('CSA_IND_ETAT'):
-            info("LiveUpdate_fortuneo:getdata quote:%s UNKNOWN QUOTE? or WRONG PLACE?" % quote)
+    def format(self,quote):
+        d = self.m_dcmpd.get(quote.isin())
+        if d==None:
             return None
 
-        # store in cache
-        self.m_dcmpd[isin] = dcmpd
-
         # extrack date
-        if not dcmpd.has_key('CSA_HD_COURS') or not dcmpd.has_key('CSA_CRS_PREMIER'):
+        if not d.has_key('CSA_HD_COURS') or not d.has_key('CSA_CRS_PREMIER'):
             info("LiveUpdate_fortuneo:getdata quote:%s CLOSED" % quote)
             return None
 
-        cl = dcmpd['CSA_HD_COURS']
-        dt = cl[:8]
+        cl = d['CSA_HD_COURS']
         dt = '20' + cl[6:8] + '-' + cl[3:5] + '-' + cl[0:2]
 
-        # extract clock
-        self.m_clock[isin] = self.convertClock(cl[8:])
-        #print 'clock:',self.m_clock[isin]
-
         # ISIN;DATE;OPEN;HIGH;LOW;CLOSE;VOLUME
         data = (
           quote.key(),
           dt,
-          dcmpd['CSA_CRS_PREMIER'],
-          dcmpd['CSA_CRS_HAUT'],
-          dcmpd['CSA_CRS_BAS'],
-          dcmpd['CSA_CRS_DERNIER'],
-          dcmpd['CSA_VOL_JOUR']
+          d['CSA_CRS_PREMIER'],
+          d['CSA_CRS_HAUT'],
+          d['CSA_CRS_BAS'],
+          d['CSA_CRS_DERNIER'],
+          d['CSA_VOL_JOUR']
         )
-        data = map(lambda (val): '%s' % str(val), data)
-        data = string.join(data, ';')
-        return data
+        return string.join(data, ';')
+
+    def getdata(self,quote):
+        # first call for a quote : wait for its first fields on the stream
+        if not self.m_running:
+            raise('LiveUpdate_fortuneo:no connection / missing connect() call !')
+            return None
+
+        self.subscribe(quote)
+
+        isin = quote.isin()
+        self.m_datalock.acquire()
+        try:
+            limit = time.time() + itrade_config.connectionTimeout
+            while self.m_running and not self.m_dcmpd.has_key(isin):
+                remaining = limit - time.time()
+                if remaining<=0:
+                    info("LiveUpdate_fortuneo:getdata quote:%s UNKNOWN QUOTE? or WRONG PLACE?" % quote)
+                    return None
+                self.m_datalock.wait(remaining)
+            return self.format(quote)
+        finally:
+            self.m_datalock.release()
 
     # ---[ cache management on data ] ---
 
     def getcacheddata(self,quote):
-        # no cache
-        return None
+        # fields of the stream (a new quote is added to the subscriptions)
+        self.subscribe(quote)
+        self.m_datalock.acquire()
+        try:
+            return self.format(quote)
+        finally:
+            self.m_datalock.release()
 
     def iscacheddataenoughfreshq(self):
-        # no cache
-        return False
+        # the stream pushes the updates : its fields are always fresh
+        return self.m_connected
 
     def cacheddatanotfresh(self):
         # no cache
@@ -930,7 +1078,7 @@ def test(ticker):
 
         state = gLiveFortuneo.getstate()
         if state:
-            debug("state=%s" % (state))
+            debug("state=%s",state)
 
             quote = quotes.lookupTicker(ticker,'EURONEXT')
             data = gLiveFortuneo.getdata(quote)
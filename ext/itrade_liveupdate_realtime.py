@@ -31,6 +31,7 @@
 #
 # History       Rev   Description
 # 2005-03-25    dgil  Wrote it from scratch
+# 2026-10-19    agent symbols resolved on demand (symbols_bourso.txt)
 # ============================================================================
 
 # ============================================================================
@@ -43,8 +44,11 @@ import re
 import thread
 import string
 import time
+from time import time as now
 import urllib2
+import Queue
 import cPickle
+import threading
 
 # iTrade system
 import itrade_config
@@ -56,6 +60,148 @@ from itrade_market import yahooTicker,convertConnectorTimeToPlaceTime
 from itrade_connection import ITradeConnection
 from datetime import *
 
+# ============================================================================
+# SymbolResolver
+#
+#   isin -> boursorama symbol, resolved on the first live request of a quote
+#   by a small pool of workers (the live request does not wait : the next one
+#   gets the symbol). Each entry has its own age : a symbol is searched again
+#   after SYMBOL_TTL, an isin without symbol after UNKNOWN_TTL (the old
+#   symbol is used while searching).
+#
+# File format (usrdata/symbols_bourso.txt) - one line by resolution, the
+# last line of an isin wins (the file is rewritten when too many lines) :
+#   <isin>;<symbol or empty>;<resolution time>
+# ============================================================================
+
+SYMBOL_TTL = 30*24*3600
+UNKNOWN_TTL = 24*3600
+RESOLVER_WORKERS = 4
+
+def searchSymbol(isin):
+    # boursorama symbol of an isin ('' if not found, None on network failure)
+    req = urllib2.Request('http://www.boursorama.com/recherche/index.phtml?search%5Bquery%5D=' + isin)
+    req.add_header('User-Agent', 'Mozilla/5.0 (Windows; U; Windows NT 5.1; en-US; rv:1.7.5) Gecko/20041202 Firefox/1.0')
+    try:
+        f = urllib2.urlopen(req,timeout=itrade_config.connectionTimeout)
+        data = f.read()
+        f.close()
+    except:
+        debug('LiveUpdate_Boursorama:unable to connect :-(')
+        return None
+
+    ch = 'class="bourse fit block" >'
+    b = data.find(ch)
+    if b == -1 or data.find('>Valeurs<',b) == -1:
+        return ''
+    c = data.find('class="exchange">Nyse Euro<',b)
+    if c == -1:
+        return ''
+    a = data.rfind('href="/cours.phtml?symbole=',0,c)
+    symbol = data[a+27:a+43]
+    return symbol[:symbol.find('" >')]
+
+class SymbolResolver(object):
+    def __init__(self,fn):
+        self.m_fn = fn
+        self.m_map = {}
+        self.m_lines = 0
+        self.m_pending = {}
+        self.m_queue = Queue.Queue()
+        self.m_workers = []
+        self.m_locker = threading.Lock()
+        self.load()
+
+    def importPickle(self,fn):
+        # symbols of the previous format (pickled dictionary)
+        try:
+            f = open(fn,'r')
+            old = cPickle.load(f)
+            f.close()
+        except:
+            return
+        self.m_locker.acquire()
+        try:
+            for isin,symbol in old.items():
+                if not self.m_map.has_key(isin):
+                    self.store(isin,symbol)
+        finally:
+            self.m_locker.release()
+
+    def load(self):
+        try:
+            f = open(self.m_fn,'r')
+            lines = f.readlines()
+            f.close()
+        except IOError:
+            return
+        for eachLine in lines:
+            item = eachLine.strip().split(';')
+            if len(item)==3:
+                try:
+                    self.m_map[item[0]] = (item[1],float(item[2]))
+                except ValueError:
+                    pass
+        self.m_lines = len(lines)
+
+    def store(self,isin,symbol):
+        # caller owns the lock
+        t = now()
+        self.m_map[isin] = (symbol,t)
+        try:
+            if self.m_lines > 2*len(self.m_map) + 16:
+                # compact
+                f = open(self.m_fn,'w')
+                for k,(s,st) in self.m_map.items():
+                    f.write('%s;%s;%.0f\n' % (k,s,st))
+                self.m_lines = len(self.m_map)
+            else:
+                f = open(self.m_fn,'a')
+                f.write('%s;%s;%.0f\n' % (isin,symbol,t))
+                self.m_lines = self.m_lines + 1
+            f.close()
+        except IOError:
+            info("SymbolResolver::store() can't write %s" % self.m_fn)
+
+    def lookup(self,isin):
+        # symbol of the isin or None (unknown yet / no symbol)
+        self.m_locker.acquire()
+        try:
+            e = self.m_map.get(isin)
+            if e:
+                symbol,t = e
+                if symbol:
+                    expired = now()-t > SYMBOL_TTL
+                else:
+                    expired = now()-t > UNKNOWN_TTL
+            else:
+                symbol = None
+                expired = True
+            if expired and not self.m_pending.has_key(isin):
+                self.m_pending[isin] = True
+                self.m_queue.put(isin)
+                if len(self.m_workers) < RESOLVER_WORKERS:
+                    worker = threading.Thread(target=self.run,name='bourso-%d' % len(self.m_workers))
+                    worker.setDaemon(True)
+                    self.m_workers.append(worker)
+                    worker.start()
+        finally:
+            self.m_locker.release()
+        return symbol or None
+
+    def run(self):
+        while 1:
+            isin = self.m_queue.get()
+            symbol = searchSymbol(isin)
+            self.m_locker.acquire()
+            try:
+                del self.m_pending[isin]
+                if symbol!=None:
+                    debug('SymbolResolver: %s -> %s',isin,symbol)
+                    self.store(isin,symbol)
+            finally:
+                self.m_locker.release()
+
 # ============================================================================
 # LiveUpdate_RealTime()
 #
@@ -79,61 +225,10 @@ class LiveUpdate_RealTime(object):
                                            connectionTimeout = itrade_config.connectionTimeout
                                            )
         
-        try:
-            select_isin = []
-            self.m_isinsymbol = {}
-            symbol = ''
-        
-            # try to open dictionnary of ticker_bourso.txt
-            f = open(os.path.join(itrade_config.dirUserData,'ticker_bourso.txt'),'r')
-            self.m_isinsymbol = cPickle.load(f)
-            f.close()
-
-        except:
-            print 'Missing or invalid file: ticker_bourso.txt'
-
-            # read isin codes of properties.txt file in directory usrdata
-            try:
-                source = open(os.path.join(itrade_config.dirUserData,'properties.txt'),'r')
-                data = source.readlines()
-                source.close()
-                for linedata in data:
-                    if 'live;realtime' in linedata:
-                        isin = linedata[:linedata.find('.')]
-                        debug('isin:%s' % isin)
-                        select_isin.append(isin)
-                        debug('%s' % select_isin)
-
-                # extract pre_symbol
-                for isin in select_isin:
-                    req = urllib2.Request('http://www.boursorama.com/recherche/index.phtml?search%5Bquery%5D=' + isin)
-                    req.add_header('User-Agent', 'Mozilla/5.0 (Windows; U; Windows NT 5.1; en-US; rv:1.7.5) Gecko/20041202 Firefox/1.0')
-                    try:
-                        f = urllib2.urlopen(req)
-                        data = f.read()
-                        f.close()
-
-                        ch = 'class="bourse fit block" >'
-
-                        if data.find(ch)!= -1:
-                            b = data.find(ch)
-                            if data.find('>Valeurs<',b) != - 1:
-                                if data.find('class="exchange">Nyse Euro<',b) != -1:
-                                    c = data.find('class="exchange">Nyse Euro<',b)
-                                    a = data.rfind('href="/cours.phtml?symbole=',0,c)
-                                    symbol = data[a+27:a+43]
-                                    symbol = symbol[:symbol.find('" >')]
-                                    self.m_isinsymbol [isin] = symbol
-                                    debug('%s found and added in dictionary (%s)' % (isin,symbol))
-                    except:
-                        pass
-
-                dic = open(os.path.join(itrade_config.dirUserData,'ticker_bourso.txt'), 'w')
-                cPickle.dump(self.m_isinsymbol,dic)
-                dic.close()
-
-            except:
-                pass
+        # isin -> symbol : resolved on demand
+        self.m_resolver = SymbolResolver(os.path.join(itrade_config.dirUserData,'symbols_bourso.txt'))
+        if not self.m_resolver.m_map:
+            self.m_resolver.importPickle(os.path.join(itrade_config.dirUserData,'ticker_bourso.txt'))
 
     # ---[ reentrant ] ---
     def acquire(self):
@@ -219,54 +314,18 @@ class LiveUpdate_RealTime(object):
     
     def getdata(self,quote):
         self.m_connected = False
-        debug("LiveUpdate_Bousorama:getdata quote:%s market:%s" % (quote,self.m_market))
+        debug("LiveUpdate_Bousorama:getdata quote:%s market:%s",quote,self.m_market)
 
         isin = quote.isin()
 
-        # add a value, default is yahoo connector
         # with boursorama realtime connector, must have pre_symbol to extract quote
-
-        if isin != '' :
-            if  not isin in self.m_isinsymbol:
-
-                req = urllib2.Request('http://www.boursorama.com/recherche/index.phtml?search%5Bquery%5D=' + isin)
-                req.add_header('User-Agent', 'Mozilla/5.0 (Windows; U; Windows NT 5.1; en-US; rv:1.7.5) Gecko/20041202 Firefox/1.0')
-                
-                try: 
-                    f = urllib2.urlopen(req)
-                    data = f.read()
-                    f.close()
-                        
-                    ch = 'class="bourse fit block" >'
-
-                    if data.find(ch)!= -1:
-                        b = data.find(ch)
-                        if data.find('>Valeurs<',b) != - 1:
-                            if data.find('class="exchange">Nyse Euro<',b) != -1:
-                                c = data.find('class="exchange">Nyse Euro<',b)
-                                a = data.rfind('href="/cours.phtml?symbole=',0,c)
-                                symbol = data[a+27:a+43]
-                                symbol = symbol[:symbol.find('" >')]
-                                self.m_isinsymbol [isin] = symbol
-                                debug('%s found and added in dictionary (%s)' % (isin,symbol))
-                                dic = open(os.path.join(itrade_config.dirUserData,'ticker_bourso.txt'), 'w')
-                                cPickle.dump(self.m_isinsymbol,dic)
-                                dic.close()
-                            else:
-                                return None
-                        else:
-                            return None
-                    else:
-                        return None
-
-                except:
-                    debug('LiveUpdate_Boursorama:unable to connect :-(')
-                    return None
-        else:
+        if isin == '':
             return None
-
-        symbol = self.m_isinsymbol[isin]
-        debug('Symbole=%s' % symbol)
+        symbol = self.m_resolver.lookup(isin)
+        if symbol == None:
+            # unknown yet (being searched) or not on boursorama
+            return None
+        debug('Symbole=%s',symbol)
 
         # extract all datas
 
@@ -478,7 +537,7 @@ def test(ticker):
 
         state = gLiveRealTime.getstate()
         if state:
-            debug("state=%s" % (state))
+            debug("state=%s",state)
 
             quote = quotes.lookupTicker(ticker,'EURONEXT')
             if (quote):
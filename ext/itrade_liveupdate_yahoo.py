@@ -160,7 +160,7 @@ class LiveUpdate_yahoo(object):
         return "%d:%02d" % (mdatetime.hour,mdatetime.minute)
 
     def getdata(self,quote):
-        debug("LiveUpdate_yahoo:getdata quote:%s " % quote)
+        debug("LiveUpdate_yahoo:getdata quote:%s ",quote)
         self.m_connected = False
 
         sname = yahooTicker(quote.ticker(),quote.market(),quote.place())
@@ -264,10 +264,10 @@ class LiveUpdate_yahoo(object):
 
         volume = string.atoi (sdata[8])
         if volume<0:
-            debug('volume : invalid negative %d' % volume)
+            debug('volume : invalid negative %d',volume)
             return None
         if volume==0 and quote.list()!=QLIST_INDICES:
-            debug('volume : invalid zero value %d' % volume)
+            debug('volume : invalid zero value %d',volume)
             return None
         else:
             if value-change <= 0:
@@ -487,7 +487,7 @@ def test(ticker):
 
         state = gLiveYahoo.getstate()
         if state:
-            debug("state=%s" % (state))
+            debug("state=%s",state)
 
             quote = quotes.lookupTicker(ticker,'NASDAQ')
             data = gLiveYahoo.getdata(Quote)
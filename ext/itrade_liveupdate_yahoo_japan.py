@@ -343,10 +343,10 @@ class LiveUpdate_yahoojp(object):
 
             volume = string.atoi (sdata[8])
             if volume<0:
-                debug('volume : invalid negative %d' % volume)
+                debug('volume : invalid negative %d',volume)
                 return None
             if volume==0 and quote.list()!=QLIST_INDICES:
-                debug('volume : invalid zero value %d' % volume)
+                debug('volume : invalid zero value %d',volume)
                 return None
             else:
                 if value-change <= 0:
@@ -487,7 +487,7 @@ def test(ticker):
 
         state = gLiveYahoojp.getstate()
         if state:
-            debug("state=%s" % (state))
+            debug("state=%s",state)
 
             quote = quotes.lookupTicker(ticker,'TOKYO EXCHANGE')
             data = gLiveYahoojp.getdata(Quote)
@@ -76,7 +76,7 @@ class Login_boursorama(object):
                                            proxyAuth = itrade_config.proxyAuthentication,
                                            connectionTimeout = itrade_config.connectionTimeout
                                            )
-        debug('Boursorama login (%s) - ready to run' % self.m_default_host)
+        debug('Boursorama login (%s) - ready to run',self.m_default_host)
 
     # ---[ properties ] ---
 
@@ -69,7 +69,7 @@ class Login_fortuneo(object):
         self.m_trader_url = "/cgi-bin/webact/WebBank/scripts/FRT5.2/outils/traderQuotes/TraderQuotes.jsp?place_indice=025&plisin=025_FR0000130007&pageAccueil=synthese&BV_SessionID=%s&BV_EngineID=%s"
         self.m_logged = False
 
-        debug('Fortuneo login (%s) - ready to run' % self.m_default_host)
+        debug('Fortuneo login (%s) - ready to run',self.m_default_host)
 
     # ---[ properties ] ---
 
@@ -62,7 +62,8 @@ def Import_ListOfQuotes_ASX(quotes,market='ASX',dlg=None,x=0):
     connection = ITradeConnection(cookies = None,
                                proxy = itrade_config.proxyHostname,
                                proxyAuth = itrade_config.proxyAuthentication,
-                               connectionTimeout = itrade_config.connectionTimeout
+                               connectionTimeout = itrade_config.connectionTimeout,
+                               cacheTTL = itrade_config.httpCacheListTTL
                                )
 
     if market=='ASX':
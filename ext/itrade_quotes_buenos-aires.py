@@ -64,7 +64,8 @@ def Import_ListOfQuotes_BUE(quotes,market='BUENOS AIRES EXCHANGE',dlg=None,x=0):
         print 'Update %s list of symbols' % market
     connection=ITradeConnection(cookies=None,
                                 proxy=itrade_config.proxyHostname,
-                                proxyAuth=itrade_config.proxyAuthentication)
+                                proxyAuth=itrade_config.proxyAuthentication,
+                                cacheTTL=itrade_config.httpCacheListTTL)
 
     if market=='BUENOS AIRES EXCHANGE':
         url = 'http://www.bolsar.com/NET/Research/Especies/Acciones.aspx'
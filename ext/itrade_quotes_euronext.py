@@ -63,8 +63,8 @@ def Import_ListOfQuotes_Euronext(quotes,market='EURONEXT',dlg=None,x=0):
     connection = ITradeConnection(cookies = None,
                                proxy = itrade_config.proxyHostname,
                                proxyAuth = itrade_config.proxyAuthentication,
-                               connectionTimeout = max(45,itrade_config.connectionTimeout)
-
+                               connectionTimeout = max(45,itrade_config.connectionTimeout),
+                               cacheTTL = itrade_config.httpCacheListTTL
                                )
 
     nyse_euronext_market = {
@@ -63,7 +63,8 @@ def Import_ListOfQuotes_HKG(quotes,market='HONG KONG EXCHANGE',dlg=None,x=0):
         print 'Update %s list of symbols' % market
     connection=ITradeConnection(cookies=None,
                                 proxy=itrade_config.proxyHostname,
-                                proxyAuth=itrade_config.proxyAuthentication)
+                                proxyAuth=itrade_config.proxyAuthentication,
+                                cacheTTL=itrade_config.httpCacheListTTL)
 
     import xlrd
 
@@ -65,7 +65,8 @@ def Import_ListOfQuotes_KRX(quotes,market='KOREA STOCK EXCHANGE',dlg=None,x=0):
     connection = ITradeConnection(cookies = None,
                                proxy = itrade_config.proxyHostname,
                                proxyAuth = itrade_config.proxyAuthentication,
-                               connectionTimeout = itrade_config.connectionTimeout
+                               connectionTimeout = itrade_config.connectionTimeout,
+                               cacheTTL = itrade_config.httpCacheListTTL
                                )
 
 
@@ -144,7 +145,7 @@ def Import_ListOfQuotes_KRX(quotes,market='KOREA STOCK EXCHANGE',dlg=None,x=0):
         debug('Import_ListOfQuotes_KRX unable to connect :-(')
         return False
 
-    debug("status:%s reason:%s" %(response.status, response.reason))
+    debug("status:%s reason:%s",response.status, response.reason)
     if response.status != 200:
         debug('Import_ListOfQuotes_KRX:status!=200')
         return False
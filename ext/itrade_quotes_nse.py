@@ -65,7 +65,8 @@ def Import_ListOfQuotes_NSE(quotes,market='NATIONAL EXCHANGE OF INDIA',dlg=None,
     connection = ITradeConnection(cookies = None,
                                proxy = itrade_config.proxyHostname,
                                proxyAuth = itrade_config.proxyAuthentication,
-                               connectionTimeout = itrade_config.connectionTimeout
+                               connectionTimeout = itrade_config.connectionTimeout,
+                               cacheTTL = itrade_config.httpCacheListTTL
                                )
 
     if market=='NATIONAL EXCHANGE OF INDIA':
@@ -109,7 +110,7 @@ def Import_ListOfQuotes_NSE(quotes,market='NATIONAL EXCHANGE OF INDIA',dlg=None,
         debug('Import_ListOfQuotes_NSE unable to connect :-(')
         return False
 
-    debug("status:%s reason:%s" %(response.status, response.reason))
+    debug("status:%s reason:%s",response.status, response.reason)
     if response.status != 200:
         debug('Import_ListOfQuotes_NSE:status!=200')
         return False
@@ -50,6 +50,12 @@ import itrade_ext
 import itrade_import
 import itrade_portfolio
 import itrade_matrix
+import itrade_alerts_rules
+import itrade_screener
+import itrade_profile
+import itrade_daemon
+import itrade_snapshot
+import itrade_replay
 
 # ============================================================================
 # Usage
@@ -67,6 +73,18 @@ def usage():
     print "--quote=<n>  select a quote by its isin                      "
     print "--ticker=<n> select a quote by its ticker                    "
     print
+    print "--screen=<e> screen the cached quotes (ex: 'rsi14<30')      "
+    print "--market=<m> restrict the screener to a market               "
+    print "--sortby=<e> rank the screener results (ex: '-percent')      "
+    print
+    print "--profile    time the main operations (report in reports/)   "
+    print
+    print "--daemon     run headless : live update and local JSON API     "
+    print "--port=<n>   port of the JSON API (default 8089)              "
+    print
+    print "--record=<d> record the connectors answers in a fixtures folder"
+    print "--replay=<u> request the connectors from a stub server URL    "
+    print
     print "--lang=<l>   select the language to be used (fr,us,...)      "
     print
     print "--user=<p>   select userdata/ specific folder                "
@@ -82,7 +100,7 @@ def usage():
 
 def main():
     try:
-        opts, args = getopt.getopt(sys.argv[1:], "xeho:vt:iq:f:l:du:", ["verbose","help", "output=", "ticker=", "quote=","file=","lang=","user=","nopsyco","nowxversion"])
+        opts, args = getopt.getopt(sys.argv[1:], "xeho:vt:iq:f:l:du:", ["verbose","help", "output=", "ticker=", "quote=","file=","lang=","user=","nopsyco","nowxversion","screen=","market=","sortby=","profile","daemon","port=","record=","replay="])
     except getopt.GetoptError:
         # print help information and exit:
         usage()
@@ -99,6 +117,24 @@ def main():
     vticker = None
     vquote  = None
 
+    vscreen = None
+    vmarket = None
+    vsortby = None
+
+    vdaemon = False
+    vport = None
+
+    # profiling and record/replay first : options below can run the commands
+    for o, a in opts:
+        if o == "--profile":
+            itrade_profile.startProfiling()
+
+        if o == "--record":
+            itrade_replay.startRecording(a)
+
+        if o == "--replay":
+            itrade_replay.startReplay(a)
+
     lang = gMessage.getAutoDetectedLang('us')
     for o, a in opts:
 
@@ -128,6 +164,7 @@ def main():
                     itrade_import.cmdline_importMatrixFromFile(matrix,file)
                 else:
                     itrade_import.cmdline_importMatrixFromInternet(matrix)
+                itrade_snapshot.publishMatrix(matrix,itrade_snapshot.snapshotName('default','import'))
             wx = False
 
         if o == "-h" or o == "--help":
@@ -162,6 +199,23 @@ def main():
         if o == "-q" or o == "--quote":
             vquote = a
 
+        if o == "--screen":
+            vscreen = a
+            wx = False
+
+        if o == "--market":
+            vmarket = a
+
+        if o == "--sortby":
+            vsortby = a
+
+        if o == "--daemon":
+            vdaemon = True
+            wx = False
+
+        if o == "--port":
+            vport = int(a)
+
     # Import Psyco if available
     if not nopsyco:
         try:
@@ -184,6 +238,7 @@ def main():
     # init modules
     itrade_quotes.initQuotesModule()
     itrade_portfolio.initPortfolioModule()
+    itrade_alerts_rules.initAlertRulesModule()
 
     # use the correct pack language
     if itrade_config.lang == 255:
@@ -203,6 +258,12 @@ def main():
             print 'quote %s not found ! format is : <ISINorTICKER>.<EXCHANGE>.<PLACE>' % vquote
             sys.exit()
 
+    if vscreen:
+        itrade_screener.cmdline_screen(vscreen,vmarket,vsortby)
+
+    if vdaemon:
+        itrade_daemon.cmdline_daemon(vport)
+
     if wx:
         import itrade_wxmain
         itrade_wxmain.start_iTradeWindow()
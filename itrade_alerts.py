@@ -30,6 +30,7 @@
 #
 # History       Rev   Description
 # 2005-10-20    dgil  Wrote it from scratch
+# 2026-10-19    agent append fired alerts to the file (appendAlert)
 # ============================================================================
 
 # ============================================================================
@@ -52,10 +53,12 @@ import itrade_csv
 
 ALERT_TYPE_INFO_QUOTE = 0
 ALERT_TYPE_INFO_SRD = 1
+ALERT_TYPE_INFO_RULE = 2
 
 alert_type_desc = {
     ALERT_TYPE_INFO_QUOTE : 'alert_type_info_quote',
-    ALERT_TYPE_INFO_SRD : 'alert_type_info_srd'
+    ALERT_TYPE_INFO_SRD : 'alert_type_info_srd',
+    ALERT_TYPE_INFO_RULE : 'alert_type_info_rule'
     }
 
 # ============================================================================
@@ -165,6 +168,21 @@ class Alerts(object):
             self.m_dirty = True
             return alert
 
+    def appendAlert(self,type,source,datation,title,desc,link,isin):
+        # the new alert is appended to the file : the store is not dirty
+        dirty = self.m_dirty
+        alert = self.newAlert(type,source,datation,title,desc,link,isin)
+        if alert:
+            self.m_dirty = dirty
+            fn = os.path.join(itrade_config.dirUserData,'alerts.txt')
+            try:
+                f = open(fn,'a')
+                f.write('%s\n' % alert.__repr__())
+                f.close()
+            except IOError:
+                print "can't append to %s !" % fn
+        return alert
+
     def delAlert(self,ref):
         if self.existAlert(ref):
             del self.m_alerts[ref]
@@ -254,7 +272,7 @@ class Alerts(object):
             warning("Alerts: can't register %s:%s : already registered !" % (name,plugin))
             return False
         self.m_plugins[name] = plugin
-        debug('Alerts: register %s:%s : ok' % (name,plugin))
+        debug('Alerts: register %s:%s : ok',name,plugin)
         return True
 
     def numOfPlugins(self):
@@ -284,6 +302,7 @@ except NameError:
 
 registerAlertPlugin = alerts.register
 newAlert = alerts.newAlert
+appendAlert = alerts.appendAlert
 
 # ============================================================================
 # Test me
@@ -0,0 +1,355 @@
+#!/usr/bin/env python
+# ============================================================================
+# Project Name : iTrade
+# Module Name  : itrade_alerts_rules.py
+#
+# Description: Alert rules evaluated on live updates (price crosses,
+#              percent moves, moving average crossings, stops)
+#
+# The Original Code is iTrade code (http://itrade.sourceforge.net).
+#
+# The Initial Developer of the Original Code is Gilles Dumortier.
+#
+# Portions created by the Initial Developer are Copyright (C) 2004-2008 the
+# Initial Developer. All Rights Reserved.
+#
+# Contributor(s):
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; see http://www.gnu.org/licenses/gpl.html
+#
+# History       Rev   Description
+# 2026-10-19    agent Wrote it from scratch
+# ============================================================================
+
+# ============================================================================
+# Imports
+# ============================================================================
+
+# python system
+from datetime import *
+from bisect import bisect_left,bisect_right
+import logging
+
+# iTrade system
+from itrade_logging import *
+import itrade_csv
+from itrade_quotes import quotes,registerLiveListener
+from itrade_alerts import appendAlert,ALERT_TYPE_INFO_RULE
+
+# ============================================================================
+# Rule kind
+#
+#   PRICE_UP / PRICE_DOWN     close crosses value
+#   PERCENT_UP / PERCENT_DOWN percent vs previous close crosses value
+#   MA_UP / MA_DOWN           close crosses the moving average of period value
+#   STOP_LOSS / STOP_WIN      quote stops (not saved : follow Quote.setStops)
+# ============================================================================
+
+RULE_PRICE_UP = 'PU'
+RULE_PRICE_DOWN = 'PD'
+RULE_PERCENT_UP = 'CU'
+RULE_PERCENT_DOWN = 'CD'
+RULE_MA_UP = 'MU'
+RULE_MA_DOWN = 'MD'
+RULE_STOP_LOSS = 'SL'
+RULE_STOP_WIN = 'SW'
+
+rule_up = {
+    RULE_PRICE_UP       : True,
+    RULE_PRICE_DOWN     : False,
+    RULE_PERCENT_UP     : True,
+    RULE_PERCENT_DOWN   : False,
+    RULE_MA_UP          : True,
+    RULE_MA_DOWN        : False,
+    RULE_STOP_LOSS      : False,
+    RULE_STOP_WIN       : True,
+}
+
+rule_desc = {
+    RULE_PRICE_UP       : 'price crosses above',
+    RULE_PRICE_DOWN     : 'price crosses below',
+    RULE_PERCENT_UP     : 'variation crosses above',
+    RULE_PERCENT_DOWN   : 'variation crosses below',
+    RULE_MA_UP          : 'price crosses above MA',
+    RULE_MA_DOWN        : 'price crosses below MA',
+    RULE_STOP_LOSS      : 'stop loss hit',
+    RULE_STOP_WIN       : 'stop win hit',
+}
+
+# ============================================================================
+# Rule
+# ============================================================================
+
+class Rule(object):
+    def __init__(self,key,kind,value):
+        self.m_key = key
+        self.m_kind = kind
+        self.m_value = float(value)
+
+    def __repr__(self):
+        return '%s;%s;%s' % (self.m_key,self.m_kind,self.m_value)
+
+    def key(self):
+        return self.m_key
+
+    def kind(self):
+        return self.m_kind
+
+    def value(self):
+        return self.m_value
+
+    def isUp(self):
+        return rule_up[self.m_kind]
+
+    def isStop(self):
+        return self.m_kind in (RULE_STOP_LOSS,RULE_STOP_WIN)
+
+    def threshold(self,quote):
+        # price level of the rule for the current day (None if unknown)
+        if self.m_kind in (RULE_PRICE_UP,RULE_PRICE_DOWN,RULE_STOP_LOSS,RULE_STOP_WIN):
+            return self.m_value
+        if self.m_kind in (RULE_PERCENT_UP,RULE_PERCENT_DOWN):
+            pc = quote.nv_prevclose()
+            if pc:
+                return pc * (1.0 + self.m_value/100.0)
+            return None
+        if self.m_kind in (RULE_MA_UP,RULE_MA_DOWN):
+            if quote.trades()==None or quote.trades().lasttrade()==None:
+                return None
+            return quote.nv_ma(int(self.m_value))
+        return None
+
+    def title(self):
+        return rule_desc[self.m_kind]
+
+    def description(self):
+        if self.m_kind in (RULE_MA_UP,RULE_MA_DOWN):
+            return '%s%d' % (rule_desc[self.m_kind],int(self.m_value))
+        if self.m_kind in (RULE_PERCENT_UP,RULE_PERCENT_DOWN):
+            return '%s %.2f%%' % (rule_desc[self.m_kind],self.m_value)
+        return '%s %.2f' % (rule_desc[self.m_kind],self.m_value)
+
+# ============================================================================
+# QuoteRules
+#
+#   rules of one quote compiled to thresholds sorted by price, one array for
+#   upward and one for downward crossings. Dynamic levels (percent, MA,
+#   stops) are recompiled only when the day, the previous close or the
+#   stops change.
+# ============================================================================
+
+class QuoteRules(object):
+    def __init__(self,quote):
+        self.m_quote = quote
+        self.m_rules = []
+        self.m_last = None
+        self.m_signature = None
+        self.m_upKeys = []
+        self.m_upRules = []
+        self.m_dnKeys = []
+        self.m_dnRules = []
+
+    def add(self,rule):
+        self.m_rules.append(rule)
+        self.m_signature = None
+
+    def remove(self,rule):
+        self.m_rules.remove(rule)
+        self.m_signature = None
+
+    def rules(self):
+        return self.m_rules
+
+    def signature(self):
+        q = self.m_quote
+        tr = None
+        if q.trades():
+            tr = q.trades().lasttrade()
+        if tr:
+            tr = tr.date()
+        if q.hasStops():
+            stops = (q.nv_stoploss(),q.nv_stopwin())
+        else:
+            stops = None
+        return (tr,q.nv_prevclose(),stops)
+
+    def compile(self):
+        q = self.m_quote
+        rules = [r for r in self.m_rules if not r.isStop()]
+        if q.hasStops():
+            rules.append(Rule(q.key(),RULE_STOP_LOSS,q.nv_stoploss()))
+            rules.append(Rule(q.key(),RULE_STOP_WIN,q.nv_stopwin()))
+
+        up = []
+        dn = []
+        for eachRule in rules:
+            t = eachRule.threshold(q)
+            if t!=None and t>0.0:
+                if eachRule.isUp():
+                    up.append((t,eachRule))
+                else:
+                    dn.append((t,eachRule))
+        up.sort(key=lambda x: x[0])
+        dn.sort(key=lambda x: x[0])
+        self.m_upKeys = [t for t,r in up]
+        self.m_upRules = [r for t,r in up]
+        self.m_dnKeys = [t for t,r in dn]
+        self.m_dnRules = [r for t,r in dn]
+
+    def tick(self,price):
+        # returns the rules crossed between the last price and price
+        sig = self.signature()
+        if sig!=self.m_signature:
+            self.compile()
+            self.m_signature = sig
+
+        last = self.m_last
+        self.m_last = price
+        if last==None or price==last:
+            return []
+        if price>last:
+            # last < threshold <= price
+            i = bisect_right(self.m_upKeys,last)
+            j = bisect_right(self.m_upKeys,price)
+            return self.m_upRules[i:j]
+        else:
+            # price <= threshold < last
+            i = bisect_left(self.m_dnKeys,price)
+            j = bisect_left(self.m_dnKeys,last)
+            return self.m_dnRules[i:j]
+
+# ============================================================================
+# AlertRules
+#
+# File format (rules):
+#   <quote key>;<kind>;<value>
+#
+# File format (log, append only):
+#   <datetime>;<quote key>;<kind>;<value>;<price>
+# ============================================================================
+
+class AlertRules(object):
+    def __init__(self):
+        self.m_quotes = {}
+
+    def quoteRules(self,quote,bCreate=False):
+        if not self.m_quotes.has_key(quote.key()):
+            if not bCreate:
+                return None
+            self.m_quotes[quote.key()] = QuoteRules(quote)
+        return self.m_quotes[quote.key()]
+
+    def addRule(self,quote,kind,value):
+        rule = Rule(quote.key(),kind,value)
+        self.quoteRules(quote,True).add(rule)
+        return rule
+
+    def removeRule(self,quote,rule):
+        qr = self.quoteRules(quote)
+        if qr:
+            qr.remove(rule)
+
+    def listRules(self,quote=None):
+        if quote:
+            qr = self.quoteRules(quote)
+            if qr:
+                return qr.rules()
+            return []
+        lst = []
+        for eachQR in self.m_quotes.values():
+            lst.extend(eachQR.rules())
+        return lst
+
+    # ---[ file ] -----------------------------------------
+
+    def load(self,fn=None):
+        infile = itrade_csv.read(fn,os.path.join(itrade_config.dirUserData,'alerts.rules.txt'))
+        if infile:
+            for eachLine in infile:
+                item = itrade_csv.parse(eachLine,3)
+                if item and len(item)>=3 and rule_up.has_key(item[1]):
+                    quote = quotes.lookupKey(item[0])
+                    if quote:
+                        self.addRule(quote,item[1],item[2])
+                    else:
+                        info('AlertRules::load(): unknown quote %s' % item[0])
+
+    def save(self,fn=None):
+        rules = [r for r in self.listRules() if not r.isStop()]
+        itrade_csv.write(fn,os.path.join(itrade_config.dirUserData,'alerts.rules.txt'),rules)
+
+    def log(self,quote,rule,price):
+        fn = os.path.join(itrade_config.dirUserData,'alerts.log')
+        try:
+            f = open(fn,'a')
+            f.write('%s;%s;%s;%s;%.4f\n' % (datetime.now().strftime('%Y-%m-%d %H:%M:%S'),quote.key(),rule.kind(),rule.value(),price))
+            f.close()
+        except IOError:
+            print "can't append to %s !" % fn
+
+    # ---[ live ] -----------------------------------------
+
+    def tick(self,quote):
+        qr = self.m_quotes.get(quote.key())
+        if qr==None:
+            if not quote.hasStops():
+                return
+            # stops are compiled even if the quote has no other rule
+            qr = self.quoteRules(quote,True)
+        price = quote.nv_close()
+        if not price:
+            return
+        for eachRule in qr.tick(price):
+            self.fire(quote,eachRule,price)
+
+    def fire(self,quote,rule,price):
+        debug('AlertRules::fire %s %s at %.4f',quote.ticker(),rule,price)
+        self.log(quote,rule,price)
+        appendAlert(ALERT_TYPE_INFO_RULE,'Rule',date.today().strftime('%Y-%m-%d'),rule.title(),'%s : %s (%.4f)' % (quote.ticker(),rule.description(),price),None,quote.isin())
+
+# ============================================================================
+# Export singleton
+# ============================================================================
+
+try:
+    ignore(alertRules)
+except NameError:
+    alertRules = AlertRules()
+
+registerLiveListener(alertRules.tick)
+
+# ============================================================================
+# initAlertRulesModule()
+# ============================================================================
+
+def initAlertRulesModule():
+    alertRules.load()
+
+# ============================================================================
+# Test me
+# ============================================================================
+
+if __name__=='__main__':
+    setLevel(logging.INFO)
+
+    from itrade_quotes import initQuotesModule
+    initQuotesModule()
+
+    initAlertRulesModule()
+    for eachRule in alertRules.listRules():
+        print eachRule
+
+# ============================================================================
+# That's all folks !
+# ============================================================================
@@ -52,12 +52,17 @@ from itrade_datation import gCal,Datation
 
 class Alerts_SRD(object):
     def __init__(self):
-        pass
+        self.m_lastscan = None
 
     def scan(self,dlg,x):
         print 'SRD::scan(): dlg,x = %s,%d' % (dlg,x)
 
+        # the SRD calendar only changes with the day
         ajd = date.today()
+        if self.m_lastscan == ajd:
+            return
+        self.m_lastscan = ajd
+
         nb = 0
         while nb<21:
             if gCal.issrd(ajd):
@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# ============================================================================
+# Project Name : iTrade
+# Module Name  : itrade_arrays.py
+#
+# Description: Indicators computed on whole histories (numpy arrays)
+#
+# The Original Code is iTrade code (http://itrade.sourceforge.net).
+#
+# The Initial Developer of the Original Code is Gilles Dumortier.
+#
+# Portions created by the Initial Developer are Copyright (C) 2004-2008 the
+# Initial Developer. All Rights Reserved.
+#
+# Contributor(s):
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; see http://www.gnu.org/licenses/gpl.html
+#
+# History       Rev   Description
+# 2026-10-19    agent Wrote it from scratch
+# ============================================================================
+
+# ============================================================================
+# Imports
+# ============================================================================
+
+# python system
+import logging
+
+# numpy
+import numpy
+from numpy.lib.stride_tricks import as_strided
+
+# iTrade system
+from itrade_logging import *
+
+# ============================================================================
+# History
+#
+#   dense arrays of the existing trades of one quote, sorted by date :
+#       date (yyyymmdd integer), open, high, low, close, volume
+#
+#   Indicators below follow the definitions of itrade_trades.Trades (same
+#   periods, average over the available days at the beginning) but return
+#   one value per trade.
+# ============================================================================
+
+class History(object):
+    def __init__(self,dates,open,high,low,close,volume):
+        self.date = dates
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    def __len__(self):
+        return len(self.close)
+
+def loadHistory(fn,key=None,isin=None):
+    # read a cache file (KEY;DATE;OPEN;HIGH;LOW;CLOSE;VOLUME) directly
+    try:
+        f = open(fn,'r')
+        lines = f.readlines()
+        f.close()
+    except IOError:
+        return None
+
+    rows = {}
+    for eachLine in lines:
+        item = eachLine.strip().split(';')
+        if len(item)<7:
+            continue
+        if key!=None and item[0]!=key and (item[0]!=isin or item[0]==''):
+            continue
+        d = item[1]
+        try:
+            if d[4]=='-':
+                d = int(d[0:4])*10000 + int(d[5:7])*100 + int(d[8:10])
+            else:
+                d = int(d[0:8])
+            # NB: replace existing date (like Trades.add)
+            rows[d] = (float(item[2]),float(item[3]),float(item[4]),float(item[5]),float(item[6]))
+        except (ValueError,IndexError):
+            continue
+
+    if not rows:
+        return None
+    dates = numpy.array(sorted(rows.keys()))
+    data = numpy.array([rows[d] for d in dates])
+    data[data<0.0] = 0.0
+    return History(dates,data[:,0],data[:,1],data[:,2],data[:,3],data[:,4])
+
+def historyFromTrades(trades):
+    # dense arrays from the gCal indexed arrays of a Trades object
+    idx = numpy.nonzero(trades.m_inClose>=0.0)[0]
+    from itrade_datation import gCal
+    dates = numpy.array([int(gCal.date(i).strftime('%Y%m%d')) for i in idx],dtype=int)
+    return History(dates,trades.m_inOpen[idx],trades.m_inHigh[idx],trades.m_inLow[idx],trades.m_inClose[idx],trades.m_inVol[idx].astype(float))
+
+# ============================================================================
+# Windows
+# ============================================================================
+
+def windows(a,n,fill):
+    # (len(a),n) read-only view : row i is a[i-n+1..i], padded with fill
+    a = numpy.concatenate((numpy.empty(n-1,dtype=float),numpy.asarray(a,dtype=float)))
+    a[:n-1] = fill
+    s = a.strides[0]
+    return as_strided(a,shape=(len(a)-n+1,n),strides=(s,s))
+
+def rollmin(a,n):
+    return windows(a,n,numpy.inf).min(axis=1)
+
+def rollmax(a,n):
+    return windows(a,n,-numpy.inf).max(axis=1)
+
+# ============================================================================
+# MinMaxTable
+#
+#   sparse table of a serie : level k holds the min/max of the windows of
+#   2**k values. Built once in O(n log n), it answers the rolling min/max of
+#   any period with two lookups (every period shares the same table).
+# ============================================================================
+
+class MinMaxTable(object):
+    def __init__(self,a):
+        a = numpy.asarray(a,dtype=float)
+        self.m_len = len(a)
+        self.m_min = [a]
+        self.m_max = [a]
+        k = 1
+        while (1<<k) <= len(a):
+            h = 1<<(k-1)
+            lo = self.m_min[-1]
+            hi = self.m_max[-1]
+            self.m_min.append(numpy.minimum(lo[:-h],lo[h:]))
+            self.m_max.append(numpy.maximum(hi[:-h],hi[h:]))
+            k = k + 1
+
+    def _query(self,levels,op,n):
+        # window i covers [max(0,i-n+1) .. i]
+        i = numpy.arange(self.m_len)
+        start = numpy.maximum(i-n+1,0)
+        size = i - start + 1
+        k = numpy.zeros(self.m_len,dtype=int)
+        for j in range(1,len(levels)):
+            k[size >= (1<<j)] = j
+        r = numpy.empty(self.m_len)
+        for j in numpy.unique(k):
+            sel = k==j
+            lv = levels[j]
+            r[sel] = op(lv[start[sel]],lv[i[sel]-(1<<j)+1])
+        return r
+
+    def min(self,n):
+        return self._query(self.m_min,numpy.minimum,n)
+
+    def max(self,n):
+        return self._query(self.m_max,numpy.maximum,n)
+
+def cumsum0(a):
+    # cumulative sum with a leading 0.0 : sum(a[i:j]) == c[j]-c[i]
+    c = numpy.empty(len(a)+1)
+    c[0] = 0.0
+    numpy.cumsum(a,out=c[1:])
+    return c
+
+def ma(a,n,c=None):
+    # moving average (average of the available values for the first ones)
+    if c is None:
+        c = cumsum0(a)
+    i = numpy.arange(1,len(c))
+    lo = numpy.maximum(i-n,0)
+    return (c[i]-c[lo]) / (i-lo)
+
+# ============================================================================
+# Indicators
+# ============================================================================
+
+def rsi(close,n=14):
+    # Wilder smoothing like Trades.compute_rsi14() (sequential by nature)
+    out = numpy.empty(len(close))
+    h = 0.0
+    b = 0.0
+    prev = None
+    k = float(n-1)
+    for i in xrange(len(close)):
+        if prev!=None:
+            t = close[i]-prev
+            if t>0:
+                h = (k*h + t) / n
+                b = (k*b) / n
+            else:
+                h = (k*h) / n
+                b = (k*b - t) / n
+        prev = close[i]
+        if b==0.0:
+            out[i] = 100.0
+        else:
+            out[i] = 100.0 - (100.0/(1.0+(h/b)))
+    return out
+
+def stochastic(high,low,close,n=14,slow=3,d=5):
+    # %K smoothed on slow days and %D (moving average of %K on d days)
+    mc = ma(close,slow)
+    ml = ma(rollmin(low,n),slow)
+    mh = ma(rollmax(high,n),slow)
+    rng = mh - ml
+    k = numpy.where(rng>0.0,(mc-ml)/numpy.where(rng>0.0,rng,1.0)*100.0,50.0)
+    k = numpy.clip(k,0.0,100.0)
+    return k,ma(k,d)
+
+def bollinger(close,n=20,width=2.0):
+    m = ma(close,n)
+    m2 = ma(close*close,n)
+    sd = numpy.sqrt(numpy.maximum(m2-m*m,0.0))
+    return m-width*sd,m,m+width*sd
+
+def ovb(close,volume):
+    # on balance volume
+    sign = numpy.ones(len(close))
+    sign[1:] = numpy.where(close[1:]>=close[:-1],1.0,-1.0)
+    return numpy.cumsum(sign*volume)
+
+def percent(close):
+    out = numpy.zeros(len(close))
+    prev = close[:-1]
+    out[1:] = numpy.where(prev>0.0,(close[1:]/numpy.where(prev>0.0,prev,1.0))*100.0-100.0,0.0)
+    return out
+
+# ============================================================================
+# That's all folks !
+# ============================================================================
@@ -0,0 +1,392 @@
+#!/usr/bin/env python
+# ============================================================================
+# Project Name : iTrade
+# Module Name  : itrade_backtest.py
+#
+# Description: Backtest of trading rules over the history of a quote
+#
+# The Original Code is iTrade code (http://itrade.sourceforge.net).
+#
+# The Initial Developer of the Original Code is Gilles Dumortier.
+#
+# Portions created by the Initial Developer are Copyright (C) 2004-2008 the
+# Initial Developer. All Rights Reserved.
+#
+# Contributor(s):
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; see http://www.gnu.org/licenses/gpl.html
+#
+# History       Rev   Description
+# 2026-10-19    agent Wrote it from scratch
+# ============================================================================
+
+# ============================================================================
+# Imports
+# ============================================================================
+
+# python system
+import os
+import logging
+
+# numpy
+import numpy
+
+# iTrade system
+from itrade_logging import *
+import itrade_config
+import itrade_arrays
+from itrade_brokers import Fees,loadBrokerFees
+
+# ============================================================================
+# BacktestError
+# ============================================================================
+
+class BacktestError(Exception):
+    pass
+
+# ============================================================================
+# Context
+#
+#   namespace of the signal expressions for one history. Series are numpy
+#   arrays (one value per trade) and functions return arrays :
+#
+#       open high low close volume
+#       ma(a,n) rsi(n) stok() stod() bollup(n,w) bolldn(n,w)
+#       highest(a,n) lowest(a,n) shift(a,n) cross(a,b) crossdown(a,b)
+#
+#   Signals combine comparisons with & | ~ (not 'and' / 'or').
+#   Indicators of the base series are memorized : one context can evaluate
+#   many rules (or many parameters) without computing them twice.
+# ============================================================================
+
+class Context(object):
+    def __init__(self,history):
+        self.m_history = history
+        self.m_memo = {}
+        self.m_series = {
+            'open'      : history.open,
+            'high'      : history.high,
+            'low'       : history.low,
+            'close'     : history.close,
+            'volume'    : history.volume,
+        }
+
+        self.m_namespace = {'__builtins__': {}, 'abs': numpy.abs}
+        self.m_namespace.update(self.m_series)
+        for eachName in ('ma','rsi','stok','stod','bollup','bolldn','highest','lowest','shift','cross','crossdown'):
+            self.m_namespace[eachName] = getattr(self,eachName)
+
+    def history(self):
+        return self.m_history
+
+    def __len__(self):
+        return len(self.m_history)
+
+    # ---[ memo ] -----------------------------------------
+
+    def seriesName(self,a):
+        for name,s in self.m_series.items():
+            if s is a:
+                return name
+        return None
+
+    def memo(self,key,fn,*args):
+        # key is None for temporary series : nothing to share
+        if key==None:
+            return fn(*args)
+        if not self.m_memo.has_key(key):
+            self.m_memo[key] = fn(*args)
+        return self.m_memo[key]
+
+    def cumsum(self,a):
+        name = self.seriesName(a)
+        return self.memo(name and ('cumsum',name),itrade_arrays.cumsum0,a)
+
+    def table(self,a):
+        name = self.seriesName(a)
+        return self.memo(name and ('table',name),itrade_arrays.MinMaxTable,a)
+
+    # ---[ indicators ] -----------------------------------
+
+    def ma(self,a,n):
+        name = self.seriesName(a)
+        return self.memo(name and ('ma',name,n),itrade_arrays.ma,a,n,self.cumsum(a))
+
+    def rsi(self,n=14):
+        return self.memo(('rsi',n),itrade_arrays.rsi,self.m_history.close,n)
+
+    def stochastic(self,n=14):
+        return self.memo(('sto',n),itrade_arrays.stochastic,self.m_history.high,self.m_history.low,self.m_history.close,n)
+
+    def stok(self,n=14):
+        return self.stochastic(n)[0]
+
+    def stod(self,n=14):
+        return self.stochastic(n)[1]
+
+    def bollinger(self,n=20,w=2.0):
+        # the moving averages of close and close**2 are shared by every width
+        close = self.m_history.close
+        m = self.ma(close,n)
+        c2 = self.memo(('cumsum','close2'),itrade_arrays.cumsum0,close*close)
+        m2 = self.memo(('ma','close2',n),itrade_arrays.ma,None,n,c2)
+        sd = numpy.sqrt(numpy.maximum(m2-m*m,0.0))
+        return m-w*sd,m,m+w*sd
+
+    def bollup(self,n=20,w=2.0):
+        return self.bollinger(n,w)[2]
+
+    def bolldn(self,n=20,w=2.0):
+        return self.bollinger(n,w)[0]
+
+    def highest(self,a,n):
+        name = self.seriesName(a)
+        if name==None:
+            return itrade_arrays.rollmax(a,n)
+        return self.memo(('max',name,n),self.table(a).max,n)
+
+    def lowest(self,a,n):
+        name = self.seriesName(a)
+        if name==None:
+            return itrade_arrays.rollmin(a,n)
+        return self.memo(('min',name,n),self.table(a).min,n)
+
+    def shift(self,a,n=1):
+        # value n trades before (NaN before the first one)
+        a = numpy.asarray(a,dtype=float)
+        r = numpy.empty(len(a))
+        r[:n] = numpy.nan
+        r[n:] = a[:len(a)-n]
+        return r
+
+    def cross(self,a,b):
+        # a crosses above b
+        a = numpy.asarray(a,dtype=float)
+        b = numpy.asarray(b,dtype=float)*numpy.ones(len(a))
+        r = numpy.zeros(len(a),dtype=bool)
+        r[1:] = (a[1:]>b[1:]) & (a[:-1]<=b[:-1])
+        return r
+
+    def crossdown(self,a,b):
+        return self.cross(-numpy.asarray(a,dtype=float),-numpy.asarray(b,dtype=float))
+
+    # ---[ signals ] --------------------------------------
+
+    def signal(self,expr):
+        # boolean mask of an expression (or an array already computed)
+        if isinstance(expr,basestring):
+            try:
+                r = eval(expr,self.m_namespace)
+            except (SyntaxError,NameError,TypeError),e:
+                raise BacktestError('invalid expression %s : %s' % (expr,e))
+        else:
+            r = expr
+        r = numpy.asarray(r)
+        if r.shape!=(len(self),):
+            raise BacktestError('expression %s is not a serie' % expr)
+        return r.astype(bool)
+
+# ============================================================================
+# positions()
+#
+#   in position mask from entry and exit masks : a position is opened on an
+#   entry and held until the next exit (exit wins when both are set)
+# ============================================================================
+
+def positions(entry,exit):
+    event = numpy.where(exit,-1,numpy.where(entry,1,0))
+    idx = numpy.where(event!=0,numpy.arange(len(event)),0)
+    idx = numpy.maximum.accumulate(idx)
+    return event[idx] > 0
+
+# ============================================================================
+# BacktestResult
+# ============================================================================
+
+class BacktestResult(object):
+    def __init__(self,dates,equity,inpos,trades,cash):
+        self.m_dates = dates
+        self.m_equity = equity
+        self.m_inpos = inpos
+        self.m_trades = trades
+        self.m_cash = cash
+
+    def __repr__(self):
+        return 'return=%.2f%% trades=%d win=%.1f%% maxdd=%.2f%% exposure=%.1f%% fees=%.2f' % (self.nv_return(),len(self.m_trades),self.nv_winrate(),self.nv_maxdrawdown(),self.nv_exposure(),self.nv_fees())
+
+    def dates(self):
+        return self.m_dates
+
+    def equity(self):
+        return self.m_equity
+
+    def trades(self):
+        # (entry index, exit index or None, shares, entry price, exit price, fees, profit)
+        return self.m_trades
+
+    def nv_return(self):
+        if len(self.m_equity)==0:
+            return 0.0
+        return (self.m_equity[-1]/self.m_cash - 1.0) * 100.0
+
+    def nv_maxdrawdown(self):
+        if len(self.m_equity)==0:
+            return 0.0
+        peak = numpy.maximum.accumulate(self.m_equity)
+        return ((self.m_equity/peak) - 1.0).min() * 100.0
+
+    def nv_winrate(self):
+        if not self.m_trades:
+            return 0.0
+        win = len([t for t in self.m_trades if t[6]>0.0])
+        return win * 100.0 / len(self.m_trades)
+
+    def nv_exposure(self):
+        if len(self.m_inpos)==0:
+            return 0.0
+        return self.m_inpos.mean() * 100.0
+
+    def nv_fees(self):
+        return sum([t[5] for t in self.m_trades])
+
+# ============================================================================
+# Backtest
+#
+#   long only, all the cash invested on each entry. Signals are computed on
+#   the close of a trade and executed on the open of the next one (close
+#   when bOnClose).
+# ============================================================================
+
+class Backtest(object):
+    def __init__(self,history,fees=None,cash=10000.0,bOnClose=False):
+        if isinstance(history,Context):
+            self.m_context = history
+        else:
+            self.m_context = Context(history)
+        if isinstance(fees,basestring):
+            fees = loadBrokerFees(fees)
+        self.m_fees = fees
+        self.m_cash = float(cash)
+        self.m_bOnClose = bOnClose
+
+    def context(self):
+        return self.m_context
+
+    def fee(self,v):
+        if self.m_fees:
+            return self.m_fees.nv_fee(v)
+        return 0.0
+
+    def run(self,entry,exit,stoploss=None):
+        # stoploss : percent under the entry price closing the position until
+        # the next entry signal
+        ctx = self.m_context
+        h = ctx.history()
+        n = len(h)
+
+        # position held at the end of each trade
+        want = positions(ctx.signal(entry),ctx.signal(exit))
+        held = numpy.zeros(n,dtype=bool)
+        if self.m_bOnClose:
+            held[:] = want
+            price = h.close
+        else:
+            held[1:] = want[:-1]
+            price = h.open
+        change = numpy.diff(numpy.concatenate(([0],held.astype(int),[0])))
+        buys = numpy.nonzero(change[:-1]>0)[0]
+        sells = numpy.nonzero(change[1:]<0)[0] + 1
+
+        # round trips : sequential only through the cash
+        cash = self.m_cash
+        dshares = numpy.zeros(n)
+        dcash = numpy.zeros(n)
+        dcash[0] = cash
+        trades = []
+        for b,s in zip(buys,sells):
+            pb = price[b]
+            if pb<=0.0:
+                continue
+            nb = int(cash/pb)
+            while nb>0 and nb*pb+self.fee(nb*pb)>cash:
+                nb = nb - 1
+            if nb==0:
+                continue
+            fb = self.fee(nb*pb)
+            cost = nb*pb + fb
+            dshares[b] += nb
+            dcash[b] -= cost
+            ps = None
+            if stoploss:
+                level = pb * (1.0 - stoploss/100.0)
+                hit = numpy.nonzero(h.low[b:s] <= level)[0]
+                if len(hit)>0:
+                    held[b+hit[0]:s] = False
+                    s = b + hit[0]
+                    ps = min(level,price[s])
+            if s<n:
+                if ps==None:
+                    ps = price[s]
+                fs = self.fee(nb*ps)
+                dshares[s] -= nb
+                dcash[s] += nb*ps - fs
+                cash = cash - cost + nb*ps - fs
+                trades.append((b,s,nb,pb,ps,fb+fs,nb*ps-fs-cost))
+            else:
+                # still open : valued at the last close
+                ps = h.close[-1]
+                cash = cash - cost
+                trades.append((b,None,nb,pb,ps,fb,nb*ps-cost))
+
+        # equity curve in one pass
+        equity = numpy.cumsum(dcash) + numpy.cumsum(dshares)*h.close
+        return BacktestResult(h.date,equity,held,trades,self.m_cash)
+
+# ============================================================================
+# backtestQuote()
+# ============================================================================
+
+def historyOfQuote(quote):
+    if quote.trades()==None:
+        quote.loadTrades()
+    return itrade_arrays.historyFromTrades(quote.trades())
+
+def backtestQuote(quote,entry,exit,fees=None,cash=10000.0):
+    return Backtest(historyOfQuote(quote),fees,cash).run(entry,exit)
+
+# ============================================================================
+# Test me
+# ============================================================================
+
+if __name__=='__main__':
+    setLevel(logging.INFO)
+
+    import time
+    numpy.random.seed(1)
+    n = 5000
+    close = 100.0 * numpy.exp(numpy.cumsum(numpy.random.normal(0.0,0.02,n)))
+    h = itrade_arrays.History(numpy.arange(n),close,close*1.01,close*0.99,close,numpy.ones(n)*1000.0)
+
+    t = time.clock()
+    bt = Backtest(h,'cortal01')
+    r = bt.run('cross(ma(close,20),ma(close,50))','crossdown(ma(close,20),ma(close,50))')
+    print 'MA20/MA50  : %s (%.1f ms)' % (r,(time.clock()-t)*1000.0)
+
+    t = time.clock()
+    r = bt.run('rsi(14)<30','rsi(14)>70')
+    print 'RSI 30/70  : %s (%.1f ms)' % (r,(time.clock()-t)*1000.0)
+
+# ============================================================================
+# That's all folks !
+# ============================================================================
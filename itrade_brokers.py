@@ -36,8 +36,14 @@
 # ============================================================================
 
 # python system
+import os
 import logging
 
+# iTrade system
+from itrade_logging import *
+import itrade_config
+import itrade_csv
+
 # ============================================================================
 # FeeRule
 #
@@ -45,7 +51,7 @@ import logging
 
 class FeeRule(object):
     def __init__(self,vfee,vmin,vmax,ref,bPercent=False):
-        debug('FeeRule::__init__(): vfee=%.2f vmin=%.2f vmax=%.2f bPercent=%s' %(vfee,vmin,vmax,bPercent))
+        debug('FeeRule::__init__(): vfee=%.2f vmin=%.2f vmax=%.2f bPercent=%s',vfee,vmin,vmax,bPercent)
         self.m_fee = vfee
         self.m_min = vmin
         self.m_max = vmax
@@ -86,7 +92,7 @@ class FeeRule(object):
 
 class Fees(object):
     def __init__(self,portfolio):
-        debug('Fees:__init__(%s)' % portfolio)
+        debug('Fees:__init__(%s)',portfolio)
         self.m_fees = []
         self.m_portfolio = portfolio
         self.m_ref = 0
@@ -95,7 +101,7 @@ class Fees(object):
         return self.m_portfolio
 
     def list(self):
-        return self.m_fees.values()
+        return self.m_fees
 
     def load(self,infile=None):
         infile = itrade_csv.read(infile,os.path.join(itrade_config.dirUserData,'default.fees.txt'))
@@ -107,10 +113,10 @@ class Fees(object):
                     self.addRule(item[0],item[1],item[2])
 
     def save(self,outfile=None):
-        itrade_csv.write(outfile,os.path.join(itrade_config.dirUserData,'default.fees.txt'),self.m_operations.values())
+        itrade_csv.write(outfile,os.path.join(itrade_config.dirUserData,'default.fees.txt'),self.m_fees)
 
     def addRule(self,sfee,smin,smax):
-        debug('Fees::add() before: 0:%s , 1:%s , 2:%s' % (sfee,smin,smax))
+        debug('Fees::add() before: 0:%s , 1:%s , 2:%s',sfee,smin,smax)
         #info('Fees::add() before: %s' % item)
         if sfee[-1:]=='%':
             bPercent = True
@@ -123,7 +129,7 @@ class Fees(object):
         fee = FeeRule(vfee,vmin,vmax,self.m_ref,bPercent)
         self.m_fees.append(fee)
         self.m_ref = self.m_ref + 1
-        debug('Fees::add() ref=%d after: %s' % (self.m_ref,self.m_fees))
+        debug('Fees::add() ref=%d after: %s',self.m_ref,self.m_fees)
         return self.m_ref
 
     def removeRule(self,ref):
@@ -133,6 +139,25 @@ class Fees(object):
     def getRule(self,ref):
         return self.m_fees[ref]
 
+    def nv_fee(self,v):
+        # first rule applying to the value v (no rule : no fee)
+        for eachFee in self.m_fees:
+            fee = eachFee.nv_fee(v)
+            if fee!=None:
+                return fee
+        return 0.0
+
+# ============================================================================
+# loadBrokerFees()
+#
+#   fee table of a broker (brokers/<broker>.fees.txt)
+# ============================================================================
+
+def loadBrokerFees(broker):
+    fees = Fees(None)
+    fees.load(os.path.join(itrade_config.dirBrokersData,'%s.fees.txt' % broker))
+    return fees
+
 # ============================================================================
 # Test
 # ============================================================================
@@ -140,6 +165,9 @@ class Fees(object):
 if __name__=='__main__':
     setLevel(logging.INFO)
 
+    fees = loadBrokerFees('cortal01')
+    for v in (1000.0,1500.0,2000.0,10000.0):
+        print '%.2f : %.2f' % (v,fees.nv_fee(v))
 
 # ============================================================================
 # That's all folks !
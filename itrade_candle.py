@@ -29,6 +29,7 @@
 #
 # History       Rev   Description
 # 2005-04-24    dgil  Wrote it from scratch
+# 2026-10-19    agent vectorized candle types and patterns of a whole history
 # ============================================================================
 
 # ============================================================================
@@ -38,6 +39,9 @@
 # python system
 import logging
 
+# numpy
+import numpy
+
 # iTrade system
 from itrade_logging import *
 from itrade_local import message
@@ -94,6 +98,28 @@ candle_type = {
     CANDLE_TYPE_MARUBOZU_BLACK_CLOSE: "closing black marubozu"
     }
 
+# ============================================================================
+# Candle Patterns (on two or three bars)
+# ============================================================================
+
+CANDLE_PATTERN_NONE              = 0
+CANDLE_PATTERN_BULLISH_ENGULFING = 1
+CANDLE_PATTERN_BEARISH_ENGULFING = 2
+CANDLE_PATTERN_BULLISH_HARAMI    = 3
+CANDLE_PATTERN_BEARISH_HARAMI    = 4
+CANDLE_PATTERN_MORNING_STAR      = 5
+CANDLE_PATTERN_EVENING_STAR      = 6
+
+candle_pattern = {
+    CANDLE_PATTERN_NONE:              "no pattern",
+    CANDLE_PATTERN_BULLISH_ENGULFING: "bullish engulfing",
+    CANDLE_PATTERN_BEARISH_ENGULFING: "bearish engulfing",
+    CANDLE_PATTERN_BULLISH_HARAMI:    "bullish harami",
+    CANDLE_PATTERN_BEARISH_HARAMI:    "bearish harami",
+    CANDLE_PATTERN_MORNING_STAR:      "morning star",
+    CANDLE_PATTERN_EVENING_STAR:      "evening star"
+    }
+
 # ============================================================================
 # Candle color()
 # ============================================================================
@@ -268,6 +294,109 @@ class Candle(object):
         else:
             self.m_type = CANDLE_TYPE_NOTYPE
 
+# ============================================================================
+# candle_types()
+#
+#   op,hi,lo,cl arrays of a whole history (days without trade are < 0.0)
+#
+#   returns the CANDLE_TYPE_x of every day in one pass (same rules as
+#   Candle.computeType()) : CANDLE_TYPE_UNKNOWN for days without trade
+# ============================================================================
+
+def candle_types(op,hi,lo,cl):
+    op = numpy.asarray(op,dtype=float)
+    hi = numpy.asarray(hi,dtype=float)
+    lo = numpy.asarray(lo,dtype=float)
+    cl = numpy.asarray(cl,dtype=float)
+
+    old = numpy.seterr(divide='ignore',invalid='ignore')
+    try:
+        doji = numpy.abs(1-(op/cl)) < threshold_doji
+        tombo = doji & (numpy.abs(1-(hi/cl)) < threshold_tombo)
+        tohba = doji & ~tombo & (numpy.abs(1-(cl/lo)) < threshold_tohba)
+    finally:
+        numpy.seterr(**old)
+
+    # lowest priority first : each rule overrides the previous ones
+    types = numpy.empty(len(cl),dtype=numpy.int8)
+    types.fill(CANDLE_TYPE_NOTYPE)
+    types[doji] = CANDLE_TYPE_DOJI
+    types[tombo] = CANDLE_TYPE_TOMBO
+    types[tohba] = CANDLE_TYPE_TOHBA
+    types[(lo==cl) & (hi==op)] = CANDLE_TYPE_MARUBOZU_BLACK
+    types[(hi==cl) & (lo==op)] = CANDLE_TYPE_MARUBOZU_WHITE
+    types[hi==lo] = CANDLE_TYPE_FLATFIX
+    types[cl<0.0] = CANDLE_TYPE_UNKNOWN
+    return types
+
+# ============================================================================
+# candle_patterns()
+#
+#   op,hi,lo,cl arrays of a whole history (days without trade are < 0.0)
+#
+#   returns the CANDLE_PATTERN_x completed on every day. Patterns are
+#   detected by comparing the arrays of the trading days shifted by one or
+#   two bars, i.e. the previous trading day and not the previous calendar
+#   day. A body is long when it is larger than the average body of the
+#   candle_period_average previous bars.
+# ============================================================================
+
+def candle_patterns(op,hi,lo,cl):
+    cl = numpy.asarray(cl,dtype=float)
+    patterns = numpy.zeros(len(cl),dtype=numpy.int8)
+
+    # trading days only
+    days = numpy.nonzero(cl>=0.0)[0]
+    n = len(days)
+    if n<2:
+        return patterns
+    o = numpy.asarray(op,dtype=float)[days]
+    c = cl[days]
+
+    body = numpy.abs(c-o)
+    top = numpy.maximum(o,c)
+    bottom = numpy.minimum(o,c)
+    white = c>o
+    black = c<o
+
+    # average body of the previous bars
+    cs = numpy.concatenate(([0.0],numpy.cumsum(body)))
+    i = numpy.arange(n)
+    first = numpy.maximum(i-candle_period_average,0)
+    count = numpy.maximum(i-first,1)
+    average = (cs[i]-cs[first])/count
+    average[0] = body[0]
+    longbody = body>=average
+
+    res = numpy.zeros(n,dtype=numpy.int8)
+
+    # two bars : p previous bar, x current bar
+    p = slice(0,n-1)
+    x = slice(1,n)
+
+    harami = longbody[p] & (top[x]<top[p]) & (bottom[x]>bottom[p])
+    r = res[x]
+    r[harami & black[p] & white[x]] = CANDLE_PATTERN_BULLISH_HARAMI
+    r[harami & white[p] & black[x]] = CANDLE_PATTERN_BEARISH_HARAMI
+
+    engulfing = (top[x]>=top[p]) & (bottom[x]<=bottom[p]) & (body[x]>body[p])
+    r[engulfing & black[p] & white[x]] = CANDLE_PATTERN_BULLISH_ENGULFING
+    r[engulfing & white[p] & black[x]] = CANDLE_PATTERN_BEARISH_ENGULFING
+
+    # three bars : f first bar, s star, x current bar
+    if n>=3:
+        f = slice(0,n-2)
+        s = slice(1,n-1)
+        x = slice(2,n)
+        middle = (o[f]+c[f])/2
+        star = longbody[f] & (body[s]<average[s]*threshold_star_body)
+        r = res[x]
+        r[star & black[f] & (top[s]<c[f]) & white[x] & (c[x]>middle)] = CANDLE_PATTERN_MORNING_STAR
+        r[star & white[f] & (bottom[s]>c[f]) & black[x] & (c[x]<middle)] = CANDLE_PATTERN_EVENING_STAR
+
+    patterns[days] = res
+    return patterns
+
 # ============================================================================
 # Test
 # ============================================================================
@@ -283,6 +412,16 @@ if __name__=='__main__':
     c = Candle(9.0,11.0,9.0,9.0)
     print 'candle: %s - %s = gravestone doji' % (c,c.type())
 
+    # open,high,low,close of a history (-1.0 : no trade on this day)
+    op = [10.0,-1.0,10.5, 9.5, 9.0, 8.0, 8.4,10.0, 9.6]
+    hi = [11.0,-1.0,10.6,10.7, 9.2, 8.05,10.8,10.2,10.1]
+    lo = [ 9.0,-1.0, 9.4, 9.3, 8.0, 7.8, 8.3, 9.4, 9.6]
+    cl = [10.0,-1.0, 9.5,10.6, 8.1, 7.9,10.7, 9.5, 9.7]
+    types = candle_types(op,hi,lo,cl)
+    patterns = candle_patterns(op,hi,lo,cl)
+    for i in range(len(cl)):
+        print '%d: %s - %s' % (i,candle_type[types[i]],candle_pattern[patterns[i]])
+
 # ============================================================================
 # That's all folks !
 # ============================================================================
@@ -176,6 +176,11 @@ dirExport = os.path.join(dirRoot, 'export')
 if not os.path.exists(dirExport):
     os.mkdir(dirExport)
 
+# directory for intraday ticks
+dirTicks = os.path.join(dirCacheData, 'ticks')
+if not os.path.exists(dirTicks):
+    os.mkdir(dirTicks)
+
 # directory for snapshots
 dirSnapshots = os.path.join(dirRoot, 'snapshots')
 if not os.path.exists(dirSnapshots):
@@ -202,6 +207,33 @@ refreshLive = 1.5
 # refresh in seconds for a currency view
 refreshCurrencyView = 15
 
+# headless daemon : local HTTP/JSON API
+daemonHost = '127.0.0.1'
+daemonPort = 8089
+
+# live updates within this delay (in seconds) share one snapshot
+snapshotDelay = 5
+
+# cache of the HTTP responses (see itrade_connection.ResponseCache) : size in
+# bytes, TTL in seconds of the lists of symbols
+httpCacheSize = 64*1024*1024
+httpCacheListTTL = 24*3600
+
+# record / replay of the connectors (see itrade_replay) : fixtures folder,
+# local server replacing all the hosts (None : real hosts), its default port
+dirFixtures = os.path.join(dirRoot, 'fixtures')
+baseUrlOverride = None
+replayPort = 8090
+
+# background jobs (see itrade_jobs) : worker threads, jobs running together
+# on the same connector
+jobWorkers = 6
+jobWorkersByConnector = 2
+
+# intraday ticks : days kept on disk, period (in seconds) of the intraday chart
+tickRetentionDays = 10
+intradayPeriod = 300
+
 # auto refresh the matrix view
 default_bAutoRefreshMatrixView = True
 global bAutoRefreshMatrixView
@@ -212,6 +244,9 @@ default_bAutoRefreshCurrencyView = True
 global bAutoRefreshCurrencyView
 bAutoRefreshCurrencyView = default_bAutoRefreshCurrencyView
 
+# repaints per second of the matrix panes on live updates
+matrixFrameRate = 4
+
 # matrix font size
 default_matrixFontSize = 2
 global matrixFontSize
@@ -38,31 +38,299 @@
 # ============================================================================
 
 # python system
+import os
 import base64
 import httplib
+import hashlib
 import urlparse
 import socket
 import time
 import string
-from gzip import GzipFile
-from StringIO import StringIO
+import zlib
+from datetime import date
+from cgi import parse_qsl
 from threading import Lock, currentThread
 from urllib import urlencode
 
 # iTrade system
+import itrade_config
 from itrade_logging import *
 
+# ============================================================================
+# ResponseCache
+#
+#   bodies of the responses stored in cache/http/<sha1 of key>.dat ; the key
+#   is the normalized URL (and the POST data). Each entry has its own TTL :
+#     CACHE_IMMUTABLE : never expires (i.e. closed historical range)
+#     0               : revalidated each time (conditional GET)
+#     n               : fresh during n seconds then revalidated
+#   The least recently used bodies are removed above itrade_config.httpCacheSize.
+#   The cache is bypassed while the connectors are recorded or replayed (see
+#   itrade_replay) : fixtures never reach it and every request is recorded.
+#
+# File format (cache/http/index.txt):
+#   <sha1>;<fetch time>;<last use>;<size>;<ttl>;<etag>;<last-modified>;<key>
+# ============================================================================
+
+CACHE_IMMUTABLE = -1
+
+class ResponseCache(object):
+    def __init__(self):
+        self.m_dir = os.path.join(itrade_config.dirCacheData,'http')
+        self.m_index = {}
+        self.m_size = 0
+        self.m_locker = Lock()
+        self.m_loaded = False
+        self.m_enabled = True
+
+    def enabled(self):
+        return self.m_enabled
+
+    def setEnabled(self, enabled):
+        self.m_enabled = enabled
+
+    # ---[ key ] ------------------------------------------
+
+    def key(self, url, data=None):
+        """normalized url (scheme and host in lower case, no default port, sorted query, no fragment) and POST data"""
+        (protocole, host, page, params, query, fragments) = urlparse.urlparse(url)
+        protocole = protocole.lower()
+        host = host.lower()
+        if (protocole, host[-3:]) == ('http', ':80') or (protocole, host[-4:]) == ('https', ':443'):
+            host = host[:host.rfind(':')]
+        query = urlencode(sorted(parse_qsl(query, True)))
+        key = urlparse.urlunparse((protocole, host, page or '/', params, query, ''))
+        if data:
+            if isinstance(data, dict):
+                data = urlencode(sorted(data.items()))
+            elif not [x for x in data.split('&') if '=' not in x]:
+                # form data : same key whatever the order of the fields
+                data = urlencode(sorted(parse_qsl(data, True)))
+            key = '%s POST %s' % (key, data)
+        return key.replace('\n', ' ')
+
+    def filename(self, h):
+        return os.path.join(self.m_dir, '%s.dat' % h)
+
+    # ---[ index ] ----------------------------------------
+
+    def load(self):
+        # caller owns the lock
+        self.m_loaded = True
+        try:
+            f = open(os.path.join(self.m_dir, 'index.txt'), 'r')
+            lines = f.readlines()
+            f.close()
+        except IOError:
+            return
+        for eachLine in lines:
+            item = eachLine.rstrip('\r\n').split(';', 7)
+            if len(item) == 8:
+                try:
+                    self.m_index[item[7]] = [item[0], float(item[1]), float(item[2]), int(item[3]), int(item[4]), item[5], item[6]]
+                    self.m_size = self.m_size + int(item[3])
+                except ValueError:
+                    pass
+
+    def save(self):
+        # caller owns the lock
+        try:
+            f = open(os.path.join(self.m_dir, 'index.txt'), 'w')
+            for key, (h, fetched, used, size, ttl, etag, modified) in self.m_index.items():
+                f.write('%s;%.0f;%.0f;%d;%d;%s;%s;%s\n' % (h, fetched, used, size, ttl, etag, modified, key))
+            f.close()
+        except IOError:
+            info("ResponseCache::save() can't write the index")
+
+    def entry(self, key, ttl=None):
+        """(body, fresh, etag, last-modified) of a key or None. Freshness uses ttl if given (the
+        TTL of the stored response otherwise)"""
+        self.m_locker.acquire()
+        try:
+            if not self.m_loaded:
+                self.load()
+            e = self.m_index.get(key)
+            if e == None:
+                return None
+            try:
+                f = open(self.filename(e[0]), 'rb')
+                body = f.read()
+                f.close()
+            except IOError:
+                self.remove(key)
+                return None
+            e[2] = time.time()
+            if ttl == None:
+                ttl = e[4]
+            fresh = ttl == CACHE_IMMUTABLE or time.time() - e[1] < ttl
+            return body, fresh, e[5], e[6]
+        finally:
+            self.m_locker.release()
+
+    def store(self, key, body, ttl, etag='', modified=''):
+        self.m_locker.acquire()
+        try:
+            if not self.m_loaded:
+                self.load()
+            if not os.path.exists(self.m_dir):
+                os.mkdir(self.m_dir)
+            self.remove(key)
+            h = hashlib.sha1(key).hexdigest()
+            try:
+                f = open(self.filename(h), 'wb')
+                f.write(body)
+                f.close()
+            except IOError:
+                info("ResponseCache::store() can't write %s" % h)
+                return
+            now = time.time()
+            self.m_index[key] = [h, now, now, len(body), ttl, etag.replace(';', ''), modified.replace(';', '')]
+            self.m_size = self.m_size + len(body)
+            self.evict()
+            self.save()
+        finally:
+            self.m_locker.release()
+
+    def revalidated(self, key, ttl):
+        """the server answered 304 : the body is fresh again"""
+        self.m_locker.acquire()
+        try:
+            e = self.m_index.get(key)
+            if e:
+                e[1] = time.time()
+                e[4] = ttl
+                self.save()
+        finally:
+            self.m_locker.release()
+
+    def remove(self, key):
+        # caller owns the lock
+        e = self.m_index.get(key)
+        if e:
+            del self.m_index[key]
+            self.m_size = self.m_size - e[3]
+            try:
+                os.remove(self.filename(e[0]))
+            except OSError:
+                pass
+
+    def evict(self):
+        # caller owns the lock : least recently used first
+        if self.m_size <= itrade_config.httpCacheSize:
+            return
+        lru = sorted(self.m_index.items(), key=lambda item: item[1][2])
+        for key, e in lru:
+            if self.m_size <= itrade_config.httpCacheSize:
+                break
+            debug('ResponseCache::evict %s', key)
+            self.remove(key)
+
+    def clear(self):
+        self.m_locker.acquire()
+        try:
+            if not self.m_loaded:
+                self.load()
+            for key in self.m_index.keys():
+                self.remove(key)
+            self.save()
+        finally:
+            self.m_locker.release()
+
+try:
+    ignore(gResponseCache)
+except NameError:
+    gResponseCache = ResponseCache()
+
+def historyTTL(datefin, ttl=0):
+    """TTL of a range of daily quotes : immutable when closed before today"""
+    if datefin < date.today():
+        return CACHE_IMMUTABLE
+    return ttl
+
+# ============================================================================
+# overrideUrl()
+#
+#   itrade_config.baseUrlOverride sends all the requests to a local server
+#   (see itrade_replay) : http://www.host.com/path?q is requested as
+#   <baseUrlOverride>/http/www.host.com/path?q
+# ============================================================================
+
+def overrideUrl(url):
+    base = itrade_config.baseUrlOverride
+    if not base or url.startswith(base):
+        return url
+    (protocole, host, page, params, query, fragments) = urlparse.urlparse(url)
+    url = '%s/%s/%s%s' % (base.rstrip('/'), protocole.lower(), host, page)
+    if query:
+        url = '%s?%s' % (url, query)
+    return url
+
+# ============================================================================
+# registerResponseObserver()
+#
+#   fn(url, data, status, content type, body) is called after each response
+#   received by ITradeConnection.getDataFromUrl() (see itrade_replay)
+# ============================================================================
+
+_responseObservers = []
+
+def registerResponseObserver(fn):
+    if fn not in _responseObservers:
+        _responseObservers.append(fn)
+
+def notifyResponse(url, data, status, ctype, body):
+    for eachObserver in _responseObservers:
+        eachObserver(url, data, status, ctype, body)
+
+# ============================================================================
+# ContentDecoder
+#
+#   incremental decoding of a Content-Encoding (gzip, deflate or identity) :
+#   the body is decompressed chunk by chunk while it is downloaded
+# ============================================================================
+
+class ContentDecoder(object):
+    def __init__(self, encoding):
+        encoding=(encoding or "").strip().lower()
+        self.m_raw=False
+        if encoding in ("gzip", "x-gzip"):
+            self.m_decompressor=zlib.decompressobj(16+zlib.MAX_WBITS)
+        elif encoding=="deflate":
+            self.m_decompressor=zlib.decompressobj()
+            # some servers send a raw deflate stream (no zlib header)
+            self.m_raw=True
+        else:
+            self.m_decompressor=None
+
+    def decompress(self, chunk):
+        if not self.m_decompressor:
+            return chunk
+        if self.m_raw:
+            self.m_raw=False
+            try:
+                return self.m_decompressor.decompress(chunk)
+            except zlib.error:
+                self.m_decompressor=zlib.decompressobj(-zlib.MAX_WBITS)
+        return self.m_decompressor.decompress(chunk)
+
+    def flush(self):
+        if not self.m_decompressor:
+            return ""
+        return self.m_decompressor.flush()
+
 # ============================================================================
 # ITradeConnection()
 # ============================================================================
 
 class ITradeConnection(object):
     """Class designed to handle request in HTTP 1.1"""
-    def __init__(self, cookies = None, proxy = None, proxyAuth = None, connectionTimeout = 20):
+    def __init__(self, cookies = None, proxy = None, proxyAuth = None, connectionTimeout = 20, cacheTTL = None):
         """@param cookies: cookie handler (instance of ITradeCookies class). If None, a private cookie
         handler is created.
         @param proxy: proxy host name or IP
-        @param proxyAuth: authentication string for proxy in the form 'user:password'"""
+        @param proxyAuth: authentication string for proxy in the form 'user:password'
+        @param cacheTTL: default TTL of the responses in gResponseCache (see ResponseCache). None
+        means no cache"""
 
         if cookies:
             self.m_cookies=cookies
@@ -87,41 +355,212 @@ class ITradeConnection(object):
         self.m_duration=0          # Duration of last request
         self.m_retrying=False      # Flag to indicate if we are retrying after connection failure
         self.m_locker=Lock()       # Lock to protect httplib strict cycle (get/response) in multithreading
-        self.m_defaultHeader={"acceptEncoding":"gzip, deflate",
-                              "accept":"*/*",
-                              "userAgent":"Mozilla/5.0 (compatible; iTrade)",
-                              "Connection":"Keep-Alive"} # Default HTTP header
+        self.m_cacheTTL=cacheTTL   # Default TTL of the cached responses (None : no cache)
+        self.m_defaultHeader={"Accept-Encoding":"gzip, deflate",
+                              "Accept":"*/*",
+                              "User-Agent":"Mozilla/5.0 (compatible; iTrade)",
+                              "Connection":"Keep-Alive"} # Default HTTP header (completed by the addon headers)
+
+    def getDataFromUrl(self, url, header=None, data=None, ttl=None):
+        """Thread safe method to get data from an URL. See put() and getData() method for details
+        @param ttl: TTL of the response in gResponseCache (optional, default is the cacheTTL of the
+        connection)"""
+        if ttl==None:
+            ttl=self.m_cacheTTL
+        if ttl!=None and gResponseCache.enabled():
+            return self.getCachedDataFromUrl(url, header, data, ttl)
 
-    def getDataFromUrl(self, url, header=None, data=None):
-        """Thread safe method to get data from an URL. See put() and getData() method for details"""
         self.m_locker.acquire()
         result=""
         try:
             self.put(url, header, data)
             result=self.getData()
+            if _responseObservers:
+                notifyResponse(url, data, self.getStatus(), self.response.getheader("Content-Type", ""), result)
         finally:
             self.m_locker.release()
         return result
 
-    def put(self, url, header=None, data=None):
+    def getCachedDataFromUrl(self, url, header, data, ttl):
+        """getDataFromUrl() through gResponseCache : fresh bodies are not requested, stale ones are
+        revalidated with their ETag / Last-Modified"""
+        key=gResponseCache.key(url, data)
+        cached=gResponseCache.entry(key, ttl)
+        if cached:
+            if cached[1]:
+                debug("ResponseCache: hit %s", key)
+                return cached[0]
+            header=self.conditionalHeader(header, cached)
+
+        self.m_locker.acquire()
+        try:
+            self.put(url, header, data)
+            if self.getStatus()==304 and cached:
+                debug("ResponseCache: not modified %s", key)
+                gResponseCache.revalidated(key, ttl)
+                return cached[0]
+            result=self.getData()
+            if _responseObservers:
+                notifyResponse(url, data, self.getStatus(), self.response.getheader("Content-Type", ""), result)
+            gResponseCache.store(key, result, ttl,
+                                 self.response.getheader("ETag", ""),
+                                 self.response.getheader("Last-Modified", ""))
+            return result
+        finally:
+            self.m_locker.release()
+
+    def getStoredDataFromUrl(self, url, header=None, data=None, ttl=0):
+        """getDataFromUrl() through gResponseCache falling back to the stored body (even stale)
+        when offline or when the request fails (i.e. news feeds)
+        @return: the body or None if never fetched"""
+        if itrade_config.isConnected():
+            try:
+                return self.getDataFromUrl(url, header, data, ttl)
+            except:
+                info("ITradeConnection: %s failed : stored body" % url)
+        if not gResponseCache.enabled():
+            return None
+        cached=gResponseCache.entry(gResponseCache.key(url, data))
+        if cached:
+            return cached[0]
+        return None
+
+    def conditionalHeader(self, header, cached):
+        """@return: header revalidating a stale entry of gResponseCache"""
+        body, fresh, etag, modified = cached
+        if header:
+            header=dict(header)
+        else:
+            header={}
+        if etag:
+            header["If-None-Match"]=etag
+        if modified:
+            header["If-Modified-Since"]=modified
+        return header
+
+    def iterData(self, url, header=None, data=None, ttl=None, size=8192):
+        """Thread safe generator of the body of an URL : decoded chunks are given while the
+        download is in progress (the connection stays locked until the end of the body).
+        Same parameters as getDataFromUrl()
+        @param size: size of the chunks read on the socket"""
+        if ttl==None:
+            ttl=self.m_cacheTTL
+        if not gResponseCache.enabled():
+            ttl=None
+        cached=None
+        if ttl!=None:
+            key=gResponseCache.key(url, data)
+            cached=gResponseCache.entry(key, ttl)
+            if cached:
+                if cached[1]:
+                    debug("ResponseCache: hit %s", key)
+                    yield cached[0]
+                    return
+                header=self.conditionalHeader(header, cached)
+
+        self.m_locker.acquire()
+        complete=False
+        try:
+            self.put(url, header, data, stream=True)
+            if self.getStatus()==304 and cached:
+                debug("ResponseCache: not modified %s", key)
+                gResponseCache.revalidated(key, ttl)
+                complete=True
+                yield cached[0]
+                return
+
+            # keep the body only if it has to be stored
+            keep=ttl!=None or _responseObservers
+            body=[]
+            for chunk in self.readChunks(size):
+                if keep:
+                    body.append(chunk)
+                yield chunk
+            complete=True
+
+            if keep:
+                body="".join(body)
+                if _responseObservers:
+                    notifyResponse(url, data, self.getStatus(), self.response.getheader("Content-Type", ""), body)
+                if ttl!=None:
+                    gResponseCache.store(key, body, ttl,
+                                         self.response.getheader("ETag", ""),
+                                         self.response.getheader("Last-Modified", ""))
+        finally:
+            if not complete:
+                # body not read until the end : the connection can't be reused
+                self.clearConnections()
+            self.m_locker.release()
+
+    def iterLines(self, url, header=None, data=None, ttl=None):
+        """Thread safe generator of the lines (without end of line) of the body of an URL while
+        the download is in progress. See iterData()"""
+        pending=[]
+        for chunk in self.iterData(url, header, data, ttl):
+            lines=chunk.split("\n")
+            if len(lines)==1:
+                pending.append(chunk)
+                continue
+            pending.append(lines[0])
+            lines[0]="".join(pending)
+            pending=[lines.pop()]
+            for eachLine in lines:
+                if eachLine[-1:]=="\r":
+                    eachLine=eachLine[:-1]
+                yield eachLine
+        eachLine="".join(pending)
+        if eachLine:
+            if eachLine[-1:]=="\r":
+                eachLine=eachLine[:-1]
+            yield eachLine
+
+    def readChunks(self, size=8192):
+        """Generator of the decoded chunks of the body of the last response (see put())"""
+        decoder=ContentDecoder(self.response.getheader("Content-Encoding"))
+
+        # some servers can return min,max or max,max
+        #  i.e. "http://www.nysedata.com/nysedata/asp/download.asp?s=txt&prod=symbols" is doing that !
+        limit=None
+        ldata=self.response.getheader("content-length")
+        if ldata:
+            ldata=string.split(ldata, ",")
+            if len(ldata)>1:
+                limit=int(ldata[0])
+
+        while limit==None or limit>0:
+            if limit==None:
+                chunk=self.response.read(size)
+            else:
+                chunk=self.response.read(min(size, limit))
+                limit=limit-len(chunk)
+            if not chunk:
+                break
+            chunk=decoder.decompress(chunk)
+            if chunk:
+                yield chunk
+        chunk=decoder.flush()
+        if chunk:
+            yield chunk
+
+    def put(self, url, header=None, data=None, stream=False):
         """Put a request to url with data parameters (for POST request only).
         No data imply GET request
         @param url: a complete url like http://www.somehost.com/somepath/somepage
         @param header: addon headers for connection (optional, default is None)
-        @param data: dictionary of parameters for POST (optional, default is None)"""
+        @param data: dictionary of parameters for POST (optional, default is None)
+        @param stream: do not read the body of the response (see readChunks())"""
 
         # Parse URL
+        url = overrideUrl(url)
         (protocole, host, page, params, query, fragments) = urlparse.urlparse(url)
 
         # print "==>", currentThread().getName(), protocole, host, page, params, query, fragments
 
         try:
             # Prepare new header
-            nextHeader={}
+            nextHeader=dict(self.m_defaultHeader)
             if header:
-                nextHeader=dict(header)
-            else:
-                nextHeader=dict(self.m_defaultHeader)
+                nextHeader.update(header)
 
             # Go through proxy if defined
             if self.m_proxy:
@@ -172,22 +611,11 @@ class ITradeConnection(object):
                 self.response = connection.getresponse()
 
                 if self.response:
-                    if self.response.getheader('Content-Encoding') == 'gzip':
-                        #print "==>", currentThread().getName(), "gzip response"
-                        self.m_responseData = GzipFile(fileobj=StringIO(self.response.read())).read()
+                    if stream and self.getStatus() not in (301, 302):
+                        # body read by the caller
+                        self.m_responseData = None
                     else:
-                        ldata = self.response.getheader('content-length')
-                        if ldata:
-                            # some servers can return min,max or max,max
-                            #  i.e. "http://www.nysedata.com/nysedata/asp/download.asp?s=txt&prod=symbols" is doing that !
-                            ldata = string.split(ldata, ',')
-                            if ldata and len(ldata)>1:
-                                ldata = int(ldata[0])
-                                self.m_responseData = self.response.read(ldata)
-                            else:
-                                self.m_responseData = self.response.read()
-                        else:
-                            self.m_responseData = self.response.read()
+                        self.m_responseData = "".join(self.readChunks())
 
                 else:
                     #print "==>", currentThread().getName(), "empty response"
@@ -196,11 +624,11 @@ class ITradeConnection(object):
                 # Follow redirect if any with recursion
                 if self.getStatus() in (301, 302):
                     url = urlparse.urljoin(url, self.response.getheader("location", ""))
-                    self.put(url, nextHeader)
+                    self.put(url, nextHeader, stream=stream)
 
                 self.m_duration = time.time()-start
 
-                if self.getStatus() != 200:
+                if self.getStatus() not in (200, 304):
                     msg="Receive bad answer from server (code %s) while requesting : %s" % \
                                                                       (self.getStatus(), url)
                     #info(msg)
@@ -232,7 +660,7 @@ class ITradeConnection(object):
                     # Eg. after a connection keep-alive timeout
                     #debug("An error occured while requesting the remote server : %s. Retrying" % e)
                     self.m_retrying=True
-                    self.put(url, header, data) # Retrying one time
+                    self.put(url, header, data, stream) # Retrying one time
                     self.m_retrying=False
                 else:
                     msg="An error occured while requesting the remote server : %s (retry fail)" % e
@@ -273,6 +701,8 @@ class ITradeConnection(object):
     def clearConnections(self):
         """Clear all http and https connexion to start up on clean base"""
         debug("Cleaning up http(s) connections")
+        for connection in self.m_httpConnection.values()+self.m_httpsConnection.values():
+            connection.close()
         self.m_httpConnection={}
         self.m_httpsConnection={}
 
@@ -317,7 +747,7 @@ class ITradeCookies:
             else:
                 self.m_cookie=cookieString
         finally:
-            debug("now cookie is %s" % self.m_cookie)
+            debug("now cookie is %s",self.m_cookie)
             self.m_locker.release()
 
     def get(self):
@@ -39,6 +39,10 @@
 # python system
 import logging
 import string
+from datetime import date
+
+# numpy
+import numpy
 
 # iTrade system
 from itrade_logging import *
@@ -87,6 +91,18 @@ def currency2symbol(cur):
 def list_of_currencies():
     return ('EUR','USD','JPY','GBP','GBX','AUD','CAD','CHF','NOK','SEK','DKK','BRL','HKD','CNY','INR','NZD','ARS','MXN','SGD','KRW','TWD')
 
+# ============================================================================
+# currency <-> integer code (index in the rates matrix)
+#
+#   the pivot currency is the one all the rates are fetched against
+# ============================================================================
+
+currency_codes = {}
+for eachCur in list_of_currencies():
+    currency_codes[eachCur] = len(currency_codes)
+
+CURRENCY_PIVOT = currency_codes['EUR']
+
 # ============================================================================
 # Build list of supported currencies
 # ============================================================================
@@ -110,9 +126,19 @@ class Currencies(object):
     def __init__(self):
         # url
         self.m_url = 'http://finance.yahoo.com/d/quotes.csv?s=%s%s=X&f=s4l1t1c1ghov&e=.csv'
+        self.m_urlbatch = 'http://finance.yahoo.com/d/quotes.csv?s=%s&f=sl1&e=.csv'
 
         self.m_connection = None
 
+        # rates matrix indexed by currency codes : m_rates[to,from]
+        n = len(currency_codes)
+        self.m_rates = numpy.ones((n,n))
+
+        # daily history of the pivot rates : date ordinals, rates
+        self.m_histDates = numpy.zeros(0,dtype=int)
+        self.m_histRates = numpy.zeros((0,n))
+        self.m_histDirty = False
+
         # to-from
         self.m_currencies = {}
         self.m_list = buildListOfSupportedCurrencies()
@@ -135,6 +161,10 @@ class Currencies(object):
             else:
                 used = False
             self.m_currencies[key] = (used,rate)
+            i = currency_codes.get(curTo)
+            j = currency_codes.get(curFrom)
+            if i!=None and j!=None:
+                self.m_rates[i,j] = rate
         return rate
 
     def load(self,fn=None):
@@ -148,6 +178,15 @@ class Currencies(object):
                     # debug('%s ::: %s' % (eachLine,item))
                     self.update(item[0],item[1],float(item[2]))
 
+        # daily history : one row per day, first column is the date ordinal
+        try:
+            hist = numpy.load(os.path.join(itrade_config.dirCacheData,'currencies.npy'))
+        except IOError:
+            hist = None
+        if hist is not None and hist.ndim==2 and hist.shape[1]==len(currency_codes)+1:
+            self.m_histDates = hist[:,0].astype(int)
+            self.m_histRates = hist[:,1:]
+
     def save(self,fn=None):
         # generate list of strings TO;FROM;RATE
         curs = []
@@ -158,28 +197,76 @@ class Currencies(object):
         # open and write the file with these currencies information
         itrade_csv.write(fn,os.path.join(itrade_config.dirCacheData,'currencies.txt'),curs)
 
+        # daily history
+        if self.m_histDirty:
+            hist = numpy.column_stack((self.m_histDates,self.m_histRates))
+            try:
+                numpy.save(os.path.join(itrade_config.dirCacheData,'currencies.npy'),hist)
+                self.m_histDirty = False
+            except IOError:
+                print "can't save currencies history !"
+
     # ---[ Convert ] ---
 
     def key(self,curTo,curFrom):
         return curTo.upper() + curFrom.upper()
 
     def rate(self,curTo,curFrom):
-        if curFrom == 'N/A' or curTo == 'N/A':
-            return 1.0
-        if curTo == curFrom:
-            return 1.0
-        key = self.key(curTo,curFrom)
-        if self.m_currencies.has_key(key):
-            used,rate = self.m_currencies[key]
-            return rate
-        else:
+        i = currency_codes.get(curTo)
+        j = currency_codes.get(curFrom)
+        if i==None or j==None:
+            # N/A or unsupported currency
             return 1.0
+        return self.m_rates[i,j]
 
     def convert(self,curTo,curFrom,Value):
         rate = self.rate(curTo,curFrom)
         #print 'convert: value:%f from:%s to:%s rate=%f retval=%f' % (Value,curFrom,curTo,rate,Value*rate)
         return Value * rate
 
+    # ---[ History ] ---
+
+    def record(self,codes,d=None):
+        # store the pivot rates of the currencies codes (the fetched ones) for
+        # the day d (default: today) in the history : the others are NaN
+        if d==None:
+            d = date.today()
+        o = d.toordinal()
+        row = numpy.empty(len(currency_codes))
+        row.fill(numpy.nan)
+        row[codes] = self.m_rates[codes,CURRENCY_PIVOT]
+        i = numpy.searchsorted(self.m_histDates,o)
+        if i<len(self.m_histDates) and self.m_histDates[i]==o:
+            self.m_histRates[i,codes] = row[codes]
+        else:
+            self.m_histDates = numpy.insert(self.m_histDates,i,o)
+            self.m_histRates = numpy.insert(self.m_histRates,i,row,axis=0)
+        self.m_histDirty = True
+
+    def history(self,curTo,curFrom,ordinals):
+        # rates for an array of date ordinals, using the last recorded day
+        # on or before each date (current rate when there is no history)
+        ordinals = numpy.asarray(ordinals)
+        i = currency_codes.get(curTo)
+        j = currency_codes.get(curFrom)
+        if i==None or j==None or i==j:
+            return numpy.ones(len(ordinals))
+        retval = numpy.empty(len(ordinals))
+        retval.fill(self.m_rates[i,j])
+        if len(self.m_histDates)>0:
+            # days both currencies have been fetched
+            hist = self.m_histRates[:,i] / self.m_histRates[:,j]
+            fetched = ~numpy.isnan(hist)
+            dates = self.m_histDates[fetched]
+            hist = hist[fetched]
+            k = numpy.searchsorted(dates,ordinals,side='right') - 1
+            known = k >= 0
+            retval[known] = hist[k[known]]
+        return retval
+
+    def rateAt(self,curTo,curFrom,d):
+        return self.history(curTo,curFrom,[d.toordinal()])[0]
+
     # ---[ Currency in use or not ? ] ---
 
     def used(self,curTo,curFrom):
@@ -217,20 +304,23 @@ class Currencies(object):
     _s1 = { "GBX": "GBP", }
     _s2 = { "GBX": 100.0, }
 
-    def get(self,curTo,curFrom):
-        if not itrade_config.isConnected():
-            return None
-
-        if curFrom == 'N/A' or curTo == 'N/A':
-            return None
-
+    def connection(self):
         if self.m_connection==None:
             self.m_connection = ITradeConnection(cookies = None,
                                proxy = itrade_config.proxyHostname,
                                proxyAuth = itrade_config.proxyAuthentication,
-                               connectionTimeout = itrade_config.connectionTimeout
+                               connectionTimeout = itrade_config.connectionTimeout,
+                               cacheTTL = itrade_config.refreshCurrencyView
                                )
             #print "**** Create Currency Connection"
+        return self.m_connection
+
+    def get(self,curTo,curFrom):
+        if not itrade_config.isConnected():
+            return None
+
+        if curFrom == 'N/A' or curTo == 'N/A':
+            return None
 
         # pence
         if curFrom in self._s1.keys():
@@ -245,7 +335,7 @@ class Currencies(object):
         # get data
         url = self.m_url % (a,b)
         try:
-            buf = self.m_connection.getDataFromUrl(url)
+            buf = self.connection().getDataFromUrl(url)
         except:
             return None
 
@@ -263,14 +353,71 @@ class Currencies(object):
         #print 'get: %s %s rate = %.4f' %(curTo,curFrom,float(sdata[1]))
         return self.update(curTo,curFrom,f)
 
+    def getbatch(self,curs):
+        # fetch the pivot rates of all the currencies of curs in one request
+        # and derive the cross rates between them : returns the codes of the
+        # fetched currencies (pivot included) or None
+        pivot = list_of_currencies()[CURRENCY_PIVOT]
+        symbs = {}
+        for eachCur in curs:
+            a = self._s1.get(eachCur,eachCur)
+            if a != pivot:
+                symbs['%s%s=X' % (pivot,a)] = a
+        if not symbs:
+            return None
+
+        url = self.m_urlbatch % '+'.join(symbs.keys())
+        try:
+            buf = self.connection().getDataFromUrl(url)
+        except:
+            return None
+
+        # extract data : "EURUSD=X",1.2345
+        rates = {pivot: 1.0}
+        for eachLine in buf.splitlines():
+            sdata = string.split(eachLine.replace('"',''), ',')
+            if len(sdata)>=2 and symbs.has_key(sdata[0]):
+                try:
+                    f = float(sdata[1])
+                except ValueError:
+                    continue
+                if f>0.0:
+                    rates[symbs[sdata[0]]] = f
+
+        # pivot rates of the fetched currencies (pence included)
+        codes = [CURRENCY_PIVOT]
+        pv = [1.0]
+        for eachCur in curs:
+            a = self._s1.get(eachCur,eachCur)
+            if eachCur!=pivot and rates.has_key(a) and currency_codes.has_key(eachCur):
+                codes.append(currency_codes[eachCur])
+                pv.append(rates[a] * self._s2.get(eachCur,1.0))
+        pv = numpy.array(pv)
+
+        # cross rates : rate(to,from) = pivot(to) / pivot(from)
+        self.m_rates[numpy.ix_(codes,codes)] = numpy.outer(pv,1.0/pv)
+        for eachKey in self.m_currencies.keys():
+            i = currency_codes.get(eachKey[:3])
+            j = currency_codes.get(eachKey[3:])
+            if i in codes and j in codes:
+                used,rate = self.m_currencies[eachKey]
+                self.m_currencies[eachKey] = (used,self.m_rates[i,j])
+        return codes
+
     def getlasttrade(self,bAllEvenNotInUse=False):
         if not itrade_config.isConnected():
             return
+        curs = {}
         for eachCurrency in self.m_currencies:
             curTo = eachCurrency[:3]
             curFrom = eachCurrency[3:]
             if bAllEvenNotInUse or self.used(curTo,curFrom):
-                self.get(curTo,curFrom)
+                curs[curTo] = True
+                curs[curFrom] = True
+        if curs:
+            codes = self.getbatch(curs.keys())
+            if codes:
+                self.record(codes)
         self.save()
 
 # ============================================================================
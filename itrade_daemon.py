@@ -0,0 +1,463 @@
+#!/usr/bin/env python
+# ============================================================================
+# Project Name : iTrade
+# Module Name  : itrade_daemon.py
+#
+# Description: Headless daemon : live scheduler and local HTTP/JSON API
+#
+# The Original Code is iTrade code (http://itrade.sourceforge.net).
+#
+# The Initial Developer of the Original Code is Gilles Dumortier.
+#
+# Portions created by the Initial Developer are Copyright (C) 2004-2008 the
+# Initial Developer. All Rights Reserved.
+#
+# Contributor(s):
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; see http://www.gnu.org/licenses/gpl.html
+#
+# History       Rev   Description
+# 2026-10-19    agent Wrote it from scratch
+# ============================================================================
+
+# ============================================================================
+# Imports
+# ============================================================================
+
+# python system
+import logging
+import time
+import json
+import heapq
+import random
+import urlparse
+import threading
+import SocketServer
+import BaseHTTPServer
+
+# iTrade system
+import itrade_config
+from itrade_logging import *
+from itrade_quotes import quotes,setImportLocker,QUOTE_CASH,QUOTE_CREDIT,QUOTE_BOTH
+from itrade_portfolio import loadPortfolio
+from itrade_matrix import createMatrix
+from itrade_snapshot import SnapshotPublisher,snapshotName
+from itrade_ticks import gTicks
+
+# ============================================================================
+# LiveScheduler
+#
+#   updates the quotes of the matrix in the background (same job as the
+#   UpdateLiveThread of the GUI : Quote.update() then Quote.compute()) with
+#   a few worker threads sharing one timetable. Quotes of a closed market
+#   are checked less often.
+# ============================================================================
+
+class LiveScheduler(object):
+    def __init__(self,daemon,period=None,workers=4):
+        self.m_daemon = daemon
+        if period==None:
+            period = itrade_config.refreshView
+        self.m_period = period
+        self.m_workers = workers
+        self.m_cond = threading.Condition()
+        self.m_heap = []
+        self.m_threads = []
+        self.m_keepGoing = False
+
+    def schedule(self,quote,delay):
+        self.m_cond.acquire()
+        heapq.heappush(self.m_heap,(time.time()+delay,quote.key(),quote))
+        self.m_cond.notify()
+        self.m_cond.release()
+
+    def start(self,lst):
+        self.m_keepGoing = True
+        for eachQuote in lst:
+            # initial delay is random (like the GUI threads)
+            self.schedule(eachQuote,random.uniform(0,self.m_period))
+        for i in range(self.m_workers):
+            t = threading.Thread(target=self.run,name='live-%d' % i)
+            t.setDaemon(True)
+            t.start()
+            self.m_threads.append(t)
+
+    def stop(self):
+        self.m_cond.acquire()
+        self.m_keepGoing = False
+        self.m_cond.notifyAll()
+        self.m_cond.release()
+        for t in self.m_threads:
+            t.join()
+        self.m_threads = []
+
+    def next(self):
+        # wait for the next quote to update (None when stopped)
+        self.m_cond.acquire()
+        try:
+            while self.m_keepGoing:
+                if self.m_heap:
+                    delay = self.m_heap[0][0] - time.time()
+                    if delay<=0:
+                        return heapq.heappop(self.m_heap)[2]
+                    self.m_cond.wait(delay)
+                else:
+                    self.m_cond.wait()
+            return None
+        finally:
+            self.m_cond.release()
+
+    def run(self):
+        while True:
+            quote = self.next()
+            if quote==None:
+                return
+            bOpen = False
+            try:
+                bOpen = quote.isOpen()
+                if bOpen or not self.m_daemon.isUpdated(quote):
+                    self.m_daemon.updateQuote(quote)
+            except Exception,e:
+                info('LiveScheduler: %s : %s' % (quote.key(),e))
+            if bOpen:
+                self.schedule(quote,self.m_period)
+            else:
+                self.schedule(quote,self.m_period*10)
+
+# ============================================================================
+# iTradeDaemon
+#
+#   keeps the portfolio, the matrix and the trades in memory. The API reads
+#   them under m_locker ; the scheduler fetches without it and holds it to
+#   merge the trades (see setImportLocker()) and compute a quote.
+# ============================================================================
+
+class iTradeDaemon(object):
+    def __init__(self):
+        self.m_locker = threading.RLock()
+        self.m_portfolio = None
+        self.m_matrix = None
+        self.m_scheduler = None
+        self.m_server = None
+        self.m_publisher = None
+        self.m_start = time.time()
+        self.m_updated = {}
+        self.m_updates = 0
+
+    def load(self):
+        self.m_portfolio = loadPortfolio()
+        self.m_matrix = createMatrix(self.m_portfolio.filename(),self.m_portfolio)
+        self.m_matrix.loadTrades()
+        for eachQuote in self.m_matrix.list():
+            eachQuote.compute()
+        self.m_portfolio.computeOperations()
+        info('daemon: portfolio %s, %d quotes' % (self.m_portfolio.filename(),len(self.m_matrix.list())))
+
+    # ---[ live ] -----------------------------------------
+
+    def isUpdated(self,quote):
+        return self.m_updated.has_key(quote.key())
+
+    def updateQuote(self,quote):
+        # network first : the trades are merged under m_locker
+        quote.update()
+        self.m_locker.acquire()
+        try:
+            quote.compute()
+            self.m_updated[quote.key()] = time.time()
+            self.m_updates = self.m_updates + 1
+        finally:
+            self.m_locker.release()
+
+    # ---[ start / stop ] ---------------------------------
+
+    def start(self,host=None,port=None,bLive=True):
+        if host==None:
+            host = itrade_config.daemonHost
+        if port==None:
+            port = itrade_config.daemonPort
+        setImportLocker(self.m_locker)
+        self.load()
+        self.m_publisher = SnapshotPublisher(snapshotName(self.m_portfolio.filename(),'daemon'),self.m_matrix)
+        self.m_publisher.start()
+        gTicks.start()
+        if bLive and itrade_config.isConnected():
+            self.m_scheduler = LiveScheduler(self)
+            self.m_scheduler.start(self.m_matrix.list())
+        self.m_server = DaemonHTTPServer((host,port),DaemonRequestHandler)
+        self.m_server.m_daemon = self
+        info('daemon: listening on http://%s:%d/' % self.m_server.server_address)
+
+    def serve(self):
+        try:
+            self.m_server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        self.stop()
+
+    def stop(self):
+        if self.m_scheduler:
+            self.m_scheduler.stop()
+            self.m_scheduler = None
+        if self.m_server:
+            self.m_server.server_close()
+            self.m_server = None
+
+    # ---[ queries ] --------------------------------------
+
+    def lookup(self,ref):
+        quote = quotes.lookupKey(ref)
+        if quote==None:
+            quote = quotes.lookupTicker(ref.upper())
+        return quote
+
+    def status(self,args):
+        return {
+            'version': itrade_config.softwareVersion,
+            'uptime': time.time()-self.m_start,
+            'portfolio': self.m_portfolio.filename(),
+            'quotes': len(self.m_matrix.list()),
+            'live': self.m_scheduler!=None,
+            'updates': self.m_updates,
+            }
+
+    def quoteInfo(self,quote):
+        tr = quote.m_daytrades and quote.m_daytrades.lasttrade()
+        return {
+            'key': quote.key(),
+            'isin': quote.isin(),
+            'ticker': quote.ticker(),
+            'name': quote.name(),
+            'market': quote.market(),
+            'currency': quote.currency(),
+            'date': tr and tr.date().isoformat() or None,
+            'open': _float(quote.nv_open()),
+            'high': _float(quote.nv_high()),
+            'low': _float(quote.nv_low()),
+            'close': _float(quote.nv_close()),
+            'volume': _int(quote.nv_volume()),
+            'prevclose': _float(quote.nv_prevclose()),
+            'percent': _float(quote.nv_percent()),
+            'updated': self.m_updated.get(quote.key()),
+            }
+
+    def quoteList(self,args):
+        return [self.quoteInfo(q) for q in sorted(self.m_matrix.list(),key=lambda q: q.ticker())]
+
+    def quoteDetail(self,args,ref):
+        quote = self.lookup(ref)
+        if quote==None:
+            raise DaemonError(404,'quote %s not found' % ref)
+        ret = self.quoteInfo(quote)
+        trades = quote.m_daytrades
+        if trades and trades.lasttrade():
+            ret['indicators'] = self.indicatorsAt(trades,trades.lasttrade().index())
+        return ret
+
+    def indicatorsAt(self,trades,i):
+        return {
+            'ma20': _float(trades.ma20(i)),
+            'ma50': _float(trades.ma50(i)),
+            'ma100': _float(trades.ma100(i)),
+            'ma150': _float(trades.ma150(i)),
+            'rsi14': _float(trades.rsi14(i)),
+            'stoK': _float(trades.stoK(i)),
+            'stoD': _float(trades.stoD(i)),
+            'vma15': _float(trades.vma15(i)),
+            'ovb': _int(trades.ovb(i)),
+            'bollUp': _float(trades.bollinger(i,2)),
+            'bollM': _float(trades.bollinger(i,1)),
+            'bollDn': _float(trades.bollinger(i,0)),
+            }
+
+    def indicators(self,args,ref):
+        # last n days (default 30) of a quote
+        quote = self.lookup(ref)
+        if quote==None or not quote.m_daytrades or not quote.m_daytrades.lasttrade():
+            raise DaemonError(404,'no trades for %s' % ref)
+        try:
+            n = int(args.get('n',['30'])[0])
+        except ValueError:
+            raise DaemonError(400,'invalid n')
+        trades = quote.m_daytrades
+        from itrade_datation import gCal
+        ret = []
+        i = trades.lasttrade().index()
+        first = trades.firsttrade().index()
+        while i>=first and len(ret)<n:
+            if trades.has_trade(i):
+                d = self.indicatorsAt(trades,i)
+                d['date'] = gCal.date(i).isoformat()
+                d['close'] = _float(trades.m_inClose[i])
+                ret.append(d)
+            i = i - 1
+        ret.reverse()
+        return {'key': quote.key(), 'days': ret}
+
+    def intraday(self,args,ref):
+        # bars of the day (period in seconds, default itrade_config.intradayPeriod)
+        quote = self.lookup(ref)
+        if quote==None:
+            raise DaemonError(404,'unknown quote %s' % ref)
+        try:
+            period = int(args.get('period',[str(itrade_config.intradayPeriod)])[0])
+        except ValueError:
+            raise DaemonError(400,'invalid period')
+        day = args.get('day',[None])[0]
+        ret = []
+        for t,o,h,l,c,v in gTicks.bars(quote.key(),period,day):
+            ret.append({'time': t, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v})
+        return {'key': quote.key(), 'period': period, 'bars': ret}
+
+    def positions(self,args):
+        p = self.m_portfolio
+        ret = []
+        for quote in sorted(self.m_matrix.list(),key=lambda q: q.ticker()):
+            if not quote.isTraded():
+                continue
+            for box,name in ((QUOTE_CASH,'cash'),(QUOTE_CREDIT,'credit')):
+                n = quote.nv_number(box)
+                if n:
+                    ret.append({
+                        'key': quote.key(),
+                        'ticker': quote.ticker(),
+                        'box': name,
+                        'number': n,
+                        'pru': _float(quote.nv_pru(box)),
+                        'pr': _float(quote.nv_pr(box)),
+                        'pv': _float(quote.nv_pv(p.currency(),box)),
+                        'profit': _float(quote.nv_profit(p.currency(),box)),
+                        'profitPercent': _float(quote.nv_profitPercent(p.currency(),box)),
+                        })
+        return ret
+
+    def portfolio(self,args):
+        p = self.m_portfolio
+        p.computeOperations()
+        return {
+            'filename': p.filename(),
+            'name': p.name(),
+            'currency': p.currency(),
+            'cash': p.nv_cash(),
+            'credit': p.nv_credit(),
+            'invest': p.nv_invest(),
+            'buy': p.nv_buy(QUOTE_BOTH),
+            'value': p.nv_value(QUOTE_BOTH),
+            'perf': p.nv_perf(QUOTE_BOTH),
+            'perfPercent': p.nv_perfPercent(QUOTE_BOTH),
+            'expenses': p.nv_expenses(),
+            'totalValue': p.nv_totalValue(),
+            'perfTotal': p.nv_perfTotal(),
+            'perfTotalPercent': p.nv_perfTotalPercent(),
+            }
+
+    # path (first element) -> (method, number of path arguments)
+    routes = {
+        'status': (status,0),
+        'quotes': (quoteList,0),
+        'quote': (quoteDetail,1),
+        'indicators': (indicators,1),
+        'intraday': (intraday,1),
+        'positions': (positions,0),
+        'portfolio': (portfolio,0),
+        }
+
+    def query(self,path,args):
+        items = [x for x in path.split('/') if x]
+        if not items or not self.routes.has_key(items[0]):
+            raise DaemonError(404,'unknown query %s' % path)
+        fn,nargs = self.routes[items[0]]
+        if len(items)-1!=nargs:
+            raise DaemonError(400,'%s expects %d argument(s)' % (items[0],nargs))
+        self.m_locker.acquire()
+        try:
+            return fn(self,args,*items[1:])
+        finally:
+            self.m_locker.release()
+
+def _float(v):
+    if v==None:
+        return None
+    return float(v)
+
+def _int(v):
+    if v==None:
+        return None
+    return int(v)
+
+# ============================================================================
+# HTTP server
+# ============================================================================
+
+class DaemonError(Exception):
+    def __init__(self,code,msg):
+        Exception.__init__(self,msg)
+        self.m_code = code
+
+class DaemonHTTPServer(SocketServer.ThreadingMixIn,BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class DaemonRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    server_version = 'iTrade'
+
+    def do_GET(self):
+        url = urlparse.urlparse(self.path)
+        try:
+            code,ret = 200,self.server.m_daemon.query(url.path,urlparse.parse_qs(url.query))
+        except DaemonError,e:
+            code,ret = e.m_code,{'error': str(e)}
+        except Exception,e:
+            info('daemon: %s : %s' % (self.path,e))
+            code,ret = 500,{'error': str(e)}
+        buf = json.dumps(ret)
+        self.send_response(code)
+        self.send_header('Content-Type','application/json')
+        self.send_header('Content-Length',str(len(buf)))
+        self.end_headers()
+        self.wfile.write(buf)
+
+    def log_message(self,format,*args):
+        if gLogFlags.debug: debug('daemon: %s',format % args)
+
+# ============================================================================
+# cmdline_daemon()
+# ============================================================================
+
+def cmdline_daemon(port=None,bLive=True):
+    d = iTradeDaemon()
+    d.start(port=port,bLive=bLive)
+    d.serve()
+
+# ============================================================================
+# Test me
+# ============================================================================
+
+if __name__=='__main__':
+    setLevel(logging.INFO)
+
+    # load extensions
+    import itrade_ext
+    itrade_ext.loadExtensions(itrade_config.fileExtData,itrade_config.dirExtData)
+
+    from itrade_quotes import initQuotesModule
+    from itrade_portfolio import initPortfolioModule
+    initQuotesModule()
+    initPortfolioModule()
+
+    cmdline_daemon(bLive=False)
+
+# ============================================================================
+# That's all folks !
+# ============================================================================
@@ -142,7 +142,7 @@ class Calendar(object):
 
         # key
         k = self.key(d,market)
-        debug('isopen %s k=%s: ? ' % (d,k))
+        if gLogFlags.debug: debug('isopen %s k=%s: ? ',d,k)
 
         # is it a special day ?
         if self.m_closed.has_key(k):
@@ -157,7 +157,7 @@ class Calendar(object):
         if not isinstance(d,Datation):
             raise TypeError("parameter shall be date, Datation or string object")
 
-        debug('issrd %s ? %s ' % (d,self.m_srd))
+        if gLogFlags.debug: debug('issrd %s ? %s ',d,self.m_srd)
 
         # is it saturday or sunday ?
         if d.weekday()>=SATURDAY:
@@ -165,7 +165,7 @@ class Calendar(object):
 
         # key
         k = self.key(d,market)
-        debug('issrd %s k=%s: ? ' % (d,k))
+        if gLogFlags.debug: debug('issrd %s k=%s: ? ',d,k)
 
         # is it a SRD day ?
         if self.m_srd.has_key(k):
@@ -212,12 +212,12 @@ class Calendar(object):
         k = self.key(d,market)
 
         if self.m_closed.has_key(k):
-            debug('Calendar::addClosed(): %s k=%s: %s - already !' % (d,k,self.m_closed[k]))
+            debug('Calendar::addClosed(): %s k=%s: %s - already !',d,k,self.m_closed[k])
             return False
         else:
             # add it in the closed list
             self.m_closed[k] = (market,title)
-            debug('Calendar::addClosed(): %s k=%s: %s - added' % (d,k,self.m_closed[k]))
+            debug('Calendar::addClosed(): %s k=%s: %s - added',d,k,self.m_closed[k])
             return True
 
     def addSRD(self,d,market=None,title=None):
@@ -232,12 +232,12 @@ class Calendar(object):
         k = self.key(d,market)
 
         if self.m_srd.has_key(k):
-            debug('Calendar::addSRD(): %s k=%s: %s - already !' % (d,k,self.m_srd[k]))
+            debug('Calendar::addSRD(): %s k=%s: %s - already !',d,k,self.m_srd[k])
             return False
         else:
             # add it in the srd list
             self.m_srd[k] = (market,title)
-            debug('Calendar::addSRD(): %s k=%s: %s - added' % (d,k,self.m_srd[k]))
+            debug('Calendar::addSRD(): %s k=%s: %s - added',d,k,self.m_srd[k])
             return True
 
     def load(self,fn=None):
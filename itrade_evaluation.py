@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+# ============================================================================
+# Project Name : iTrade
+# Module Name  : itrade_evaluation.py
+#
+# Description: Daily evaluation (equity curve) of a portfolio
+#
+# The Original Code is iTrade code (http://itrade.sourceforge.net).
+#
+# The Initial Developer of the Original Code is Gilles Dumortier.
+#
+# Portions created by the Initial Developer are Copyright (C) 2004-2008 the
+# Initial Developer. All Rights Reserved.
+#
+# Contributor(s):
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; see http://www.gnu.org/licenses/gpl.html
+#
+# History       Rev   Description
+# 2026-10-19    agent Wrote it from scratch
+# ============================================================================
+
+# ============================================================================
+# Imports
+# ============================================================================
+
+# python system
+import logging
+from datetime import timedelta
+
+# numpy
+import numpy
+
+# iTrade system
+from itrade_logging import *
+from itrade_datation import gCal
+from itrade_currency import currencies
+from itrade_portfolio import *
+
+# ============================================================================
+# Operation effects
+#
+#   cash / credit / invest deltas by operation type (sign applied to value),
+#   as cumulated by Portfolio.computeOperations()
+# ============================================================================
+
+evaluation_cash = {
+    OPERATION_CREDIT    : 1.0,
+    OPERATION_DEBIT     : -1.0,
+    OPERATION_BUY       : -1.0,
+    OPERATION_SELL      : 1.0,
+    OPERATION_FEE       : -1.0,
+    OPERATION_LIQUIDATION : 1.0,
+    OPERATION_INTEREST  : 1.0,
+    OPERATION_DETACHMENT: 1.0,
+    OPERATION_DIVIDEND  : 1.0,
+}
+
+evaluation_credit = {
+    OPERATION_BUY_SRD   : 1.0,
+    OPERATION_SELL_SRD  : -1.0,
+}
+
+evaluation_invest = {
+    OPERATION_CREDIT    : 1.0,
+    OPERATION_REGISTER  : 1.0,
+}
+
+# number of shares held (DIR and SRD boxes together)
+evaluation_shares = {
+    OPERATION_BUY       : 1,
+    OPERATION_BUY_SRD   : 1,
+    OPERATION_SELL      : -1,
+    OPERATION_SELL_SRD  : -1,
+    OPERATION_QUOTE     : 1,
+    OPERATION_REGISTER  : 1,
+}
+
+# ============================================================================
+# date2index() - function helper
+#
+#   index in gCal of the first open day on or after d, clamped to the
+#   calendar range
+# ============================================================================
+
+def date2index(d):
+    if d <= gCal.date(0):
+        return 0
+    if d >= gCal.lastdate():
+        return gCal.lastindex()
+    idx = gCal.index(d)
+    while idx==-1:
+        d = d + timedelta(1)
+        idx = gCal.index(d)
+    return idx
+
+# ============================================================================
+# fillclose() - function helper
+#
+#   forward fill a m_inClose array (missing days are negative) ; days before
+#   the first known close are valued 0.0
+# ============================================================================
+
+def fillclose(inClose):
+    valid = inClose >= 0.0
+    idx = numpy.where(valid, numpy.arange(len(inClose)), 0)
+    idx = numpy.maximum.accumulate(idx)
+    close = inClose[idx]
+    close[~valid[idx]] = 0.0
+    return close
+
+# ============================================================================
+# Evaluation
+#
+#   daily mark-to-market of a portfolio, indexed like gCal :
+#       m_inCash    cash available
+#       m_inCredit  credit used (SRD)
+#       m_inInvest  cash investment cumulation
+#       m_inValue   value of the quotes (portfolio currency)
+#       m_inTotal   value + cash - credit
+# ============================================================================
+
+class Evaluation(object):
+    def __init__(self,portfolio):
+        debug('Evaluation:__init__(%s)',portfolio)
+        self.m_portfolio = portfolio
+        self.m_signature = None
+        self.compute()
+
+    def portfolio(self):
+        return self.m_portfolio
+
+    def signature(self):
+        # operations ledger + last trade of each quote + rates in use
+        ops = self.m_portfolio.operations()
+        sig = [ops.m_ref,len(ops.m_sorted),len(currencies.m_histDates)]
+        for eachQuote in self.quotes():
+            trades = eachQuote.trades()
+            if trades and trades.lasttrade():
+                tr = trades.lasttrade()
+                sig.append((eachQuote.key(),tr.date(),tr.nv_close()))
+            sig.append(currencies.rate(self.m_portfolio.currency(),eachQuote.currency()))
+        return tuple(sig)
+
+    def quotes(self):
+        return self.m_portfolio.operations().quotes()
+
+    def compute(self):
+        n = gCal.lastindex()+1
+        ops = self.m_portfolio.operations().list()
+        quotes = self.quotes()
+        qidx = {}
+        for i in range(len(quotes)):
+            qidx[quotes[i].key()] = i
+
+        # daily deltas
+        cash = numpy.zeros(n)
+        credit = numpy.zeros(n)
+        invest = numpy.zeros(n)
+        shares = numpy.zeros((len(quotes),n))
+        for eachOp in ops:
+            idx = date2index(eachOp.date())
+            typ = eachOp.type()
+            if evaluation_cash.has_key(typ):
+                cash[idx] += evaluation_cash[typ] * eachOp.nv_value()
+            if evaluation_credit.has_key(typ):
+                credit[idx] += evaluation_credit[typ] * eachOp.nv_value()
+            if typ == OPERATION_LIQUIDATION:
+                credit[idx] += eachOp.nv_value() + eachOp.nv_expenses()
+            if evaluation_invest.has_key(typ):
+                invest[idx] += evaluation_invest[typ] * eachOp.nv_value()
+            if evaluation_shares.has_key(typ) and eachOp.isQuote() and eachOp.m_quote:
+                shares[qidx[eachOp.m_quote.key()],idx] += evaluation_shares[typ] * eachOp.nv_number()
+
+        # cumulated positions
+        self.m_inCash = numpy.cumsum(cash)
+        self.m_inCredit = numpy.cumsum(credit)
+        self.m_inInvest = numpy.cumsum(invest)
+        positions = numpy.cumsum(shares,axis=1)
+
+        # close of each quote (forward filled) and daily rate to portfolio
+        # currency (from the local rates history)
+        ordinals = [gCal.date(i).toordinal() for i in range(n)]
+        closes = numpy.zeros((len(quotes),n))
+        rates = numpy.ones((len(quotes),n))
+        for i in range(len(quotes)):
+            if quotes[i].trades()==None:
+                quotes[i].loadTrades()
+            closes[i] = fillclose(quotes[i].trades().m_inClose[:n])
+            rates[i] = currencies.history(self.m_portfolio.currency(),quotes[i].currency(),ordinals)
+
+        # one pass for the whole range
+        self.m_inValue = (rates * positions * closes).sum(axis=0)
+        self.m_inTotal = self.m_inValue + self.m_inCash - self.m_inCredit
+
+        self.m_signature = self.signature()
+
+    def first(self):
+        # index of the first day with an operation
+        nz = numpy.nonzero(self.m_inInvest + numpy.abs(self.m_inCash) + self.m_inValue)[0]
+        if len(nz)>0:
+            return nz[0]
+        return gCal.lastindex()
+
+    def dates(self,first=0):
+        return [gCal.date(i) for i in range(first,gCal.lastindex()+1)]
+
+    def nv_total(self,idx):
+        return self.m_inTotal[idx]
+
+    def nv_value(self,idx):
+        return self.m_inValue[idx]
+
+    def nv_cash(self,idx):
+        return self.m_inCash[idx]
+
+    def nv_credit(self,idx):
+        return self.m_inCredit[idx]
+
+    def nv_invest(self,idx):
+        return self.m_inInvest[idx]
+
+# ============================================================================
+# getEvaluation()
+#
+#   evaluations are cached per portfolio and recomputed only when the
+#   operations or the trades of the quotes have changed
+# ============================================================================
+
+_evaluations = {}
+
+def getEvaluation(portfolio):
+    key = portfolio.filename()
+    ev = _evaluations.get(key)
+    if ev==None or ev.portfolio()!=portfolio:
+        ev = Evaluation(portfolio)
+        _evaluations[key] = ev
+    elif ev.signature()!=ev.m_signature:
+        ev.compute()
+    return ev
+
+# ============================================================================
+# Test
+# ============================================================================
+
+if __name__=='__main__':
+    setLevel(logging.INFO)
+
+    import itrade_ext
+    itrade_ext.loadExtensions(itrade_config.fileExtData,itrade_config.dirExtData)
+
+    initPortfolioModule()
+    p = loadPortfolio()
+    ev = getEvaluation(p)
+    for i in range(ev.first(),gCal.lastindex()+1,20):
+        print '%s: total=%.2f value=%.2f cash=%.2f invest=%.2f' % (gCal.date(i),ev.nv_total(i),ev.nv_value(i),ev.nv_cash(i),ev.nv_invest(i))
+
+# ============================================================================
+# That's all folks !
+# ============================================================================
@@ -44,6 +44,7 @@ import imp
 
 # iTrade system
 from itrade_logging import *
+from itrade_profile import instrumentConnector
 import itrade_config
 from itrade_market import market2place
 from itrade_login import loggedLoginConnector
@@ -60,10 +61,12 @@ loadedModules = {}  # keys are module names, values are modules ref
 # ============================================================================
 
 class ConnectorRegistry(object):
-    def __init__(self):
+    def __init__(self,kind):
+        self.m_kind = kind
         self.m_conn = []
 
     def register(self,market,place,qlist,qtag,connector,bDefault=True):
+        instrumentConnector(connector,self.m_kind)
         self.m_conn.append((market,place,bDefault,connector,qlist,qtag))
         #print 'Register %s for market :' % self, market,' qlist:',qlist,' qtag:',qtag
         return True
@@ -96,7 +99,7 @@ class ConnectorRegistry(object):
 try:
     ignore(gLiveRegistry)
 except NameError:
-    gLiveRegistry = ConnectorRegistry()
+    gLiveRegistry = ConnectorRegistry('live')
 
 registerLiveConnector = gLiveRegistry.register
 getLiveConnector = gLiveRegistry.get
@@ -119,7 +122,7 @@ def getDefaultLiveConnector(market,list,place=None):
 try:
     ignore(gImportRegistry)
 except NameError:
-    gImportRegistry = ConnectorRegistry()
+    gImportRegistry = ConnectorRegistry('import')
 
 registerImportConnector = gImportRegistry.register
 getImportConnector = gImportRegistry.get
@@ -132,7 +135,7 @@ listImportConnector = gImportRegistry.list
 try:
     ignore(gListSymbolRegistry)
 except NameError:
-    gListSymbolRegistry = ConnectorRegistry()
+    gListSymbolRegistry = ConnectorRegistry('listsymbol')
 
 registerListSymbolConnector = gListSymbolRegistry.register
 getListSymbolConnector = gListSymbolRegistry.get
@@ -101,7 +101,7 @@ def liveupdate_from_internet(quote):
     bRet = False
 
     if not itrade_config.isConnected():
-        debug("liveupdate_from_internet(%s): no connexion" % quote.ticker())
+        debug("liveupdate_from_internet(%s): no connexion",quote.ticker())
         return bRet
 
     abc = quote.liveconnector()
@@ -110,7 +110,7 @@ def liveupdate_from_internet(quote):
         data = abc.getcacheddata(quote)
         if data:
             #debug(data)
-            debug("liveupdate_from_internet(%s): import live from cache" % quote.ticker())
+            debug("liveupdate_from_internet(%s): import live from cache",quote.ticker())
             quote.importTrades(data,bLive=True)
             bRet = True
         else:
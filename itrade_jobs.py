@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+# ============================================================================
+# Project Name : iTrade
+# Module Name  : itrade_jobs.py
+#
+# Description: Background jobs (imports, computes) run by a pool of threads
+#
+# The Original Code is iTrade code (http://itrade.sourceforge.net).
+#
+# The Initial Developer of the Original Code is Gilles Dumortier.
+#
+# Portions created by the Initial Developer are Copyright (C) 2004-2008 the
+# Initial Developer. All Rights Reserved.
+#
+# Contributor(s):
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; see http://www.gnu.org/licenses/gpl.html
+#
+# History       Rev   Description
+# 2026-10-19    agent Wrote it from scratch
+# ============================================================================
+
+# ============================================================================
+# Imports
+# ============================================================================
+
+# python system
+import heapq
+import logging
+import threading
+
+# iTrade system
+import itrade_config
+from itrade_logging import *
+
+# ============================================================================
+# Job
+#
+#   fn(*args) run by a worker thread. Each subscriber (owner, done) has its
+#   done(job) called by the worker thread when the job is over (not when it
+#   has unsubscribed before).
+# ============================================================================
+
+class Job(object):
+    def __init__(self,key,fn,args,group,priority,owner,done,resource=None):
+        self.m_key = key
+        if resource==None:
+            resource = key
+        self.m_resource = resource
+        self.m_fn = fn
+        self.m_args = args
+        self.m_group = group
+        self.m_priority = priority
+        self.m_subscribers = []
+        self.subscribe(owner,done)
+        self.m_cancelled = False
+        self.m_result = None
+        self.m_error = None
+
+    def __repr__(self):
+        return '<Job %s %s p=%d>' % (self.m_key,self.m_group,self.m_priority)
+
+    def key(self):
+        return self.m_key
+
+    def args(self):
+        return self.m_args
+
+    def result(self):
+        return self.m_result
+
+    def error(self):
+        return self.m_error
+
+    def cancel(self):
+        self.m_cancelled = True
+
+    def cancelled(self):
+        return self.m_cancelled
+
+    # ---[ subscribers ] ----------------------------------
+
+    def subscribe(self,owner,done):
+        for eachOwner,eachDone in self.m_subscribers:
+            if eachOwner is owner and eachDone==done:
+                return
+        self.m_subscribers.append((owner,done))
+
+    def unsubscribe(self,owner):
+        # returns True when nobody is subscribed anymore
+        self.m_subscribers = [s for s in self.m_subscribers if s[0] is not owner]
+        return len(self.m_subscribers)==0
+
+    def subscribed(self,owner):
+        for eachOwner,eachDone in self.m_subscribers:
+            if eachOwner is owner:
+                return True
+        return False
+
+# ============================================================================
+# JobQueue
+#
+#   lower priority first (0 : visible rows of a list), then submission
+#   order. At most `perGroup` jobs of the same group (i.e. connector) run
+#   together, and never two jobs with the same resource (the key by default,
+#   the quote for the jobs of different kinds on a quote). Submitting a key
+#   already queued or running subscribes to that job : the work is done once
+#   and the done() of every subscriber is called.
+# ============================================================================
+
+class JobQueue(object):
+    def __init__(self,workers=None,perGroup=None):
+        if workers==None:
+            workers = itrade_config.jobWorkers
+        if perGroup==None:
+            perGroup = itrade_config.jobWorkersByConnector
+        self.m_workers = workers
+        self.m_perGroup = perGroup
+        self.m_cond = threading.Condition()
+        self.m_heap = []
+        self.m_seq = 0
+        self.m_queued = {}      # key -> Job waiting
+        self.m_running = {}     # key -> Job running
+        self.m_busy = {}        # resource -> Job running
+        self.m_groups = {}      # group -> number of running jobs
+        self.m_threads = []
+
+    # ---[ submit / cancel ] ------------------------------
+
+    def submit(self,key,fn,args=(),group=None,priority=1,owner=None,done=None,resource=None):
+        self.m_cond.acquire()
+        try:
+            job = self.m_queued.get(key) or self.m_running.get(key)
+            if job and not job.m_cancelled:
+                job.subscribe(owner,done)
+                if self.m_queued.get(key) is job and priority<job.m_priority:
+                    job.m_priority = priority
+                    self.push(job)
+                    self.m_cond.notify()
+                return job
+            job = Job(key,fn,args,group,priority,owner,done,resource)
+            self.m_queued[key] = job
+            self.push(job)
+            if len(self.m_threads)<self.m_workers:
+                t = threading.Thread(target=self.run,name='job%d' % len(self.m_threads))
+                t.setDaemon(True)
+                self.m_threads.append(t)
+                t.start()
+            self.m_cond.notify()
+        finally:
+            self.m_cond.release()
+        return job
+
+    def push(self,job):
+        # caller owns the lock
+        self.m_seq = self.m_seq + 1
+        heapq.heappush(self.m_heap,(job.m_priority,self.m_seq,job))
+
+    def prioritize(self,keys,priority=0):
+        # queued jobs of keys run before the others (i.e. rows scrolled into view)
+        self.m_cond.acquire()
+        try:
+            for eachKey in keys:
+                job = self.m_queued.get(eachKey)
+                if job and job.m_priority>priority:
+                    job.m_priority = priority
+                    self.push(job)
+            self.m_cond.notify()
+        finally:
+            self.m_cond.release()
+
+    def cancel(self,owner=None):
+        # unsubscribe (an owner) from the queued jobs ; returns their number.
+        # Jobs nobody is subscribed to anymore are cancelled.
+        n = 0
+        self.m_cond.acquire()
+        try:
+            for eachKey,eachJob in self.m_queued.items():
+                if owner==None or eachJob.subscribed(owner):
+                    if owner==None or eachJob.unsubscribe(owner):
+                        eachJob.cancel()
+                        del self.m_queued[eachKey]
+                    n = n + 1
+            for eachJob in self.m_running.values():
+                if owner==None or eachJob.subscribed(owner):
+                    # running until the end but done() is not called
+                    if owner==None or eachJob.unsubscribe(owner):
+                        eachJob.cancel()
+        finally:
+            self.m_cond.release()
+        return n
+
+    def pending(self,owner=None):
+        # number of jobs (of an owner) queued or running
+        self.m_cond.acquire()
+        try:
+            lst = self.m_queued.values() + self.m_running.values()
+            if owner==None:
+                return len(lst)
+            return len([j for j in lst if j.subscribed(owner) and not j.m_cancelled])
+        finally:
+            self.m_cond.release()
+
+    # ---[ workers ] --------------------------------------
+
+    def next(self):
+        # caller owns the lock : best job allowed to run now or None
+        deferred = []
+        job = None
+        while self.m_heap:
+            priority,seq,candidate = heapq.heappop(self.m_heap)
+            if candidate.m_cancelled or self.m_queued.get(candidate.m_key) is not candidate:
+                continue
+            if priority!=candidate.m_priority:
+                # stale entry (the job has been prioritized)
+                continue
+            if self.m_busy.has_key(candidate.m_resource) or \
+               self.m_groups.get(candidate.m_group,0)>=self.m_perGroup:
+                deferred.append((priority,seq,candidate))
+                continue
+            job = candidate
+            break
+        for eachEntry in deferred:
+            heapq.heappush(self.m_heap,eachEntry)
+        return job
+
+    def run(self):
+        while 1:
+            self.m_cond.acquire()
+            try:
+                job = self.next()
+                while job==None:
+                    self.m_cond.wait()
+                    job = self.next()
+                del self.m_queued[job.m_key]
+                self.m_running[job.m_key] = job
+                self.m_busy[job.m_resource] = job
+                self.m_groups[job.m_group] = self.m_groups.get(job.m_group,0) + 1
+            finally:
+                self.m_cond.release()
+
+            try:
+                job.m_result = job.m_fn(*job.m_args)
+            except Exception,e:
+                job.m_error = e
+                info('JobQueue: %s : %s' % (job,e))
+
+            self.m_cond.acquire()
+            try:
+                del self.m_running[job.m_key]
+                del self.m_busy[job.m_resource]
+                self.m_groups[job.m_group] = self.m_groups[job.m_group] - 1
+                subscribers = list(job.m_subscribers)
+                # a job of this group or key may be allowed now
+                self.m_cond.notifyAll()
+            finally:
+                self.m_cond.release()
+
+            if job.m_cancelled:
+                continue
+            for eachOwner,eachDone in subscribers:
+                if eachDone:
+                    try:
+                        eachDone(job)
+                    except Exception,e:
+                        info('JobQueue: done %s : %s' % (job,e))
+
+# ============================================================================
+# connectorGroup()
+#
+#   group of the jobs of a quote : its import connector
+# ============================================================================
+
+def connectorGroup(quote):
+    connector = quote.importconnector()
+    if connector and hasattr(connector,'name'):
+        return connector.name()
+    return None
+
+# ============================================================================
+# Export me
+# ============================================================================
+
+try:
+    ignore(gJobs)
+except NameError:
+    gJobs = JobQueue()
+
+# ============================================================================
+# Test me
+# ============================================================================
+
+if __name__=='__main__':
+    setLevel(logging.INFO)
+
+    import time
+
+    def work(n,group):
+        time.sleep(0.05)
+        return n
+
+    def done(job):
+        print 'done',job,job.result()
+
+    q = JobQueue(workers=4,perGroup=2)
+    for i in range(8):
+        q.submit(i,work,(i,i%2 and 'yahoo' or 'euronext'),group=i%2 and 'yahoo' or 'euronext',priority=i<2 and 1 or 2,done=done)
+    q.prioritize([7])
+    while q.pending():
+        time.sleep(0.05)
+
+# ============================================================================
+# That's all folks !
+# ============================================================================
@@ -150,14 +150,43 @@ class myColorFormatter(Formatter):
 itrade_logger = logging.getLogger('itrade')
 
 # export me
+#
+#   pass the arguments separately to get a lazy formatting :
+#       debug('Trades::load %s on %s', item[5], item[1])
+#   the message is formatted only if the level is enabled.
 debug = itrade_logger.debug
 info = itrade_logger.info
 warning = itrade_logger.warning
 error = itrade_logger.error
 critical = itrade_logger.critical
 exception = itrade_logger.exception
-setLevel = itrade_logger.setLevel
 log = itrade_logger.log
+isEnabledFor = itrade_logger.isEnabledFor
+
+# ============================================================================
+# gLogFlags
+#
+#   module-level fast flags, kept in sync by setLevel(). On a hot path, test
+#   the flag before the call so that even the arguments are not evaluated :
+#       if gLogFlags.debug: debug('Trade::__init__():%s', d)
+# ============================================================================
+
+class LogFlags(object):
+    def __init__(self):
+        self.update()
+
+    def update(self):
+        self.debug = itrade_logger.isEnabledFor(logging.DEBUG)
+        self.info = itrade_logger.isEnabledFor(logging.INFO)
+
+try:
+    ignore(gLogFlags)
+except NameError:
+    gLogFlags = LogFlags()
+
+def setLevel(level):
+    itrade_logger.setLevel(level)
+    gLogFlags.update()
 
 # be sure to shutdown gracefully
 atexit.register(logging.shutdown)
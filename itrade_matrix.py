@@ -29,6 +29,7 @@
 #
 # History       Rev   Description
 # 2004-02-20    dgil  Wrote it from scratch
+# 2026-10-19    agent summary of the last bars read at startup
 # ============================================================================
 
 # ============================================================================
@@ -43,6 +44,7 @@ import logging
 from itrade_logging import *
 from itrade_quotes import quotes,quote_reference
 from itrade_portfolio import *
+from itrade_summary import gSummaries
 import itrade_csv
 
 # ============================================================================
@@ -102,6 +104,16 @@ class TradingMatrix(object):
     def saveTrades(self):
         for eachQuote in self.list():
             eachQuote.saveTrades()
+        self.saveSummaries()
+
+    # the last bars of the quotes are displayed at startup from the summary
+    # file : the full histories are loaded later (see Quote.history())
+    def loadSummaries(self):
+        gSummaries.load()
+        gSummaries.apply(self.list())
+
+    def saveSummaries(self):
+        gSummaries.save(self.list())
 
     # load some trades on the matrix
     def loadTrades(self,fi=None):
@@ -155,7 +167,7 @@ class TradingMatrix(object):
         if q:
             debug('addKey: add %s',q.ticker())
             self.m_quotes[q.key()] = q
-            debug('addKey: monitor %s' % i)
+            debug('addKey: monitor %s',i)
             q.monitorIt(True)
             return True
         else:
@@ -167,7 +179,7 @@ class TradingMatrix(object):
         if q:
             debug('removeKey: add %s',q.ticker())
             del self.m_quotes[q.key()]
-            debug('removeKey: un-monitor %s' % i)
+            debug('removeKey: un-monitor %s',i)
             q.monitorIt(False)
 
 # ============================================================================
@@ -179,6 +191,7 @@ def createMatrix(fn='default',dp=None):
     m = TradingMatrix()
     m.load(fn)
     m.build()
+    m.loadSummaries()
 
     if dp:
         dp.setupCurrencies()
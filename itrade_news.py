@@ -38,7 +38,9 @@
 # python system
 import logging
 import re
+import time
 import webbrowser
+from threading import Thread, Lock
 
 # iTrade system
 import itrade_config
@@ -49,6 +51,34 @@ from itrade_news_google import gNewsGoogle
 from itrade_news_boursorama import gNewsBoursorama
 from itrade_news_balo import gNewsBalo
 
+# ============================================================================
+# Used to build the aggregated feed
+# ============================================================================
+
+class _FeedEntry(object):
+    pass
+
+# ============================================================================
+# _SourceThread
+#
+#   fetch one source for one quote (the caller waits with its own timeout)
+# ============================================================================
+
+class _SourceThread(Thread):
+    def __init__(self,source,quote,lang):
+        Thread.__init__(self)
+        self.setDaemon(True)
+        self.m_source = source
+        self.m_quote = quote
+        self.m_lang = lang
+        self.m_feed = None
+
+    def run(self):
+        try:
+            self.m_feed = self.m_source.fetchQuote(self.m_quote,self.m_lang)
+        except Exception,e:
+            info('News: %s failed for %s : %s' % (self.m_source.__class__.__name__,self.m_quote.ticker(),e))
+
 # ============================================================================
 # News()
 #
@@ -61,27 +91,106 @@ from itrade_news_balo import gNewsBalo
 #
 #   callback : object to receive notifications during aggregation
 #
+#   All the sources of a quote are fetched concurrently (each one through
+#   the feed cache, with its own timeout) and their entries are merged,
+#   deduplicated by link and sorted newest first. The last aggregated feed
+#   of each quote is kept to display the news page instantly.
 # ============================================================================
 
 class News(object):
     def __init__(self):
         debug('News:__init__')
         self.m_cb = None
+        self.m_feeds = {}
+        self.m_locker = Lock()
+        self.m_refresher = None
 
     def setCallback(self,callback):
         self.m_cb = callback
 
+    def sources(self,quote,lang):
+        # boursorama only knows the tickers of Euronext Paris
+        if lang.upper()=='FR':
+            return (gNewsBoursorama,gNewsGoogle)
+        return (gNewsGoogle,)
+
+    def linkKey(self,link):
+        # <service>::<url> : same url from two services is the same news
+        pos = link.find('::')
+        if pos>=0:
+            link = link[pos+2:]
+        return link.strip().lower()
+
+    def merge(self,quote,feeds):
+        flux = _FeedEntry()
+        flux.feed = _FeedEntry()
+        flux.feed.title = quote.ticker()
+        flux.entries = []
+        seen = {}
+        for eachFeed in feeds:
+            if eachFeed:
+                for eachEntry in eachFeed.entries:
+                    key = self.linkKey(eachEntry.link)
+                    if not seen.has_key(key):
+                        seen[key] = True
+                        flux.entries.append(eachEntry)
+        flux.entries.sort(key=lambda e: e.date,reverse=True)
+        return flux
+
     def feedQuote(self,quote,lang=None):
         if lang==None:
             lang = quote.country()
-        print 'feedQuote: lang=%s' % lang
-
-        # __x very temporary : need to aggregate news from various sources
-        #                      using callback to notify the progress
-        if lang.upper()=='FR':
-            return gNewsBoursorama.feedQuote(quote,lang)
-        else:
-            return gNewsGoogle.feedQuote(quote,lang)
+        debug('feedQuote: %s lang=%s',quote.ticker(),lang)
+
+        threads = []
+        for eachSource in self.sources(quote,lang):
+            t = _SourceThread(eachSource,quote,lang)
+            t.start()
+            threads.append(t)
+
+        feeds = []
+        for t in threads:
+            t.join(t.m_source.m_timeout+1)
+            if t.isAlive():
+                info('News: %s timeout for %s' % (t.m_source.__class__.__name__,quote.ticker()))
+            else:
+                feeds.append(t.m_feed)
+
+        flux = self.merge(quote,feeds)
+        self.m_locker.acquire()
+        self.m_feeds[quote.key()] = flux
+        self.m_locker.release()
+        return flux
+
+    def cachedQuote(self,quote):
+        # last aggregated feed of the quote (None if never fetched)
+        self.m_locker.acquire()
+        try:
+            return self.m_feeds.get(quote.key())
+        finally:
+            self.m_locker.release()
+
+    # ---[ background refresh of a matrix ] ---
+
+    def refreshMatrix(self,matrix):
+        if not itrade_config.isConnected():
+            return
+        if self.m_refresher and self.m_refresher.isAlive():
+            return
+        self.m_refresher = Thread(target=self._refreshQuotes,args=(matrix.list(),))
+        self.m_refresher.setDaemon(True)
+        self.m_refresher.start()
+
+    def _refreshQuotes(self,lst):
+        start = time.time()
+        for eachQuote in lst:
+            if not itrade_config.isConnected():
+                break
+            try:
+                self.feedQuote(eachQuote)
+            except Exception,e:
+                info('News: refresh %s : %s' % (eachQuote.ticker(),e))
+        info('News: matrix refreshed in %.1f s' % (time.time()-start))
 
     def goto(self,parent,url):
         # url is : <service>::<url>
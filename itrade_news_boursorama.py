@@ -82,6 +82,11 @@ class News_Boursorama(object):
         self.m_baseurl[3] = "http://www.boursorama.com/conseils/conseils_index_code.phtml?symbole=1rP%s"
         self.m_baselink = "http://www.boursorama.com/infos/imprimer_news.phtml?news=%s"
 
+        # feeds kept in gResponseCache : time to live (seconds) and time to
+        # wait for the feed
+        self.m_ttl = 600
+        self.m_timeout = 10
+
         self.m_connection = ITradeConnection(cookies = None,
                                proxy = itrade_config.proxyHostname,
                                proxyAuth = itrade_config.proxyAuthentication,
@@ -115,13 +120,19 @@ class News_Boursorama(object):
 
     def feed(self,url):
         self.m_url = url
-        self.m_feed = _FeedEntry()
-        self.m_feed.entries = []
-        self.m_feed.feed = _FeedEntry()
-        self.m_feed.feed.title = 'Boursorama: ' + self.m_quote.ticker()
-
         info('Boursorama News refresh %s',self.m_url)
-        buf = self.getdata(url)
+        self.m_feed = self.parse(self.m_connection.getStoredDataFromUrl(url,ttl=self.m_ttl),self.m_quote)
+        return self.m_feed
+
+    def parse(self,buf,quote):
+        if not buf:
+            return None
+        buf = unicode(buf,'iso-8859-1','strict')
+
+        feed = _FeedEntry()
+        feed.entries = []
+        feed.feed = _FeedEntry()
+        feed.feed.title = 'Boursorama: ' + quote.ticker()
 
         iter = self.splitLines(buf)
         #print iter
@@ -145,9 +156,9 @@ class News_Boursorama(object):
                     entry.date = sdate
                     entry.summary = ""
                     entry.source = "boursorama"
-                    self.m_feed.entries.append(entry)
+                    feed.entries.append(entry)
 
-        return self.m_feed
+        return feed
 
     def goto(self,html,url):
         if html:
@@ -189,11 +200,16 @@ class News_Boursorama(object):
                 print 'empty'
 
     # ---[ public interface ] ---
+    def feedURL(self,quote,lang=None,page=0):
+        return self.m_baseurl[page] % quote.ticker()
+
     def feedQuote(self,quote,lang=None,page=0):
         self.m_quote = quote
-        if lang==None:
-            lang = self.m_quote.country()
-        return self.feed(self.m_baseurl[page] % self.m_quote.ticker())
+        return self.feed(self.feedURL(quote,lang,page))
+
+    def fetchQuote(self,quote,lang=None,page=0):
+        # same as feedQuote() without state : can run in any thread
+        return self.parse(self.m_connection.getStoredDataFromUrl(self.feedURL(quote,lang,page),ttl=self.m_ttl),quote)
 
 # ============================================================================
 # Export me
@@ -42,10 +42,12 @@ import re
 import time
 import webbrowser
 import string
+from threading import Lock
 
 # iTrade system
 from itrade_logging import *
 from itrade_local import setLocale,getLocale
+from itrade_connection import ITradeConnection
 
 # feedparser
 import feedparser
@@ -57,6 +59,9 @@ import feedparser
 class _FeedEntry(object):
     pass
 
+# locale is process wide : one conversion at a time
+_locale_locker = Lock()
+
 # ============================================================================
 # News_Google()
 #
@@ -74,6 +79,17 @@ class News_Google(object):
 
         self.m_baseurl = "http://news.google.fr/news?hl=%s&ie=UTF-8&output=rss&q=%s&scoring=d"
 
+        # feeds kept in gResponseCache : time to live (seconds) and time to
+        # wait for the feed
+        self.m_ttl = 900
+        self.m_timeout = 10
+
+        self.m_connection = ITradeConnection(cookies = None,
+                               proxy = itrade_config.proxyHostname,
+                               proxyAuth = itrade_config.proxyAuthentication,
+                               connectionTimeout = itrade_config.connectionTimeout
+                               )
+
     # ---[ protected interface ] ---
     def getURL(self):
         return self.m_url
@@ -87,7 +103,10 @@ class News_Google(object):
     def feed(self,url):
         self.m_url = url
         info('RSS News refresh %s',self.m_url)
-        self.m_feed = self.convert(feedparser.parse(self.m_url))
+        buf = self.m_connection.getStoredDataFromUrl(url,ttl=self.m_ttl)
+        if not buf:
+            return None
+        self.m_feed = self.convert(feedparser.parse(buf))
         return self.m_feed
 
     def convert(self,feed):
@@ -98,26 +117,29 @@ class News_Google(object):
         flux = _FeedEntry()
         flux.entries = []
         flux.feed = _FeedEntry()
-        flux.feed.title = feed.feed.title
+        flux.feed.title = feed.feed.get('title','Google')
 
         # force local to 'en' : strptime() will work correctly
+        _locale_locker.acquire()
         setLocale('en')
 
-        for eachEntry in feed.entries:
-            entry = _FeedEntry()
-            entry.link = "google::%s" % eachEntry.link
-            entry.title = "%s" % eachEntry.title
-
-            # convert datetime in the right locale
-            entry.date = time.strptime(eachEntry.date, "%a, %d %b %Y %H:%M:%S %Z")
-            print '%s: %s -> %s' % (entry.link,eachEntry.date,entry.date)
+        try:
+            for eachEntry in feed.entries:
+                entry = _FeedEntry()
+                entry.link = "google::%s" % eachEntry.link
+                entry.title = "%s" % eachEntry.title
 
-            entry.summary = eachEntry.summary
-            entry.source = "google"
-            flux.entries.append(entry)
+                # convert datetime in the right locale
+                entry.date = time.strptime(eachEntry.date, "%a, %d %b %Y %H:%M:%S %Z")
+                debug('%s: %s -> %s' % (entry.link,eachEntry.date,entry.date))
 
-        # restore locale
-        setLocale()
+                entry.summary = eachEntry.summary
+                entry.source = "google"
+                flux.entries.append(entry)
+        finally:
+            # restore locale
+            setLocale()
+            _locale_locker.release()
 
         #info('Feed %s',flux.feed.title)
         return flux
@@ -126,15 +148,25 @@ class News_Google(object):
         webbrowser.open(url)
 
     # ---[ public interface ] ---
-    def feedQuote(self,quote,lang=None,page=0):
-        self.m_quote = quote
+    def feedURL(self,quote,lang=None,page=0):
         if lang==None:
-            lang = self.m_quote.country()
+            lang = quote.country()
 
-        param = self.m_quote.name()+' '+self.m_quote.ticker()
+        param = quote.name()+' '+quote.ticker()
         param = string.replace(param,' ','+')
 
-        return self.feed(self.m_baseurl % (lang,param))
+        return self.m_baseurl % (lang,param)
+
+    def feedQuote(self,quote,lang=None,page=0):
+        self.m_quote = quote
+        return self.feed(self.feedURL(quote,lang,page))
+
+    def fetchQuote(self,quote,lang=None,page=0):
+        # same as feedQuote() without state : can run in any thread
+        buf = self.m_connection.getStoredDataFromUrl(self.feedURL(quote,lang,page),ttl=self.m_ttl)
+        if not buf:
+            return None
+        return self.convert(feedparser.parse(buf))
 
 # ============================================================================
 # Export me
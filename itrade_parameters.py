@@ -29,6 +29,7 @@
 #
 # History       Rev   Description
 # 2005-04-24    dgil  Wrote it from scratch
+# 2026-10-19    agent threshold of the body of a star
 # ============================================================================
 
 # ============================================================================
@@ -56,6 +57,9 @@ threshold_doji = 0.003
 threshold_tombo = 0.003
 threshold_tohba = 0.003
 
+# body of the star of a morning/evening star, relative to the average body
+threshold_star_body = 0.5
+
 # ============================================================================
 # period : Default parameters
 #
@@ -38,9 +38,11 @@
 # python system
 import datetime
 import logging
+from bisect import bisect_left
 
 # iTrade system
 from itrade_logging import *
+from itrade_profile import timed
 import itrade_datation
 from itrade_quotes import quotes,QUOTE_CASH,QUOTE_CREDIT,QUOTE_BOTH
 from itrade_matrix import *
@@ -491,8 +493,20 @@ def signOfOperationType(type):
 #
 #   TYPE: see OPERATION_xx
 #
+# Operations are kept sorted by (datetime,ref) in m_keys/m_sorted, so that
+# period queries are a bisect plus a slice instead of a full sort. The
+# number of operations of each quote is kept for quotes().
 # ============================================================================
 
+def _opkey(op):
+    return (op.datetime(),op.ref())
+
+def _datekey(d):
+    # date or datetime to a key comparing before any (datetime,ref) key
+    if not isinstance(d,datetime.datetime):
+        d = datetime.datetime.combine(d,datetime.time())
+    return (d,)
+
 class Operations(object):
     def __init__(self,portfolio):
         debug('Operations:__init__(%s)' % portfolio)
@@ -500,16 +514,55 @@ class Operations(object):
         self.m_portfolio = portfolio
         self.m_ref = 0
 
+        # sorted keys and operations ; quote key -> [quote,number of operations]
+        self.m_keys = []
+        self.m_sorted = []
+        self.m_quotes = {}
+
     def portfolio(self):
         return self.m_portfolio
 
     def list(self):
-        items = self.m_operations.values()
-        nlist = [(x.datetime(), x) for x in items]
-        nlist.sort()
-        nlist = [val for (key, val) in nlist]
-        #print nlist
-        return nlist
+        return self.m_sorted[:]
+
+    def quotes(self):
+        ''' quotes with at least one operation '''
+        return [quote for quote,n in self.m_quotes.values()]
+
+    def range(self,dmin=None,dmax=None):
+        ''' operations with dmin <= date < dmax (sorted) '''
+        keys,ops = self.m_keys,self.m_sorted
+        if dmin==None:
+            i = 0
+        else:
+            i = bisect_left(keys,_datekey(dmin))
+        if dmax==None:
+            j = len(keys)
+        else:
+            j = bisect_left(keys,_datekey(dmax))
+        return ops[i:j]
+
+    def _index(self,op):
+        k = _opkey(op)
+        i = bisect_left(self.m_keys,k)
+        self.m_keys.insert(i,k)
+        self.m_sorted.insert(i,op)
+        if op.isQuote() and op.m_quote:
+            if not self.m_quotes.has_key(op.m_quote.key()):
+                self.m_quotes[op.m_quote.key()] = [op.m_quote,0]
+            count = self.m_quotes[op.m_quote.key()]
+            count[1] = count[1] + 1
+
+    def _unindex(self,op):
+        k = _opkey(op)
+        i = bisect_left(self.m_keys,k)
+        del self.m_keys[i]
+        del self.m_sorted[i]
+        if op.isQuote() and op.m_quote and self.m_quotes.has_key(op.m_quote.key()):
+            count = self.m_quotes[op.m_quote.key()]
+            count[1] = count[1] - 1
+            if count[1]==0:
+                del self.m_quotes[op.m_quote.key()]
 
     def load(self,infile=None):
         infile = itrade_csv.read(infile,os.path.join(itrade_config.dirUserData,'default.operations.txt'))
@@ -532,6 +585,7 @@ class Operations(object):
             vat = self.m_portfolio.vat()
         op = Operation(item[0],item[1],item[2],item[3],item[4],item[5],vat,self.m_ref)
         self.m_operations[self.m_ref] = op
+        self._index(op)
         if bApply:
             op.apply()
         debug('Operations::add() after: %s' % self.m_operations)
@@ -541,6 +595,7 @@ class Operations(object):
     def remove(self,ref,bUndo):
         if bUndo:
             self.m_operations[ref].undo()
+        self._unindex(self.m_operations[ref])
         del self.m_operations[ref]
 
     def get(self,ref):
@@ -787,14 +842,15 @@ class Portfolio(object):
 
     def applyOperations(self,d=None):
         debug('applyOperations date<=%s' % d)
-        for eachOp in self.m_operations.list():
+        if d==None:
+            ops = self.m_operations.list()
+        else:
+            ops = self.m_operations.range(dmax=d+datetime.timedelta(1))
+        for eachOp in ops:
             debug('applyOperations: %s' % eachOp)
-            if d==None or d>=eachOp.date():
-                typ = eachOp.type()
-                if operation_apply.has_key(typ) and operation_apply[typ]:
-                    eachOp.apply(d)
-            else:
-                info('ignore %s' % (eachOp.name()))
+            typ = eachOp.type()
+            if operation_apply.has_key(typ) and operation_apply[typ]:
+                eachOp.apply(d)
 
     # --- [ manage login to services ] ----------------------------------------
 
@@ -863,6 +919,7 @@ class Portfolio(object):
         else:
             return False
 
+    @timed('Portfolio.computeOperations')
     def computeOperations(self,cd=None):
         self.reset()
         for eachOp in self.m_operations.list():
@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# ============================================================================
+# Project Name : iTrade
+# Module Name  : itrade_profile.py
+#
+# Description: Profiling mode : timing counters of the main operations
+#
+# The Original Code is iTrade code (http://itrade.sourceforge.net).
+#
+# The Initial Developer of the Original Code is Gilles Dumortier.
+#
+# Portions created by the Initial Developer are Copyright (C) 2004-2008 the
+# Initial Developer. All Rights Reserved.
+#
+# Contributor(s):
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; see http://www.gnu.org/licenses/gpl.html
+#
+# History       Rev   Description
+# 2026-10-19    agent Wrote it from scratch
+# ============================================================================
+
+# ============================================================================
+# Imports
+# ============================================================================
+
+# python system
+import os
+import sys
+import time
+import atexit
+import logging
+from threading import Lock
+
+# iTrade system
+import itrade_config
+from itrade_logging import *
+
+# best clock of the platform
+if sys.platform=='win32':
+    _clock = time.clock
+else:
+    _clock = time.time
+
+# ============================================================================
+# Metrics
+#
+#   registry of timing counters : name -> [count, total, min, max] (seconds)
+#   m_enabled is tested by every timed() call : nothing is recorded (and
+#   the clock is not read) when the profiling mode is off.
+# ============================================================================
+
+class Metrics(object):
+    def __init__(self):
+        self.m_enabled = False
+        self.m_counters = {}
+        self.m_locker = Lock()
+        self.m_profiler = None
+        self.m_start = None
+
+    def enabled(self):
+        return self.m_enabled
+
+    def reset(self):
+        self.m_locker.acquire()
+        self.m_counters = {}
+        self.m_locker.release()
+
+    def record(self,name,duration):
+        self.m_locker.acquire()
+        try:
+            c = self.m_counters.get(name)
+            if c==None:
+                self.m_counters[name] = [1,duration,duration,duration]
+            else:
+                c[0] += 1
+                c[1] += duration
+                if duration<c[2]: c[2] = duration
+                if duration>c[3]: c[3] = duration
+        finally:
+            self.m_locker.release()
+
+    def counters(self):
+        self.m_locker.acquire()
+        try:
+            return dict([(k,list(v)) for k,v in self.m_counters.items()])
+        finally:
+            self.m_locker.release()
+
+    # ---[ start / stop ] ---------------------------------
+
+    def start(self,bProfiler=True):
+        if self.m_enabled:
+            return
+        self.reset()
+        self.m_start = _clock()
+        if bProfiler:
+            import cProfile
+            self.m_profiler = cProfile.Profile()
+            self.m_profiler.enable()
+        self.m_enabled = True
+        info('Profiling : ON')
+
+    def stop(self,fn=None):
+        # stop and dump the report and the profiler stats
+        if not self.m_enabled:
+            return None
+        self.m_enabled = False
+        if self.m_profiler:
+            self.m_profiler.disable()
+        if fn==None:
+            fn = os.path.join(itrade_config.dirReports,'profile-%s' % time.strftime('%Y%m%d-%H%M%S'))
+        f = open(fn+'.txt','w')
+        f.write(self.report())
+        f.close()
+        if self.m_profiler:
+            self.m_profiler.dump_stats(fn+'.pstats')
+            self.m_profiler = None
+        info('Profiling : OFF (report in %s.txt)',fn)
+        return fn
+
+    # ---[ report ] ---------------------------------------
+
+    report_columns = ('name','count','total','mean','min','max')
+
+    def report(self,sortby='total'):
+        if sortby not in self.report_columns:
+            sortby = 'total'
+        rows = []
+        for name,(n,total,mn,mx) in self.counters().items():
+            rows.append({'name':name,'count':n,'total':total,'mean':total/n,'min':mn,'max':mx})
+        rows.sort(key=lambda r: r[sortby],reverse=(sortby!='name'))
+
+        lines = []
+        if self.m_start!=None:
+            lines.append('elapsed : %.3f s' % (_clock()-self.m_start))
+        lines.append('%-40s %8s %12s %10s %10s %10s' % ('operation','count','total ms','mean ms','min ms','max ms'))
+        for r in rows:
+            lines.append('%-40s %8d %12.1f %10.3f %10.3f %10.3f' % (r['name'][:40],r['count'],r['total']*1000.0,r['mean']*1000.0,r['min']*1000.0,r['max']*1000.0))
+        return '\n'.join(lines) + '\n'
+
+# ============================================================================
+# Export singleton
+# ============================================================================
+
+try:
+    ignore(gMetrics)
+except NameError:
+    gMetrics = Metrics()
+
+# ============================================================================
+# timed() - decorator
+#
+#   @timed('Trades.load')
+#   def load(self,infile=None):
+# ============================================================================
+
+def timed(name):
+    def decorator(fn):
+        def wrapper(*args,**kwargs):
+            if not gMetrics.m_enabled:
+                return fn(*args,**kwargs)
+            t = _clock()
+            try:
+                return fn(*args,**kwargs)
+            finally:
+                gMetrics.record(name,_clock()-t)
+        wrapper.__name__ = fn.__name__
+        wrapper.__doc__ = fn.__doc__
+        return wrapper
+    return decorator
+
+# ============================================================================
+# instrumentConnector()
+#
+#   connectors are plugins : their connect() / getdata() are timed when they
+#   register (one counter per connector name)
+# ============================================================================
+
+def instrumentConnector(connector,kind):
+    name = '%s:%s' % (kind,connector.__class__.__name__)
+    for eachMethod in ('connect','getdata'):
+        m = getattr(connector,eachMethod,None)
+        if m and not hasattr(m,'m_timed'):
+            w = timed('%s.%s' % (name,eachMethod))(m)
+            w.m_timed = True
+            setattr(connector,eachMethod,w)
+    return connector
+
+# ============================================================================
+# startProfiling() / stopProfiling()
+# ============================================================================
+
+_atexit = []
+
+def startProfiling():
+    gMetrics.start()
+    if not _atexit:
+        atexit.register(stopProfiling)
+        _atexit.append(True)
+
+def stopProfiling():
+    fn = gMetrics.stop()
+    if fn:
+        print gMetrics.report()
+
+def isProfiling():
+    return gMetrics.enabled()
+
+# ============================================================================
+# Test me
+# ============================================================================
+
+if __name__=='__main__':
+    setLevel(logging.INFO)
+
+    @timed('sleep')
+    def f(d):
+        time.sleep(d)
+
+    f(0.01)
+    gMetrics.start(bProfiler=False)
+    for i in range(5):
+        f(0.01)
+    print gMetrics.report()
+
+# ============================================================================
+# That's all folks !
+# ============================================================================
@@ -30,6 +30,7 @@
 # History       Rev   Description
 # 2004-01-08    dgil  Wrote it from scratch
 # 2006-09-2x    dgil  New quote referencing
+# 2026-10-19    agent summary of the last bars until the history is loaded
 # ============================================================================
 
 # ============================================================================
@@ -42,6 +43,7 @@ import logging
 
 # iTrade system
 from itrade_logging import *
+from itrade_profile import timed
 from itrade_local import message,getGroupChar
 import itrade_csv
 import itrade_trades
@@ -122,6 +124,31 @@ def quote_reference(isin,ticker,market,place):
 
     return '%s.%s.%s' % (ticker,market,place)
 
+# ============================================================================
+# Live listeners
+#
+#   called with the quote after each live update of its trades
+# ============================================================================
+
+_liveListeners = []
+
+def registerLiveListener(fn):
+    if fn not in _liveListeners:
+        _liveListeners.append(fn)
+
+# ============================================================================
+# Import locker
+#
+#   held while imported trades are merged in a quote (i.e. by the daemon :
+#   the network is read without it, the API reads the trades under it)
+# ============================================================================
+
+_importLocker = None
+
+def setImportLocker(locker):
+    global _importLocker
+    _importLocker = locker
+
 # ============================================================================
 # Quote
 # ============================================================================
@@ -194,6 +221,7 @@ class Quote(object):
         self.m_daytrades = None
         self.m_weektrades = None
         self.m_monthtrades = None
+        self.m_summary = None
 
         self.m_percent   = None
         self.m_prevclose = None
@@ -366,6 +394,19 @@ class Quote(object):
     def trades(self):
         return self.m_daytrades
 
+    def summary(self):
+        return self.m_summary
+
+    def setSummary(self,summary):
+        self.m_summary = summary
+
+    def history(self):
+        # the trades when loaded, the startup summary (last bars only)
+        # otherwise (see itrade_summary)
+        if self.m_daytrades:
+            return self.m_daytrades
+        return self.m_summary
+
     # ---[ market & connectors ] -------------------------------------
 
     def market(self):
@@ -615,15 +656,30 @@ class Quote(object):
     # ---[ load or import trades / date is unique key ] ---
 
     def loadTrades(self,fn=None):
-        debug('Quote:loadTrades %s' % self.m_ticker)
+        debug('Quote:loadTrades %s',self.m_ticker)
         if self.m_daytrades==None:
-            self.m_daytrades = itrade_trades.Trades(self)
-        self.m_daytrades.load(fn)
+            trades = itrade_trades.Trades(self)
+            trades.load(fn)
+            # published once loaded : the summary is used meanwhile
+            self.m_daytrades = trades
+        else:
+            self.m_daytrades.load(fn)
 
     def importTrades(self,data,bLive):
         #debug('Quote:importTrades %s %s bLive=%s' % (self.ticker,data,bLive))
+        if _importLocker:
+            _importLocker.acquire()
+            try:
+                self.mergeTrades(data,bLive)
+            finally:
+                _importLocker.release()
+        else:
+            self.mergeTrades(data,bLive)
+
+    def mergeTrades(self,data,bLive):
         if self.m_daytrades==None:
-            self.m_daytrades = itrade_trades.Trades(self)
+            # the history is loaded first (lazy loading : see history())
+            self.loadTrades()
 
         data = data.split('\r\n')
         self.m_daytrades.imp(data,bLive)
@@ -638,21 +694,25 @@ class Quote(object):
                 # previous close is included !
                 self.m_prevclose = string.atof (item[8])
 
+        if bLive:
+            for eachListener in _liveListeners:
+                eachListener(self)
+
     # ---[ save or export trades / date is unique key ] ---
 
     def saveTrades(self,fn=None):
         if self.m_daytrades==None:
             info('Quote:saveTrades %s - no daytrades !' % self.ticker())
             return
-        debug('Quote:saveTrades %s - save now !' % self.ticker())
+        debug('Quote:saveTrades %s - save now !',self.ticker())
         self.m_daytrades.save(fn)
 
     # ---[ update the quote from the network ] ---
 
+    @timed('Quote.update')
     def update(self,fromdate=None,todate=None):
         #debug('update %s from:%s to:%s' % (self.ticker(),fromdate,todate))
         if self.m_daytrades==None:
-            self.m_daytrades = itrade_trades.Trades(self)
             self.loadTrades()
         if fromdate==date.today() or fromdate==None:
             # import until 'yesterday' (be sure the day is or will open !)
@@ -759,75 +819,75 @@ class Quote(object):
     # ---[ current / live values on the quote ] ---
 
     def index(self,d=None):
-        if self.m_daytrades:
+        if self.history():
             if d==None:
-                tr = self.m_daytrades.lasttrade()
+                tr = self.history().lasttrade()
             else:
-                tr = self.m_daytrades.trade(d)
+                tr = self.history().trade(d)
             if tr:
                 return tr.index()
         return -1
 
     def lastindex(self):
-        if self.m_daytrades:
-            tr = self.m_daytrades.lasttrade()
+        if self.history():
+            tr = self.history().lasttrade()
             if tr:
                 return tr.index()
         return -1
 
     def firstindex(self):
-        if self.m_daytrades:
-            tr = self.m_daytrades.firsttrade()
+        if self.history():
+            tr = self.history().firsttrade()
             if tr:
                 return tr.index()
         return -1
 
     def nv_close(self,d=None):
-        if self.m_daytrades:
+        if self.history():
             if d==None:
-                tr = self.m_daytrades.lasttrade()
+                tr = self.history().lasttrade()
             else:
-                tr = self.m_daytrades.trade(d)
+                tr = self.history().trade(d)
             if tr:
                 return tr.nv_close()
         return None
 
     def nv_open(self,d=None):
-        if self.m_daytrades:
+        if self.history():
             if d==None:
-                tr = self.m_daytrades.lasttrade()
+                tr = self.history().lasttrade()
             else:
-                tr = self.m_daytrades.trade(d)
+                tr = self.history().trade(d)
             if tr:
                 return tr.nv_open()
         return None
 
     def nv_low(self,d=None):
-        if self.m_daytrades:
+        if self.history():
             if d==None:
-                tr = self.m_daytrades.lasttrade()
+                tr = self.history().lasttrade()
             else:
-                tr = self.m_daytrades.trade(d)
+                tr = self.history().trade(d)
             if tr:
                 return tr.nv_low()
         return None
 
     def nv_high(self,d=None):
-        if self.m_daytrades:
+        if self.history():
             if d==None:
-                tr = self.m_daytrades.lasttrade()
+                tr = self.history().lasttrade()
             else:
-                tr = self.m_daytrades.trade(d)
+                tr = self.history().trade(d)
             if tr:
                 return tr.nv_high()
         return None
 
     def nv_volume(self,d=None):
-        if self.m_daytrades:
+        if self.history():
             if d==None:
-                tr = self.m_daytrades.lasttrade()
+                tr = self.history().lasttrade()
             else:
-                tr = self.m_daytrades.trade(d)
+                tr = self.history().trade(d)
             if tr:
                 return tr.nv_volume()
         return None
@@ -837,14 +897,14 @@ class Quote(object):
             #print '$$ %s nv_prevclose:' % self.ticker(),self.m_prevclose
             return self.m_prevclose
 
-        if self.m_daytrades:
-            tc = self.m_daytrades.prevtrade(d)
+        if self.history():
+            tc = self.history().prevtrade(d)
             if tc:
                 return tc.nv_close()
         return None
 
     def nv_unitvar(self,d=None):
-        if self.m_daytrades:
+        if self.history():
             tc = self.nv_close(d)
             tp = self.nv_prevclose(d)
             if tc and tp:
@@ -856,7 +916,7 @@ class Quote(object):
             #print '$$ %s nv_percent:' % self.ticker(),self.m_percent
             return self.m_percent
 
-        if self.m_daytrades:
+        if self.history():
             tc = self.nv_close(d)
             tp = self.nv_prevclose(d)
             if tc and tp:
@@ -939,25 +999,25 @@ class Quote(object):
     # ---[ object value ] ---
 
     def ov_candle(self,d=None):
-        if self.m_daytrades:
+        if self.history():
             if d==None:
-                tr = self.m_daytrades.lasttrade()
+                tr = self.history().lasttrade()
             else:
-                tr = self.m_daytrades.trade(d)
+                tr = self.history().trade(d)
             if tr==None:
                 return None
             d = Datation(tr.date()).date()
-            tc = self.m_daytrades.candle(d)
+            tc = self.history().candle(d)
         else:
             tc = None
         return tc
 
     def ov_pivots(self):
-        if self.m_daytrades:
-            tc = self.m_daytrades.lasttrade()
+        if self.history():
+            tc = self.history().lasttrade()
             if tc:
                 #debug('ov_pivots(): tc=%s tc_date=%s ... need to get prev ...' % (tc,tc.date()))
-                tc = self.m_daytrades.prevtrade()
+                tc = self.history().prevtrade()
             if tc:
                 H = tc.nv_high()
                 B = tc.nv_low()
@@ -1002,11 +1062,11 @@ class Quote(object):
     # ---[ market open/close ] ---
 
     def date(self,d=None):
-        if self.m_daytrades:
+        if self.history():
             if d==None:
-                tr = self.m_daytrades.lasttrade()
+                tr = self.history().lasttrade()
             else:
-                tr = self.m_daytrades.trade(d)
+                tr = self.history().trade(d)
             if tr:
                 return tr.date()
         return None
@@ -1033,7 +1093,7 @@ class Quote(object):
                 return False
         else:
             # today is closed : check previous open
-            if self.m_daytrades and self.m_daytrades.prevtrade():
+            if self.history() and self.history().prevtrade():
                 # a trade exists !
                 return True
             else:
@@ -1046,8 +1106,9 @@ class Quote(object):
 
     # ---[ compute all the data ] ---
 
+    @timed('Quote.compute')
     def compute(self,todate=None):
-        debug('%s: compute [%s]' % (self.ticker(),todate))
+        debug('%s: compute [%s]',self.ticker(),todate)
         if self.m_daytrades:
             self.m_daytrades.compute(todate)
 
@@ -1055,7 +1116,7 @@ class Quote(object):
 
     def colorLine(self,d=None):
         if self.m_percent == None:
-            if self.m_daytrades:
+            if self.history():
                 tc = self.nv_close(d)
                 tp = self.nv_prevclose(d)
                 if tc and tp:
@@ -1074,15 +1135,15 @@ class Quote(object):
     
 
     def colorTrend(self,d=None):
-        if self.m_daytrades:
+        if self.history():
             if d==None:
-                tc = self.m_daytrades.lasttrade()
+                tc = self.history().lasttrade()
                 #print 'colorTrend: lastrade close : %.2f date : %s ' % (tc.nv_close(),tc.date())
             else:
-                tc = self.m_daytrades.trade(d)
+                tc = self.history().trade(d)
                 #print 'colorTrend: specific close : %.2f date : %s ' % (tc.nv_close(),tc.date())
                 
-            tp = self.m_daytrades.prevtrade(d)
+            tp = self.history().prevtrade(d)
             if not tp:
                 return QUOTE_INVALID
             
@@ -1122,12 +1183,12 @@ class Quote(object):
 
     def nv_ma(self,period=20,d=None):
         if d==None:
-            d = self.m_daytrades.lasttrade()
+            d = self.history().lasttrade()
             if d:
                 d = d.date()
             else:
                 return None
-        mm = self.m_daytrades.ma(period,d)
+        mm = self.history().ma(period,d)
         return mm
 
     def sv_ma(self,period=20,d=None):
@@ -1138,12 +1199,12 @@ class Quote(object):
 
     def nv_rsi(self,period=14,d=None):
         if d==None:
-            d = self.m_daytrades.lasttrade()
+            d = self.history().lasttrade()
             if d:
                 d = d.date()
             else:
                 return None
-        rsi = self.m_daytrades.rsi(period,d)
+        rsi = self.history().rsi(period,d)
         return rsi
 
     def sv_rsi(self,period=14,d=None):
@@ -1154,12 +1215,12 @@ class Quote(object):
 
     def nv_stoK(self,d=None):
         if d==None:
-            d = self.m_daytrades.lasttrade()
+            d = self.history().lasttrade()
             if d:
                 d = d.date()
             else:
                 return None
-        sto = self.m_daytrades.stoK(d)
+        sto = self.history().stoK(d)
         return sto
 
     def sv_stoK(self,d=None):
@@ -1170,12 +1231,12 @@ class Quote(object):
 
     def nv_stoD(self,d=None):
         if d==None:
-            d = self.m_daytrades.lasttrade()
+            d = self.history().lasttrade()
             if d:
                 d = d.date()
             else:
                 return None
-        sto = self.m_daytrades.stoD(d)
+        sto = self.history().stoD(d)
         return sto
 
     def sv_stoD(self,d=None):
@@ -1190,7 +1251,7 @@ class Quote(object):
                 d = d.date()
             else:
                 return None
-        mm = self.m_daytrades.vma(period,d)
+        mm = self.history().vma(period,d)
         return mm
 
     def sv_vma(self,period=15,d=None):
@@ -1205,7 +1266,7 @@ class Quote(object):
                 d = d.date()
             else:
                 return None
-        mm = self.m_daytrades.ovb(d)
+        mm = self.history().ovb(d)
         return mm
 
     def sv_ovb(self,d=None):
@@ -1244,6 +1305,7 @@ class Quote(object):
         if self.m_daytrades:
             self.m_daytrades.reset()
             self.m_daytrades = None
+        self.m_summary = None
         self.m_pluginId = None
 
     def flushNews(self):
@@ -0,0 +1,592 @@
+#!/usr/bin/env python
+# ============================================================================
+# Project Name : iTrade
+# Module Name  : itrade_replay.py
+#
+# Description: Record / replay of the connectors with a local stub server
+#
+# The Original Code is iTrade code (http://itrade.sourceforge.net).
+#
+# The Initial Developer of the Original Code is Gilles Dumortier.
+#
+# Portions created by the Initial Developer are Copyright (C) 2004-2008 the
+# Initial Developer. All Rights Reserved.
+#
+# Contributor(s):
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; see http://www.gnu.org/licenses/gpl.html
+#
+# History       Rev   Description
+# 2026-10-19    agent Wrote it from scratch
+# ============================================================================
+
+# ============================================================================
+# Imports
+# ============================================================================
+
+# python system
+import os
+import sys
+import time
+import random
+import struct
+import getopt
+import hashlib
+import logging
+import urllib2
+import urlparse
+import threading
+import SocketServer
+import BaseHTTPServer
+from StringIO import StringIO
+
+# iTrade system
+import itrade_config
+from itrade_logging import *
+from itrade_connection import gResponseCache,overrideUrl,registerResponseObserver,ITradeConnection
+
+# ============================================================================
+# Fixtures
+#
+#   recorded responses by request (key of itrade_connection.ResponseCache :
+#   normalized URL and POST data). The body is in <sha1 of key>.dat.
+#
+# File format (fixtures/index.txt) - the last line of a key wins :
+#   <sha1>;<status>;<content type>;<key>
+# ============================================================================
+
+class Fixtures(object):
+    def __init__(self,dir=None):
+        if dir==None:
+            dir = itrade_config.dirFixtures
+        self.m_dir = dir
+        self.m_index = {}
+        self.m_locker = threading.Lock()
+        self.load()
+
+    def __len__(self):
+        return len(self.m_index)
+
+    def keys(self):
+        return self.m_index.keys()
+
+    def filename(self,h):
+        return os.path.join(self.m_dir,'%s.dat' % h)
+
+    def load(self):
+        try:
+            f = open(os.path.join(self.m_dir,'index.txt'),'r')
+            lines = f.readlines()
+            f.close()
+        except IOError:
+            return
+        for eachLine in lines:
+            item = eachLine.rstrip('\r\n').split(';',3)
+            if len(item)==4:
+                try:
+                    self.m_index[item[3]] = (item[0],int(item[1]),item[2])
+                except ValueError:
+                    pass
+
+    def add(self,url,data,status,ctype,body):
+        key = gResponseCache.key(url,data)
+        h = hashlib.sha1(key).hexdigest()
+        self.m_locker.acquire()
+        try:
+            if not os.path.exists(self.m_dir):
+                os.makedirs(self.m_dir)
+            f = open(self.filename(h),'wb')
+            f.write(body)
+            f.close()
+            f = open(os.path.join(self.m_dir,'index.txt'),'a')
+            f.write('%s;%d;%s;%s\n' % (h,status,ctype.replace(';',' ').replace('\n',' '),key))
+            f.close()
+            self.m_index[key] = (h,status,ctype)
+        finally:
+            self.m_locker.release()
+        debug('Fixtures::add %s (%d bytes)',key,len(body))
+
+    def get(self,url,data=None):
+        # (status, content type, body) of a request or None
+        e = self.m_index.get(gResponseCache.key(url,data))
+        if e==None:
+            return None
+        h,status,ctype = e
+        try:
+            f = open(self.filename(h),'rb')
+            body = f.read()
+            f.close()
+        except IOError:
+            return None
+        return status,ctype,body
+
+# ============================================================================
+# Recording
+#
+#   ITradeConnection responses are observed (registerResponseObserver) ;
+#   urllib2.urlopen is wrapped : the body is read, recorded, then given back
+#   to the caller. The wrapper also applies itrade_config.baseUrlOverride.
+# ============================================================================
+
+_recorder = []
+
+def _urlopen(url,data=None,*args,**kwargs):
+    if isinstance(url,urllib2.Request):
+        req = url
+        target = overrideUrl(req.get_full_url())
+        if target!=req.get_full_url():
+            req = urllib2.Request(target,req.get_data(),dict(req.header_items()))
+        data = req.get_data()
+        original = url.get_full_url()
+    else:
+        original = url
+        req = overrideUrl(url)
+    r = _urlopen.m_urlopen(req,data,*args,**kwargs)
+    if not _recorder:
+        return r
+    body = r.read()
+    r.close()
+    _recorder[0].add(original,data,r.getcode() or 200,r.info().getheader('Content-Type',''),body)
+    ret = urllib2.addinfourl(StringIO(body),r.info(),r.geturl(),r.getcode())
+    ret.msg = getattr(r,'msg','')
+    return ret
+
+def installUrllib2():
+    # idempotent
+    if urllib2.urlopen is not _urlopen:
+        _urlopen.m_urlopen = urllib2.urlopen
+        urllib2.urlopen = _urlopen
+
+def _record(url,data,status,ctype,body):
+    if _recorder:
+        _recorder[0].add(url,data,status,ctype,body)
+
+def startRecording(dir=None):
+    fixtures = Fixtures(dir)
+    del _recorder[:]
+    _recorder.append(fixtures)
+    registerResponseObserver(_record)
+    # cached bodies would not be recorded
+    gResponseCache.setEnabled(False)
+    installUrllib2()
+    info('Recording the connectors in %s' % fixtures.m_dir)
+    return fixtures
+
+def stopRecording():
+    del _recorder[:]
+    gResponseCache.setEnabled(True)
+
+def startReplay(base):
+    # every connector requests the local server
+    itrade_config.baseUrlOverride = base
+    # the fixtures must not be stored under the real URLs
+    gResponseCache.setEnabled(False)
+    installUrllib2()
+    info('Replaying the connectors from %s' % base)
+
+# ============================================================================
+# StubServer
+#
+#   serves the fixtures : /<scheme>/<host>/<path>?<query> is the original
+#   URL (see itrade_connection.overrideUrl). Each answer can be delayed
+#   (latency in seconds), throttled (bandwidth in bytes per second) or
+#   replaced by an error (errors : probability, errorCode : status).
+# ============================================================================
+
+class StubRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def originalUrl(self):
+        items = self.path.lstrip('/').split('/',2)
+        if len(items)<2:
+            return None
+        if len(items)==2:
+            items.append('')
+        return '%s://%s/%s' % tuple(items)
+
+    def answer(self,data=None):
+        server = self.server
+        url = self.originalUrl()
+        server.count('requests')
+        if server.m_latency:
+            time.sleep(server.m_latency)
+
+        if server.m_errors and server.random() < server.m_errors:
+            server.count('errors')
+            self.send(server.m_errorCode,'text/plain','injected error\n')
+            return
+
+        fixture = url and server.m_fixtures.get(url,data)
+        if fixture==None:
+            server.count('misses')
+            self.send(404,'text/plain','no fixture for %s\n' % url)
+            return
+        status,ctype,body = fixture
+        self.send(status,ctype,body)
+
+    def send(self,status,ctype,body):
+        server = self.server
+        self.send_response(status)
+        self.send_header('Content-Type',ctype or 'application/octet-stream')
+        self.send_header('Content-Length',str(len(body)))
+        self.end_headers()
+        if not server.m_bandwidth:
+            self.wfile.write(body)
+        else:
+            chunk = max(1024,int(server.m_bandwidth/10))
+            for i in xrange(0,len(body),chunk):
+                part = body[i:i+chunk]
+                self.wfile.write(part)
+                self.wfile.flush()
+                time.sleep(float(len(part))/server.m_bandwidth)
+        server.count('bytes',len(body))
+
+    def do_GET(self):
+        self.answer()
+
+    def do_POST(self):
+        n = int(self.headers.getheader('Content-Length') or 0)
+        self.answer(self.rfile.read(n))
+
+    def log_message(self,format,*args):
+        debug('StubServer: ' + format,*args)
+
+class StubServer(SocketServer.ThreadingMixIn,BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self,fixtures,port=None,latency=0.0,bandwidth=None,errors=0.0,errorCode=503,seed=None):
+        if port==None:
+            port = itrade_config.replayPort
+        BaseHTTPServer.HTTPServer.__init__(self,('127.0.0.1',port),StubRequestHandler)
+        self.m_fixtures = fixtures
+        self.m_latency = latency
+        self.m_bandwidth = bandwidth
+        self.m_errors = errors
+        self.m_errorCode = errorCode
+        self.m_random = random.Random(seed)
+        self.m_locker = threading.Lock()
+        self.m_counters = {'requests':0,'errors':0,'misses':0,'bytes':0}
+        self.m_thread = None
+
+    def base(self):
+        return 'http://%s:%d' % self.server_address
+
+    def random(self):
+        self.m_locker.acquire()
+        try:
+            return self.m_random.random()
+        finally:
+            self.m_locker.release()
+
+    def count(self,name,n=1):
+        self.m_locker.acquire()
+        self.m_counters[name] += n
+        self.m_locker.release()
+
+    def counters(self):
+        self.m_locker.acquire()
+        try:
+            return dict(self.m_counters)
+        finally:
+            self.m_locker.release()
+
+    def start(self):
+        # serve in the background
+        self.m_thread = threading.Thread(target=self.serve_forever,name='stub')
+        self.m_thread.setDaemon(True)
+        self.m_thread.start()
+        return self.base()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+# ============================================================================
+# importPcap()
+#
+#   HTTP exchanges of a libpcap capture (ethereal/ folder) as fixtures :
+#   TCP streams to port 80 are reassembled, then requests and responses of
+#   each connection are paired in order.
+# ============================================================================
+
+def _packets(fn):
+    f = open(fn,'rb')
+    buf = f.read()
+    f.close()
+    if buf[:4]=='\xd4\xc3\xb2\xa1':
+        e = '<'
+    elif buf[:4]=='\xa1\xb2\xc3\xd4':
+        e = '>'
+    else:
+        raise ValueError('%s is not a libpcap capture' % fn)
+    linktype = struct.unpack(e+'I',buf[20:24])[0]
+    pos = 24
+    while pos+16<=len(buf):
+        incl = struct.unpack(e+'I',buf[pos+8:pos+12])[0]
+        pkt = buf[pos+16:pos+16+incl]
+        pos = pos+16+incl
+        if linktype==1:
+            # ethernet
+            if pkt[12:14]!='\x08\x00':
+                continue
+            pkt = pkt[14:]
+        elif linktype!=101:
+            # not raw IP
+            continue
+        if len(pkt)<20 or ord(pkt[9])!=6:
+            continue
+        ihl = (ord(pkt[0]) & 15)*4
+        total = struct.unpack('>H',pkt[2:4])[0]
+        tcp = pkt[ihl:total]
+        if len(tcp)<20:
+            continue
+        sport,dport,seq = struct.unpack('>HHI',tcp[:8])
+        off = (ord(tcp[12]) >> 4)*4
+        payload = tcp[off:]
+        if payload:
+            yield (pkt[12:16],sport,pkt[16:20],dport),seq,payload
+
+def _streams(fn):
+    flows = {}
+    for flow,seq,payload in _packets(fn):
+        flows.setdefault(flow,{})[seq] = payload
+    streams = {}
+    for flow,segments in flows.items():
+        data = []
+        end = None
+        for seq in sorted(segments.keys()):
+            payload = segments[seq]
+            if end!=None and seq<end:
+                # retransmission
+                payload = payload[end-seq:]
+            data.append(payload)
+            end = seq + len(segments[seq])
+        streams[flow] = ''.join(data)
+    return streams
+
+def _messages(stream,bRequest):
+    # list of (first line, headers, body)
+    ret = []
+    pos = 0
+    while pos<len(stream):
+        eoh = stream.find('\r\n\r\n',pos)
+        if eoh<0:
+            break
+        lines = stream[pos:eoh].split('\r\n')
+        headers = {}
+        for eachLine in lines[1:]:
+            if ':' in eachLine:
+                k,v = eachLine.split(':',1)
+                headers[k.strip().lower()] = v.strip()
+        pos = eoh+4
+        if not bRequest and lines[0][9:10]=='1':
+            # interim response (100 Continue, ...) : no body, the final
+            # response follows
+            continue
+        if headers.get('transfer-encoding','').lower()=='chunked':
+            body = []
+            while 1:
+                eol = stream.find('\r\n',pos)
+                if eol<0:
+                    break
+                n = int(stream[pos:eol].split(';')[0] or '0',16)
+                pos = eol+2
+                if n==0:
+                    pos = stream.find('\r\n',pos)+2
+                    break
+                body.append(stream[pos:pos+n])
+                pos = pos+n+2
+            body = ''.join(body)
+        elif headers.has_key('content-length'):
+            n = int(headers['content-length'].split(',')[0])
+            body = stream[pos:pos+n]
+            pos = pos+n
+        elif bRequest:
+            body = ''
+        else:
+            # until the next response or the end of the connection
+            nxt = stream.find('HTTP/1.',pos)
+            if nxt<0:
+                nxt = len(stream)
+            body = stream[pos:nxt]
+            pos = nxt
+        ret.append((lines[0],headers,body))
+    return ret
+
+def importPcap(fn,fixtures):
+    streams = _streams(fn)
+    n = 0
+    for (src,sport,dst,dport),stream in streams.items():
+        if dport!=80:
+            continue
+        answers = streams.get((dst,dport,src,sport),'')
+        requests = _messages(stream,True)
+        responses = _messages(answers,False)
+        for (reqline,headers,data),(statusline,rheaders,body) in zip(requests,responses):
+            items = reqline.split(' ')
+            if len(items)<2 or items[0] not in ('GET','POST'):
+                continue
+            host = headers.get('host') or '%d.%d.%d.%d' % tuple([ord(x) for x in dst])
+            url = urlparse.urljoin('http://%s/' % host,items[1])
+            try:
+                status = int(statusline.split(' ')[1])
+            except (IndexError,ValueError):
+                continue
+            if rheaders.get('content-encoding','').lower()=='gzip':
+                import gzip
+                body = gzip.GzipFile(fileobj=StringIO(body)).read()
+            fixtures.add(url,(items[0]=='POST' and data) or None,status,rheaders.get('content-type',''),body)
+            n = n + 1
+    return n
+
+# ============================================================================
+# benchReplay()
+#
+#   every fixture is requested `rounds` times by `threads` threads, each with
+#   its own ITradeConnection, through the stub server
+# ============================================================================
+
+def benchReplay(fixtures,server,threads=4,rounds=3):
+    base = server.base()
+    urls = []
+    for eachKey in fixtures.keys():
+        if ' POST ' in eachKey:
+            url,data = eachKey.split(' POST ',1)
+        else:
+            url,data = eachKey,None
+        urls.append((url,data))
+
+    itrade_config.baseUrlOverride = base
+    results = {'ok':0,'failed':0,'bytes':0}
+    locker = threading.Lock()
+
+    def worker(lst):
+        connection = ITradeConnection(connectionTimeout=itrade_config.connectionTimeout)
+        for url,data in lst:
+            try:
+                body = connection.getDataFromUrl(url,data=data and dict(urlparse.parse_qsl(data,True)))
+                ok,size = 1,len(body)
+            except:
+                ok,size = 0,0
+            locker.acquire()
+            if ok:
+                results['ok'] += 1
+            else:
+                results['failed'] += 1
+            results['bytes'] += size
+            locker.release()
+
+    start = time.time()
+    lst = []
+    for i in range(threads):
+        t = threading.Thread(target=worker,args=(urls*rounds,))
+        t.setDaemon(True)
+        lst.append(t)
+        t.start()
+    for t in lst:
+        t.join()
+    elapsed = time.time()-start
+
+    results['elapsed'] = elapsed
+    results['requests/s'] = (results['ok']+results['failed'])/max(elapsed,1e-6)
+    results['server'] = server.counters()
+    return results
+
+# ============================================================================
+# Command line
+# ============================================================================
+
+def usage():
+    print "itrade_replay.py --serve | --bench | --pcap=<capture>"
+    print
+    print "--fixtures=<d>   fixtures folder (default fixtures/)"
+    print "--port=<n>       port of the stub server (default %d)" % itrade_config.replayPort
+    print "--latency=<ms>   delay of each answer"
+    print "--bandwidth=<k>  throughput of the answers in KB/s"
+    print "--errors=<p>     probability of an injected error (0..1)"
+    print "--code=<n>       status of the injected errors (default 503)"
+    print "--threads=<n>    --bench : concurrent connections (default 4)"
+    print "--rounds=<n>     --bench : requests of each fixture by thread (default 3)"
+
+def main():
+    try:
+        opts,args = getopt.getopt(sys.argv[1:],'h',['serve','bench','pcap=','fixtures=','port=','latency=','bandwidth=','errors=','code=','threads=','rounds=','help'])
+    except getopt.GetoptError:
+        usage()
+        sys.exit(2)
+
+    cmd = None
+    pcap = []
+    dir = None
+    port = None
+    latency = 0.0
+    bandwidth = None
+    errors = 0.0
+    code = 503
+    threads = 4
+    rounds = 3
+    for o,a in opts:
+        if o in ('-h','--help'):
+            usage()
+            sys.exit()
+        elif o in ('--serve','--bench'):
+            cmd = o[2:]
+        elif o=='--pcap':
+            pcap.append(a)
+        elif o=='--fixtures':
+            dir = a
+        elif o=='--port':
+            port = int(a)
+        elif o=='--latency':
+            latency = float(a)/1000.0
+        elif o=='--bandwidth':
+            bandwidth = float(a)*1024
+        elif o=='--errors':
+            errors = float(a)
+        elif o=='--code':
+            code = int(a)
+        elif o=='--threads':
+            threads = int(a)
+        elif o=='--rounds':
+            rounds = int(a)
+
+    fixtures = Fixtures(dir)
+    for eachCapture in pcap:
+        print '%s : %d exchanges' % (eachCapture,importPcap(eachCapture,fixtures))
+
+    if cmd=='serve':
+        server = StubServer(fixtures,port,latency,bandwidth,errors,code)
+        print 'serving %d fixtures on %s' % (len(fixtures),server.base())
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print server.counters()
+    elif cmd=='bench':
+        server = StubServer(fixtures,port or 0,latency,bandwidth,errors,code,seed=0)
+        server.start()
+        results = benchReplay(fixtures,server,threads,rounds)
+        server.stop()
+        for k in sorted(results.keys()):
+            print '%-12s %s' % (k,results[k])
+    elif not pcap:
+        usage()
+
+if __name__=='__main__':
+    setLevel(logging.INFO)
+    main()
+
+# ============================================================================
+# That's all folks !
+# ============================================================================
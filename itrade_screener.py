@@ -0,0 +1,350 @@
+#!/usr/bin/env python
+# ============================================================================
+# Project Name : iTrade
+# Module Name  : itrade_screener.py
+#
+# Description: Technical screener over every cached quote of a market
+#
+# The Original Code is iTrade code (http://itrade.sourceforge.net).
+#
+# The Initial Developer of the Original Code is Gilles Dumortier.
+#
+# Portions created by the Initial Developer are Copyright (C) 2004-2008 the
+# Initial Developer. All Rights Reserved.
+#
+# Contributor(s):
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; see http://www.gnu.org/licenses/gpl.html
+#
+# History       Rev   Description
+# 2026-10-19    agent Wrote it from scratch
+# ============================================================================
+
+# ============================================================================
+# Imports
+# ============================================================================
+
+# python system
+import os
+import logging
+import multiprocessing
+
+# numpy
+import numpy
+
+# iTrade system
+from itrade_logging import *
+import itrade_config
+import itrade_csv
+import itrade_arrays
+from itrade_quotes import quotes
+
+# ============================================================================
+# Screener fields
+#
+#   values of the last trade available to filter and rank expressions.
+#   Unknown values (not enough history) are NaN : every comparison is False.
+# ============================================================================
+
+screener_fields = (
+    'date','open','high','low','close','volume','prevclose','percent',
+    'ma20','ma50','ma100','ma150','vma15','rsi14','stok','stod',
+    'bolldn','bollup','high52','low52','ovb','days',
+)
+
+# min/max and volume on one year of open days
+SCREENER_YEAR = 260
+
+# below this number of stale cache files, no process pool is started
+SCREENER_POOL_MIN = 32
+
+NaN = float('nan')
+
+# ============================================================================
+# screenMetrics()
+#
+#   compute the screener fields of an History (itrade_arrays)
+# ============================================================================
+
+def screenMetrics(h):
+    n = len(h)
+    c = h.close
+    cs = itrade_arrays.cumsum0(c)
+
+    def last_ma(period):
+        if n<period:
+            return NaN
+        return (cs[n]-cs[n-period]) / period
+
+    m = {}
+    m['date'] = float(h.date[-1])
+    m['open'] = h.open[-1]
+    m['high'] = h.high[-1]
+    m['low'] = h.low[-1]
+    m['close'] = c[-1]
+    m['volume'] = h.volume[-1]
+    if n>1 and c[-2]>0.0:
+        m['prevclose'] = c[-2]
+        m['percent'] = (c[-1]/c[-2])*100.0 - 100.0
+    else:
+        m['prevclose'] = NaN
+        m['percent'] = NaN
+    m['ma20'] = last_ma(20)
+    m['ma50'] = last_ma(50)
+    m['ma100'] = last_ma(100)
+    m['ma150'] = last_ma(150)
+    if n>=15:
+        m['vma15'] = h.volume[-15:].mean()
+    else:
+        m['vma15'] = NaN
+
+    # indicators on the whole history, keep the last value
+    if n>14:
+        m['rsi14'] = itrade_arrays.rsi(c,14)[-1]
+        k,d = itrade_arrays.stochastic(h.high,h.low,c)
+        m['stok'] = k[-1]
+        m['stod'] = d[-1]
+    else:
+        m['rsi14'] = m['stok'] = m['stod'] = NaN
+    if n>=20:
+        w = c[-20:]
+        sd = w.std()
+        m['bolldn'] = w.mean() - 2.0*sd
+        m['bollup'] = w.mean() + 2.0*sd
+    else:
+        m['bolldn'] = m['bollup'] = NaN
+    m['high52'] = h.high[-SCREENER_YEAR:].max()
+    m['low52'] = h.low[-SCREENER_YEAR:].min()
+    m['ovb'] = itrade_arrays.ovb(c,h.volume)[-1]
+    m['days'] = float(n)
+    return m
+
+# ============================================================================
+# screenChunk()
+#
+#   worker of the process pool : (key,isin,filename) -> (key,metrics)
+#   Only the cache files are read : no Quote / Trades object is built.
+# ============================================================================
+
+def screenChunk(chunk):
+    ret = []
+    for key,isin,fn in chunk:
+        h = itrade_arrays.loadHistory(fn,key,isin)
+        if h:
+            ret.append((key,screenMetrics(h)))
+        else:
+            ret.append((key,None))
+    return ret
+
+# ============================================================================
+# ScreenerError
+# ============================================================================
+
+class ScreenerError(Exception):
+    pass
+
+def compileExpression(expr):
+    if not expr:
+        return None
+    try:
+        return compile(expr,'<screener>','eval')
+    except SyntaxError,e:
+        raise ScreenerError('invalid expression %s : %s' % (expr,e))
+
+_screener_builtins = {
+    '__builtins__'  : {},
+    'abs'           : abs,
+    'min'           : min,
+    'max'           : max,
+}
+
+def evalExpression(code,metrics):
+    try:
+        return eval(code,_screener_builtins,metrics)
+    except NameError,e:
+        raise ScreenerError('%s (fields: %s)' % (e,', '.join(screener_fields)))
+    except ArithmeticError:
+        return None
+
+# ============================================================================
+# Screener
+#
+#   metrics are cached per quote with the mtime and size of its cache file :
+#   a quote is computed again only when its cache file has changed.
+#
+# File format (cache/screener.txt):
+#   <quote key>;<mtime>;<size>;<screener_fields ...>
+# ============================================================================
+
+class Screener(object):
+    def __init__(self):
+        self.m_metrics = {}
+        self.m_dirty = False
+        self.m_loaded = False
+
+    # ---[ file ] -----------------------------------------
+
+    def load(self,fn=None):
+        self.m_loaded = True
+        infile = itrade_csv.read(fn,os.path.join(itrade_config.dirCacheData,'screener.txt'))
+        if infile:
+            nf = len(screener_fields)
+            for eachLine in infile:
+                item = itrade_csv.parse(eachLine,nf+3)
+                if item and len(item)==nf+3:
+                    try:
+                        values = [float(v) for v in item[3:]]
+                        stamp = (float(item[1]),long(item[2]))
+                    except ValueError:
+                        continue
+                    self.m_metrics[item[0]] = (stamp,dict(zip(screener_fields,values)))
+
+    def save(self,fn=None):
+        if not self.m_dirty:
+            return
+        lines = []
+        for key,(stamp,m) in self.m_metrics.items():
+            values = ';'.join(['%r' % float(m[f]) for f in screener_fields])
+            lines.append('%s;%r;%d;%s' % (key,stamp[0],stamp[1],values))
+        itrade_csv.write(fn,os.path.join(itrade_config.dirCacheData,'screener.txt'),lines)
+        self.m_dirty = False
+
+    # ---[ candidates ] -----------------------------------
+
+    def candidates(self,market=None):
+        # quotes of the market (all markets if None) having a cache file
+        lst = []
+        for eachQuote in quotes.list():
+            if market and eachQuote.market()!=market:
+                continue
+            fn = os.path.join(itrade_config.dirCacheData,'%s.txt' % eachQuote.key())
+            try:
+                st = os.stat(fn)
+            except OSError:
+                continue
+            lst.append((eachQuote,fn,(st.st_mtime,long(st.st_size))))
+        return lst
+
+    # ---[ compute ] --------------------------------------
+
+    def refresh(self,candidates,processes=None):
+        # compute the metrics of the quotes whose cache file changed
+        stale = []
+        stamps = {}
+        for quote,fn,stamp in candidates:
+            cached = self.m_metrics.get(quote.key())
+            if cached==None or cached[0]!=stamp:
+                stale.append((quote.key(),quote.isin(),fn))
+                stamps[quote.key()] = stamp
+        if not stale:
+            return 0
+
+        if processes==None:
+            processes = multiprocessing.cpu_count()
+        if processes>1 and len(stale)>=SCREENER_POOL_MIN:
+            # shard : a few chunks per worker to balance uneven histories
+            nchunks = processes*4
+            chunks = [stale[i::nchunks] for i in range(nchunks) if stale[i::nchunks]]
+            pool = multiprocessing.Pool(processes)
+            try:
+                results = pool.map(screenChunk,chunks)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = [screenChunk(stale)]
+
+        for eachResult in results:
+            for key,m in eachResult:
+                if m:
+                    self.m_metrics[key] = (stamps[key],m)
+                elif self.m_metrics.has_key(key):
+                    del self.m_metrics[key]
+        self.m_dirty = True
+        info('Screener::refresh %d quote(s) computed' % len(stale))
+        return len(stale)
+
+    def screen(self,expr=None,market=None,sortby=None,reverse=True,limit=None,processes=None):
+        # returns [(quote,metrics)] matching expr ranked by sortby
+        cfilter = compileExpression(expr)
+        csort = compileExpression(sortby)
+
+        if not self.m_loaded:
+            self.load()
+        candidates = self.candidates(market)
+        self.refresh(candidates,processes)
+        self.save()
+
+        lst = []
+        for quote,fn,stamp in candidates:
+            cached = self.m_metrics.get(quote.key())
+            if cached==None:
+                continue
+            m = cached[1]
+            if cfilter and not evalExpression(cfilter,m):
+                continue
+            if csort:
+                rank = evalExpression(csort,m)
+                if rank!=rank:
+                    # NaN ranks last (like None)
+                    rank = None
+            else:
+                rank = quote.name()
+            lst.append((rank,quote,m))
+
+        bReverse = reverse and csort!=None
+        lst.sort(key=lambda x: ((x[0]==None) != bReverse,x[0]),reverse=bReverse)
+        if limit:
+            lst = lst[:limit]
+        return [(quote,m) for rank,quote,m in lst]
+
+# ============================================================================
+# Export singleton
+# ============================================================================
+
+try:
+    ignore(screener)
+except NameError:
+    screener = Screener()
+
+# ============================================================================
+# cmdline_screen()
+# ============================================================================
+
+def cmdline_screen(expr,market=None,sortby=None):
+    try:
+        lst = screener.screen(expr,market,sortby)
+    except ScreenerError,e:
+        print 'screener: %s' % e
+        return
+    print '%-14s %-20s %10s %8s %8s %8s %8s' % ('isin','name','close','%','rsi14','stok','ma50')
+    for quote,m in lst:
+        print '%-14s %-20s %10.3f %8.2f %8.2f %8.2f %8.3f' % (quote.isin(),quote.name()[:20],m['close'],m['percent'],m['rsi14'],m['stok'],m['ma50'])
+    print '%d quote(s)' % len(lst)
+
+# ============================================================================
+# Test me
+# ============================================================================
+
+if __name__=='__main__':
+    setLevel(logging.INFO)
+
+    from itrade_quotes import initQuotesModule
+    initQuotesModule()
+
+    cmdline_screen('rsi14 < 30 and close > ma100',None,'-rsi14')
+
+# ============================================================================
+# That's all folks !
+# ============================================================================
@@ -0,0 +1,484 @@
+#!/usr/bin/env python
+# ============================================================================
+# Project Name : iTrade
+# Module Name  : itrade_snapshot.py
+#
+# Description: Snapshots of the quotes shared between iTrade processes
+#
+# The Original Code is iTrade code (http://itrade.sourceforge.net).
+#
+# The Initial Developer of the Original Code is Gilles Dumortier.
+#
+# Portions created by the Initial Developer are Copyright (C) 2004-2008 the
+# Initial Developer. All Rights Reserved.
+#
+# Contributor(s):
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; see http://www.gnu.org/licenses/gpl.html
+#
+# History       Rev   Description
+# 2026-10-19    agent Wrote it from scratch
+# ============================================================================
+
+# ============================================================================
+# Imports
+# ============================================================================
+
+# python system
+import os
+import sys
+import mmap
+import time
+import struct
+import logging
+import tempfile
+import threading
+
+# numpy
+import numpy
+
+# iTrade system
+import itrade_config
+from itrade_logging import *
+
+# ============================================================================
+# File format (snapshots/<name>.snap, little endian)
+#
+#   header   magic 'ITSNAP02', counter (incremented by each publication),
+#            publication time, number of days, number of quotes
+#   dates    ndays int32 : yyyymmdd of each day of the calendar
+#   keys     nquotes keys : uint16 length then the key, padded to 8 bytes
+#   quotes   nquotes records : index of the last trade, last trade
+#            (open, high, low, close, volume), previous close, percent
+#            (NaN when unknown)
+#   arrays   nquotes x 5 x ndays float64 : open, high, low, close, volume
+#            of each day (-1.0 when no trade, like itrade_trades.Trades)
+#
+#   A snapshot is written in a temporary file then renamed : readers see
+#   the previous or the new version, never a partial one. They keep their
+#   mapping of the previous file until they remap.
+#
+#   Live updates that don't change the layout (same calendar, quotes and
+#   index of the last trade of each quote) only patch the records and the
+#   last bars in place (see patchSnapshot()) : the counter is 0 during the
+#   patch and readers skip a version whose counter changed while reading.
+# ============================================================================
+
+SNAPSHOT_MAGIC = 'ITSNAP02'
+SNAPSHOT_HEADER = struct.Struct('<8sQdII4x')
+SNAPSHOT_KEYLEN = struct.Struct('<H')
+SNAPSHOT_QUOTE = struct.Struct('<i4x7d')
+SNAPSHOT_ARRAYS = 5
+
+def snapshotPath(name):
+    return os.path.join(itrade_config.dirSnapshots,'%s.snap' % name)
+
+def snapshotName(fn,publisher):
+    # each publisher (gui, daemon, import) has its own snapshot of a portfolio
+    return '%s.%s' % (fn,publisher)
+
+def listSnapshots():
+    lst = []
+    for eachFile in os.listdir(itrade_config.dirSnapshots):
+        if eachFile.endswith('.snap') and not eachFile.startswith('.'):
+            lst.append(eachFile[:-len('.snap')])
+    lst.sort()
+    return lst
+
+def packKeys(keys):
+    buf = []
+    for eachKey in keys:
+        buf.append(SNAPSHOT_KEYLEN.pack(len(eachKey)))
+        buf.append(eachKey)
+    buf = ''.join(buf)
+    return buf + '\0' * (-len(buf) % 8)
+
+def _nan(v):
+    if v==None:
+        return numpy.nan
+    return float(v)
+
+def _value(v):
+    if v!=v:
+        return None
+    return v
+
+# ============================================================================
+# readCounter()
+# ============================================================================
+
+def readCounter(fn):
+    try:
+        f = open(fn,'rb')
+        try:
+            buf = f.read(SNAPSHOT_HEADER.size)
+        finally:
+            f.close()
+    except IOError:
+        return 0
+    if len(buf)<SNAPSHOT_HEADER.size:
+        return 0
+    magic,counter,published,ndays,nquotes = SNAPSHOT_HEADER.unpack(buf)
+    if magic!=SNAPSHOT_MAGIC:
+        return 0
+    return counter
+
+# ============================================================================
+# snapshotLayout()
+#
+#   what a snapshot can't patch : number of days, keys and index of the last
+#   trade of each quote
+# ============================================================================
+
+def _lasttrade(quote):
+    trades = quote.m_daytrades
+    return trades and trades.lasttrade()
+
+def snapshotLayout(lst):
+    from itrade_datation import gCal
+
+    last = []
+    for eachQuote in lst:
+        tr = _lasttrade(eachQuote)
+        if tr:
+            last.append(tr.index())
+        else:
+            last.append(-1)
+    return (gCal.lastindex()+1,tuple([q.key() for q in lst]),tuple(last))
+
+def packQuote(quote):
+    tr = _lasttrade(quote)
+    if tr:
+        last = (tr.index(),tr.nv_open(),tr.nv_high(),tr.nv_low(),tr.nv_close(),tr.nv_volume())
+    else:
+        last = (-1,None,None,None,None,None)
+    return SNAPSHOT_QUOTE.pack(last[0],
+        _nan(last[1]),_nan(last[2]),_nan(last[3]),_nan(last[4]),_nan(last[5]),
+        _nan(quote.nv_prevclose()),_nan(quote.nv_percent()))
+
+# ============================================================================
+# writeSnapshot()
+#
+#   lst : quotes ; returns the counter of the new snapshot. bSync : the file
+#   is flushed to the disk before being renamed
+# ============================================================================
+
+def writeSnapshot(name,lst,bSync=True):
+    from itrade_datation import gCal
+
+    fn = snapshotPath(name)
+    counter = readCounter(fn) + 1
+    ndays = gCal.lastindex() + 1
+    dates = numpy.zeros(ndays,dtype='<i4')
+    for i in range(ndays):
+        d = gCal.date(i)
+        if d:
+            dates[i] = d.year*10000 + d.month*100 + d.day
+
+    keys = []
+    records = []
+    arrays = numpy.empty((len(lst),SNAPSHOT_ARRAYS,ndays),dtype='<f8')
+    arrays.fill(-1.0)
+    for n,eachQuote in enumerate(lst):
+        trades = eachQuote.m_daytrades
+        if _lasttrade(eachQuote):
+            arrays[n,0] = trades.m_inOpen
+            arrays[n,1] = trades.m_inHigh
+            arrays[n,2] = trades.m_inLow
+            arrays[n,3] = trades.m_inClose
+            arrays[n,4] = trades.m_inVol
+        keys.append(eachQuote.key())
+        records.append(packQuote(eachQuote))
+
+    fd,tmp = tempfile.mkstemp(prefix='.%s.' % name,dir=itrade_config.dirSnapshots)
+    try:
+        f = os.fdopen(fd,'wb')
+        try:
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC,counter,time.time(),ndays,len(lst)))
+            f.write(dates.tostring())
+            f.write(packKeys(keys))
+            f.write(''.join(records))
+            f.write(arrays.tostring())
+            if bSync:
+                f.flush()
+                os.fsync(f.fileno())
+        finally:
+            f.close()
+        if sys.platform=='win32' and os.path.exists(fn):
+            # no atomic replace : readers retry on a missing file
+            os.remove(fn)
+        os.rename(tmp,fn)
+    except:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    debug('writeSnapshot %s : %d quotes, counter=%d',fn,len(lst),counter)
+    return counter
+
+# ============================================================================
+# patchSnapshot()
+#
+#   rewrites in place the records and the last bars of the quotes of lst
+#   (all the quotes of the snapshot, same layout) listed in keys (None :
+#   all). Returns the new counter or 0 when the file doesn't match lst.
+# ============================================================================
+
+def patchSnapshot(name,lst,keys=None):
+    fn = snapshotPath(name)
+    try:
+        f = open(fn,'r+b')
+    except IOError:
+        return 0
+    try:
+        buf = f.read(SNAPSHOT_HEADER.size)
+        if len(buf)<SNAPSHOT_HEADER.size:
+            return 0
+        magic,counter,published,ndays,nquotes = SNAPSHOT_HEADER.unpack(buf)
+        if magic!=SNAPSHOT_MAGIC or counter==0 or nquotes!=len(lst):
+            return 0
+        records = SNAPSHOT_HEADER.size + ndays*4 + len(packKeys([q.key() for q in lst]))
+        arrays = records + nquotes*SNAPSHOT_QUOTE.size
+
+        # counter 0 : readers don't map the file during the patch
+        f.seek(0)
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC,0,published,ndays,nquotes))
+        f.flush()
+        for n,eachQuote in enumerate(lst):
+            if keys!=None and not keys.has_key(eachQuote.key()):
+                continue
+            f.seek(records + n*SNAPSHOT_QUOTE.size)
+            f.write(packQuote(eachQuote))
+            tr = _lasttrade(eachQuote)
+            if tr:
+                bar = (tr.nv_open(),tr.nv_high(),tr.nv_low(),tr.nv_close(),tr.nv_volume())
+                for k in range(SNAPSHOT_ARRAYS):
+                    f.seek(arrays + ((n*SNAPSHOT_ARRAYS+k)*ndays+tr.index())*8)
+                    f.write(struct.pack('<d',bar[k]))
+        counter = counter + 1
+        f.seek(0)
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC,counter,time.time(),ndays,nquotes))
+    finally:
+        f.close()
+    debug('patchSnapshot %s : counter=%d',fn,counter)
+    return counter
+
+# ============================================================================
+# SnapshotPublisher
+#
+#   publishes a list of quotes (usually the matrix) : at once with publish()
+#   or after each live update with start(). Updates within `delay` seconds
+#   are published together : only the quotes updated are patched, the file
+#   is rewritten (without fsync) when the layout changed.
+# ============================================================================
+
+class SnapshotPublisher(object):
+    def __init__(self,name,source,delay=None):
+        # source : object with a list() of quotes (TradingMatrix)
+        self.m_name = name
+        self.m_source = source
+        if delay==None:
+            delay = itrade_config.snapshotDelay
+        self.m_delay = delay
+        self.m_locker = threading.Lock()
+        self.m_timer = None
+        self.m_counter = 0
+        self.m_layout = None
+        self.m_touched = {}
+
+    def counter(self):
+        return self.m_counter
+
+    def publish(self,bLive=False):
+        self.m_locker.acquire()
+        try:
+            self.m_timer = None
+            touched = self.m_touched
+            self.m_touched = {}
+            lst = self.m_source.list()
+            layout = snapshotLayout(lst)
+            try:
+                counter = 0
+                if bLive and layout==self.m_layout:
+                    counter = patchSnapshot(self.m_name,lst,touched)
+                if counter==0:
+                    counter = writeSnapshot(self.m_name,lst,bSync=not bLive)
+                    self.m_layout = layout
+                self.m_counter = counter
+            except (IOError,OSError),e:
+                self.m_layout = None
+                info('SnapshotPublisher::publish %s : %s' % (self.m_name,e))
+        finally:
+            self.m_locker.release()
+
+    def livePublish(self):
+        self.publish(bLive=True)
+
+    def touch(self,quote=None):
+        self.m_locker.acquire()
+        try:
+            if quote:
+                self.m_touched[quote.key()] = True
+            else:
+                # everything may have changed
+                self.m_layout = None
+            if self.m_timer==None:
+                self.m_timer = threading.Timer(self.m_delay,self.livePublish)
+                self.m_timer.setDaemon(True)
+                self.m_timer.start()
+        finally:
+            self.m_locker.release()
+
+    def start(self):
+        from itrade_quotes import registerLiveListener
+        registerLiveListener(self.touch)
+        self.publish()
+
+# ============================================================================
+# SnapshotReader
+#
+#   read-only mapping of a snapshot. refresh() remaps when the publisher
+#   has renamed a new version in place (the counter of the header changed).
+# ============================================================================
+
+class SnapshotReader(object):
+    def __init__(self,name):
+        self.m_fn = snapshotPath(name)
+        self.m_map = None
+        self.m_counter = 0
+        self.m_published = 0.0
+        self.m_index = {}
+        self.m_dates = None
+        self.m_arrays = None
+        self.m_quotes = None
+
+    def counter(self):
+        return self.m_counter
+
+    def published(self):
+        return self.m_published
+
+    def refresh(self):
+        # returns True when a new version has been mapped
+        counter = readCounter(self.m_fn)
+        if counter==0 or counter==self.m_counter:
+            return False
+        try:
+            f = open(self.m_fn,'rb')
+        except IOError:
+            return False
+        try:
+            m = mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
+        finally:
+            f.close()
+        magic,counter,published,ndays,nquotes = SNAPSHOT_HEADER.unpack_from(m,0)
+        offset = SNAPSHOT_HEADER.size
+        dates = numpy.frombuffer(m,dtype='<i4',count=ndays,offset=offset)
+        offset = offset + dates.nbytes
+        index = {}
+        keys = []
+        start = offset
+        for n in range(nquotes):
+            size, = SNAPSHOT_KEYLEN.unpack_from(m,offset)
+            offset = offset + SNAPSHOT_KEYLEN.size
+            key = m[offset:offset+size]
+            offset = offset + size
+            index[key] = n
+            keys.append(key)
+        offset = offset + (-(offset-start) % 8)
+        quotes = []
+        for n in range(nquotes):
+            quotes.append((keys[n],)+SNAPSHOT_QUOTE.unpack_from(m,offset))
+            offset = offset + SNAPSHOT_QUOTE.size
+        arrays = numpy.frombuffer(m,dtype='<f8',count=nquotes*SNAPSHOT_ARRAYS*ndays,offset=offset)
+        if readCounter(self.m_fn)!=counter:
+            # patched or replaced while reading
+            return False
+
+        self.m_map = m
+        self.m_counter = counter
+        self.m_published = published
+        self.m_dates = dates
+        self.m_index = index
+        self.m_quotes = quotes
+        self.m_arrays = arrays.reshape((nquotes,SNAPSHOT_ARRAYS,ndays))
+        return True
+
+    def keys(self):
+        return self.m_index.keys()
+
+    def dates(self):
+        return self.m_dates
+
+    def quote(self,key):
+        # last state of a quote (None if not in the snapshot)
+        n = self.m_index.get(key)
+        if n==None:
+            return None
+        key,idx,o,h,l,c,v,prevclose,percent = self.m_quotes[n]
+        if idx<0:
+            date = None
+        else:
+            date = int(self.m_dates[idx])
+        return {
+            'key': key,
+            'date': date,
+            'open': _value(o),
+            'high': _value(h),
+            'low': _value(l),
+            'close': _value(c),
+            'volume': _value(v),
+            'prevclose': _value(prevclose),
+            'percent': _value(percent),
+            }
+
+    def daily(self,key):
+        # read-only views (open, high, low, close, volume) indexed like dates()
+        n = self.m_index.get(key)
+        if n==None:
+            return None
+        return self.m_arrays[n]
+
+# ============================================================================
+# publishMatrix()
+# ============================================================================
+
+def publishMatrix(matrix,name):
+    return writeSnapshot(name,matrix.list())
+
+# ============================================================================
+# Test me
+# ============================================================================
+
+if __name__=='__main__':
+    setLevel(logging.INFO)
+
+    # itrade_snapshot.py [name] : dump the snapshots published
+    if len(sys.argv)>1:
+        names = sys.argv[1:]
+    else:
+        names = listSnapshots()
+    for eachName in names:
+        reader = SnapshotReader(eachName)
+        if reader.refresh():
+            print '%s : snapshot #%d (%s)' % (eachName,reader.counter(),time.ctime(reader.published()))
+            for key in sorted(reader.keys()):
+                print reader.quote(key)
+        else:
+            print '%s : no snapshot' % eachName
+
+# ============================================================================
+# That's all folks !
+# ============================================================================
@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+# ============================================================================
+# Project Name : iTrade
+# Module Name  : itrade_summary.py
+#
+# Description: Summary of the last bars of the quotes, read at startup
+#
+# The Original Code is iTrade code (http://itrade.sourceforge.net).
+#
+# The Initial Developer of the Original Code is Gilles Dumortier.
+#
+# Portions created by the Initial Developer are Copyright (C) 2004-2008 the
+# Initial Developer. All Rights Reserved.
+#
+# Contributor(s):
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; see http://www.gnu.org/licenses/gpl.html
+#
+# History       Rev   Description
+# 2026-10-19    agent Wrote it from scratch
+# ============================================================================
+
+# ============================================================================
+# Imports
+# ============================================================================
+
+# python system
+import os
+import logging
+
+# iTrade system
+import itrade_config
+from itrade_logging import *
+import itrade_csv
+from itrade_datation import gCal,Datation
+from itrade_trades import Trade
+from itrade_candle import Candle
+
+# ============================================================================
+# Summary
+#
+#   last bar, previous bar and indicators of the last bar of a quote. It
+#   answers the read API of Trades used by the quote (lasttrade(),
+#   prevtrade(), ma(), ...) until the full history is loaded.
+#
+# CSV File format :
+#
+#   KEY;DATE;OPEN;HIGH;LOW;CLOSE;VOLUME;PREVDATE;OPEN;HIGH;LOW;CLOSE;VOLUME;
+#   MA20;MA50;MA100;MA150;RSI14;STOK;STOD;VMA15;OVB
+# ============================================================================
+
+SUMMARY_INDICATORS = ('ma20','ma50','ma100','ma150','rsi14','stoK','stoD','vma15','ovb')
+
+class Summary(object):
+    def __init__(self,key,last,prev,indicators):
+        self.m_key = key
+        self.m_last = last
+        self.m_prev = prev
+        self.m_indicators = indicators
+        self.m_candle = None
+
+    def __repr__(self):
+        items = [self.m_key]
+        for eachTrade in (self.m_last,self.m_prev):
+            if eachTrade:
+                items.extend(['%s' % eachTrade.date(),'%f' % eachTrade.nv_open(),'%f' % eachTrade.nv_high(),'%f' % eachTrade.nv_low(),'%f' % eachTrade.nv_close(),'%d' % eachTrade.nv_volume()])
+            else:
+                items.extend(['']*6)
+        for eachName in SUMMARY_INDICATORS:
+            v = self.m_indicators.get(eachName)
+            if v==None:
+                items.append('')
+            else:
+                items.append('%f' % v)
+        return ';'.join(items)
+
+    def key(self):
+        return self.m_key
+
+    # ---[ Trades read API (last bars only) ] ---
+
+    def lasttrade(self):
+        return self.m_last
+
+    def firsttrade(self):
+        return self.m_prev or self.m_last
+
+    def prevtrade(self,d=None):
+        if d==None or (self.m_last and d==self.m_last.date()):
+            return self.m_prev
+        return None
+
+    def trade(self,d):
+        for eachTrade in (self.m_last,self.m_prev):
+            if eachTrade and eachTrade.date()==d:
+                return eachTrade
+        return None
+
+    def candle(self,d):
+        if self.m_last and d==self.m_last.date():
+            if self.m_candle==None:
+                tr = self.m_last
+                self.m_candle = Candle(tr.nv_open(),tr.nv_high(),tr.nv_low(),tr.nv_close())
+            return self.m_candle
+        return None
+
+    def indicator(self,name,d):
+        # value on the last bar only (None otherwise)
+        if not self.m_last:
+            return None
+        if isinstance(d,int):
+            if d!=self.m_last.index():
+                return None
+        elif d!=self.m_last.date():
+            return None
+        return self.m_indicators.get(name)
+
+    def ma(self,period,d):
+        return self.indicator('ma%d' % period,d)
+
+    def rsi(self,period,d):
+        return self.indicator('rsi%d' % period,d)
+
+    def stoK(self,d):
+        return self.indicator('stoK',d)
+
+    def stoD(self,d):
+        return self.indicator('stoD',d)
+
+    def vma(self,period,d):
+        return self.indicator('vma%d' % period,d)
+
+    def ovb(self,d):
+        return self.indicator('ovb',d)
+
+# ============================================================================
+# summaryFromTrades()
+#
+#   summary of the loaded trades of a quote (None without trade)
+# ============================================================================
+
+def summaryFromTrades(key,trades):
+    last = trades.lasttrade()
+    if last==None:
+        return None
+    prev = trades.prevtrade()
+    idx = last.index()
+    indicators = {}
+    indicators['ma20'] = trades.ma20(idx)
+    indicators['ma50'] = trades.ma50(idx)
+    indicators['ma100'] = trades.ma100(idx)
+    indicators['ma150'] = trades.ma150(idx)
+    indicators['rsi14'] = trades.rsi14(idx)
+    indicators['stoK'] = trades.stoK(idx)
+    indicators['stoD'] = trades.stoD(idx)
+    indicators['vma15'] = trades.vma15(idx)
+    indicators['ovb'] = trades.ovb(idx)
+    for eachName,eachValue in indicators.items():
+        if eachName!='ovb' and eachValue<0.0:
+            # not computable (i.e. not enough trades)
+            indicators[eachName] = None
+    return Summary(key,last,prev,indicators)
+
+# ============================================================================
+# Summaries
+#
+#   one Summary by quote key, read in one go at startup and written when
+#   the matrix is saved. Summaries of the quotes not in the current matrix
+#   are kept (other portfolios).
+# ============================================================================
+
+class Summaries(object):
+    def __init__(self):
+        self.m_summaries = {}
+
+    def filename(self):
+        return os.path.join(itrade_config.dirCacheData,'summary.txt')
+
+    def get(self,key):
+        return self.m_summaries.get(key)
+
+    def parseTrade(self,summary,items):
+        if items[0]=='':
+            return None
+        idx = gCal.index(Datation(items[0]).date())
+        if idx==-1:
+            return None
+        return Trade(summary,items[0],items[1],items[2],items[3],items[4],items[5],idx)
+
+    def load(self,fn=None):
+        infile = itrade_csv.read(fn,self.filename())
+        if infile:
+            for eachLine in infile:
+                item = itrade_csv.parse(eachLine,len(SUMMARY_INDICATORS)+13)
+                if item and len(item)>=len(SUMMARY_INDICATORS)+13:
+                    try:
+                        indicators = {}
+                        for i in range(len(SUMMARY_INDICATORS)):
+                            v = item[13+i]
+                            if v!='':
+                                indicators[SUMMARY_INDICATORS[i]] = float(v)
+                        summary = Summary(item[0],None,None,indicators)
+                        summary.m_last = self.parseTrade(summary,item[1:7])
+                        summary.m_prev = self.parseTrade(summary,item[7:13])
+                    except ValueError:
+                        info('Summaries::load: invalid line %s' % eachLine.strip())
+                        continue
+                    if summary.m_last:
+                        self.m_summaries[summary.key()] = summary
+
+    def apply(self,lst):
+        # quotes without history get their summary
+        for eachQuote in lst:
+            summary = self.m_summaries.get(eachQuote.key())
+            if summary and eachQuote.trades()==None:
+                eachQuote.setSummary(summary)
+
+    def update(self,lst):
+        # summaries of quotes with a loaded history are refreshed
+        for eachQuote in lst:
+            if eachQuote.trades():
+                summary = summaryFromTrades(eachQuote.key(),eachQuote.trades())
+            else:
+                summary = eachQuote.summary()
+            if summary:
+                self.m_summaries[eachQuote.key()] = summary
+            elif self.m_summaries.has_key(eachQuote.key()):
+                del self.m_summaries[eachQuote.key()]
+
+    def save(self,lst,fn=None):
+        self.update(lst)
+        itrade_csv.write(fn,self.filename(),self.m_summaries.values())
+
+# ============================================================================
+# Export me
+# ============================================================================
+
+try:
+    ignore(gSummaries)
+except NameError:
+    gSummaries = Summaries()
+
+# ============================================================================
+# Test me
+# ============================================================================
+
+if __name__=='__main__':
+    setLevel(logging.INFO)
+
+    from datetime import date,timedelta
+
+    class _Quote(object):
+        def key(self):
+            return 'TEST.PAR'
+        def isin(self):
+            return ''
+
+    from itrade_trades import Trades
+    trades = Trades(_Quote())
+    d = date.today() - timedelta(300)
+    cl = 10.0
+    while d<date.today():
+        if d.weekday()<5:
+            cl = cl * 1.001
+            trades.add(['TEST.PAR','%s' % d,cl,cl*1.01,cl*0.99,cl,1000],bImporting=True)
+        d = d + timedelta(1)
+
+    s = summaryFromTrades('TEST.PAR',trades)
+    print s
+    print 'close %.3f prev %.3f ma20 %.3f' % (s.lasttrade().nv_close(),s.prevtrade().nv_close(),s.ma(20,s.lasttrade().date()))
+
+# ============================================================================
+# That's all folks !
+# ============================================================================
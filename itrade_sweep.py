@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# ============================================================================
+# Project Name : iTrade
+# Module Name  : itrade_sweep.py
+#
+# Description: Parameters sweep of a trading rule (backtest optimizer)
+#
+# The Original Code is iTrade code (http://itrade.sourceforge.net).
+#
+# The Initial Developer of the Original Code is Gilles Dumortier.
+#
+# Portions created by the Initial Developer are Copyright (C) 2004-2008 the
+# Initial Developer. All Rights Reserved.
+#
+# Contributor(s):
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; see http://www.gnu.org/licenses/gpl.html
+#
+# History       Rev   Description
+# 2026-10-19    agent Wrote it from scratch
+# ============================================================================
+
+# ============================================================================
+# Imports
+# ============================================================================
+
+# python system
+import os
+import logging
+import itertools
+import multiprocessing
+
+# iTrade system
+from itrade_logging import *
+import itrade_config
+import itrade_arrays
+from itrade_backtest import Context,Backtest,BacktestError
+
+# ============================================================================
+# Sweep parameters
+#
+#   entry / exit are rule templates using the grid names :
+#       entry = 'cross(ma(close,%(fast)d),ma(close,%(slow)d))'
+#       grid  = {'fast': [5,10,20], 'slow': [50,100,150]}
+#
+#   grid names of Backtest.run() keywords (stoploss) are passed to the run
+#   instead of the templates.
+# ============================================================================
+
+sweep_run_keywords = ('stoploss',)
+
+# grid points sent at once to a worker (same quote : same Context)
+SWEEP_CHUNK = 64
+
+# ============================================================================
+# gridPoints()
+# ============================================================================
+
+def gridPoints(grid,constraint=None):
+    names = sorted(grid.keys())
+    if constraint:
+        constraint = compile(constraint,'<sweep>','eval')
+    points = []
+    for values in itertools.product(*[grid[k] for k in names]):
+        p = dict(zip(names,values))
+        if constraint and not eval(constraint,{'__builtins__': {}},p):
+            continue
+        points.append(p)
+    return points
+
+# ============================================================================
+# sweepChunk()
+#
+#   worker : run the grid points of a chunk on one quote. Contexts are kept
+#   per process, so the cumulative sums and min/max tables of a quote are
+#   computed once whatever the number of chunks sent to the same worker.
+# ============================================================================
+
+_contexts = {}
+
+def getContext(source):
+    key,isin,fn = source
+    ctx = _contexts.get(fn)
+    if ctx==None:
+        h = itrade_arrays.loadHistory(fn,key,isin)
+        if h==None:
+            return None
+        _contexts.clear()
+        ctx = Context(h)
+        _contexts[fn] = ctx
+    return ctx
+
+def sweepChunk(task):
+    source,entry,exit,fees,cash,points = task
+    ctx = getContext(source)
+    ret = []
+    if ctx==None:
+        return ret
+    bt = Backtest(ctx,fees,cash)
+    for p in points:
+        kw = {}
+        for k in sweep_run_keywords:
+            if p.has_key(k):
+                kw[k] = p[k]
+        try:
+            r = bt.run(entry % p,exit % p,**kw)
+        except BacktestError,e:
+            info('sweep: %s' % e)
+            continue
+        ret.append((source[0],p,(r.nv_return(),r.nv_maxdrawdown(),len(r.trades()),r.nv_winrate(),r.nv_exposure(),r.nv_fees())))
+    return ret
+
+# ============================================================================
+# Sweep
+#
+# File format (reports/<name>.sweep.txt, one line per grid point):
+#   <quote key>;<param>=<value>,...;<return>;<maxdd>;<trades>;<win>;<exposure>;<fees>
+# ============================================================================
+
+class Sweep(object):
+    def __init__(self,entry,exit,grid,constraint=None,fees=None,cash=10000.0):
+        self.m_entry = entry
+        self.m_exit = exit
+        self.m_points = gridPoints(grid,constraint)
+        self.m_fees = fees
+        self.m_cash = cash
+
+    def points(self):
+        return self.m_points
+
+    def tasks(self,sources):
+        for eachSource in sources:
+            for i in range(0,len(self.m_points),SWEEP_CHUNK):
+                yield (eachSource,self.m_entry,self.m_exit,self.m_fees,self.m_cash,self.m_points[i:i+SWEEP_CHUNK])
+
+    def run(self,sources,fn=None,processes=None):
+        # sources : [(key,isin,cache filename)] ; returns the results sorted
+        # by return, streamed to fn as they come
+        if fn==None:
+            fn = os.path.join(itrade_config.dirReports,'default.sweep.txt')
+        if processes==None:
+            processes = multiprocessing.cpu_count()
+        ntasks = len(sources) * ((len(self.m_points)+SWEEP_CHUNK-1)/SWEEP_CHUNK)
+
+        results = []
+        f = open(fn,'w')
+        try:
+            if processes>1 and ntasks>1:
+                pool = multiprocessing.Pool(processes)
+                try:
+                    for eachChunk in pool.imap_unordered(sweepChunk,self.tasks(sources)):
+                        self.write(f,eachChunk)
+                        results.extend(eachChunk)
+                finally:
+                    pool.close()
+                    pool.join()
+            else:
+                for eachTask in self.tasks(sources):
+                    eachChunk = sweepChunk(eachTask)
+                    self.write(f,eachChunk)
+                    results.extend(eachChunk)
+        finally:
+            f.close()
+
+        results.sort(key=lambda x: x[2][0],reverse=True)
+        return results
+
+    def write(self,f,chunk):
+        for key,p,stats in chunk:
+            params = ','.join(['%s=%s' % (k,p[k]) for k in sorted(p.keys())])
+            f.write('%s;%s;%.2f;%.2f;%d;%.1f;%.1f;%.2f\n' % ((key,params)+stats))
+        f.flush()
+
+# ============================================================================
+# sourcesOfQuotes()
+# ============================================================================
+
+def sourcesOfQuotes(lst):
+    sources = []
+    for eachQuote in lst:
+        fn = os.path.join(itrade_config.dirCacheData,'%s.txt' % eachQuote.key())
+        if os.path.exists(fn):
+            sources.append((eachQuote.key(),eachQuote.isin(),fn))
+    return sources
+
+def sweepMatrix(matrix,entry,exit,grid,constraint=None,fees=None,fn=None):
+    return Sweep(entry,exit,grid,constraint,fees).run(sourcesOfQuotes(matrix.list()),fn)
+
+# ============================================================================
+# Test me
+# ============================================================================
+
+if __name__=='__main__':
+    setLevel(logging.INFO)
+
+    from itrade_quotes import initQuotesModule
+    import itrade_matrix
+    initQuotesModule()
+
+    matrix = itrade_matrix.createMatrix()
+    res = sweepMatrix(matrix,
+        'cross(ma(close,%(fast)d),ma(close,%(slow)d))',
+        'crossdown(ma(close,%(fast)d),ma(close,%(slow)d)) | (close < shift(lowest(low,%(channel)d)))',
+        {'fast': range(5,30,5), 'slow': range(30,210,20), 'channel': [10,20,55], 'stoploss': [None,5.0,10.0]},
+        'fast < slow','cortal01')
+    for key,p,stats in res[:10]:
+        print key,p,'return=%.2f%% maxdd=%.2f%%' % stats[:2]
+
+# ============================================================================
+# That's all folks !
+# ============================================================================
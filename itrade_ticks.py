@@ -0,0 +1,340 @@
+#!/usr/bin/env python
+# ============================================================================
+# Project Name : iTrade
+# Module Name  : itrade_ticks.py
+#
+# Description: Local store of the intraday ticks and minute bars
+#
+# The Original Code is iTrade code (http://itrade.sourceforge.net).
+#
+# The Initial Developer of the Original Code is Gilles Dumortier.
+#
+# Portions created by the Initial Developer are Copyright (C) 2004-2008 the
+# Initial Developer. All Rights Reserved.
+#
+# Contributor(s):
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; see http://www.gnu.org/licenses/gpl.html
+#
+# History       Rev   Description
+# 2026-10-19    agent Wrote it from scratch
+# ============================================================================
+
+# ============================================================================
+# Imports
+# ============================================================================
+
+# python system
+import os
+import time
+import shutil
+import struct
+import logging
+from datetime import date
+from threading import Lock
+
+# iTrade system
+import itrade_config
+from itrade_logging import *
+
+# ============================================================================
+# File format (cache/ticks/<yyyymmdd>/<quote key>.tck, little endian)
+#
+#   one record per tick : time (seconds since the epoch), last price and
+#   cumulative volume of the day. Records are only appended : a file can be
+#   read while the live thread is writing it.
+# ============================================================================
+
+TICK_RECORD = struct.Struct('<ddq')
+
+# periods (in seconds) of the bars built on the fly
+BAR_PERIODS = (60,300)
+
+def dayOf(t):
+    return time.strftime('%Y%m%d',time.localtime(t))
+
+# ============================================================================
+# Bars
+#
+#   OHLCV bars of one period, updated tick by tick. The volume of a bar is
+#   the increase of the cumulative volume during the bar.
+# ============================================================================
+
+class Bars(object):
+    def __init__(self,period):
+        self.m_period = period
+        self.m_time = []
+        self.m_open = []
+        self.m_high = []
+        self.m_low = []
+        self.m_close = []
+        self.m_volume = []
+        self.m_lastvol = None
+
+    def period(self):
+        return self.m_period
+
+    def __len__(self):
+        return len(self.m_time)
+
+    def add(self,t,price,volume):
+        if self.m_lastvol==None or volume<self.m_lastvol:
+            # first tick (or volume reset by the connector) : no known delta
+            dv = 0
+        else:
+            dv = volume - self.m_lastvol
+        self.m_lastvol = volume
+
+        start = int(t // self.m_period) * self.m_period
+        if self.m_time and start<=self.m_time[-1]:
+            # same bar (late ticks are merged in the current one)
+            if price>self.m_high[-1]: self.m_high[-1] = price
+            if price<self.m_low[-1]: self.m_low[-1] = price
+            self.m_close[-1] = price
+            self.m_volume[-1] += dv
+        else:
+            self.m_time.append(start)
+            self.m_open.append(price)
+            self.m_high.append(price)
+            self.m_low.append(price)
+            self.m_close.append(price)
+            self.m_volume.append(dv)
+
+    def items(self,first=0):
+        # list of (time, open, high, low, close, volume)
+        return zip(self.m_time[first:],self.m_open[first:],self.m_high[first:],self.m_low[first:],self.m_close[first:],self.m_volume[first:])
+
+# ============================================================================
+# DayTicks
+#
+#   ticks of one quote for one day : the file and the bars of BAR_PERIODS
+# ============================================================================
+
+class DayTicks(object):
+    def __init__(self,fn,key,day):
+        self.m_fn = fn
+        self.m_key = key
+        self.m_day = day
+        self.m_file = None
+        self.m_count = 0
+        self.m_last = None
+        self.m_bars = {}
+        for eachPeriod in BAR_PERIODS:
+            self.m_bars[eachPeriod] = Bars(eachPeriod)
+
+    def day(self):
+        return self.m_day
+
+    def count(self):
+        return self.m_count
+
+    def bars(self,period):
+        return self.m_bars.get(period)
+
+    def feed(self,t,price,volume):
+        self.m_count += 1
+        self.m_last = (price,volume)
+        for eachBars in self.m_bars.values():
+            eachBars.add(t,price,volume)
+
+    def load(self):
+        # replay the file : the bars survive a restart of iTrade
+        for t,price,volume in readTicks(self.m_fn):
+            self.feed(t,price,volume)
+
+    def append(self,t,price,volume):
+        # returns False when nothing changed since the previous tick
+        if self.m_last==(price,volume):
+            return False
+        if self.m_file==None:
+            d = os.path.dirname(self.m_fn)
+            if not os.path.exists(d):
+                os.mkdir(d)
+            self.m_file = open(self.m_fn,'ab')
+        self.m_file.write(TICK_RECORD.pack(t,price,volume))
+        self.m_file.flush()
+        self.feed(t,price,volume)
+        return True
+
+    def close(self):
+        if self.m_file:
+            self.m_file.close()
+            self.m_file = None
+
+# ============================================================================
+# readTicks()
+#
+#   list of (time, price, volume) ; a partial record at the end of the file
+#   (written while reading) is ignored
+# ============================================================================
+
+def readTicks(fn):
+    try:
+        f = open(fn,'rb')
+        try:
+            buf = f.read()
+        finally:
+            f.close()
+    except IOError:
+        return []
+    n = len(buf) // TICK_RECORD.size
+    return [TICK_RECORD.unpack_from(buf,i*TICK_RECORD.size) for i in xrange(n)]
+
+# ============================================================================
+# TickStore
+#
+#   one DayTicks by quote for the current day. Ticks are kept on disk for
+#   itrade_config.tickRetentionDays days : older day folders are removed
+#   at the first tick of a new day.
+# ============================================================================
+
+class TickStore(object):
+    def __init__(self):
+        self.m_days = {}
+        self.m_locker = Lock()
+        self.m_purged = None
+        self.m_started = False
+
+    def filename(self,key,day):
+        return os.path.join(itrade_config.dirTicks,day,'%s.tck' % key)
+
+    def current(self,key,day):
+        # caller owns the lock
+        dt = self.m_days.get(key)
+        if dt and dt.day()==day:
+            return dt
+        if dt:
+            dt.close()
+        if self.m_purged!=day:
+            self.m_purged = day
+            self.purge()
+        dt = DayTicks(self.filename(key,day),key,day)
+        dt.load()
+        self.m_days[key] = dt
+        return dt
+
+    # ---[ record ] ---------------------------------------
+
+    def add(self,key,t,price,volume):
+        self.m_locker.acquire()
+        try:
+            try:
+                return self.current(key,dayOf(t)).append(t,price,volume)
+            except (IOError,OSError),e:
+                info('TickStore::add %s : %s' % (key,e))
+                return False
+        finally:
+            self.m_locker.release()
+
+    def tick(self,quote):
+        # live listener (see itrade_quotes.registerLiveListener)
+        trades = quote.m_daytrades
+        tr = trades and trades.lasttrade()
+        if not tr or tr.date()!=date.today():
+            return
+        self.add(quote.key(),time.time(),tr.nv_close(),int(tr.nv_volume()))
+
+    def start(self):
+        if not self.m_started:
+            self.m_started = True
+            from itrade_quotes import registerLiveListener
+            registerLiveListener(self.tick)
+
+    def close(self):
+        self.m_locker.acquire()
+        try:
+            for eachDay in self.m_days.values():
+                eachDay.close()
+            self.m_days = {}
+        finally:
+            self.m_locker.release()
+
+    # ---[ query ] ----------------------------------------
+
+    def days(self,key=None):
+        # days stored on disk (of a quote), older first
+        try:
+            lst = os.listdir(itrade_config.dirTicks)
+        except OSError:
+            return []
+        lst = [d for d in lst if len(d)==8 and d.isdigit()]
+        if key:
+            lst = [d for d in lst if os.path.exists(self.filename(key,d))]
+        lst.sort()
+        return lst
+
+    def ticks(self,key,day=None):
+        if day==None:
+            day = dayOf(time.time())
+        return readTicks(self.filename(key,day))
+
+    def bars(self,key,period=None,day=None):
+        # list of (time, open, high, low, close, volume) of a quote
+        if period==None:
+            period = itrade_config.intradayPeriod
+        if day==None:
+            day = dayOf(time.time())
+        self.m_locker.acquire()
+        try:
+            dt = self.m_days.get(key)
+            if dt and dt.day()==day and dt.bars(period):
+                return dt.bars(period).items()
+        finally:
+            self.m_locker.release()
+
+        # not live : built from the file
+        b = Bars(period)
+        for t,price,volume in self.ticks(key,day):
+            b.add(t,price,volume)
+        return b.items()
+
+    # ---[ retention ] ------------------------------------
+
+    def purge(self,keep=None):
+        if keep==None:
+            keep = itrade_config.tickRetentionDays
+        lst = self.days()
+        if keep>0:
+            lst = lst[:-keep]
+        for eachDay in lst:
+            debug('TickStore::purge %s',eachDay)
+            shutil.rmtree(os.path.join(itrade_config.dirTicks,eachDay),True)
+
+# ============================================================================
+# Export me
+# ============================================================================
+
+try:
+    ignore(gTicks)
+except NameError:
+    gTicks = TickStore()
+
+# ============================================================================
+# Test me
+# ============================================================================
+
+if __name__=='__main__':
+    setLevel(logging.INFO)
+
+    import sys
+    if len(sys.argv)>1:
+        key = sys.argv[1]
+        for eachBar in gTicks.bars(key,60):
+            print time.strftime('%H:%M',time.localtime(eachBar[0])),eachBar[1:]
+    else:
+        print 'days :',gTicks.days()
+
+# ============================================================================
+# That's all folks !
+# ============================================================================
@@ -29,6 +29,7 @@
 #
 # History       Rev   Description
 # 2004-01-08    dgil  Wrote it from scratch
+# 2026-10-19    agent cached candle types and patterns of the whole history
 # ============================================================================
 
 # ============================================================================
@@ -41,10 +42,11 @@ from math import pow,sqrt
 import logging
 
 # numpy
-from numpy import array
+from numpy import array,nonzero
 
 # iTrade system
 from itrade_logging import *
+from itrade_profile import timed
 import itrade_csv
 from itrade_datation import gCal,Datation
 from itrade_candle import *
@@ -56,11 +58,10 @@ from itrade_candle import *
 class Trade(object):
     def __init__(self,trades,d,open,high,low,close,volume,idx):
         if d[4]=='-':
-            debug('Trade::__init__():%s: %d %d %d' % (d,int(d[0:4]),int(d[5:7]),int(d[8:10])));
             self.m_date = date(int(d[0:4]),int(d[5:7]),int(d[8:10]))
         else:
-            debug('Trade::__init__():%s: %d %d %d' % (d,int(d[0:4]),int(d[4:6]),int(d[6:8])));
             self.m_date = date(int(d[0:4]),int(d[4:6]),int(d[6:8]))
+        if gLogFlags.debug: debug('Trade::__init__():%s: %s',d,self.m_date)
         self.m_open = float(open)
         if self.m_open<0.0: self.m_open=0.0
         self.m_close = float(close)
@@ -118,7 +119,7 @@ def create_array(defval):
 
 class Trades(object):
     def __init__(self,quote):
-        debug('Trades:__init__(%s)' % quote)
+        debug('Trades:__init__(%s)',quote)
         self.m_quote = quote
         self._init_()
 
@@ -153,6 +154,10 @@ class Trades(object):
 
         self.m_candles = {}
 
+        # CANDLE_TYPE_x / CANDLE_PATTERN_x of every day, computed on demand
+        self.m_ctypes = None
+        self.m_patterns = None
+
     def quote(self):
         return self.m_quote
 
@@ -179,18 +184,19 @@ class Trades(object):
         except OSError:
             pass
 
+    @timed('Trades.load')
     def load(self,infile=None):
         infile = itrade_csv.read(infile,os.path.join(itrade_config.dirCacheData,'%s.txt' % self.m_quote.key()))
         #print 'Trades:load::',infile
         if infile:
             # scan each line to read each trade
-            debug('Trades::load %s %s' % (self.m_quote.ticker(),self.m_quote.key()))
+            debug('Trades::load %s %s',self.m_quote.ticker(),self.m_quote.key())
             for eachLine in infile:
                 item = itrade_csv.parse(eachLine,7)
                 if item:
                     if (item[0]==self.m_quote.key()) or (item[0]==self.m_quote.isin() and item[0]!=''):
                         #print item
-                        debug('Trades::load %s on %s' % (item[5],item[1]))
+                        if gLogFlags.debug: debug('Trades::load %s on %s',item[5],item[1])
                         self.add(item,bImporting=True)
 
     def imp(self,data,bLive):
@@ -205,6 +211,7 @@ class Trades(object):
                         #print item
                         self.add(item,bImporting=not bLive)
 
+    @timed('Trades.save')
     def save(self,outfile=None):
         #debug('Trades::save %s %s' % (self.m_quote.ticker(),self.m_quote.key()))
         if self.m_trades.keys():
@@ -227,11 +234,11 @@ class Trades(object):
                 self.m_trades[ajd] = tr
 
     def add(self,item,bImporting):
-        debug('Trades::add() before: %s : bImporting=%s' % (item,bImporting));
+        if gLogFlags.debug: debug('Trades::add() before: %s : bImporting=%s',item,bImporting)
 
         idx = gCal.index(Datation(item[1]).date())
         if idx==-1:
-            debug('invalid date in: %s' % item)
+            debug('invalid date in: %s',item)
             # __x need to save file
             self.m_dirty = True
             return False
@@ -246,6 +253,8 @@ class Trades(object):
         self.m_inHigh[idx] = tr.nv_high()
         self.m_inVol[idx] = tr.nv_volume()
         #self.m_date[idx] = tr.date()
+        self.m_ctypes = None
+        self.m_patterns = None
 
         #if not bImporting:
         #    print 'lasttrade: %s   new trade : %s' %(self.m_lasttrade.date(),tr.date())
@@ -404,6 +413,36 @@ class Trades(object):
             idx = gCal.index(idx)
         return self.m_ovb[idx]
 
+    # ---[ chart data preparation ] ---
+
+    def prepareChart(self,begin,end,bRSI14=True,bSto=True,bMA150=True,bBollinger=True):
+        # compute the indicators of the days [begin,end[ displayed by a chart
+        # returns the indexes and the dates of these days, and the number of trades
+        idx = []
+        dates = []
+        num = 0
+        for i in range(begin,end):
+            if self.has_trade(i): num = num + 1
+            dt = gCal.date(i)
+            if dt:
+                dates.append(dt)
+                idx.append(i)
+                if bRSI14:
+                    self.rsi14(i)
+                if bSto:
+                    self.stoK(i)
+                    self.stoD(i)
+                self.ma(20,i)
+                self.ma(50,i)
+                self.ma(100,i)
+                if bMA150:
+                    self.ma(150,i)
+                self.vma(15,i)
+                self.ovb(i)
+                if bBollinger:
+                    self.bollinger(i,0)
+        return idx,dates,num
+
     def close(self,idx):
         if not isinstance(idx,int):
             idx = gCal.index(idx)
@@ -421,6 +460,30 @@ class Trades(object):
             print 'trades:candle() not found: %s' % d
             return None
 
+    # ---[ candle types and patterns of the whole history ] ---
+
+    def candleTypes(self):
+        if self.m_ctypes is None:
+            self.m_ctypes = candle_types(self.m_inOpen,self.m_inHigh,self.m_inLow,self.m_inClose)
+        return self.m_ctypes
+
+    def patterns(self):
+        if self.m_patterns is None:
+            self.m_patterns = candle_patterns(self.m_inOpen,self.m_inHigh,self.m_inLow,self.m_inClose)
+        return self.m_patterns
+
+    def pattern(self,idx):
+        if not isinstance(idx,int):
+            idx = gCal.index(idx)
+        return self.patterns()[idx]
+
+    def findPattern(self,pattern,begin=0,end=None):
+        # indexes of the days of [begin,end[ completing the pattern
+        if end==None:
+            end = gCal.lastindex()+1
+        found = nonzero(self.patterns()[begin:end]==pattern)[0]
+        return [int(i)+begin for i in found]
+
     def compute(self,d=None):
         # default date == last trade
         if d==None:
@@ -458,6 +521,7 @@ class Trades(object):
 
         return True
 
+    @timed('Trades.compute_ma150')
     def compute_ma150(self,i):
         #debug('%s: compute MA150 [%d]' % (self.m_quote.ticker(),i))
         s = 0.0
@@ -473,6 +537,7 @@ class Trades(object):
         else:
             self.m_ma150[i] = -1.0
 
+    @timed('Trades.compute_ma100')
     def compute_ma100(self,i):
         #debug('%s: compute MA100 [%d]' % (self.m_quote.ticker(),i))
         s = 0.0
@@ -488,6 +553,7 @@ class Trades(object):
         else:
             self.m_ma100[i] = -1.0
 
+    @timed('Trades.compute_ma50')
     def compute_ma50(self,i):
         #debug('%s: compute MA50 [%d]' % (self.m_quote.ticker(),i))
         s = 0.0
@@ -503,6 +569,7 @@ class Trades(object):
         else:
             self.m_ma50[i] = -1.0
 
+    @timed('Trades.compute_ma20')
     def compute_ma20(self,i):
         #debug('%s: compute MA20 [%d]' % (self.m_quote.ticker(),i))
         s = 0.0
@@ -518,6 +585,7 @@ class Trades(object):
         else:
             self.m_ma20[i] = -1.0
 
+    @timed('Trades.compute_rsi14')
     def compute_rsi14(self,i):
         #debug('%s: compute RSI14 [%d]' % (self.m_quote.ticker(),i))
         h = 0.0
@@ -559,6 +627,7 @@ class Trades(object):
             j = j - 1
         return l,h
 
+    @timed('Trades.compute_stoK')
     def compute_stoK(self,i):
         #debug('%s: compute STO K [%d]' % (self.m_quote.ticker(),i))
         mc = (self.close(i) + self.close(i-1) + self.close(i-2))/3
@@ -573,6 +642,7 @@ class Trades(object):
         if t>100.0: t=100.0
         self.m_stoK[i] = t
 
+    @timed('Trades.compute_stoD')
     def compute_stoD(self,i):
         #debug('%s: compute STO D [%d]' % (self.m_quote.ticker(),i))
         s = 0.0
@@ -587,6 +657,7 @@ class Trades(object):
         else:
             self.m_stoD[i] = -1
 
+    @timed('Trades.compute_vma15')
     def compute_vma15(self,i):
         #debug(<'%s: compute VMA15 [%d]' % (self.m_quote.ticker(),i))
         s = long(0)
@@ -602,6 +673,7 @@ class Trades(object):
         else:
             self.m_vma15[i] = -1
 
+    @timed('Trades.compute_ovb')
     def compute_ovb(self):
         ovb = long(0)
         for j in range(0,gCal.lastindex()+1):
@@ -614,6 +686,7 @@ class Trades(object):
 
             self.m_ovb[j] = ovb
 
+    @timed('Trades.compute_bollinger')
     def compute_bollinger(self,i):
         #debug('%s: compute BOLLINGER n=20,d=2 [%d,%d]' % (self.m_quote.ticker(),i-20+1,i+1))
         sm = 0.0
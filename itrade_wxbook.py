@@ -47,6 +47,7 @@ import wx
 import itrade_config
 import time
 from itrade_logging import *
+from itrade_profile import startProfiling,stopProfiling,isProfiling
 from itrade_local import message,gMessage,getLang
 from itrade_portfolio import loadPortfolio,OPERATION_BUY,OPERATION_SELL
 from itrade_matrix import *
@@ -150,6 +151,7 @@ ID_CACHE_ERASE_NEWS = 501
 ID_CACHE_ERASE_ALL = 510
 
 ID_CONNEXION = 599
+ID_PROFILE = 600
 
 #ID_HELP_CONTENTS = 800
 ID_SUPPORT = 801
@@ -599,6 +601,7 @@ class iTradeMainWindow(wx.Frame,iTrade_wxFrame):
         self.optionsmenu.AppendMenu(ID_CACHE,message('main_options_cache'),self.cachemenu,message('main_options_desc_cache'))
 
         self.optionsmenu.Append(ID_CONNEXION,message('main_options_connexion'),message('main_options_desc_connexion'))
+        self.optionsmenu.AppendCheckItem(ID_PROFILE,message('main_options_profile'),message('main_options_desc_profile'))
 
         self.helpmenu = wx.Menu()
         self.helpmenu.Append(wx.ID_HELP_CONTENTS, message('main_help_contents'),message('main_help_desc_contents'))
@@ -678,6 +681,7 @@ class iTradeMainWindow(wx.Frame,iTrade_wxFrame):
         wx.EVT_MENU(self, ID_CACHE_ERASE_ALL, self.OnCacheEraseAll)
 
         wx.EVT_MENU(self, ID_CONNEXION, self.OnConnexion)
+        wx.EVT_MENU(self, ID_PROFILE, self.OnProfile)
 
         wx.EVT_MENU(self, wx.ID_REFRESH, self.OnRefresh)
         wx.EVT_MENU(self, ID_AUTOREFRESH, self.OnAutoRefresh)
@@ -866,6 +870,9 @@ class iTradeMainWindow(wx.Frame,iTrade_wxFrame):
         m = self.matrixmenu.FindItemById(ID_BIG_VIEW)
         m.Check(itrade_config.matrixFontSize==3)
 
+        m = self.optionsmenu.FindItemById(ID_PROFILE)
+        m.Check(isProfiling())
+
         if itrade_config.lang != 255:
             m = self.langmenu.FindItemById(wx.LANGUAGE_DEFAULT + ID_MAC_OFFSET)
             m.Check(itrade_config.lang==0)
@@ -998,6 +1005,7 @@ class iTradeMainWindow(wx.Frame,iTrade_wxFrame):
 
     def Save(self):
         self.m_matrix.save(self.m_portfolio.filename())
+        self.m_matrix.saveSummaries()
         self.m_portfolio.saveStops()
         itrade_config.saveConfig()
         self.saveConfig()
@@ -1180,6 +1188,16 @@ class iTradeMainWindow(wx.Frame,iTrade_wxFrame):
         itrade_config.proxyHostname,itrade_config.proxyAuthentication,itrade_config.connectionTimeout = connection_UI(self,itrade_config.proxyHostname,itrade_config.proxyAuthentication,itrade_config.connectionTimeout)
         itrade_config.saveConfig()
 
+    # --- [ profiling ] -------------------------------------
+
+    def OnProfile(self,e):
+        # report and stats are dumped when the profiling stops
+        if isProfiling():
+            stopProfiling()
+        else:
+            startProfiling()
+        self.updateCheckItems()
+
     # --- [ autosize management ] -------------------------------------
 
     def OnAutoSize(self,e):
@@ -268,29 +268,17 @@ class iTradeCurrenciesWindow(wx.Frame,iTrade_wxFrame,iTrade_wxLiveCurrencyMixin)
             self.stopLiveCurrency(bBusy=True)
 
     def OnRefresh(self,e):
+        # one batched request for all the currencies, then redisplay
+        bBusy = self.hasFocus()
+        if bBusy:
+            wx.BeginBusyCursor()
+        currencies.getlasttrade(bAllEvenNotInUse=True)
         x = 0
-        lst = currencies.m_currencies
-        max = len(lst)
-        keepGoing = True
-        if self.hasFocus():
-            dlg = wx.ProgressDialog(message('currency_refreshing'), "", max,
-                                    self, wx.PD_CAN_ABORT | wx.PD_APP_MODAL)
-        else:
-            dlg = None
-        for eachKey in lst:
-            if not keepGoing:
-                break
-            curTo = eachKey[:3]
-            curFrom = eachKey[3:]
-            if dlg:
-                (keepGoing, skip) = dlg.Update(x,"%s -> %s" % (curFrom,curTo))
-            currencies.get(curTo,curFrom)
+        for eachKey in currencies.m_currencies:
             self.refreshLine(eachKey,x,True)
             x = x + 1
-
-        currencies.save()
-        if dlg:
-            dlg.Destroy()
+        if bBusy:
+            wx.EndBusyCursor()
 
     def OnLiveCurrency(self, evt):
         if self.isRunningCurrency(evt.key):
@@ -283,6 +283,9 @@ class iTradeRSSPanel(wx.Panel):
         self.TrailerPage()
 
     def buildPage(self):
+        if not self.m_feed:
+            # already aggregated by the background refresh of the matrix ?
+            self.m_feed = gNews.cachedQuote(self.m_quote)
         if self.m_feed and self.m_feed.entries:
             info('Feed %s',self.m_feed.feed.title)
             self.HeaderPage()
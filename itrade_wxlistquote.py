@@ -31,6 +31,7 @@
 # History       Rev   Description
 # 2005-05-29    dgil  from itrade_wxquote.py
 # 2006-1x-xx    dgil  downloading of quotes + user quotes + advanced search
+# 2026-10-19    agent virtual list of quotes
 # ============================================================================
 
 # ============================================================================
@@ -63,7 +64,7 @@ from itrade_isin import checkISIN
 from itrade_defs import *
 import itrade_ext
 
-from itrade_wxmixin import iTradeSelectorListCtrl
+from itrade_wxmixin import iTradeVirtualListCtrl
 from itrade_wxpropquote import open_iTradeQuoteProperty
 
 from itrade_wxutil import iTradeInformation,iTradeError,iTradeYesNo
@@ -377,7 +378,7 @@ IDC_IMPORT = 6
 import wx.lib.newevent
 (PostInitEvent,EVT_POSTINIT) = wx.lib.newevent.NewEvent()
 
-class iTradeQuoteListCtrlDialog(wx.Dialog, wxl.ColumnSorterMixin):
+class iTradeQuoteListCtrlDialog(wx.Dialog):
     def __init__(self, parent, market):
         # context help
         pre = wx.PreDialog()
@@ -399,15 +400,21 @@ class iTradeQuoteListCtrlDialog(wx.Dialog, wxl.ColumnSorterMixin):
         self.sm_up = self.m_imagelist.Add(wx.Bitmap(os.path.join(itrade_config.dirRes, 'sm_up.png')))
         self.sm_dn = self.m_imagelist.Add(wx.Bitmap(os.path.join(itrade_config.dirRes, 'sm_down.png')))
 
-        self.m_list = iTradeSelectorListCtrl(self, tID,
+        self.m_list = iTradeVirtualListCtrl(self, tID,
                                  style = wx.LC_REPORT | wx.SUNKEN_BORDER,
                                  size=(570, 380)
                                  )
         self.m_list.SetImageList(self.m_imagelist, wx.IMAGE_LIST_SMALL)
+        self.m_list.SetSortImages((self.sm_dn, self.sm_up))
 
-        # Now that the list exists we can init the other base class,
-        # see wxPython/lib/mixins/listctrl.py
-        wxl.ColumnSorterMixin.__init__(self, 7)
+        # but since we want images on the column header we have to do it the hard way:
+        self.m_list.InsertColumn(IDC_ISIN, message('isin'), wx.LIST_FORMAT_LEFT, wx.LIST_AUTOSIZE)
+        self.m_list.InsertColumn(IDC_TICKER, message('ticker'), wx.LIST_FORMAT_LEFT, wx.LIST_AUTOSIZE)
+        self.m_list.InsertColumn(IDC_NAME, message('name'), wx.LIST_FORMAT_LEFT, wx.LIST_AUTOSIZE)
+        self.m_list.InsertColumn(IDC_PLACE, message('place'), wx.LIST_FORMAT_LEFT, wx.LIST_AUTOSIZE)
+        self.m_list.InsertColumn(IDC_MARKET, message('market'), wx.LIST_FORMAT_LEFT, wx.LIST_AUTOSIZE)
+        self.m_list.InsertColumn(IDC_LIVE, message('clive'), wx.LIST_FORMAT_LEFT, wx.LIST_AUTOSIZE)
+        self.m_list.InsertColumn(IDC_IMPORT, message('cimport'), wx.LIST_FORMAT_LEFT, wx.LIST_AUTOSIZE)
 
         wx.EVT_LIST_COL_CLICK(self, tID, self.OnColClick)
         wx.EVT_SIZE(self, self.OnSize)
@@ -598,52 +605,12 @@ class iTradeQuoteListCtrlDialog(wx.Dialog, wxl.ColumnSorterMixin):
     def PopulateList(self,curquote=None):
         wx.SetCursor(wx.HOURGLASS_CURSOR)
 
-        self.m_list.ClearAll()
-
-        # but since we want images on the column header we have to do it the hard way:
-        self.m_list.InsertColumn(IDC_ISIN, message('isin'), wx.LIST_FORMAT_LEFT, wx.LIST_AUTOSIZE)
-        self.m_list.InsertColumn(IDC_TICKER, message('ticker'), wx.LIST_FORMAT_LEFT, wx.LIST_AUTOSIZE)
-        self.m_list.InsertColumn(IDC_NAME, message('name'), wx.LIST_FORMAT_LEFT, wx.LIST_AUTOSIZE)
-        self.m_list.InsertColumn(IDC_PLACE, message('place'), wx.LIST_FORMAT_LEFT, wx.LIST_AUTOSIZE)
-        self.m_list.InsertColumn(IDC_MARKET, message('market'), wx.LIST_FORMAT_LEFT, wx.LIST_AUTOSIZE)
-        self.m_list.InsertColumn(IDC_LIVE, message('clive'), wx.LIST_FORMAT_LEFT, wx.LIST_AUTOSIZE)
-        self.m_list.InsertColumn(IDC_IMPORT, message('cimport'), wx.LIST_FORMAT_LEFT, wx.LIST_AUTOSIZE)
-
-        count = 0
         self.currentItem = -1
 
-        self.itemDataMap = {}
-        self.itemQuoteMap = {}
-        self.itemLineMap = {}
-
-        for eachQuote in quotes.list():
-            if  self.m_qlist==QLIST_ALL or self.m_qlist==eachQuote.list():
-                self.itemDataMap[count] = (eachQuote.isin(),eachQuote.ticker(),eachQuote.name(),eachQuote.place(),eachQuote.market(),eachQuote.liveconnector().name(),eachQuote.importconnector().name())
-
-                self.itemQuoteMap[count] = eachQuote
-                count = count + 1
-
-        items = self.itemDataMap.items()
-        line = 0
-        curline = -1
-        for x in range(len(items)):
-            key, data = items[x]
-            if self.m_market==None or (self.m_market==data[4]):
-                if data[0]!='':
-                    self.m_list.InsertImageStringItem(line, data[0], self.sm_q)
-                else:
-                    self.m_list.InsertImageStringItem(line, data[0], self.sm_i)
-                self.m_list.SetStringItem(line, IDC_TICKER, data[1])
-                self.m_list.SetStringItem(line, IDC_NAME, data[2])
-                self.m_list.SetStringItem(line, IDC_PLACE, data[3])
-                self.m_list.SetStringItem(line, IDC_MARKET, data[4])
-                self.m_list.SetStringItem(line, IDC_LIVE, data[5])
-                self.m_list.SetStringItem(line, IDC_IMPORT, data[6])
-                self.m_list.SetItemData(line, key)
-                self.itemLineMap[data[1]] = line
-                if self.itemQuoteMap[key]==curquote:
-                    curline = line
-                line += 1
+        # the cells are computed by OnGetRowText() for the displayed lines only
+        self.m_list.SetRows(quotes.list(), self.isFiltered)
+        line = self.m_list.GetItemCount()
+        curline = self.m_list.FindRow(curquote)
 
         self.m_list.SetColumnWidth(IDC_ISIN, wx.LIST_AUTOSIZE)
         self.m_list.SetColumnWidth(IDC_TICKER, wx.LIST_AUTOSIZE_USEHEADER)
@@ -678,21 +645,38 @@ class iTradeQuoteListCtrlDialog(wx.Dialog, wxl.ColumnSorterMixin):
             self.m_list.SetItemState(self.currentItem, wx.LIST_STATE_SELECTED, wx.LIST_STATE_SELECTED)
             self.m_list.EnsureVisible(self.currentItem)
 
-    # --- [ wxl.ColumnSorterMixin management ] -------------------------------------
-
-    # Used by the wxl.ColumnSorterMixin, see wxPython/lib/mixins/listctrl.py
-    def GetListCtrl(self):
-        return self.m_list
-
-    # Used by the wxl.ColumnSorterMixin, see wxPython/lib/mixins/listctrl.py
-    def GetSortImages(self):
-        return (self.sm_dn, self.sm_up)
+    # --- [ iTradeVirtualListCtrl management ] -------------------------------------
+
+    def isFiltered(self,quote):
+        if self.m_qlist!=QLIST_ALL and self.m_qlist!=quote.list():
+            return False
+        return self.m_market==None or self.m_market==quote.market()
+
+    def OnGetRowText(self,quote,col):
+        if col==IDC_ISIN:
+            return quote.isin()
+        elif col==IDC_TICKER:
+            return quote.ticker()
+        elif col==IDC_NAME:
+            return quote.name()
+        elif col==IDC_PLACE:
+            return quote.place()
+        elif col==IDC_MARKET:
+            return quote.market()
+        elif col==IDC_LIVE:
+            return quote.liveconnector().name()
+        elif col==IDC_IMPORT:
+            return quote.importconnector().name()
+        return ''
+
+    def OnGetRowImage(self,quote):
+        if quote.isin()!='':
+            return self.sm_q
+        return self.sm_i
 
     def getQuoteOnTheLine(self,x):
         if x>=0:
-            key = self.m_list.GetItemData(x)
-            quote = self.itemQuoteMap[key]
-            return quote
+            return self.m_list.GetRow(x)
         else:
             return None
 
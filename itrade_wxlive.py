@@ -49,6 +49,7 @@ from itrade_local import message
 import itrade_quotes
 import itrade_import
 import itrade_currency
+from itrade_jobs import gJobs,connectorGroup
 
 # wxPython system
 if not itrade_config.nowxversion:
@@ -62,6 +63,7 @@ import wx.lib.newevent
 
 (UpdateLiveEvent,EVT_UPDATE_LIVE) = wx.lib.newevent.NewEvent()
 (UpdateLiveCurrencyEvent,EVT_UPDATE_LIVECURRENCY) = wx.lib.newevent.NewEvent()
+(RefreshDoneEvent,EVT_REFRESH_DONE) = wx.lib.newevent.NewEvent()
 
 # ============================================================================
 # UpdateLiveThread
@@ -198,6 +200,90 @@ class iTrade_wxLiveMixin:
             #if itrade_config.verbose:
             #    print '] --- stopLive'
 
+# ============================================================================
+# iTrade_wxRefreshMixin
+#
+#   quotes updated by the background jobs (see itrade_jobs.gJobs) instead of
+#   the UI thread. The quotes done are posted back with RefreshDoneEvent :
+#   one event at most is pending, it carries all the quotes done since the
+#   previous one (see takeRefreshDone()).
+#
+#   The jobs of a quote are keyed on the quote and the job function : panes
+#   refreshing the same quote the same way subscribe to the same job and are
+#   all notified when it is done. Jobs of a quote never run together.
+# ============================================================================
+
+class iTrade_wxRefreshMixin:
+    def __init__(self):
+        self.m_refreshLocker = thread.allocate_lock()
+        self.m_refreshDone = []
+        self.m_refreshPosted = False
+
+    def refreshKey(self,quote,fn=None):
+        if quote:
+            if fn==None:
+                fn = self.refreshQuoteJob
+            # same job for every pane using the same function
+            return (quote.key(),getattr(fn,'im_func',fn))
+        # job of the window
+        return (id(self),None)
+
+    def submitRefresh(self,quote,fn,args=(),priority=1,group=None):
+        # quote : None for a job done for the whole window (i.e. currencies)
+        if quote:
+            resource = quote.key()
+            if group==None:
+                group = connectorGroup(quote)
+        else:
+            resource = None
+        gJobs.submit(self.refreshKey(quote,fn),fn,args,group=group,priority=priority,owner=self,done=self.refreshJobDone,resource=resource)
+
+    def refreshQuotes(self,quotes,visible=()):
+        # visible : quotes displayed, updated first
+        for eachQuote in quotes:
+            if eachQuote in visible:
+                priority = 0
+            else:
+                priority = 1
+            self.submitRefresh(eachQuote,self.refreshQuoteJob,(eachQuote,),priority)
+
+    def prioritizeRefresh(self,quotes):
+        gJobs.prioritize([self.refreshKey(q) for q in quotes])
+
+    def cancelRefresh(self):
+        gJobs.cancel(self)
+
+    def isRefreshing(self):
+        return gJobs.pending(self)>0
+
+    def refreshQuoteJob(self,quote):
+        # worker thread
+        quote.update()
+
+    def refreshJobDone(self,job):
+        # worker thread
+        self.m_refreshLocker.acquire()
+        try:
+            # the quote (None for a job of the window)
+            self.m_refreshDone.append(job.args() and job.args()[0] or None)
+            post = not self.m_refreshPosted
+            self.m_refreshPosted = True
+        finally:
+            self.m_refreshLocker.release()
+        if post:
+            wx.PostEvent(self,RefreshDoneEvent())
+
+    def takeRefreshDone(self):
+        # UI thread (EVT_REFRESH_DONE) : quotes done since the previous event
+        self.m_refreshLocker.acquire()
+        try:
+            lst = self.m_refreshDone
+            self.m_refreshDone = []
+            self.m_refreshPosted = False
+        finally:
+            self.m_refreshLocker.release()
+        return lst
+
 # ============================================================================
 # UpdateLiveCurrencyThread
 # ============================================================================
@@ -52,6 +52,9 @@ import wx
 import itrade_logging
 from itrade_portfolio import loadPortfolio
 from itrade_matrix import createMatrix
+from itrade_news import gNews
+from itrade_snapshot import SnapshotPublisher,snapshotName
+from itrade_ticks import gTicks
 
 # iTrade wxPython system
 from itrade_wxbook import iTradeMainWindow
@@ -94,6 +97,15 @@ class iTradeApp(wx.App):
         print '--- build a matrix -----------'
         matrix = createMatrix(portfolio.filename(), portfolio)
 
+        # news of the matrix are aggregated in the background
+        gNews.refreshMatrix(matrix)
+
+        # live updates are shared with the other processes
+        SnapshotPublisher(snapshotName(portfolio.filename(),'gui'),matrix).start()
+
+        # live updates are recorded for the intraday charts
+        gTicks.start()
+
         frame = iTradeMainWindow(None, portfolio, matrix)
         self.SetTopWindow(frame)
 
@@ -29,6 +29,7 @@
 #
 # History       Rev   Description
 # 2005-10-17    dgil  Wrote it from scratch
+# 2026-10-19    agent iTradeVirtualListCtrl
 # ============================================================================
 
 # ============================================================================
@@ -163,6 +164,149 @@ class iTradeSelectorListCtrl(wx.ListCtrl, wxl.ListCtrlAutoWidthMixin):
         wx.ListCtrl.__init__(self, parent, ID, pos, size, style)
         wxl.ListCtrlAutoWidthMixin.__init__(self)
 
+# ============================================================================
+# iTradeVirtualListCtrl
+#
+# wx.LC_VIRTUAL list over an array of indexes in the rows of the owner : the
+# cells are only computed for the displayed lines, filtering and sorting
+# permute the indexes. The owner (parent by default) supports :
+# - OnGetRowText(row,col)
+# - OnGetRowImage(row) (optional)
+# - OnGetRowColour(row) (optional)
+# - OnGetRowSortValue(row,col) (optional, the text otherwise)
+# ============================================================================
+
+class iTradeVirtualListCtrl(wx.ListCtrl, wxl.ListCtrlAutoWidthMixin):
+    def __init__(self, parent, ID, pos=wx.DefaultPosition,
+                 size=wx.DefaultSize, style=0, owner=None):
+        wx.ListCtrl.__init__(self, parent, ID, pos, size, style | wx.LC_VIRTUAL)
+        wxl.ListCtrlAutoWidthMixin.__init__(self)
+
+        if owner==None:
+            owner = parent
+        self.m_owner = owner
+        self.m_rows = []
+        self.m_index = []
+        self.m_filter = None
+        self.m_sortcol = -1
+        self.m_sortasc = True
+        self.m_sortimages = None
+        self.m_attrs = {}
+
+        wx.EVT_LIST_COL_CLICK(self, self.GetId(), self.OnColClick)
+
+    # --- [ rows ] -------------------------------------
+
+    def SetRows(self, rows, filter=None):
+        # filter(row) : row displayed or not
+        self.m_rows = rows
+        self.m_filter = filter
+        self.Rebuild(bKeepSelection=False)
+
+    def SetFilter(self, filter=None):
+        self.m_filter = filter
+        self.Rebuild()
+
+    def Rebuild(self, bKeepSelection=True):
+        row = bKeepSelection and self.GetRow(self.GetFirstSelected()) or None
+        if self.m_filter:
+            self.m_index = [i for i in xrange(len(self.m_rows)) if self.m_filter(self.m_rows[i])]
+        else:
+            self.m_index = range(len(self.m_rows))
+        self.sortIndex()
+        self.SetItemCount(len(self.m_index))
+        self.reselect(row)
+
+    def GetRow(self, line):
+        if 0 <= line < len(self.m_index):
+            return self.m_rows[self.m_index[line]]
+        return None
+
+    def FindLine(self, fn):
+        # first line of a row with fn(row) True (or -1)
+        for line in xrange(len(self.m_index)):
+            if fn(self.m_rows[self.m_index[line]]):
+                return line
+        return -1
+
+    def FindRow(self, row):
+        if row==None:
+            return -1
+        return self.FindLine(lambda r: r is row)
+
+    def reselect(self, row):
+        # the selection follows its row when the lines are permuted
+        line = self.GetFirstSelected()
+        while line!=-1:
+            self.SetItemState(line, 0, wx.LIST_STATE_SELECTED)
+            line = self.GetNextSelected(line)
+        line = self.FindRow(row)
+        if line!=-1:
+            self.SetItemState(line, wx.LIST_STATE_SELECTED, wx.LIST_STATE_SELECTED)
+            self.EnsureVisible(line)
+        self.Refresh()
+
+    # --- [ sorting ] -------------------------------------
+
+    def SetSortImages(self, images):
+        # (descending, ascending) images of the column header
+        self.m_sortimages = images
+
+    def SortByColumn(self, col, ascending=None):
+        if ascending==None:
+            if col==self.m_sortcol:
+                ascending = not self.m_sortasc
+            else:
+                ascending = True
+        if self.m_sortimages and self.m_sortcol!=-1 and self.m_sortcol!=col:
+            self.ClearColumnImage(self.m_sortcol)
+        self.m_sortcol = col
+        self.m_sortasc = ascending
+        if self.m_sortimages:
+            self.SetColumnImage(col, self.m_sortimages[int(ascending)])
+        row = self.GetRow(self.GetFirstSelected())
+        self.sortIndex()
+        self.reselect(row)
+
+    def sortIndex(self):
+        col = self.m_sortcol
+        if col==-1:
+            return
+        rows = self.m_rows
+        if hasattr(self.m_owner, 'OnGetRowSortValue'):
+            value = self.m_owner.OnGetRowSortValue
+        else:
+            value = self.m_owner.OnGetRowText
+        self.m_index.sort(key=lambda i: value(rows[i], col), reverse=not self.m_sortasc)
+
+    def OnColClick(self, event):
+        self.SortByColumn(event.GetColumn())
+        event.Skip()
+
+    # --- [ wx.LC_VIRTUAL callbacks ] -------------------------------------
+
+    def OnGetItemText(self, line, col):
+        return self.m_owner.OnGetRowText(self.m_rows[self.m_index[line]], col)
+
+    def OnGetItemImage(self, line):
+        if hasattr(self.m_owner, 'OnGetRowImage'):
+            return self.m_owner.OnGetRowImage(self.m_rows[self.m_index[line]])
+        return -1
+
+    def OnGetItemAttr(self, line):
+        if not hasattr(self.m_owner, 'OnGetRowColour'):
+            return None
+        colour = self.m_owner.OnGetRowColour(self.m_rows[self.m_index[line]])
+        if colour==None:
+            return None
+        key = colour.Get()
+        attr = self.m_attrs.get(key)
+        if attr==None:
+            attr = wx.ListItemAttr()
+            attr.SetTextColour(colour)
+            self.m_attrs[key] = attr
+        return attr
+
 # ============================================================================
 # That's all folks !
 # ============================================================================
@@ -55,6 +55,12 @@ from itrade_local import message
 from itrade_quotes import QUOTE_BOTH,QUOTE_CASH,QUOTE_CREDIT
 from itrade_portfolio import *
 
+from itrade_evaluation import getEvaluation
+
+# matplotlib system
+from matplotlib.backends.backend_wxagg import FigureCanvasWxAgg as FigureCanvas
+from matplotlib.figure import Figure
+
 # iTrade wxPython system
 from itrade_wxhtml import wxUrlClickHtmlWindow,EVT_HTML_URL_CLICK
 import itrade_wxres
@@ -96,8 +102,29 @@ class iTradeEvaluationChartPanel(wx.Window):
         self.m_port = port
         self.m_currentItem = -1
 
+        self.m_figure = Figure((6,4), dpi = 96)
+        self.m_canvas = FigureCanvas(self, -1, self.m_figure)
+
+        wx.EVT_SIZE(self, self.OnSize)
+
+    def OnSize(self, event):
+        w,h = self.GetClientSizeTuple()
+        self.m_canvas.SetDimensions(0, 0, w, h)
+
     def refresh(self):
-        pass
+        ev = getEvaluation(self.m_port)
+        first = ev.first()
+        dates = ev.dates(first)
+
+        self.m_figure.clear()
+        ax = self.m_figure.add_subplot(111)
+        ax.plot_date(dates, ev.m_inTotal[first:], '-', color='blue', label=message('money_value'))
+        ax.plot_date(dates, ev.m_inInvest[first:], '-', color='green', label=message('money_initial_investment'))
+        ax.plot_date(dates, ev.m_inCash[first:], '-', color='grey', label=message('money_cash'))
+        ax.grid(True)
+        ax.legend(loc='upper left')
+        self.m_figure.autofmt_xdate()
+        self.m_canvas.draw()
 
 # ============================================================================
 # iTradeComputeChartPanel
@@ -30,6 +30,7 @@
 #
 # History       Rev   Description
 # 2006-01-1x    dgil  Split code from original itrade_wxportfolio.py module
+# 2026-10-19    agent virtual list of operations
 # ============================================================================
 
 # ============================================================================
@@ -65,7 +66,7 @@ from itrade_currency import currency2symbol
 #from itrade_wxdatation import itrade_datePicker
 from itrade_wxselectquote import select_iTradeQuote
 import itrade_wxres
-from itrade_wxmixin import iTrade_wxFrame,iTradeSelectorListCtrl
+from itrade_wxmixin import iTrade_wxFrame,iTradeVirtualListCtrl
 from itrade_wxutil import FontFromSize,iTradeSizedDialog
 
 # ============================================================================
@@ -471,11 +472,10 @@ class iTradeOperationDialog(iTradeSizedDialog):
 # iTradeOperationsListCtrl
 # ============================================================================
 
-class iTradeOperationsListCtrl(wx.ListCtrl, wxl.ListCtrlAutoWidthMixin):
+class iTradeOperationsListCtrl(iTradeVirtualListCtrl):
     def __init__(self, parent, ID, pos=wx.DefaultPosition,
                  size=wx.DefaultSize, style=0):
-        wx.ListCtrl.__init__(self, parent, ID, pos, size, style)
-        wxl.ListCtrlAutoWidthMixin.__init__(self)
+        iTradeVirtualListCtrl.__init__(self, parent, ID, pos, size, style)
 
 # ============================================================================
 # iTradeOperationToolbar
@@ -593,7 +593,7 @@ class iTradeOperationToolbar(wx.ToolBar):
 # iTradeOperationsWindow
 # ============================================================================
 
-class iTradeOperationsWindow(wx.Frame,iTrade_wxFrame,wxl.ColumnSorterMixin):
+class iTradeOperationsWindow(wx.Frame,iTrade_wxFrame):
 
     # window  identifier
     ID_WINDOW_TOP = 300
@@ -667,13 +667,10 @@ class iTradeOperationsWindow(wx.Frame,iTrade_wxFrame,wxl.ColumnSorterMixin):
         self.m_list = iTradeOperationsListCtrl(self, tID,
                                  style = wx.LC_REPORT | wx.SUNKEN_BORDER | wx.LC_SINGLE_SEL | wx.LC_VRULES | wx.LC_HRULES)
         self.m_list.SetImageList(self.m_imagelist, wx.IMAGE_LIST_SMALL)
+        self.m_list.SetSortImages((self.sm_dn, self.sm_up))
 
         self.m_list.SetFont(FontFromSize(itrade_config.operationFontSize))
 
-        # Now that the list exists we can init the other base class,
-        # see wxPython/lib/mixins/listctrl.py
-        wxl.ColumnSorterMixin.__init__(self, IDC_RESERVED)
-
         # Toolbar
         self.m_toolbar = iTradeOperationToolbar(self, wx.NewId())
 
@@ -712,15 +709,90 @@ class iTradeOperationsWindow(wx.Frame,iTrade_wxFrame,wxl.ColumnSorterMixin):
 
         self.populate()
 
-    # --- [ wxl.ColumnSorterMixin management ] -------------------------------------
-
-    # Used by the wxl.ColumnSorterMixin, see wxPython/lib/mixins/listctrl.py
-    def GetListCtrl(self):
-        return self.m_list
-
-    # Used by the wxl.ColumnSorterMixin, see wxPython/lib/mixins/listctrl.py
-    def GetSortImages(self):
-        return (self.sm_dn, self.sm_up)
+    # --- [ iTradeVirtualListCtrl management ] -------------------------------------
+
+    # a row is (op,balance,vsrd,pr,vdebit,vcredit)
+
+    def OnGetRowText(self,row,col):
+        op,balance,vsrd,pr,vdebit,vcredit = row
+        sign = op.sign()
+        if col==IDC_DATE:
+            return op.datetime().strftime('%x %X')
+        elif col==IDC_OPERATION:
+            return op.operation()
+        elif col==IDC_DESCRIPTION:
+            return op.description()
+        elif col==IDC_PRU:
+            return pr
+        elif col==IDC_NUMBER:
+            if op.nv_number()>0:
+                return '%s' % op.sv_number()
+            return ''
+        elif col==IDC_DEBIT:
+            if sign=='-' or sign=='~':
+                return op.sv_value()
+            return ''
+        elif col==IDC_CREDIT:
+            if sign=='+' or sign=='~':
+                return op.sv_value()
+            return ''
+        elif col==IDC_EXPENSES:
+            return op.sv_expenses()
+        elif col==IDC_BALANCE:
+            return '%.2f' % balance
+        elif col==IDC_SRD and self.m_srdcolumn:
+            if op.isSRD():
+                return '%.2f' % vsrd
+            return ''
+        elif col==IDC_SRD or col==IDC_RESERVED:
+            return '%d' % op.ref()
+        return ''
+
+    def OnGetRowSortValue(self,row,col):
+        op,balance,vsrd,pr,vdebit,vcredit = row
+        if col==IDC_DATE:
+            return op.datetime()
+        elif col==IDC_OPERATION:
+            return op.operation()
+        elif col==IDC_DESCRIPTION:
+            return op.description()
+        elif col==IDC_PRU:
+            if pr:
+                return float(pr)
+            return 0.0
+        elif col==IDC_NUMBER:
+            return op.nv_number()
+        elif col==IDC_DEBIT:
+            return vdebit
+        elif col==IDC_CREDIT:
+            return vcredit
+        elif col==IDC_EXPENSES:
+            return op.nv_expenses()
+        elif col==IDC_BALANCE:
+            return balance
+        elif col==IDC_SRD and self.m_srdcolumn:
+            return vsrd
+        return op.ref()
+
+    def OnGetRowImage(self,row):
+        sign = row[0].sign()
+        if sign=='+':
+            return self.idx_plus
+        elif sign=='-':
+            return self.idx_minus
+        elif sign==' ' or sign=='~':
+            return self.idx_neutral
+        return self.idx_unknown
+
+    def OnGetRowColour(self,row):
+        sign = row[0].sign()
+        if sign == '+':
+            return wx.BLACK
+        elif sign == '-':
+            return wx.BLUE
+        elif sign == ' ':
+            return wx.BLACK
+        return wx.RED
 
     # --- [ Text font size management ] -------------------------------------
 
@@ -788,26 +860,49 @@ class iTradeOperationsWindow(wx.Frame,iTrade_wxFrame,wxl.ColumnSorterMixin):
 
         return False
 
-    def filterPeriod(self,op):
+    def filterPeriod(self):
+        # returns the [dmin,dmax) range of dates to display
+        today = datetime.date.today()
         if self.m_period == PERIOD_ALLYEARS:
-            return True
+            return None,None
         elif self.m_period == PERIOD_CURRENTYEAR:
             # year should be the current one
-            return op.date().year==datetime.date.today().year
+            return datetime.date(today.year,1,1),datetime.date(today.year+1,1,1)
         elif self.m_period == PERIOD_90DAYS:
             # last 90 days
-            return (datetime.date.today() - op.date()) <= timedelta(90)
+            return today - timedelta(90),None
         elif self.m_period == PERIOD_30DAYS:
             # last 30 days
-            return (datetime.date.today() - op.date()) <= timedelta(30)
-        return False
+            return today - timedelta(30),None
+        return today,today
+
+    def filterBalance(self,op,balance,srd):
+        sign = op.sign()
+        if sign=='+':
+            if op.isSRD():
+                if op.type()==OPERATION_LIQUIDATION:
+                    balance = balance + op.nv_value()
+                    srd = srd + ( op.nv_value() + op.nv_expenses() )
+                else:
+                    srd = srd + op.nv_value()
+            else:
+                if self.m_mode == DISP_PVAL:
+                    balance = balance + op.nv_pvalue()
+                else:
+                    balance = balance + op.nv_value()
+        elif sign=='-':
+            if op.isSRD():
+                srd = srd - op.nv_value()
+            else:
+                balance = balance - op.nv_value()
+        return balance,srd
 
     # --- [ list population ] -------------------------------------
 
     def populate(self):
+        self.m_list.SetRows([])
         self.m_list.ClearAll()
-        self.itemDataMap = {}
-        self.itemOpMap = {}
+        self.m_srdcolumn = self.filterSRDcolumn()
 
         # set column headers
         self.m_list.InsertColumn(IDC_DATE, message('portfolio_list_date'), wx.LIST_FORMAT_LEFT)
@@ -819,7 +914,7 @@ class iTradeOperationsWindow(wx.Frame,iTrade_wxFrame,wxl.ColumnSorterMixin):
         self.m_list.InsertColumn(IDC_CREDIT,message('portfolio_list_credit'), wx.LIST_FORMAT_RIGHT)
         self.m_list.InsertColumn(IDC_EXPENSES,message('portfolio_list_expense'), wx.LIST_FORMAT_RIGHT)
         self.m_list.InsertColumn(IDC_BALANCE,message('portfolio_list_balance'), wx.LIST_FORMAT_RIGHT)
-        if self.filterSRDcolumn():
+        if self.m_srdcolumn:
             self.m_list.InsertColumn(IDC_SRD,message('portfolio_list_srd'), wx.LIST_FORMAT_RIGHT)
         self.m_list.InsertColumn(IDC_RESERVED, '', wx.LIST_FORMAT_LEFT)
 
@@ -828,119 +923,59 @@ class iTradeOperationsWindow(wx.Frame,iTrade_wxFrame,wxl.ColumnSorterMixin):
         for col in range(self.m_list.GetColumnCount() - 1):
             self.m_list.SetColumnWidth(col, wx.LIST_AUTOSIZE_USEHEADER)
             self.m_hdrcolwidths.append(self.m_list.GetColumnWidth(col))
-        # populate the list
-        x = 0
+        # populate the rows : the cells are computed by OnGetRowText() for
+        # the displayed lines only
+        rows = []
         balance = 0
         srd = 0
-        for eachOp in self.m_port.operations().list():
+        ops = self.m_port.operations()
+        dmin,dmax = self.filterPeriod()
+
+        # balances before the period are cumulated but not displayed
+        if dmin:
+            for eachOp in ops.range(dmax=dmin):
+                if self.filterDisplay(eachOp):
+                    balance,srd = self.filterBalance(eachOp,balance,srd)
+
+        for eachOp in ops.range(dmin,dmax):
             if self.filterDisplay(eachOp):
                 #print 'populate:',eachOp
                 sign = eachOp.sign()
+                balance,srd = self.filterBalance(eachOp,balance,srd)
 
                 if sign=='+':
-                    if eachOp.isSRD():
-                        if eachOp.type()==OPERATION_LIQUIDATION:
-                            balance = balance + eachOp.nv_value()
-                            srd = srd + ( eachOp.nv_value() + eachOp.nv_expenses() )
-                        else:
-                            srd = srd + eachOp.nv_value()
-                    else:
-                        if self.m_mode == DISP_PVAL:
-                            balance = balance + eachOp.nv_pvalue()
-                        else:
-                            balance = balance + eachOp.nv_value()
+                    vdebit = 0.0
+                    vcredit = eachOp.nv_value()
                 elif sign=='-':
-                    if eachOp.isSRD():
-                        srd = srd - eachOp.nv_value()
-                    else:
-                        balance = balance - eachOp.nv_value()
-
-                # do we really need to display this op ?
-                if self.filterPeriod(eachOp):
-                    if sign=='+':
-                        idx = self.idx_plus
-                    elif sign=='-':
-                        idx = self.idx_minus
-                    elif sign==' ' or sign=='~':
-                        idx = self.idx_neutral
-                    else:
-                        idx = self.idx_unknown
-                    sdate = eachOp.datetime().strftime('%x %X')
-                    self.m_list.InsertImageStringItem(x, sdate, idx)
-                    self.m_list.SetStringItem(x,IDC_OPERATION,eachOp.operation())
-                    if eachOp.nv_number()>0:
-                        self.m_list.SetStringItem(x,IDC_NUMBER,'%s' % eachOp.sv_number())
-                    else:
-                        self.m_list.SetStringItem(x,IDC_NUMBER,'')
-                    if sign=='+':
-                        self.m_list.SetStringItem(x,IDC_CREDIT,eachOp.sv_value())
-                        vdebit = 0.0
-                        vcredit = eachOp.nv_value()
-                    elif sign=='-':
-                        self.m_list.SetStringItem(x,IDC_DEBIT,eachOp.sv_value())
-                        vcredit = 0.0
-                        vdebit = eachOp.nv_value()
-                    elif sign=='~':
-                        self.m_list.SetStringItem(x,IDC_CREDIT,eachOp.sv_value())
-                        vcredit = eachOp.nv_value()
-                        self.m_list.SetStringItem(x,IDC_DEBIT,eachOp.sv_value())
-                        vdebit = eachOp.nv_value()
-                    else:
-                        vcredit = 0.0
-                        vdebit = 0.0
-                    self.m_list.SetStringItem(x,IDC_EXPENSES,eachOp.sv_expenses())
-                    self.m_list.SetStringItem(x,IDC_DESCRIPTION,eachOp.description())
-                    self.m_list.SetStringItem(x,IDC_BALANCE,'%.2f' % balance)
-
-                    if self.filterSRDcolumn():
-                        if eachOp.isSRD():
-                            self.m_list.SetStringItem(x,IDC_SRD,'%.2f' % srd)
-                            vsrd = srd
-                        else:
-                            self.m_list.SetStringItem(x,IDC_SRD,'')
-                            vsrd = 0.0
-                        self.m_list.SetStringItem(x,IDC_RESERVED,'%d' % eachOp.ref())
-                    else:
-                        vsrd = 0.0
-                        self.m_list.SetStringItem(x,IDC_SRD,'%d' % eachOp.ref())
-                        
-                    try:
-                        pr = str( '%.2f'%((vcredit + vdebit)/eachOp.nv_number()))
-                        if pr == '0.00' : pr =''
-                    except ZeroDivisionError:
-                        pr = ''
-                    self.m_list.SetStringItem(x,IDC_PRU,pr)
-                    
-                    self.itemDataMap[x] = (eachOp.date().strftime('%Y%m%d'),eachOp.operation(),eachOp.description(),eachOp.nv_number(),pr,vdebit,vcredit,eachOp.nv_expenses(),balance,vsrd)
-                    self.itemOpMap[x] = eachOp.ref()
-
-                    item = self.m_list.GetItem(x)
-                    if sign == '+':
-                        item.SetTextColour(wx.BLACK)
-                    elif sign == '-':
-                        item.SetTextColour(wx.BLUE)
-                    elif sign == ' ':
-                        item.SetTextColour(wx.BLACK)
-                    else:
-                        item.SetTextColour(wx.RED)
-                    self.m_list.SetItem(item)
-
-                    # one more item !
-                    #self.m_op[x] = eachOp
-
-                    x = x + 1
-
-        # fix the item data
-        items = self.itemDataMap.items()
-        for x in range(len(items)):
-            key, data = items[x]
-            self.m_list.SetItemData(x, key)
+                    vcredit = 0.0
+                    vdebit = eachOp.nv_value()
+                elif sign=='~':
+                    vcredit = eachOp.nv_value()
+                    vdebit = eachOp.nv_value()
+                else:
+                    vcredit = 0.0
+                    vdebit = 0.0
+
+                if self.m_srdcolumn and eachOp.isSRD():
+                    vsrd = srd
+                else:
+                    vsrd = 0.0
+
+                try:
+                    pr = str( '%.2f'%((vcredit + vdebit)/eachOp.nv_number()))
+                    if pr == '0.00' : pr =''
+                except ZeroDivisionError:
+                    pr = ''
+
+                rows.append((eachOp,balance,vsrd,pr,vdebit,vcredit))
+
+        self.m_list.SetRows(rows)
 
         # adjust size of columns
         self.adjustColumns()
 
         # default selection
-        if len(items)>0:
+        if len(rows)>0:
             self.m_currentItem = 0
             self.m_list.SetItemState(0, wx.LIST_STATE_SELECTED, wx.LIST_STATE_SELECTED)
             self.m_list.EnsureVisible(self.m_currentItem)
@@ -1061,8 +1096,7 @@ class iTradeOperationsWindow(wx.Frame,iTrade_wxFrame,wxl.ColumnSorterMixin):
         event.Skip(False)
 
     def getColumnText(self, index, col):
-        item = self.m_list.GetItem(index, col)
-        return item.GetText()
+        return self.m_list.OnGetItemText(index, col)
 
     # --- [ popup menu ] ------------------------------------------------------
 
@@ -1128,9 +1162,8 @@ class iTradeOperationsWindow(wx.Frame,iTrade_wxFrame,wxl.ColumnSorterMixin):
         menu.Destroy()
 
     def OnModify(self, event):
-        key = self.m_list.GetItemData(self.m_currentItem)
-        ind = self.itemOpMap[key]
-        info("OnModify currentItem=%d key=%d ind=%d",self.m_currentItem,key,ind)
+        ind = self.m_list.GetRow(self.m_currentItem)[0].ref()
+        info("OnModify currentItem=%d ind=%d",self.m_currentItem,ind)
 
         aRet = edit_iTradeOperation(self,self.m_port.getOperation(ind),OPERATION_MODIFY,currency=self.m_port.currency())
         if aRet:
@@ -1140,9 +1173,8 @@ class iTradeOperationsWindow(wx.Frame,iTrade_wxFrame,wxl.ColumnSorterMixin):
             self.RebuildList()
 
     def OnDelete(self, event):
-        key = self.m_list.GetItemData(self.m_currentItem)
-        ind = self.itemOpMap[key]
-        info("OnDelete currentItem=%d key=%d ind=%d",self.m_currentItem,key,ind)
+        ind = self.m_list.GetRow(self.m_currentItem)[0].ref()
+        info("OnDelete currentItem=%d ind=%d",self.m_currentItem,ind)
 
         aRet = edit_iTradeOperation(self,self.m_port.getOperation(ind),OPERATION_DELETE,currency=self.m_port.currency())
         if aRet:
@@ -29,6 +29,9 @@
 #
 # History       Rev   Description
 # 2006-01-2x    dgil  Wrote it from itrade_wxmain.py module
+# 2026-10-19    agent quotes refreshed in background (itrade_jobs)
+# 2026-10-19    agent live updates repainted by frame (row index, dirty quotes)
+# 2026-10-19    agent last bars of the startup summary displayed at once
 # ============================================================================
 
 # ============================================================================
@@ -49,6 +52,7 @@ import wx.lib.mixins.listctrl as wxl
 
 # iTrade system
 from itrade_logging import *
+from itrade_profile import timed
 from itrade_local import message
 from itrade_matrix import *
 from itrade_quotes import *
@@ -58,7 +62,7 @@ from itrade_currency import currencies
 from itrade_wxquote import open_iTradeQuote
 from itrade_wxpropquote import open_iTradeQuoteProperty
 from itrade_wxutil import FontFromSize
-from itrade_wxlive import iTrade_wxLiveMixin,EVT_UPDATE_LIVE
+from itrade_wxlive import iTrade_wxLiveMixin,EVT_UPDATE_LIVE,iTrade_wxRefreshMixin,EVT_REFRESH_DONE
 
 # ============================================================================
 # column number
@@ -132,11 +136,12 @@ class iTradeMatrixListCtrl(wx.ListCtrl, wxl.ListCtrlAutoWidthMixin):
 # Root of - basic mechanism
 # ============================================================================
 
-class iTrade_MatrixPanel(wx.Panel,wxl.ColumnSorterMixin,iTrade_wxLiveMixin):
+class iTrade_MatrixPanel(wx.Panel,wxl.ColumnSorterMixin,iTrade_wxLiveMixin,iTrade_wxRefreshMixin):
 
     def __init__(self,parent,wm,id,portfolio,matrix):
         wx.Panel.__init__(self, parent, id)
         iTrade_wxLiveMixin.__init__(self)
+        iTrade_wxRefreshMixin.__init__(self)
 
         self.m_parent = wm
         self.m_portfolio = portfolio
@@ -146,6 +151,12 @@ class iTrade_MatrixPanel(wx.Panel,wxl.ColumnSorterMixin,iTrade_wxLiveMixin):
 
         self.m_mustInit = True
 
+        # live : lines of each quote key (None : to be rebuilt), quotes to be
+        # repainted by the next frame
+        self.m_rowIndex = None
+        self.m_dirty = {}
+        self.m_liveTimer = wx.Timer(self)
+
         # create an image list
         self.m_imagelist = wx.ImageList(16,16)
 
@@ -171,6 +182,7 @@ class iTrade_MatrixPanel(wx.Panel,wxl.ColumnSorterMixin,iTrade_wxLiveMixin):
         wx.EVT_RIGHT_UP(self.m_list, self.OnRightClick)
         wx.EVT_RIGHT_DOWN(self.m_list, self.OnRightDown)
         wx.EVT_LEFT_DOWN(self.m_list, self.OnLeftDown)
+        wx.EVT_SCROLLWIN(self.m_list, self.OnScroll)
 
         self.m_list.SetImageList(self.m_imagelist, wx.IMAGE_LIST_SMALL)
         self.m_list.SetFont(FontFromSize(itrade_config.matrixFontSize))
@@ -187,10 +199,13 @@ class iTrade_MatrixPanel(wx.Panel,wxl.ColumnSorterMixin,iTrade_wxLiveMixin):
         wx.EVT_LIST_COL_CLICK(self,tID,self.OnColClick)
 
         EVT_UPDATE_LIVE(self, self.OnLive)
+        EVT_REFRESH_DONE(self, self.OnRefreshDone)
+        wx.EVT_TIMER(self, self.m_liveTimer.GetId(), self.OnLiveTimer)
 
     # --- [ window management ] -------------------------------------
 
     def OnColClick(self,evt):
+        self.m_rowIndex = None
         self.SaveSortColumn()
 
     def OnEraseBackground(self, evt):
@@ -202,9 +217,17 @@ class iTrade_MatrixPanel(wx.Panel,wxl.ColumnSorterMixin,iTrade_wxLiveMixin):
         #event.Skip(False)
 
     def OnCloseWindow(self, evt):
+        self.m_liveTimer.Stop()
+        self.cancelRefresh()
         self.stopLive(bBusy=False)
         self.SaveSortColumn()
 
+    def OnScroll(self, evt):
+        # rows scrolled into view are refreshed first
+        if self.isRefreshing():
+            self.prioritizeRefresh(self.visibleQuotes())
+        evt.Skip()
+
     # --- [ wxl.ColumnSorterMixin management ] -------------------------------------
 
     # Used by the wxl.ColumnSorterMixin, see wxPython/lib/mixins/listctrl.py
@@ -248,6 +271,7 @@ class iTrade_MatrixPanel(wx.Panel,wxl.ColumnSorterMixin,iTrade_wxLiveMixin):
             if itrade_config.verbose:
                 print 'Sorting',self.name(),'- column:',self.m_sort_colnum,'ascending:',self.m_sort_colasc
             self.SortListItems(self.m_sort_colnum,ascending=self.m_sort_colasc)
+            self.m_rowIndex = None
 
     def needDynamicSortColumn(self):
         if self.m_sort_colnum<IDC_PRU:
@@ -256,6 +280,16 @@ class iTrade_MatrixPanel(wx.Panel,wxl.ColumnSorterMixin,iTrade_wxLiveMixin):
             return False
         return True
 
+    def rowsOf(self,quote):
+        # lines of a quote (cash and credit lines in the portfolio view)
+        if self.m_rowIndex==None:
+            self.m_rowIndex = {}
+            for xline in range(0,self.m_maxlines):
+                q = self.itemQuoteMap[self.m_list.GetItemData(xline)]
+                if q:
+                    self.m_rowIndex.setdefault(q.key(),[]).append(xline)
+        return self.m_rowIndex.get(quote.key(),())
+
     def getQuoteAndItemOnTheLine(self,x):
         key = self.m_list.GetItemData(x)
         #print 'line:%d -> key=%d quote=%s' % (x,key,self.itemQuoteMap[key].ticker())
@@ -376,13 +410,20 @@ class iTrade_MatrixPanel(wx.Panel,wxl.ColumnSorterMixin,iTrade_wxLiveMixin):
         #debug('populate duringinit=%d' % bDuringInit)
 
         # clear current population
+        self.cancelRefresh()
         self.stopLive(bBusy=False)
         self.unregisterLive()
+        self.m_liveTimer.Stop()
+        self.m_dirty = {}
+        self.m_rowIndex = None
         self.m_list.ClearAll()
 
         # start a new population
         self.populateList()
 
+        # last bars already known (i.e. startup summary) displayed at once
+        self.refreshKnownLines()
+
         # start Index management
         self.registerIndice()
 
@@ -451,27 +492,8 @@ class iTrade_MatrixPanel(wx.Panel,wxl.ColumnSorterMixin,iTrade_wxLiveMixin):
 
     # refresh currencies
     def refreshCurrencies(self):
-        x = 0
-        lst = currencies.m_currencies
-        max = len(lst)
-        keepGoing = True
-        if self.m_parent.hasFocus():
-            dlg = wx.ProgressDialog(message('currency_refreshing'),"",max,self,wx.PD_CAN_ABORT | wx.PD_APP_MODAL)
-        else:
-            dlg = None
-        for eachKey in lst:
-            if keepGoing:
-                curTo = eachKey[:3]
-                curFrom = eachKey[3:]
-                if currencies.used(curTo,curFrom):
-                    if dlg:
-                        keepGoing = dlg.Update(x,"%s -> %s" % (curFrom,curTo))
-                    currencies.get(curTo,curFrom)
-                    x = x + 1
-
-        currencies.save()
-        if dlg:
-            dlg.Destroy()
+        # one batched request for all the currencies in use
+        currencies.getlasttrade()
 
     # --- [ manage current page ] -------------------------------------
 
@@ -501,33 +523,135 @@ class iTrade_MatrixPanel(wx.Panel,wxl.ColumnSorterMixin,iTrade_wxLiveMixin):
 
     # --- [ refresh lists ] -------------------------------------
 
+    @timed('MatrixPanel.OnLive')
     def OnLive(self, evt):
         # be sure this quote is still under population
         if self.isRunning(evt.quote):
-            idview = evt.param
-            for xline in range(0,self.m_maxlines):
-                if self.itemQuoteMap[xline] == evt.quote:
-                    #print 'live %d %d %d VS %d' % (xline,idview,xtype,self.m_id)
-                    if idview == self.m_id:
-                        #debug('%s: %s' % (evt.quote.key(),evt.param))
-                        ref = self.OnLiveQuote(evt.quote,xline)
-                        if ref and self.needDynamicSortColumn(): self.SortColumn()
-                    else:
-                        if itrade_config.verbose:
-                            print 'pane::OnLive %s: %s - bad : other view' % (evt.quote.key(),evt.param)
-                        pass
-            self.m_parent.refreshConnexion()
+            if evt.param == self.m_id:
+                # repainted by the next frame (see OnLiveTimer)
+                self.m_dirty[evt.quote.key()] = evt.quote
+                if not self.m_liveTimer.IsRunning():
+                    self.m_liveTimer.Start(int(1000/itrade_config.matrixFrameRate),wx.TIMER_ONE_SHOT)
+            else:
+                if itrade_config.verbose:
+                    print 'pane::OnLive %s: %s - bad : other view' % (evt.quote.key(),evt.param)
+                pass
         else:
             if itrade_config.verbose:
                 print 'pane::OnLive %s: %s - bad : not running' % (evt.quote.key(),evt.param)
             pass
 
-    # refresh list
+    # one frame : the quotes updated since the previous frame are repainted
+    # together, the list is sorted again only if the sorted column changed
+    @timed('MatrixPanel.OnLiveTimer')
+    def OnLiveTimer(self, evt):
+        dirty = self.m_dirty
+        self.m_dirty = {}
+        if not dirty:
+            return
+
+        col = self.m_sort_colnum
+        bSort = False
+        self.m_list.Freeze()
+        try:
+            for eachQuote in dirty.values():
+                for xline in self.rowsOf(eachQuote):
+                    key = self.m_list.GetItemData(xline)
+                    old = self.itemDataMap[key]
+                    self.OnLiveQuote(eachQuote,xline)
+                    if 0<=col<len(old) and self.itemDataMap[key][col]!=old[col]:
+                        bSort = True
+        finally:
+            self.m_list.Thaw()
+
+        if bSort and self.needDynamicSortColumn():
+            self.SortColumn()
+        self.m_parent.refreshConnexion()
+
+    # refresh list (in background : see OnRefreshDone)
+    @timed('MatrixPanel.OnRefresh')
     def OnRefresh(self,e):
+        self.cancelRefresh()
         if self.m_portfolio.is_multicurrencies():
-            self.refreshCurrencies()
+            self.submitRefresh(None,self.refreshCurrencies,priority=0,group='currencies')
         self.refreshList()
 
+    def visibleQuotes(self):
+        top = self.m_list.GetTopItem()
+        bottom = min(top + self.m_list.GetCountPerPage() + 1,self.m_maxlines)
+        lst = []
+        for xline in range(top,bottom):
+            quote = self.itemQuoteMap[self.m_list.GetItemData(xline)]
+            if quote:
+                lst.append(quote)
+        return lst
+
+    def refreshKnownLines(self):
+        lines = []
+        for xline in range(0,self.m_maxlines):
+            quote = self.itemQuoteMap[self.m_list.GetItemData(xline)]
+            if quote and quote.history():
+                lines.append(xline)
+        if lines:
+            self.m_list.Freeze()
+            try:
+                for xline in lines:
+                    self.refreshLine(xline)
+            finally:
+                self.m_list.Thaw()
+            if self.needDynamicSortColumn():
+                self.SortColumn()
+            self.refreshListDone()
+
+    # refresh all the quotes of the list
+    def refreshList(self):
+        quotes = []
+        keys = {}
+        for xline in range(0,self.m_maxlines):
+            quote = self.itemQuoteMap[self.m_list.GetItemData(xline)]
+            if quote and not keys.has_key(quote.key()):
+                keys[quote.key()] = True
+                quotes.append(quote)
+        self.refreshQuotes(quotes,self.visibleQuotes())
+
+    # the quotes updated by the background jobs are repainted in one batch
+    @timed('MatrixPanel.OnRefreshDone')
+    def OnRefreshDone(self,evt):
+        quotes = {}
+        bAll = False
+        for eachQuote in self.takeRefreshDone():
+            if eachQuote:
+                quotes[eachQuote.key()] = eachQuote
+            else:
+                # currencies : every line can change
+                bAll = True
+
+        if bAll:
+            lines = range(0,self.m_maxlines)
+        else:
+            lines = []
+            for eachQuote in quotes.values():
+                lines.extend(self.rowsOf(eachQuote))
+
+        if lines:
+            bSort = False
+            self.m_list.Freeze()
+            try:
+                for xline in lines:
+                    if self.refreshLine(xline):
+                        bSort = True
+            finally:
+                self.m_list.Thaw()
+            if bSort and self.needDynamicSortColumn():
+                self.SortColumn()
+
+        if not self.isRefreshing():
+            self.refreshListDone()
+
+    def refreshListDone(self):
+        # all the quotes of the list have been refreshed
+        pass
+
     def updateQuoteItems(self):
         op1 = (self.m_currentItem>=0) and (self.m_currentItem<self.m_maxlines)
         if op1:
@@ -706,24 +830,11 @@ class iTrade_MatrixPortfolioPanel(iTrade_MatrixPanel):
 
         return bRef
 
-    # refresh all the portfolio
-    def refreshList(self):
-        keepGoing = True
-        if self.m_parent.hasFocus():
-            dlg = wx.ProgressDialog(message('main_refreshing'),"",self.m_maxlines,self,wx.PD_CAN_ABORT | wx.PD_APP_MODAL)
-        else:
-            dlg = None
-
-        for xline in range(0,self.m_maxlines):
-            if keepGoing:
-                key = self.m_list.GetItemData(xline)
-                quote = self.itemQuoteMap[key]
-                if quote:
-                    if dlg:
-                        keepGoing = dlg.Update(xline,quote.name())
-                    quote.update()
-                    self.refreshPortfolioLine(xline,True)
+    def refreshLine(self,xline):
+        return self.refreshPortfolioLine(xline,True)
 
+    # all the portfolio has been refreshed : evaluation
+    def refreshListDone(self):
         self.m_portfolio.computeOperations()
         if self.m_sort_colasc:
             key = self.m_maxlines-1
@@ -731,9 +842,6 @@ class iTrade_MatrixPortfolioPanel(iTrade_MatrixPanel):
             key = 0
         self.refreshEvalLine(key)
 
-        if dlg:
-            dlg.Destroy()
-
     def OnLiveQuote(self,quote,xline):
         return self.refreshPortfolioLine(xline,True)
 
@@ -891,25 +999,8 @@ class iTrade_MatrixQuotesPanel(iTrade_MatrixPanel):
 
         return bRef
 
-    # refresh all quotes
-    def refreshList(self):
-        keepGoing = True
-        if self.m_parent.hasFocus():
-            dlg = wx.ProgressDialog(message('main_refreshing'),"",self.m_maxlines,self,wx.PD_CAN_ABORT | wx.PD_APP_MODAL)
-        else:
-            dlg = None
-
-        for xline in range(0,self.m_maxlines):
-            if keepGoing:
-                key = self.m_list.GetItemData(xline)
-                quote = self.itemQuoteMap[key]
-                if dlg:
-                    keepGoing = dlg.Update(xline,quote.name())
-                quote.update()
-                self.refreshQuoteLine(xline,True)
-
-        if dlg:
-            dlg.Destroy()
+    def refreshLine(self,xline):
+        return self.refreshQuoteLine(xline,True)
 
     def OnLiveQuote(self, quote, xline):
         return self.refreshQuoteLine(xline,True)
@@ -1094,25 +1185,8 @@ class iTrade_MatrixStopsPanel(iTrade_MatrixPanel):
         self.m_list.SetItem(item)
         return bRef
 
-    # refresh all the stop
-    def refreshList(self):
-        keepGoing = True
-        if self.m_parent.hasFocus():
-            dlg = wx.ProgressDialog(message('main_refreshing'),"",self.m_maxlines,self,wx.PD_CAN_ABORT | wx.PD_APP_MODAL)
-        else:
-            dlg = None
-
-        for xline in range(0,self.m_maxlines):
-            if keepGoing:
-                key = self.m_list.GetItemData(xline)
-                quote = self.itemQuoteMap[key]
-                if dlg:
-                    keepGoing = dlg.Update(xline,quote.name())
-                quote.update()
-                self.refreshStopLine(xline,True)
-
-        if dlg:
-            dlg.Destroy()
+    def refreshLine(self,xline):
+        return self.refreshStopLine(xline,True)
 
     def OnLiveQuote(self,quote,xline):
         return self.refreshStopLine(xline,True)
@@ -1297,25 +1371,13 @@ class iTrade_MatrixIndicatorsPanel(iTrade_MatrixPanel):
 
         return bRef
 
-    # refresh all indicators
-    def refreshList(self):
-        keepGoing = True
-        if self.m_parent.hasFocus():
-            dlg = wx.ProgressDialog(message('main_refreshing'),"",self.m_maxlines,self,wx.PD_CAN_ABORT | wx.PD_APP_MODAL)
-        else:
-            dlg = None
+    # indicators computed by the background job too
+    def refreshQuoteJob(self,quote):
+        quote.update()
+        quote.compute()
 
-        for xline in range(0,self.m_maxlines):
-            if keepGoing:
-                key = self.m_list.GetItemData(xline)
-                quote = self.itemQuoteMap[key]
-                if dlg:
-                    keepGoing = dlg.Update(xline,quote.name())
-                quote.update()
-                self.refreshIndicatorLine(xline,True)
-
-        if dlg:
-            dlg.Destroy()
+    def refreshLine(self,xline):
+        return self.refreshIndicatorLine(xline,True)
 
     def OnLiveQuote(self, quote, xline):
         quote.compute()
@@ -46,6 +46,7 @@ import locale
 
 # iTrade system
 from itrade_logging import *
+from itrade_profile import timed
 from itrade_quotes import *
 from itrade_local import message,setLocale
 from itrade_config import *
@@ -64,7 +65,10 @@ except:
 # matplotlib system
 import matplotlib
 
-from matplotlib.dates import date2num, num2date
+from matplotlib.dates import date2num, num2date, DateFormatter
+from matplotlib.ticker import FuncFormatter
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_wxagg import FigureCanvasWxAgg as FigureCanvas
 from myfinance import candlestick, plot_day_summary2, candlestick2, volume_overlay, plot_day_summary3
 #from myfinance import index_bar
 
@@ -77,6 +81,7 @@ from itrade_wxselectquote import select_iTradeQuote
 from itrade_wxpropquote import iTradeQuotePropertiesPanel
 from itrade_wxdecision import iTrade_wxDecision
 from itrade_market import yahoosuffix
+from itrade_ticks import gTicks
 # ============================================================================
 # iTradeQuoteToolbar
 #
@@ -310,7 +315,7 @@ class iTradeQuoteInfoWindow(sc.SizedPanel):
         self.wxLow_threshold.SetLabel("%.2f" % self.m_quote.low_threshold())
 
     def refresh(self,nquote=None,live=False):
-        debug('QuoteInfoWindow::refresh %s' % self.m_quote.ticker())
+        debug('QuoteInfoWindow::refresh %s',self.m_quote.ticker())
 
         # update the logo if needed
         fit = False
@@ -774,6 +779,7 @@ class iTradeQuoteGraphPanel(wx.Panel,iTrade_wxPanelGraph):
     def getTextPeriod(self):
         return '%s %s %s' % (message('graph_period'),self.getPeriod(),message('graph_days'))
 
+    @timed('Graph.ChartRealize')
     def ChartRealize(self):
         # special case __x
         if self.m_quote.m_daytrades == None: return
@@ -790,31 +796,8 @@ class iTradeQuoteGraphPanel(wx.Panel,iTrade_wxPanelGraph):
         if begin<min:
             begin = min
 
-        self.times = []
-        self.idx = []
-        num = 0
-
-        for i in range(begin,end):
-            if self.m_quote.m_daytrades.has_trade(i): num = num + 1
-            dt = gCal.date(i)
-            if dt:
-                d = date2num(dt)
-                self.times.append(d)
-                self.idx.append(i)
-                if self.m_dispRSI14:
-                    self.m_quote.m_daytrades.rsi14(i)
-                if self.m_dispSto:
-                    self.m_quote.m_daytrades.stoK(i)
-                    self.m_quote.m_daytrades.stoD(i)
-                self.m_quote.m_daytrades.ma(20,i)
-                self.m_quote.m_daytrades.ma(50,i)
-                self.m_quote.m_daytrades.ma(100,i)
-                if self.m_dispMA150:
-                    self.m_quote.m_daytrades.ma(150,i)
-                self.m_quote.m_daytrades.vma(15,i)
-                self.m_quote.m_daytrades.ovb(i)
-                if self.m_dispBollinger:
-                    self.m_quote.m_daytrades.bollinger(i,0)
+        self.idx,dates,num = self.m_quote.m_daytrades.prepareChart(begin,end,self.m_dispRSI14,self.m_dispSto,self.m_dispMA150,self.m_dispBollinger)
+        self.times = [date2num(dt) for dt in dates]
 
         # self.m_quote.m_daytrades.m_[begin:end]
         # print 'ChartRealize: begin:',begin,' end:',end,' num:',num
@@ -983,6 +966,77 @@ class iTradeQuoteGraphPanel(wx.Panel,iTrade_wxPanelGraph):
 
         return s
 
+# ============================================================================
+# iTradeQuoteIntradayPanel
+#
+#   Candlesticks of the bars recorded by itrade_ticks during the day. The
+#   remote chart (itrade_config.intradayGraphUrl) is displayed when nothing
+#   has been recorded for the quote.
+# ============================================================================
+
+class iTradeQuoteIntradayPanel(wx.Panel):
+    def __init__(self,parent,id,quote,url):
+        wx.Panel.__init__(self, parent, id)
+        self.m_id = id
+        self.m_quote = quote
+        self.m_parent = parent
+        self.m_local = None
+
+        self.m_html = iTradeHtmlPanel(self,wx.NewId(),url)
+        self.m_figure = Figure((6,4), dpi = 96)
+        self.m_canvas = FigureCanvas(self, -1, self.m_figure)
+        self.m_canvas.Show(False)
+
+        wx.EVT_SIZE(self,self.OnSize)
+
+    def OnSize(self, event):
+        w,h = self.GetClientSizeTuple()
+        self.m_html.SetDimensions(0, 0, w, h)
+        self.m_canvas.SetDimensions(0, 0, w, h)
+
+    def paint(self,bars):
+        period = itrade_config.intradayPeriod
+        width = period / 86400.0 * 0.8
+        candles = [(date2num(datetime.fromtimestamp(t)),o,c,h,l,v) for t,o,h,l,c,v in bars]
+
+        self.m_figure.clear()
+        ax = self.m_figure.add_axes([0.08,0.30,0.88,0.62])
+        ax2 = self.m_figure.add_axes([0.08,0.08,0.88,0.18],sharex=ax)
+        candlestick(ax, candles, width=width, colorup='g', colordown='r')
+        ax2.bar([c[0] for c in candles], [c[5] for c in candles], width, color='b')
+
+        ax.set_title('%s (%s)' % (self.m_quote.name(),self.m_quote.ticker()))
+        ax.xaxis_date()
+        ax.xaxis.set_major_formatter(DateFormatter('%H:%M'))
+        for eachLabel in ax.get_xticklabels():
+            eachLabel.set_visible(False)
+        ax2.yaxis.set_major_formatter(FuncFormatter(fmtVolumeFunc0))
+        ax.grid(True)
+        ax2.grid(True)
+        self.m_canvas.draw()
+
+    def refresh(self):
+        bars = gTicks.bars(self.m_quote.key())
+        if bars:
+            if not self.m_local:
+                self.m_local = True
+                self.m_html.Show(False)
+                self.m_canvas.Show(True)
+            self.paint(bars)
+        elif self.m_local!=False:
+            # nothing recorded : remote chart (loaded once)
+            self.m_local = False
+            self.m_canvas.Show(False)
+            self.m_html.Show(True)
+            self.m_html.refresh()
+
+    def InitPage(self):
+        self.m_local = None
+        self.refresh()
+
+    def DonePage(self):
+        pass
+
 # ============================================================================
 # iTradeQuoteNotebookWindow
 #
@@ -1074,7 +1128,7 @@ class iTradeQuoteNotebookWindow(wx.Notebook):
                 # chart not available because no url
                 url = ''
 
-            self.win[self.ID_PAGE_INTRADAY] = iTradeHtmlPanel(self,wx.NewId(), url)
+            self.win[self.ID_PAGE_INTRADAY] = iTradeQuoteIntradayPanel(self,wx.NewId(),self.m_quote,url)
             self.AddPage(self.win[self.ID_PAGE_INTRADAY], message('quote_intraday'))
 
             self.win[self.ID_PAGE_NEWS] = iTradeRSSPanel(self,wx.NewId(),self.m_quote)
@@ -1105,7 +1159,7 @@ class iTradeQuoteNotebookWindow(wx.Notebook):
             self.SetSelection(page)
         else:
             # refresh current page
-            if (self.m_curpage==self.ID_PAGE_LIVE) or (not live):
+            if (self.m_curpage in (self.ID_PAGE_LIVE,self.ID_PAGE_INTRADAY)) or (not live):
                 if itrade_config.verbose:
                     print 'QuoteNotebookWindow::refresh Current Quote %s live=%s page: %s' % (self.m_quote.ticker(),live,self.m_curpage)
                 self.win[self.m_curpage].refresh()
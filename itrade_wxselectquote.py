@@ -30,6 +30,7 @@
 #
 # History       Rev   Description
 # 2005-10-31    dgil  from itrade_wxlistquote.py
+# 2026-10-19    agent virtual list of quotes
 # ============================================================================
 
 # ============================================================================
@@ -53,7 +54,7 @@ from itrade_isin import checkISIN
 from itrade_defs import *
 from itrade_ext import *
 
-from itrade_wxmixin import iTradeSelectorListCtrl
+from itrade_wxmixin import iTradeVirtualListCtrl
 from itrade_wxutil import iTradeSizedDialog
 
 # wxPython system
@@ -80,7 +81,7 @@ IDC_MARKET = 4
 import wx.lib.newevent
 (PostInitEvent,EVT_POSTINIT) = wx.lib.newevent.NewEvent()
 
-class iTradeQuoteSelectorListCtrlDialog(iTradeSizedDialog, wxl.ColumnSorterMixin):
+class iTradeQuoteSelectorListCtrlDialog(iTradeSizedDialog):
     def __init__(self, parent, quote, filter = False, market = None, filterEnabled=True, tradableOnly=False):
 
         iTradeSizedDialog.__init__(self,parent,-1,message('quote_select_title'), size=(460, 460),style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER)
@@ -185,13 +186,17 @@ class iTradeQuoteSelectorListCtrlDialog(iTradeSizedDialog, wxl.ColumnSorterMixin
         self.wxFilterCtrl.Enable(filterEnabled)
 
         # List
-        self.m_list = iTradeSelectorListCtrl(container, tID, style = wx.LC_REPORT | wx.SUNKEN_BORDER,size=(440, 380))
+        self.m_list = iTradeVirtualListCtrl(container, tID, style = wx.LC_REPORT | wx.SUNKEN_BORDER,size=(440, 380), owner=self)
         self.m_list.SetSizerProps(expand=True)
         self.m_list.SetImageList(self.m_imagelist, wx.IMAGE_LIST_SMALL)
+        self.m_list.SetSortImages((self.sm_dn, self.sm_up))
 
-        # Now that the list exists we can init the other base class,
-        # see wxPython/lib/mixins/listctrl.py
-        wxl.ColumnSorterMixin.__init__(self, 5)
+        # but since we want images on the column header we have to do it the hard way:
+        self.m_list.InsertColumn(IDC_ISIN, message('isin'), wx.LIST_FORMAT_LEFT, wx.LIST_AUTOSIZE)
+        self.m_list.InsertColumn(IDC_TICKER, message('ticker'), wx.LIST_FORMAT_LEFT, wx.LIST_AUTOSIZE)
+        self.m_list.InsertColumn(IDC_NAME, message('name'), wx.LIST_FORMAT_LEFT, wx.LIST_AUTOSIZE)
+        self.m_list.InsertColumn(IDC_PLACE, message('place'), wx.LIST_FORMAT_LEFT, wx.LIST_AUTOSIZE)
+        self.m_list.InsertColumn(IDC_MARKET, message('market'), wx.LIST_FORMAT_LEFT, wx.LIST_AUTOSIZE)
 
         wx.EVT_LIST_COL_CLICK(self, tID, self.OnColClick)
         wx.EVT_LIST_ITEM_ACTIVATED(self, tID, self.OnItemActivated)
@@ -284,48 +289,12 @@ class iTradeQuoteSelectorListCtrlDialog(iTradeSizedDialog, wxl.ColumnSorterMixin
     def PopulateList(self,bDuringInit=False):
         wx.SetCursor(wx.HOURGLASS_CURSOR)
 
-        # clear list
-        self.m_list.ClearAll()
         self.currentItem = -1
 
-        # but since we want images on the column header we have to do it the hard way:
-        self.m_list.InsertColumn(IDC_ISIN, message('isin'), wx.LIST_FORMAT_LEFT, wx.LIST_AUTOSIZE)
-        self.m_list.InsertColumn(IDC_TICKER, message('ticker'), wx.LIST_FORMAT_LEFT, wx.LIST_AUTOSIZE)
-        self.m_list.InsertColumn(IDC_NAME, message('name'), wx.LIST_FORMAT_LEFT, wx.LIST_AUTOSIZE)
-        self.m_list.InsertColumn(IDC_PLACE, message('place'), wx.LIST_FORMAT_LEFT, wx.LIST_AUTOSIZE)
-        self.m_list.InsertColumn(IDC_MARKET, message('market'), wx.LIST_FORMAT_LEFT, wx.LIST_AUTOSIZE)
-
-        x = 0
-
-        self.itemDataMap = {}
-        self.itemQuoteMap = {}
-        self.itemLineMap = {}
-
-        for eachQuote in quotes.list():
-            if (not self.m_filter or eachQuote.isMatrix()) and self.isFiltered(eachQuote,bDuringInit):
-                self.itemDataMap[x] = (eachQuote.isin(),eachQuote.ticker(),eachQuote.name(),eachQuote.place(),eachQuote.market())
-                self.itemQuoteMap[x] = eachQuote
-                x = x + 1
-
-        items = self.itemDataMap.items()
-        line = 0
-        curline = -1
-        for x in range(len(items)):
-            key, data = items[x]
-            if data[0]!='':
-                self.m_list.InsertImageStringItem(line, data[0], self.sm_q)
-            else:
-                self.m_list.InsertImageStringItem(line, data[0], self.sm_i)
-            if data[0] == self.m_isin and data[1]== self.m_ticker and data[3] == self.m_place and data[4] == self.m_market:
-                # current selection
-                curline = line
-            self.m_list.SetStringItem(line, IDC_TICKER, data[1])
-            self.m_list.SetStringItem(line, IDC_NAME, data[2])
-            self.m_list.SetStringItem(line, IDC_PLACE, data[3])
-            self.m_list.SetStringItem(line, IDC_MARKET, data[4])
-            self.m_list.SetItemData(line, key)
-            self.itemLineMap[data[1]] = line
-            line += 1
+        # filtering (i.e. on each key of the ticker) only permutes indexes :
+        # the cells are computed by OnGetRowText() for the displayed lines
+        self.m_list.SetRows(quotes.list(), lambda quote: (not self.m_filter or quote.isMatrix()) and self.isFiltered(quote,bDuringInit))
+        curline = self.m_list.FindLine(self.isCurrentQuote)
 
         self.m_list.SetColumnWidth(IDC_ISIN, wx.LIST_AUTOSIZE)
         self.m_list.SetColumnWidth(IDC_TICKER, wx.LIST_AUTOSIZE_USEHEADER)
@@ -347,22 +316,32 @@ class iTradeQuoteSelectorListCtrlDialog(iTradeSizedDialog, wxl.ColumnSorterMixin
             self.m_list.SetItemState(self.currentItem, wx.LIST_STATE_SELECTED, wx.LIST_STATE_SELECTED)
             self.m_list.EnsureVisible(self.currentItem)
 
-    # --- [ wxl.ColumnSorterMixin management ] -------------------------------------
-
-    # Used by the wxl.ColumnSorterMixin, see wxPython/lib/mixins/listctrl.py
-    def GetListCtrl(self):
-        return self.m_list
-
-    # Used by the wxl.ColumnSorterMixin, see wxPython/lib/mixins/listctrl.py
-    def GetSortImages(self):
-        return (self.sm_dn, self.sm_up)
+    # --- [ iTradeVirtualListCtrl management ] -------------------------------------
+
+    def isCurrentQuote(self,quote):
+        return quote.isin()==self.m_isin and quote.ticker()==self.m_ticker and quote.place()==self.m_place and quote.market()==self.m_market
+
+    def OnGetRowText(self,quote,col):
+        if col==IDC_ISIN:
+            return quote.isin()
+        elif col==IDC_TICKER:
+            return quote.ticker()
+        elif col==IDC_NAME:
+            return quote.name()
+        elif col==IDC_PLACE:
+            return quote.place()
+        elif col==IDC_MARKET:
+            return quote.market()
+        return ''
+
+    def OnGetRowImage(self,quote):
+        if quote.isin()!='':
+            return self.sm_q
+        return self.sm_i
 
     def getQuoteOnTheLine(self,x):
         if x>=0:
-            key = self.m_list.GetItemData(x)
-            quote = self.itemQuoteMap[key]
-            #print 'getQuoteOnTheLine(%d) : returns key=%d quote=%s' % (x,key,quote.ticker())
-            return quote
+            return self.m_list.GetRow(x)
         else:
             return None
 
@@ -412,7 +391,7 @@ class iTradeQuoteSelectorListCtrlDialog(iTradeSizedDialog, wxl.ColumnSorterMixin
                 self.m_ticker = quote.ticker()
                 self.m_place = quote.place()
                 v = self.wxTickerCtrl.GetValue()
-                #print 'isin:',isin,' label %s=?=%s' % (v,quote.ticker()), 'line=%d' % self.itemLineMap[quote.ticker()]
+                #print 'isin:',isin,' label %s=?=%s' % (v,quote.ticker())
                 if v!= quote.ticker():
                     self.wxTickerCtrl.SetValue(quote.ticker())
             else: